@@ -6,15 +6,24 @@ Uses Opus 4 to craft personalized follow-up messages
 
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any
+from typing import Any, Optional
 
 from anthropic import Anthropic
 from dotenv import load_dotenv
 from supabase import create_client
 
 
+# Batch pipeline limits
+LLM_CONCURRENCY = 8           # Parallel Opus 4 calls per batch
+LLM_TIMEOUT_SECONDS = 20.0    # Per-call deadline before falling back to a template
+
+# Channel -> key in the generated content dict
+CHANNEL_CONTENT_KEYS = {"email": "email", "sms": "sms", "website_form": "form"}
+
+
 class FollowUpStrategy(Enum):
     """Follow-up strategies based on contractor behavior"""
     GENTLE_REMINDER = "gentle_reminder"      # First follow-up
@@ -113,8 +122,7 @@ class FollowUpAutomation:
                 "contractors": []
             }
 
-            for candidate in candidates:
-                result = self._process_followup(candidate)
+            for result in self._process_followup_batch(candidates):
                 results["contractors"].append(result)
                 results["total_processed"] += 1
 
@@ -138,74 +146,134 @@ class FollowUpAutomation:
             print(f"[FollowUp ERROR] Campaign failed: {e}")
             return {"success": False, "error": str(e)}
 
-    def _process_followup(self, candidate: dict[str, Any]) -> dict[str, Any]:
-        """Process follow-up for a single contractor"""
-        try:
-            contractor_id = candidate["contractor_id"]
-            company_name = candidate["company_name"]
+    def _process_followup_batch(self, candidates: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Process a whole batch of follow-ups with bulk reads and writes
 
-            print(f"\n[FollowUp] Processing: {company_name}")
+        Contractors and bid cards are prefetched with one query each, Opus 4
+        messages are generated concurrently (each call falls back to a
+        template on error or timeout), and sends, logs and distribution
+        updates are written in bulk.
+        """
+        contractors = self._get_contractors_bulk([c["contractor_id"] for c in candidates])
+        bid_cards = self._get_bid_cards_bulk([c["bid_card_id"] for c in candidates])
+
+        # Plan every follow-up before generating any content
+        plans = []
+        results = []
+        for candidate in candidates:
+            contractor = contractors.get(candidate["contractor_id"])
+            bid_card = bid_cards.get(candidate["bid_card_id"])
+            if not contractor or not bid_card:
+                results.append({
+                    "success": False,
+                    "contractor_id": candidate["contractor_id"],
+                    "company_name": candidate.get("company_name"),
+                    "error": "Contractor or bid card not found"
+                })
+                continue
 
-            # Determine follow-up strategy
             strategy = self._determine_strategy(candidate)
-            print(f"  Strategy: {strategy.value}")
-
-            # Get contractor and bid details
-            contractor = self._get_contractor_details(contractor_id)
-            bid_card = self._get_bid_card_details(candidate["bid_card_id"])
-
-            # Generate follow-up content based on strategy
-            if strategy == FollowUpStrategy.PERSONALIZED:
-                # Use Opus 4 for intelligent personalization
-                content = self._generate_opus4_followup(contractor, bid_card, candidate)
+            plans.append({
+                "candidate": candidate,
+                "contractor": contractor,
+                "bid_card": bid_card,
+                "strategy": strategy,
+                "channel": self._determine_channel(candidate, contractor)
+            })
+
+        self._generate_batch_content(plans)
+
+        # Only channels with a usable address can be sent
+        sendable = []
+        for plan in plans:
+            contractor = plan["contractor"]
+            channel = plan["channel"]
+            has_address = (
+                (channel == "email" and contractor.get("primary_email"))
+                or (channel == "sms" and contractor.get("phone"))
+                or (channel == "website_form" and contractor.get("website"))
+            )
+            if has_address:
+                sendable.append(plan)
             else:
-                # Use template-based approach
-                content = self._generate_template_followup(contractor, bid_card, candidate, strategy)
-
-            # Determine channel
-            channel = self._determine_channel(candidate, contractor)
-
-            # Send follow-up
-            success = False
-            if channel == "email" and contractor.get("primary_email"):
-                success = self._send_email_followup(contractor, content["email"])
-            elif channel == "sms" and contractor.get("phone"):
-                success = self._send_sms_followup(contractor, content["sms"])
-            elif channel == "website_form" and contractor.get("website"):
-                success = self._send_form_followup(contractor, content["form"])
-
-            if success:
-                # Record follow-up
-                self.bid_tracker.record_follow_up(candidate["distribution_id"], channel)
-
-                # Log follow-up details
-                self._log_followup(candidate, strategy, channel, content)
-
-                print(f"  ✓ Follow-up sent via {channel}")
+                results.append(self._batch_result(plan, False, "Failed to send"))
+
+        if not sendable:
+            return results
+
+        if not self._send_followups_bulk(sendable):
+            results.extend(self._batch_result(plan, False, "Failed to send") for plan in sendable)
+            return results
+
+        self.bid_tracker.record_follow_ups_bulk([
+            {
+                "distribution_id": plan["candidate"]["distribution_id"],
+                "bid_card_id": plan["candidate"]["bid_card_id"],
+                "contractor_id": plan["candidate"]["contractor_id"],
+                "distribution_method": plan["candidate"].get("last_method"),
+                "follow_up_count": plan["candidate"].get("follow_up_count", 0) + 1,
+                "method": plan["channel"]
+            }
+            for plan in sendable
+        ])
+        self._log_followups_bulk(sendable)
+
+        print(f"[FollowUp] Batch sent {len(sendable)} follow-ups")
+        results.extend(self._batch_result(plan, True) for plan in sendable)
+        return results
+
+    def _batch_result(self, plan: dict[str, Any], success: bool, error: str = "") -> dict[str, Any]:
+        """Build the per-contractor result entry for a batch plan"""
+        result = {
+            "success": success,
+            "contractor_id": plan["candidate"]["contractor_id"],
+            "company_name": plan["candidate"].get("company_name")
+        }
+        if success:
+            result["strategy"] = plan["strategy"].value
+            result["channel"] = plan["channel"]
+        else:
+            result["error"] = error
+        return result
 
-                return {
-                    "success": True,
-                    "contractor_id": contractor_id,
-                    "company_name": company_name,
-                    "strategy": strategy.value,
-                    "channel": channel
-                }
-            else:
-                print("  ✗ Failed to send follow-up")
-                return {
-                    "success": False,
-                    "contractor_id": contractor_id,
-                    "company_name": company_name,
-                    "error": "Failed to send"
-                }
+    def _generate_batch_content(self, plans: list[dict[str, Any]]):
+        """
+        Fill plan["content"], running Opus 4 calls concurrently under a limit
 
-        except Exception as e:
-            print(f"  ✗ Error: {e}")
-            return {
-                "success": False,
-                "contractor_id": candidate["contractor_id"],
-                "error": str(e)
-            }
+        Every call has its own timeout. A plan whose call fails is sent the
+        VALUE_PROPOSITION template and its strategy is updated to match, so
+        logs and results record what was actually sent.
+        """
+        personalized = [p for p in plans if p["strategy"] == FollowUpStrategy.PERSONALIZED]
+
+        for plan in plans:
+            if plan["strategy"] != FollowUpStrategy.PERSONALIZED:
+                plan["content"] = self._generate_template_followup(
+                    plan["contractor"], plan["bid_card"], plan["candidate"], plan["strategy"]
+                )
+
+        if not personalized:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(LLM_CONCURRENCY, len(personalized))) as executor:
+            contents = list(executor.map(
+                lambda p: self._request_opus4_followup(p["contractor"], p["bid_card"], p["candidate"]),
+                personalized
+            ))
+
+        fallbacks = 0
+        for plan, content in zip(personalized, contents, strict=True):
+            if content is None:
+                fallbacks += 1
+                plan["strategy"] = FollowUpStrategy.VALUE_PROPOSITION
+                content = self._generate_template_followup(
+                    plan["contractor"], plan["bid_card"], plan["candidate"], plan["strategy"]
+                )
+            plan["content"] = content
+
+        if fallbacks:
+            print(f"[FollowUp] {fallbacks} Opus 4 follow-ups failed, used templates")
 
     def _determine_strategy(self, candidate: dict[str, Any]) -> FollowUpStrategy:
         """Determine best follow-up strategy based on contractor behavior"""
@@ -234,11 +302,11 @@ class FollowUpAutomation:
             # Final attempt
             return FollowUpStrategy.FINAL_CHANCE
 
-    def _generate_opus4_followup(self,
-                               contractor: dict[str, Any],
-                               bid_card: dict[str, Any],
-                               candidate: dict[str, Any]) -> dict[str, str]:
-        """Use Claude Opus 4 to generate intelligent follow-up"""
+    def _request_opus4_followup(self,
+                                contractor: dict[str, Any],
+                                bid_card: dict[str, Any],
+                                candidate: dict[str, Any]) -> Optional[dict[str, str]]:
+        """Use Claude Opus 4 to generate intelligent follow-up; None if the call fails"""
         try:
             # Prepare context for Opus 4
             prompt = f"""You are crafting a follow-up message to a contractor who hasn't responded to a project opportunity.
@@ -276,7 +344,8 @@ Format as JSON with keys: email, sms, form"""
             response = self.anthropic.messages.create(
                 model="claude-opus-4-20250514",
                 max_tokens=1000,
-                messages=[{"role": "user", "content": prompt}]
+                messages=[{"role": "user", "content": prompt}],
+                timeout=LLM_TIMEOUT_SECONDS
             )
 
             # Parse response
@@ -298,8 +367,7 @@ Format as JSON with keys: email, sms, form"""
 
         except Exception as e:
             print(f"  [Opus 4 ERROR] {e}")
-            # Fallback to template
-            return self._generate_template_followup(contractor, bid_card, candidate, FollowUpStrategy.VALUE_PROPOSITION)
+            return None
 
     def _generate_template_followup(self,
                                   contractor: dict[str, Any],
@@ -405,102 +473,72 @@ Instabids Team""",
 
         return "email"  # Fallback
 
-    def _send_email_followup(self, contractor: dict[str, Any], content: str) -> bool:
-        """Send email follow-up"""
-        try:
-            # TODO: Integrate with email service
-            print(f"    Sending email to: {contractor['primary_email']}")
-
-            # Record attempt
-            self.supabase.table("followup_attempts").insert({
-                "contractor_id": contractor["id"],
-                "method": "email",
-                "content": content,
-                "sent_at": datetime.now().isoformat()
-            }).execute()
-
-            return True
-        except Exception:
-            return False
-
-    def _send_sms_followup(self, contractor: dict[str, Any], content: str) -> bool:
-        """Send SMS follow-up"""
-        try:
-            # TODO: Integrate with Twilio
-            print(f"    Sending SMS to: {contractor['phone']}")
-
-            # Record attempt
-            self.supabase.table("followup_attempts").insert({
-                "contractor_id": contractor["id"],
-                "method": "sms",
-                "content": content,
-                "sent_at": datetime.now().isoformat()
-            }).execute()
-
-            return True
-        except Exception:
-            return False
-
-    def _send_form_followup(self, contractor: dict[str, Any], content: str) -> bool:
-        """Submit follow-up via website form"""
+    def _send_followups_bulk(self, plans: list[dict[str, Any]]) -> bool:
+        """Record all follow-up attempts in a single insert"""
         try:
-            # TODO: Use WFA agent
-            print(f"    Submitting form on: {contractor['website']}")
-
-            # Record attempt
-            self.supabase.table("followup_attempts").insert({
-                "contractor_id": contractor["id"],
-                "method": "website_form",
-                "content": content,
-                "sent_at": datetime.now().isoformat()
-            }).execute()
-
+            # TODO: Integrate with email service, Twilio and WFA agent
+            sent_at = datetime.now().isoformat()
+            attempts = [
+                {
+                    "contractor_id": plan["contractor"]["id"],
+                    "bid_card_id": plan["bid_card"]["id"],
+                    "method": plan["channel"],
+                    "content": plan["content"].get(CHANNEL_CONTENT_KEYS[plan["channel"]], ""),
+                    "sent_at": sent_at
+                }
+                for plan in plans
+            ]
+            self.supabase.table("followup_attempts").insert(attempts).execute()
             return True
-        except Exception:
+        except Exception as e:
+            print(f"[FollowUp ERROR] Bulk send failed: {e}")
             return False
 
-    def _get_contractor_details(self, contractor_id: str) -> dict[str, Any]:
-        """Get contractor details"""
+    def _get_contractors_bulk(self, contractor_ids: list[str]) -> dict[str, dict[str, Any]]:
+        """Get contractor details for many contractors, keyed by id"""
+        ids = list(dict.fromkeys(contractor_ids))
+        if not ids:
+            return {}
         try:
-            result = self.supabase.table("potential_contractors").select("*").eq(
-                "id", contractor_id
-            ).limit(1).execute()
-            return result.data[0] if result.data else {}
-        except Exception:
+            result = self.supabase.table("potential_contractors").select("*").in_("id", ids).execute()
+            return {row["id"]: row for row in result.data or []}
+        except Exception as e:
+            print(f"[FollowUp ERROR] Failed to prefetch contractors: {e}")
             return {}
 
-    def _get_bid_card_details(self, bid_card_id: str) -> dict[str, Any]:
-        """Get bid card details"""
+    def _get_bid_cards_bulk(self, bid_card_ids: list[str]) -> dict[str, dict[str, Any]]:
+        """Get bid card details for many bid cards, keyed by id"""
+        ids = list(dict.fromkeys(bid_card_ids))
+        if not ids:
+            return {}
         try:
-            result = self.supabase.table("bid_cards").select("*").eq(
-                "id", bid_card_id
-            ).limit(1).execute()
-            return result.data[0] if result.data else {}
-        except Exception:
+            result = self.supabase.table("bid_cards").select("*").in_("id", ids).execute()
+            return {row["id"]: row for row in result.data or []}
+        except Exception as e:
+            print(f"[FollowUp ERROR] Failed to prefetch bid cards: {e}")
             return {}
 
-    def _log_followup(self,
-                     candidate: dict[str, Any],
-                     strategy: FollowUpStrategy,
-                     channel: str,
-                     content: dict[str, str]):
-        """Log follow-up details for analysis"""
+    def _log_followups_bulk(self, plans: list[dict[str, Any]]):
+        """Log a batch of follow-ups in a single insert"""
         try:
-            log_entry = {
-                "distribution_id": candidate["distribution_id"],
-                "contractor_id": candidate["contractor_id"],
-                "bid_card_id": candidate["bid_card_id"],
-                "strategy": strategy.value,
-                "channel": channel,
-                "follow_up_number": candidate["follow_up_count"] + 1,
-                "content_preview": content.get(channel, "")[:100],
-                "created_at": datetime.now().isoformat()
-            }
-
-            self.supabase.table("followup_logs").insert(log_entry).execute()
+            created_at = datetime.now().isoformat()
+            log_entries = [
+                {
+                    "distribution_id": plan["candidate"]["distribution_id"],
+                    "contractor_id": plan["candidate"]["contractor_id"],
+                    "bid_card_id": plan["candidate"]["bid_card_id"],
+                    "strategy": plan["strategy"].value,
+                    "channel": plan["channel"],
+                    "follow_up_number": plan["candidate"].get("follow_up_count", 0) + 1,
+                    "content_preview": plan["content"].get(CHANNEL_CONTENT_KEYS[plan["channel"]], "")[:100],
+                    "created_at": created_at
+                }
+                for plan in plans
+            ]
+            self.supabase.table("followup_logs").insert(log_entries).execute()
 
         except Exception as e:
-            print(f"[FollowUp ERROR] Failed to log: {e}")
+            print(f"[FollowUp ERROR] Failed to log batch: {e}")
 
     def get_followup_analytics(self, days_back: int = 30) -> dict[str, Any]:
         """Get analytics on follow-up effectiveness"""
@@ -377,12 +377,10 @@ class ContractorDiscoveryAgent:
                                  bid_card_id: str,
                                  bid_analysis: dict[str, Any]) -> list[str]:
         """Store selected contractors with intelligent match data"""
-        stored_ids = []
-
         try:
-            for contractor in contractors:
-                # Prepare match record
-                match_record = {
+            now = datetime.now().isoformat()
+            match_records = [
+                {
                     "bid_card_id": bid_card_id,
                     "contractor_id": contractor.get("id"),
                     "company_name": contractor.get("company_name"),
@@ -392,21 +390,26 @@ class ContractorDiscoveryAgent:
                     "key_strengths": json.dumps(contractor.get("key_strengths", [])),
                     "concerns": json.dumps(contractor.get("concerns", [])),
                     "bid_analysis": json.dumps(bid_analysis),
-                    "created_at": datetime.now().isoformat()
+                    "created_at": now
                 }
+                for contractor in contractors
+            ]
+            if not match_records:
+                return []
 
-                # Store in contractor_bid_matches table (create if needed)
-                result = self.supabase.table("contractor_bid_matches").insert(match_record).execute()
+            # One upsert; re-running discovery for a bid card updates its matches
+            result = self.supabase.table("contractor_bid_matches").upsert(
+                match_records, on_conflict="bid_card_id,contractor_id"
+            ).execute()
 
-                if result.data:
-                    stored_ids.append(result.data[0]["id"])
-                    print(f"[CDA v2] Stored match: {contractor.get('company_name')} - Score: {contractor.get('match_score')}")
+            for record in result.data or []:
+                print(f"[CDA v2] Stored match: {record.get('company_name')} - Score: {record.get('match_score')}")
+            return [record["id"] for record in result.data or []]
 
         except Exception as e:
             print(f"[CDA v2] Note: contractor_bid_matches table may not exist yet - {e}")
             # Continue anyway - main functionality still works
-
-        return stored_ids
+            return []
 
     def _apply_simple_scoring(self, contractor: dict[str, Any]) -> None:
         """Apply simple scoring as fallback when intelligent matching unavailable"""
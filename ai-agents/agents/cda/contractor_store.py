@@ -0,0 +1,145 @@
+"""
+Contractor Store
+Deduplicated bulk writes of discovered contractors to potential_contractors
+
+Discovery agents find the same businesses again and again. Each business gets
+a dedupe key (Google place ID, else normalized phone, else website domain,
+else name + ZIP); a batch is merged on that key and written with a single
+upsert_potential_contractors RPC call that merges fields into any existing
+row and returns the canonical rows.
+
+What a discovery found a business for (ZIP, project type, query, rank, score)
+is recorded per discovery in potential_contractor_discoveries; readers that
+filter on that context go through discovered_contractors.
+"""
+import re
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+
+# Hosts shared by many businesses; their domain says nothing about identity
+SHARED_HOSTS = {
+    "facebook.com", "instagram.com", "linkedin.com", "twitter.com", "x.com", "yelp.com",
+    "google.com", "sites.google.com", "business.site", "linktr.ee", "nextdoor.com",
+    "angi.com", "angieslist.com", "homeadvisor.com", "thumbtack.com", "houzz.com", "bbb.org"
+}
+
+POTENTIAL_CONTRACTOR_FIELDS = [
+    "discovery_source", "source_query", "project_zip_code", "project_type", "company_name",
+    "contact_name", "phone", "email", "website", "address", "city", "state", "zip_code",
+    "google_place_id", "google_rating", "google_review_count", "google_types", "google_business_status",
+    "specialties", "years_in_business", "license_number", "insurance_verified", "bonded",
+    "search_rank", "distance_miles", "match_score",
+    "business_size", "service_types", "service_description", "service_areas",
+    "enrichment_status", "enrichment_data"
+]
+
+# Context of one discovery rather than facts about the business
+DISCOVERY_FIELDS = [
+    "project_zip_code", "project_type", "discovery_source", "source_query",
+    "search_rank", "distance_miles", "match_score"
+]
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Last 10 digits of a phone number, or None if it doesn't look like one"""
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-10:] if len(digits) >= 10 else None
+
+
+def normalize_domain(website: Optional[str]) -> Optional[str]:
+    """Lowercase host without www, or None for empty/shared hosts"""
+    if not website:
+        return None
+    host = urlparse(website if "//" in website else f"//{website}").hostname or ""
+    host = host.lower().removeprefix("www.")
+    if not host or host in SHARED_HOSTS or any(host.endswith(f".{shared}") for shared in SHARED_HOSTS):
+        return None
+    return host
+
+
+def contractor_dedupe_key(contractor: dict[str, Any]) -> str:
+    if contractor.get("google_place_id"):
+        return f"place:{contractor['google_place_id']}"
+    phone = normalize_phone(contractor.get("phone"))
+    if phone:
+        return f"phone:{phone}"
+    domain = normalize_domain(contractor.get("website"))
+    if domain:
+        return f"domain:{domain}"
+    name = re.sub(r"[^a-z0-9]+", " ", (contractor.get("company_name") or "").lower()).strip()
+    return f"name:{name}|{contractor.get('zip_code') or contractor.get('project_zip_code') or ''}"
+
+
+def contractor_row(contractor: Any) -> dict[str, Any]:
+    """potential_contractors columns from a PotentialContractor (or enriched subclass) or dict"""
+    if isinstance(contractor, dict):
+        return {field: contractor.get(field) for field in POTENTIAL_CONTRACTOR_FIELDS}
+    # Enrichment fields are set as plain attributes on the dataclass instance
+    return {field: getattr(contractor, field, None) for field in POTENTIAL_CONTRACTOR_FIELDS}
+
+
+def merge_contractor_rows(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Collapse rows sharing a dedupe key; later non-null values win"""
+    merged: dict[str, dict[str, Any]] = {}
+    for row in rows:
+        key = contractor_dedupe_key(row)
+        if key in merged:
+            merged[key].update({field: value for field, value in row.items() if value is not None})
+        else:
+            merged[key] = {**row, "dedupe_key": key}
+    return list(merged.values())
+
+
+def upsert_potential_contractors(supabase: Any, contractors: list[Any]) -> list[dict[str, Any]]:
+    """
+    Store discovered contractors with one round trip
+
+    Args:
+        supabase: Supabase client
+        contractors: PotentialContractor instances or row dicts
+
+    Returns:
+        Canonical potential_contractors rows, one per distinct business, in
+        the order they first appear in contractors
+    """
+    rows = merge_contractor_rows([contractor_row(contractor) for contractor in contractors])
+    if not rows:
+        return []
+
+    result = supabase.rpc("upsert_potential_contractors", {"contractors": rows}).execute()
+    stored = {row["dedupe_key"]: row for row in result.data or []}
+    return [stored[row["dedupe_key"]] for row in rows if row["dedupe_key"] in stored]
+
+
+def discovered_contractors(supabase: Any,
+                           project_type: Optional[str] = None,
+                           project_zip_code: Optional[str] = None,
+                           limit: Optional[int] = None) -> list[dict[str, Any]]:
+    """
+    Contractors discovered for a project type and/or ZIP, best match first
+
+    Returns:
+        potential_contractors rows carrying the matching discovery's context
+        (DISCOVERY_FIELDS), one per business
+    """
+    query = supabase.table("potential_contractor_discoveries").select("*, potential_contractors(*)")
+    if project_zip_code:
+        query = query.eq("project_zip_code", project_zip_code)
+    if project_type:
+        query = query.eq("project_type", project_type)
+    query = query.order("match_score", desc=True)
+    if limit:
+        query = query.limit(limit)
+    result = query.execute()
+
+    contractors: dict[str, dict[str, Any]] = {}
+    for discovery in result.data or []:
+        contractor = discovery.get("potential_contractors")
+        # Several ZIPs can match one business; keep its best discovery
+        if contractor and contractor["id"] not in contractors:
+            # '' marks a ZIP or project type the discovery didn't have
+            context = {field: discovery.get(field) for field in DISCOVERY_FIELDS}
+            context = {field: None if value == "" else value for field, value in context.items()}
+            contractors[contractor["id"]] = {**contractor, **context, "discovered_at": discovery.get("discovered_at")}
+    return list(contractors.values())
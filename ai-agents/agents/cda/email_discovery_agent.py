@@ -2,13 +2,14 @@
 Email Discovery Agent for Contractor Websites
 Scrapes contractor websites to find email addresses and contact information
 """
-import re
-import time
+import asyncio
 from typing import Any, Optional
 from urllib.parse import urljoin, urlparse
 
-import requests
-from bs4 import BeautifulSoup
+from agents.enrichment.domain_enrichment_store import EMAIL_FACETS, get_domain_enrichment_store, website_domain
+
+from .email_extractor import EMAIL_RE, TEXT_MAILTO_RE, VALID_EMAIL_RE, extract_emails
+from .website_crawler import WebsiteCrawler
 
 
 class EmailDiscoveryAgent:
@@ -16,12 +17,10 @@ class EmailDiscoveryAgent:
 
     def __init__(self, supabase_client):
         self.supabase = supabase_client
+        self.enrichment_store = get_domain_enrichment_store(supabase_client)
 
-        # Common email patterns
-        self.email_patterns = [
-            r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
-            r"mailto:([A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,})",
-        ]
+        # Common email patterns (extraction itself runs through email_extractor)
+        self.email_patterns = [EMAIL_RE.pattern, TEXT_MAILTO_RE.pattern]
 
         # Pages to check for contact info
         self.contact_pages = [
@@ -48,9 +47,16 @@ class EmailDiscoveryAgent:
         print("[EmailDiscoveryAgent] Initialized email discovery system")
 
     def discover_emails_for_contractors(self, contractor_ids: list[str]) -> dict[str, Any]:
+        """Synchronous entry point for adiscover_emails_for_contractors"""
+        return asyncio.run(self.adiscover_emails_for_contractors(contractor_ids))
+
+    async def adiscover_emails_for_contractors(self, contractor_ids: list[str]) -> dict[str, Any]:
         """
         Discover emails for a list of contractors
 
+        Websites are crawled concurrently through one WebsiteCrawler, which
+        keeps requests to any single host one second apart.
+
         Args:
             contractor_ids: List of contractor IDs to process
 
@@ -68,61 +74,51 @@ class EmailDiscoveryAgent:
                 "discoveries": []
             }
 
+            contractors = await asyncio.to_thread(self._load_contractors, contractor_ids)
+
+            to_crawl = []
             for contractor_id in contractor_ids:
-                try:
-                    contractor = self._load_contractor(contractor_id)
-                    if not contractor:
-                        results["errors"].append(f"Contractor {contractor_id} not found")
-                        continue
+                contractor = contractors.get(contractor_id)
+                if not contractor:
+                    results["errors"].append(f"Contractor {contractor_id} not found")
+                    continue
 
-                    # Skip if already has email
-                    if contractor.get("email"):
-                        print(f"[EmailDiscoveryAgent] {contractor.get('company_name')} already has email")
-                        results["total_processed"] += 1
-                        continue
+                # Skip if already has email
+                if contractor.get("email"):
+                    print(f"[EmailDiscoveryAgent] {contractor.get('company_name')} already has email")
+                    results["total_processed"] += 1
+                    continue
 
-                    website = contractor.get("website")
-                    if not website:
-                        print(f"[EmailDiscoveryAgent] {contractor.get('company_name')} has no website")
-                        results["total_processed"] += 1
-                        continue
+                if not contractor.get("website"):
+                    print(f"[EmailDiscoveryAgent] {contractor.get('company_name')} has no website")
+                    results["total_processed"] += 1
+                    continue
 
-                    print(f"[EmailDiscoveryAgent] Discovering email for: {contractor.get('company_name')}")
-                    print(f"[EmailDiscoveryAgent] Website: {website}")
-
-                    # Discover email from website
-                    discovery_result = self._discover_email_from_website(website, contractor.get("company_name", ""))
-
-                    if discovery_result["success"] and discovery_result["emails"]:
-                        # Update contractor with discovered email
-                        primary_email = discovery_result["emails"][0]
-                        update_result = self._update_contractor_email(contractor_id, primary_email, discovery_result)
-
-                        if update_result:
-                            results["emails_found"] += 1
-                            results["contractors_updated"] += 1
-                            results["discoveries"].append({
-                                "contractor_id": contractor_id,
-                                "company_name": contractor.get("company_name"),
-                                "email": primary_email,
-                                "source_page": discovery_result.get("source_page", "unknown")
-                            })
-                            print(f"[EmailDiscoveryAgent] SUCCESS: Found {primary_email} for {contractor.get('company_name')}")
-                        else:
-                            results["errors"].append(f"Failed to update {contractor.get('company_name')} with email")
-                    else:
-                        print(f"[EmailDiscoveryAgent] No email found for {contractor.get('company_name')}")
+                to_crawl.append(contractor)
 
-                    results["total_processed"] += 1
+            # Sites whose emails are already known skip crawling
+            records = await asyncio.to_thread(
+                self.enrichment_store.get_many, [website_domain(contractor["website"]) for contractor in to_crawl]
+            )
 
-                    # Respectful delay between requests
-                    time.sleep(2)
+            async with WebsiteCrawler(self.headers) as crawler:
+                outcomes = await asyncio.gather(
+                    *(self._discover_for_contractor(crawler, contractor, records) for contractor in to_crawl),
+                    return_exceptions=True
+                )
 
-                except Exception as e:
-                    error_msg = f"Error processing contractor {contractor_id}: {e}"
+            for contractor, outcome in zip(to_crawl, outcomes, strict=True):
+                results["total_processed"] += 1
+                if isinstance(outcome, Exception):
+                    error_msg = f"Error processing contractor {contractor['id']}: {outcome}"
                     print(f"[EmailDiscoveryAgent ERROR] {error_msg}")
                     results["errors"].append(error_msg)
-                    results["total_processed"] += 1
+                elif outcome.get("error"):
+                    results["errors"].append(outcome["error"])
+                elif outcome.get("discovery"):
+                    results["emails_found"] += 1
+                    results["contractors_updated"] += 1
+                    results["discoveries"].append(outcome["discovery"])
 
             print(f"[EmailDiscoveryAgent] Discovery complete: {results['emails_found']}/{results['total_processed']} emails found")
             return results
@@ -136,11 +132,75 @@ class EmailDiscoveryAgent:
                 "emails_found": 0
             }
 
+    async def _discover_for_contractor(self, crawler: WebsiteCrawler, contractor: dict[str, Any],
+                                       records: dict[str, Any]) -> dict[str, Any]:
+        """Crawl one contractor's website (unless its domain is already known) and store the best email found"""
+        company_name = contractor.get("company_name", "")
+        print(f"[EmailDiscoveryAgent] Discovering email for: {company_name}")
+        print(f"[EmailDiscoveryAgent] Website: {contractor['website']}")
+
+        domain = website_domain(contractor["website"])
+        home_page = urljoin(self._normalize_website(contractor["website"]), "/")
+        record = self.enrichment_store.lookup(records, domain, EMAIL_FACETS)
+        stale = records.get(domain)
+        if record is None and stale is not None and stale.has(EMAIL_FACETS):
+            if await crawler.revalidate(home_page, stale.revalidation_headers()):
+                await asyncio.to_thread(self.enrichment_store.mark_validated, stale)
+                record = stale
+
+        if record is not None:
+            print(f"[EmailDiscoveryAgent] Using stored emails for {domain}")
+            discovery_result = {
+                "success": True,
+                "emails": self._filter_relevant_emails(record.emails, domain, company_name),
+                "source_page": home_page
+            }
+        else:
+            discovery_result = await self._adiscover_email_from_website(crawler, contractor["website"], company_name)
+            if discovery_result["success"]:
+                etag, last_modified = crawler.validators(home_page)
+                await asyncio.to_thread(
+                    self.enrichment_store.save, domain, etag, last_modified, emails=discovery_result["all_emails"]
+                )
+
+        if not (discovery_result["success"] and discovery_result["emails"]):
+            print(f"[EmailDiscoveryAgent] No email found for {company_name}")
+            return {}
+
+        # Update contractor with discovered email
+        primary_email = discovery_result["emails"][0]
+        updated = await asyncio.to_thread(self._update_contractor_email, contractor["id"], primary_email, discovery_result)
+        if not updated:
+            return {"error": f"Failed to update {company_name} with email"}
+
+        print(f"[EmailDiscoveryAgent] SUCCESS: Found {primary_email} for {company_name}")
+        return {
+            "discovery": {
+                "contractor_id": contractor["id"],
+                "company_name": company_name,
+                "email": primary_email,
+                "source_page": discovery_result.get("source_page", "unknown")
+            }
+        }
+
     def _discover_email_from_website(self, website_url: str, company_name: str) -> dict[str, Any]:
+        """Synchronous single-site discovery (see _adiscover_email_from_website)"""
+
+        async def run() -> dict[str, Any]:
+            async with WebsiteCrawler(self.headers) as crawler:
+                return await self._adiscover_email_from_website(crawler, website_url, company_name)
+
+        return asyncio.run(run())
+
+    async def _adiscover_email_from_website(self, crawler: WebsiteCrawler, website_url: str, company_name: str) -> dict[str, Any]:
         """
         Discover email addresses from a contractor's website
 
+        Pages are checked in contact_pages order and the crawl stops as soon
+        as an email on the company's own domain turns up.
+
         Args:
+            crawler: Shared crawler for the batch
             website_url: The contractor's website URL
             company_name: Company name for filtering relevant emails
 
@@ -148,9 +208,7 @@ class EmailDiscoveryAgent:
             Dict with discovery results
         """
         try:
-            # Normalize URL
-            if not website_url.startswith(("http://", "https://")):
-                website_url = "https://" + website_url
+            website_url = self._normalize_website(website_url)
 
             parsed_url = urlparse(website_url)
             base_domain = parsed_url.netloc.lower()
@@ -160,45 +218,38 @@ class EmailDiscoveryAgent:
 
             # Check multiple pages for contact information
             for page_path in self.contact_pages:
+                page_url = urljoin(website_url, page_path)
                 try:
-                    page_url = urljoin(website_url, page_path)
-
-                    # Make request with timeout
-                    response = requests.get(
-                        page_url,
-                        headers=self.headers,
-                        timeout=10,
-                        allow_redirects=True
-                    )
-
-                    if response.status_code == 200:
-                        page_emails = self._extract_emails_from_html(response.text, base_domain)
-                        if page_emails:
-                            emails_found.extend(page_emails)
-                            pages_checked.append({
-                                "url": page_url,
-                                "emails_found": len(page_emails),
-                                "emails": page_emails
-                            })
-
-                        # Don't overload the server
-                        time.sleep(1)
-
-                except requests.exceptions.RequestException as e:
-                    print(f"[EmailDiscoveryAgent] Error accessing {page_url}: {e}")
-                    continue
+                    html = await crawler.fetch(page_url)
+                    if html is None:
+                        continue
+
+                    page_emails = self._extract_emails_from_html(html, base_domain)
+                    if page_emails:
+                        emails_found.extend(page_emails)
+                        pages_checked.append({
+                            "url": page_url,
+                            "emails_found": len(page_emails),
+                            "emails": page_emails
+                        })
+
+                        # Good enough: stop crawling this site
+                        if any(self._is_company_email(email, base_domain) for email in page_emails):
+                            break
+
                 except Exception as e:
                     print(f"[EmailDiscoveryAgent] Error processing {page_url}: {e}")
                     continue
 
             # Remove duplicates and filter emails
-            unique_emails = list(set(emails_found))
+            unique_emails = list(dict.fromkeys(emails_found))
             filtered_emails = self._filter_relevant_emails(unique_emails, base_domain, company_name)
 
             return {
                 "success": True,
                 "website_url": website_url,
                 "emails": filtered_emails,
+                "all_emails": unique_emails,
                 "pages_checked": pages_checked,
                 "total_emails_found": len(unique_emails),
                 "filtered_emails": len(filtered_emails),
@@ -213,46 +264,23 @@ class EmailDiscoveryAgent:
                 "emails": []
             }
 
+    def _normalize_website(self, website_url: str) -> str:
+        if not website_url.startswith(("http://", "https://")):
+            website_url = "https://" + website_url
+        return website_url
+
+    def _is_company_email(self, email: str, base_domain: str) -> bool:
+        """Email on the company's own domain (and not an automated sender)"""
+        prefix, _, domain = email.lower().partition("@")
+        site_domain = base_domain.removeprefix("www.")
+        if any(indicator in prefix for indicator in ["noreply", "donotreply", "no-reply", "mailer", "automated"]):
+            return False
+        return domain == site_domain or domain.endswith(f".{site_domain}") or site_domain.endswith(f".{domain}")
+
     def _extract_emails_from_html(self, html_content: str, base_domain: str) -> list[str]:
         """Extract email addresses from HTML content"""
-        emails = []
-
         try:
-            # Parse HTML
-            soup = BeautifulSoup(html_content, "html.parser")
-
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-
-            # Get text content
-            text_content = soup.get_text()
-
-            # Extract emails using regex patterns
-            for pattern in self.email_patterns:
-                matches = re.findall(pattern, text_content, re.IGNORECASE)
-                if isinstance(matches[0] if matches else None, tuple):
-                    # Handle patterns with groups (like mailto:)
-                    emails.extend([match[0] if isinstance(match, tuple) else match for match in matches])
-                else:
-                    emails.extend(matches)
-
-            # Also check href attributes for mailto links
-            mailto_links = soup.find_all("a", href=re.compile(r"^mailto:", re.IGNORECASE))
-            for link in mailto_links:
-                href = link.get("href", "")
-                email_match = re.search(r"mailto:([^?&\s]+)", href, re.IGNORECASE)
-                if email_match:
-                    emails.append(email_match.group(1))
-
-            # Clean and validate emails
-            cleaned_emails = []
-            for email in emails:
-                email = email.strip().lower()
-                if self._is_valid_email(email):
-                    cleaned_emails.append(email)
-
-            return cleaned_emails
+            return extract_emails(html_content)
 
         except Exception as e:
             print(f"[EmailDiscoveryAgent] Error extracting emails from HTML: {e}")
@@ -317,8 +345,24 @@ class EmailDiscoveryAgent:
 
     def _is_valid_email(self, email: str) -> bool:
         """Validate email format"""
-        pattern = r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}$"
-        return bool(re.match(pattern, email))
+        return bool(VALID_EMAIL_RE.match(email))
+
+    def _load_contractors(self, contractor_ids: list[str]) -> dict[str, dict[str, Any]]:
+        """Load contractors by ID with one query per table"""
+        contractors = {}
+        try:
+            result = self.supabase.table("potential_contractors").select("*").in_("id", contractor_ids).execute()
+            contractors.update({row["id"]: row for row in result.data or []})
+
+            missing = [contractor_id for contractor_id in contractor_ids if contractor_id not in contractors]
+            if missing:
+                result = self.supabase.table("contractor_leads").select("*").in_("id", missing).execute()
+                contractors.update({row["id"]: row for row in result.data or []})
+
+        except Exception as e:
+            print(f"[EmailDiscoveryAgent] Error loading contractors: {e}")
+
+        return contractors
 
     def _load_contractor(self, contractor_id: str) -> Optional[dict[str, Any]]:
         """Load contractor data from database"""
@@ -373,12 +417,13 @@ class EmailDiscoveryAgent:
     def get_contractors_needing_emails(self, project_zip_code: str | None = None, limit: int = 20) -> list[dict[str, Any]]:
         """Get contractors that need email discovery"""
         try:
-            # Build query
-            query = self.supabase.table("potential_contractors").select("*")
-
-            # Filter by location if provided
+            # Build query; ZIPs a contractor was discovered for live in potential_contractor_discoveries
             if project_zip_code:
-                query = query.eq("project_zip_code", project_zip_code)
+                query = self.supabase.table("potential_contractors").select(
+                    "*, potential_contractor_discoveries!inner(project_zip_code)"
+                ).eq("potential_contractor_discoveries.project_zip_code", project_zip_code)
+            else:
+                query = self.supabase.table("potential_contractors").select("*")
 
             # Filter for contractors without emails but with websites
             query = query.is_("email", "null").not_.is_("website", "null")
@@ -388,7 +433,10 @@ class EmailDiscoveryAgent:
 
             result = query.execute()
 
-            return result.data if result.data else []
+            contractors = result.data or []
+            for contractor in contractors:
+                contractor.pop("potential_contractor_discoveries", None)
+            return contractors
 
         except Exception as e:
             print(f"[EmailDiscoveryAgent] Error getting contractors needing emails: {e}")
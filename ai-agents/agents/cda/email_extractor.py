@@ -0,0 +1,99 @@
+"""
+Email Extractor
+Single-pass email extraction from raw contractor website HTML
+
+One compiled regex walks the page once. Script/style blocks and comments are
+skipped whole, tags are skipped except for <a href="mailto:..."> links, and
+the text between them is joined the way get_text() joins it, so an address
+split across inline tags (<b>info</b>@acme.com) stays whole. Block-level tags
+end the line, so "info@acme.com</p><p>Call" doesn't run together into
+"info@acme.comcall" the way it does in get_text(). Only lines that
+could hold an @ (or an encoded / obfuscated one) are searched, with entities
+decoded just around each candidate. Results match what a BeautifulSoup
+get_text() scan would find, plus "name [at] domain [dot] com" style addresses.
+"""
+import re
+from html import unescape
+
+
+# Same address pattern EmailDiscoveryAgent has always used
+EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", re.IGNORECASE)
+TEXT_MAILTO_RE = re.compile(r"mailto:([A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,})", re.IGNORECASE)
+VALID_EMAIL_RE = re.compile(r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}$")
+
+_AT = r"(?:@|&\#0*64;|&\#[xX]0*40;|&commat;)"
+_OBFUSCATED_AT = r"\s*[\[({]\s*at\s*[\])}]\s*"
+_OBFUSCATED_DOT = r"\s*[\[({]\s*dot\s*[\])}]\s*"
+
+PAGE_RE = re.compile(
+    r"(?P<skip><(?P<raw>script|style)\b.*?</(?P=raw)\s*>|<!--.*?-->)"
+    r"|(?P<anchor><a\s[^>]*>)"
+    r"|(?P<block></?(?:address|article|br|dd|div|dl|dt|footer|h[1-6]|header|hr|li|main|nav|ol|p|section|table|td|th|tr|ul)\b[^>]*>)"
+    r"|(?P<tag></?[A-Za-z!?][^>]*>)"
+    r"|(?P<text>[^<]+|<)",
+    re.IGNORECASE | re.DOTALL
+)
+# Entity-encoded characters are allowed on both sides and decoded later
+CANDIDATE_RE = re.compile(
+    rf"(?P<email>(?:[A-Za-z0-9._%+|-]|&\#?\w+;)*{_AT}(?:[A-Za-z0-9._%+|-]|&\#?\w+;)+)"
+    rf"|(?P<obfuscated>[A-Za-z0-9._%+-]+{_OBFUSCATED_AT}[A-Za-z0-9-]+(?:(?:\.|{_OBFUSCATED_DOT})[A-Za-z0-9-]+)+)",
+    re.IGNORECASE
+)
+HREF_RE = re.compile(r"""\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+HREF_MAILTO_RE = re.compile(r"mailto:([^?&\s]+)", re.IGNORECASE)
+
+
+def _clean(emails: list[str]) -> list[str]:
+    cleaned = []
+    for email in emails:
+        email = email.strip().lower()
+        if VALID_EMAIL_RE.match(email):
+            cleaned.append(email)
+    return cleaned
+
+
+def _scan_text(text: str, text_emails: list[str], text_mailtos: list[str]):
+    for match in CANDIDATE_RE.finditer(text):
+        if match.lastgroup == "email":
+            start = match.start()
+            candidate = unescape(match.group())
+            text_emails.extend(EMAIL_RE.findall(candidate))
+            if text[max(0, start - 7):start].lower() == "mailto:":
+                text_mailtos.extend(TEXT_MAILTO_RE.findall("mailto:" + candidate))
+        else:
+            candidate = re.sub(_OBFUSCATED_AT, "@", match.group(), flags=re.IGNORECASE)
+            candidate = re.sub(_OBFUSCATED_DOT, ".", candidate, flags=re.IGNORECASE)
+            text_emails.extend(EMAIL_RE.findall(candidate))
+
+
+def extract_emails(html: str) -> list[str]:
+    """
+    Email addresses on a page, lowercased, in the order
+    text emails, text "mailto:" emails, then mailto links (duplicates kept)
+    """
+    text_emails = []
+    text_mailtos = []
+    link_emails = []
+    texts = []
+
+    for match in PAGE_RE.finditer(html):
+        kind = match.lastgroup
+        if kind == "text":
+            texts.append(match.group())
+        elif kind == "block":
+            texts.append("\n")
+        elif kind == "anchor" and "mailto:" in match.group().lower():
+            href = HREF_RE.search(match.group())
+            if href:
+                value = unescape(href.group(1) or href.group(2) or href.group(3) or "")
+                if value.lower().startswith("mailto:"):
+                    email = HREF_MAILTO_RE.search(value)
+                    if email:
+                        link_emails.append(email.group(1))
+
+    # Addresses never span a line break, so each line is searched on its own
+    for line in "".join(texts).split("\n"):
+        if "@" in line or "&" in line or "[" in line or "(" in line or "{" in line:
+            _scan_text(line, text_emails, text_mailtos)
+
+    return _clean(text_emails + text_mailtos + link_emails)
@@ -8,8 +8,15 @@ from typing import Any, Optional
 
 from supabase import Client
 
+from agents.enrichment.domain_enrichment_store import (
+    CLASSIFICATION_FACETS,
+    DomainEnrichment,
+    get_domain_enrichment_store,
+    website_domain,
+)
 from agents.enrichment.smart_website_enricher import SmartWebsiteEnricher
 
+from .contractor_store import contractor_row, upsert_potential_contractors
 from .web_search_agent import PotentialContractor, WebSearchContractorAgent
 
 
@@ -21,6 +28,7 @@ class EnrichedWebSearchAgent(WebSearchContractorAgent):
     def __init__(self, supabase: Client, use_playwright: bool = False):
         super().__init__(supabase)
         self.enricher = SmartWebsiteEnricher()
+        self.enrichment_store = get_domain_enrichment_store(supabase)
         self.use_playwright = use_playwright
         print("[EnrichedWebSearchAgent] Initialized with automatic enrichment")
 
@@ -54,22 +62,32 @@ class EnrichedWebSearchAgent(WebSearchContractorAgent):
             contractors = self._search_contractors(search_query, contractors_to_find)
             print(f"[EnrichedWebSearchAgent] Found {len(contractors)} contractors")
 
-            # Step 4: Enrich all discovered contractors
+            # Step 4: Enrich all discovered contractors (known domains come from the store)
+            records = self.enrichment_store.get_many([website_domain(c.website) for c in contractors])
+
             enriched_contractors = []
             for i, contractor in enumerate(contractors):
                 print(f"\n[EnrichedWebSearchAgent] Enriching {i+1}/{len(contractors)}: {contractor.company_name}")
 
-                # Prepare contractor data for enrichment
-                contractor_dict = {
-                    "website": contractor.website,
-                    "company_name": contractor.company_name,
-                    "google_review_count": contractor.google_review_count,
-                    "project_type": contractor.project_type,
-                    "phone": contractor.phone
-                }
-
-                # Enrich using website data
-                if contractor.website:
+                domain = website_domain(contractor.website)
+                record = self.enrichment_store.lookup(records, domain, CLASSIFICATION_FACETS, contractor.website)
+
+                if record:
+                    print(f"   - Using stored enrichment for {domain}")
+                    self._apply_domain_enrichment(contractor, record)
+
+                elif contractor.website:
+                    # Prepare contractor data for enrichment
+                    contractor_dict = {
+                        "website": contractor.website,
+                        "company_name": contractor.company_name,
+                        "google_review_count": contractor.google_review_count,
+                        "project_type": contractor.project_type,
+                        "phone": contractor.phone
+                    }
+
+                    # Enrich using website data
+                    etag, last_modified = self.enrichment_store.fetch_validators(contractor.website)
                     enriched_data = self.enricher.enrich_contractor_from_website(contractor_dict)
 
                     # Update contractor with enriched data
@@ -85,6 +103,20 @@ class EnrichedWebSearchAgent(WebSearchContractorAgent):
                         "years_in_business": enriched_data.years_in_business,
                         "enrichment_timestamp": datetime.now().isoformat()
                     }
+
+                    facets = {
+                        "business_size": enriched_data.business_size,
+                        "service_types": enriched_data.service_types or [],
+                        "service_description": enriched_data.service_description,
+                        "service_areas": enriched_data.service_areas or [],
+                        "social_media": getattr(enriched_data, "social_media", None) or {},
+                        "enrichment_data": {key: value for key, value in contractor.enrichment_data.items()
+                                            if key != "enrichment_timestamp"}
+                    }
+                    # Only a found email is recorded; email discovery still crawls otherwise
+                    if enriched_data.email:
+                        facets["emails"] = [enriched_data.email]
+                    self.enrichment_store.save(domain, etag, last_modified, **facets)
                 else:
                     # No website - classify based on review count
                     contractor.business_size = self._classify_by_reviews(contractor.google_review_count)
@@ -140,6 +172,19 @@ class EnrichedWebSearchAgent(WebSearchContractorAgent):
                 "bid_card_id": bid_card_id
             }
 
+    def _apply_domain_enrichment(self, contractor: PotentialContractor, record: DomainEnrichment):
+        """Fill a contractor from a stored domain enrichment record"""
+        contractor.email = contractor.email or (record.emails[0] if record.emails else None)
+        contractor.business_size = record.business_size
+        contractor.service_types = record.service_types
+        contractor.service_description = record.service_description
+        contractor.service_areas = record.service_areas or []
+        contractor.enrichment_status = "ENRICHED"
+        contractor.enrichment_data = {
+            **(record.enrichment_data or {}),
+            "enrichment_timestamp": record.enriched_at.isoformat() if record.enriched_at else None
+        }
+
     def _classify_by_reviews(self, review_count: Optional[int]) -> str:
         """Classify business size based on review count alone"""
         if not review_count:
@@ -223,54 +268,21 @@ class EnrichedWebSearchAgent(WebSearchContractorAgent):
         return selected
 
     def _store_enriched_contractors(self, contractors: list[PotentialContractor], bid_card_id: str) -> list[dict[str, Any]]:
-        """Store contractors with enrichment data"""
-        stored_contractors = []
-
+        """Store contractors with enrichment data (one upsert, deduplicated per business)"""
         try:
-            for contractor in contractors:
-                # Prepare data for storage
-                contractor_data = {
-                    "discovery_source": contractor.discovery_source,
-                    "source_query": contractor.source_query,
-                    "project_zip_code": contractor.project_zip_code,
-                    "project_type": contractor.project_type,
-                    "company_name": contractor.company_name,
-                    "contact_name": contractor.contact_name,
-                    "phone": contractor.phone,
-                    "email": contractor.email,
-                    "website": contractor.website,
-                    "address": contractor.address,
-                    "city": contractor.city,
-                    "state": contractor.state,
-                    "zip_code": contractor.zip_code,
-                    "google_place_id": contractor.google_place_id,
-                    "google_rating": contractor.google_rating,
-                    "google_review_count": contractor.google_review_count,
-                    "google_types": contractor.google_types,
-                    "google_business_status": contractor.google_business_status,
-                    "search_rank": contractor.search_rank,
-                    "match_score": contractor.match_score,
-                    # New enrichment fields
-                    "business_size": getattr(contractor, "business_size", None),
-                    "service_types": getattr(contractor, "service_types", None),
-                    "service_description": getattr(contractor, "service_description", None),
-                    "service_areas": getattr(contractor, "service_areas", None),
-                    "enrichment_status": getattr(contractor, "enrichment_status", "PENDING"),
-                    "enrichment_data": getattr(contractor, "enrichment_data", None)
-                }
-
-                # Insert into database
-                result = self.supabase.table("potential_contractors").insert(contractor_data).execute()
-
-                if result.data:
-                    stored_contractors.append(result.data[0])
-                    print(f"[EnrichedWebSearchAgent] Stored: {contractor.company_name} ({contractor.business_size})")
+            rows = [contractor_row(contractor) for contractor in contractors]
+            for row in rows:
+                row["enrichment_status"] = row["enrichment_status"] or "PENDING"
+
+            stored_contractors = upsert_potential_contractors(self.supabase, rows)
+            for contractor in stored_contractors:
+                print(f"[EnrichedWebSearchAgent] Stored: {contractor.get('company_name')} ({contractor.get('business_size')})")
 
             return stored_contractors
 
         except Exception as e:
             print(f"[EnrichedWebSearchAgent ERROR] Failed to store contractors: {e}")
-            return stored_contractors
+            return []
 
     def _calculate_enrichment_stats(self, contractors: list[dict[str, Any]]) -> dict[str, Any]:
         """Calculate enrichment statistics"""
@@ -0,0 +1,181 @@
+"""
+Place Search Cache
+Shared cache for Google Places Text Search results used by Tier 3 discovery
+
+Searches are keyed by normalized query text + type filter + a ~11km location
+cell + radius, so bid cards in the same metro reuse one search. When the
+coordinates are only a fallback (city not geocoded), the key uses the
+normalized city/state/ZIP text instead of the cell. Results live
+in memory and in Supabase (place_search_cache) with a TTL, and concurrent
+discoveries for the same key wait on a single in-flight request. Place
+payloads are also cached by place ID (google_place_cache) so a search whose
+places are all known can be answered from an IDs-only request.
+"""
+import os
+import re
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+from utils.session_cache import SessionCache
+
+
+PLACE_SEARCH_TTL_HOURS = float(os.getenv("PLACE_SEARCH_TTL_HOURS", "168"))
+PLACE_DETAILS_TTL_HOURS = float(os.getenv("PLACE_DETAILS_TTL_HOURS", "720"))
+# Grid size in degrees for location cells (0.1 deg is roughly 11km)
+LOCATION_CELL_DEGREES = 0.1
+
+
+def location_cell(latitude: float, longitude: float, cell_degrees: float = LOCATION_CELL_DEGREES) -> str:
+    """Snap coordinates to a grid cell so nearby searches share a key"""
+    return f"{round(latitude / cell_degrees) * cell_degrees:.2f},{round(longitude / cell_degrees) * cell_degrees:.2f}"
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text.lower()).strip()
+
+
+def search_key(search_term: str, contractor_type: Optional[str], latitude: float, longitude: float, radius_miles: int,
+               location_text: Optional[str] = None) -> str:
+    """Cache key for a search; pass location_text when the coordinates don't identify the place"""
+    location = f"@{_normalize(location_text)}" if location_text else location_cell(latitude, longitude)
+    return f"{_normalize(search_term)}|{contractor_type or '*'}|{location}|{radius_miles}"
+
+
+class PlaceSearchCache:
+    """TTL cache of place searches and place payloads with request coalescing"""
+
+    def __init__(self, supabase: Any = None,
+                 search_ttl_hours: float = PLACE_SEARCH_TTL_HOURS,
+                 place_ttl_hours: float = PLACE_DETAILS_TTL_HOURS):
+        self.supabase = supabase
+        self.search_ttl = timedelta(hours=search_ttl_hours)
+        self.place_ttl = timedelta(hours=place_ttl_hours)
+
+        self._searches = SessionCache("place_searches", max_entries=2000, ttl_seconds=search_ttl_hours * 3600)
+        self._places = SessionCache("google_places", max_entries=20000, ttl_seconds=place_ttl_hours * 3600)
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Optional[list[dict[str, Any]]]]) -> Optional[list[dict[str, Any]]]:
+        """
+        Places for a search key: memory, then Supabase, then one shared fetch
+
+        Failed fetches (None) and empty results aren't cached, so the next
+        discovery retries them.
+        """
+        places = self._searches.get(key)
+        if places is not None:
+            print(f"[PlaceSearchCache] Hit: {key}")
+            return places
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            print(f"[PlaceSearchCache] Waiting on in-flight search: {key}")
+            return future.result()
+
+        try:
+            places = self._load_search(key)
+            if places is None:
+                places = fetch()
+                if places:
+                    self._save_search(key, places)
+            if places:
+                self._searches[key] = places
+                self.put_places(places, persist=False)
+            future.set_result(places)
+            return places
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def get_places(self, place_ids: list[str]) -> dict[str, dict[str, Any]]:
+        """Cached place payloads by ID (memory first, then Supabase)"""
+        found = {}
+        missing = []
+        for place_id in place_ids:
+            place = self._places.get(place_id)
+            if place is not None:
+                found[place_id] = place
+            else:
+                missing.append(place_id)
+
+        if missing and self.supabase is not None:
+            try:
+                cutoff = (datetime.utcnow() - self.place_ttl).isoformat()
+                result = self.supabase.table("google_place_cache").select("place_id,place").in_(
+                    "place_id", missing
+                ).gte("fetched_at", cutoff).execute()
+                for row in result.data or []:
+                    found[row["place_id"]] = row["place"]
+                    self._places[row["place_id"]] = row["place"]
+            except Exception as e:
+                print(f"[PlaceSearchCache] Could not read place cache: {e}")
+
+        return found
+
+    def put_places(self, places: list[dict[str, Any]], persist: bool = True):
+        """Remember place payloads by ID"""
+        rows = []
+        now = datetime.utcnow().isoformat()
+        for place in places:
+            if place.get("id"):
+                self._places[place["id"]] = place
+                rows.append({"place_id": place["id"], "place": place, "fetched_at": now})
+
+        if persist and rows and self.supabase is not None:
+            try:
+                self.supabase.table("google_place_cache").upsert(rows, on_conflict="place_id").execute()
+            except Exception as e:
+                print(f"[PlaceSearchCache] Could not write place cache: {e}")
+
+    def _load_search(self, key: str) -> Optional[list[dict[str, Any]]]:
+        if self.supabase is None:
+            return None
+        try:
+            cutoff = (datetime.utcnow() - self.search_ttl).isoformat()
+            result = self.supabase.table("place_search_cache").select("places").eq(
+                "query_key", key
+            ).gte("fetched_at", cutoff).limit(1).execute()
+            if result.data:
+                print(f"[PlaceSearchCache] Persistent hit: {key}")
+                return result.data[0]["places"]
+        except Exception as e:
+            print(f"[PlaceSearchCache] Could not read search cache: {e}")
+        return None
+
+    def _save_search(self, key: str, places: list[dict[str, Any]]):
+        if self.supabase is None:
+            return
+        try:
+            self.supabase.table("place_search_cache").upsert({
+                "query_key": key,
+                "places": places,
+                "fetched_at": datetime.utcnow().isoformat()
+            }, on_conflict="query_key").execute()
+        except Exception as e:
+            print(f"[PlaceSearchCache] Could not write search cache: {e}")
+
+    def stats(self) -> dict[str, Any]:
+        return {"searches": self._searches.stats(), "places": self._places.stats(), "in_flight": len(self._inflight)}
+
+
+_place_search_cache: Optional[PlaceSearchCache] = None
+
+
+def get_place_search_cache(supabase: Any = None) -> PlaceSearchCache:
+    """Process-wide cache so every discovery agent shares searches and in-flight requests"""
+    global _place_search_cache
+    if _place_search_cache is None:
+        _place_search_cache = PlaceSearchCache(supabase)
+    return _place_search_cache
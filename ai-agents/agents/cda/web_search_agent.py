@@ -5,11 +5,38 @@ Uses web search to find contractors and store them as potential_contractors
 import json
 import os
 from dataclasses import dataclass
+from functools import partial
 from typing import Any, Optional
 
 import requests
 from supabase import Client
 
+from .contractor_store import discovered_contractors, upsert_potential_contractors
+from .place_search_cache import get_place_search_cache, search_key
+
+
+PLACES_SEARCH_URL = "https://places.googleapis.com/v1/places:searchText"
+PLACES_FIELD_MASK = "places.id,places.displayName,places.formattedAddress,places.location,places.rating,places.userRatingCount,places.types,places.businessStatus,places.nationalPhoneNumber,places.websiteUri,places.addressComponents"
+PLACES_TIMEOUT = float(os.getenv("GOOGLE_PLACES_TIMEOUT", "10"))
+
+# Approximate coordinates for common FL cities (in production, use Google Geocoding API)
+CITY_COORDINATES = {
+    "coconut creek": (26.2517, -80.1789),
+    "boca raton": (26.3683, -80.1289),
+    "coral springs": (26.2706, -80.2706),
+    "pompano beach": (26.2379, -80.1248),
+    "deerfield beach": (26.3184, -80.0997),
+    "orlando": (28.5383, -81.3792),
+    "miami": (25.7617, -80.1918),
+    "tampa": (27.9506, -82.4572),
+    "jacksonville": (30.3322, -81.6557),
+    "fort lauderdale": (26.1224, -80.1373),
+    "tallahassee": (30.4518, -84.27277),
+    "parkland": (26.3106, -80.2372),
+    "margate": (26.2445, -80.2064),
+    "coral gables": (25.7218, -80.2685)
+}
+
 
 @dataclass
 class ContractorSearchQuery:
@@ -77,6 +104,10 @@ class WebSearchContractorAgent:
 
         print(f"[WebSearchAgent] Google Maps API Key: {'Found' if self.google_api_key else 'NOT FOUND'}")
 
+        # Shared across agents: repeat metros reuse earlier searches
+        self.place_cache = get_place_search_cache(supabase)
+        self.http = requests.Session()
+
         # Enhanced contractor search terms with service-level specifics
         self.search_terms = {
             "holiday lighting": ["holiday lighting installation", "christmas light installation", "holiday decorating services", "christmas lighting company"],
@@ -462,6 +493,12 @@ class WebSearchContractorAgent:
             if not contractor_types or contractor_types == [None]:
                 searches_to_run = [(search_terms[0], None)]
 
+            latitude, longitude = self._get_city_coordinates(query.city, query.state)
+            # Fallback coordinates say nothing about the place, so key those searches by its text
+            location_text = None
+            if not self._has_city_coordinates(query.city):
+                location_text = f"{query.city} {query.state} {query.zip_code}"
+
             for search_term, contractor_type in searches_to_run:
                 if len(contractors) >= max_results:
                     break
@@ -469,90 +506,56 @@ class WebSearchContractorAgent:
                 # Build location-specific search query
                 text_query = f"{search_term} contractors {query.city} {query.state} {query.zip_code}"
 
-                # Use Google Places API (New) Text Search
-                url = "https://places.googleapis.com/v1/places:searchText"
-
-                headers = {
-                    "Content-Type": "application/json",
-                    "X-Goog-Api-Key": self.google_api_key,
-                    "X-Goog-FieldMask": "places.id,places.displayName,places.formattedAddress,places.location,places.rating,places.userRatingCount,places.types,places.businessStatus,places.nationalPhoneNumber,places.websiteUri,places.addressComponents"
-                }
-
-                # Request body with location bias and optional type filtering
-                request_body = {
-                    "textQuery": text_query,
-                    "pageSize": min(20, max_results - len(contractors)),
-                    "locationBias": {
-                        "circle": {
-                            "center": {
-                                "latitude": self._get_city_coordinates(query.city, query.state)[0],
-                                "longitude": self._get_city_coordinates(query.city, query.state)[1]
-                            },
-                            "radius": query.radius_miles * 1609.34  # Convert miles to meters
-                        }
-                    },
-                    "includePureServiceAreaBusinesses": True,  # Include service-only businesses
-                    "rankPreference": "RELEVANCE"
-                }
-
-                # Add type filter only if we have a valid contractor type
-                if contractor_type:
-                    request_body["includedType"] = contractor_type
-
                 print(f"[WebSearchAgent] Searching Google Maps for: {text_query}")
                 print(f"[WebSearchAgent] Using contractor type filter: {contractor_type or 'None (broad search)'}")
 
-                response = requests.post(url, headers=headers, json=request_body)
-
-                if response.status_code == 200:
-                    data = response.json()
-                    places = data.get("places", [])
-
-                    print(f"[WebSearchAgent] Google Maps returned {len(places)} results")
-
-                    for _i, place in enumerate(places):
-                        # Filter out directory websites
-                        if self._is_directory_website(place):
-                            print(f"[WebSearchAgent] Skipping directory: {place.get('displayName', {}).get('text', 'Unknown')}")
-                            continue
-
-                        # Extract location info
-                        place.get("location", {})
-                        address_components = place.get("addressComponents", [])
-                        city, state, zip_code = self._extract_address_components(address_components)
-
-                        contractor = PotentialContractor(
-                            discovery_source="google_maps_new",
-                            source_query=text_query,
-                            project_zip_code=query.zip_code,
-                            project_type=query.project_type,
-                            company_name=place.get("displayName", {}).get("text", "Unknown"),
-                            phone=place.get("nationalPhoneNumber"),
-                            website=place.get("websiteUri"),
-                            address=place.get("formattedAddress", ""),
-                            city=city,
-                            state=state,
-                            zip_code=zip_code,
-                            google_place_id=place.get("id"),
-                            google_rating=place.get("rating"),
-                            google_review_count=place.get("userRatingCount", 0),
-                            google_types=place.get("types", []),
-                            google_business_status=place.get("businessStatus", ""),
-                            search_rank=len(contractors) + 1,
-                            match_score=self._calculate_match_score_new(place, query)
-                        )
-                        contractors.append(contractor)
-
-                        print(f"[WebSearchAgent] Added contractor: {contractor.company_name}")
-
-                        if len(contractors) >= max_results:
-                            break
-
-                elif response.status_code == 403:
-                    print("[WebSearchAgent ERROR] Google Maps API access denied. Check API key and billing.")
-                    break
-                else:
-                    print(f"[WebSearchAgent ERROR] Google Maps API error: {response.status_code} - {response.text}")
+                # Same term, type and location cell as an earlier search -> cached places
+                key = search_key(search_term, contractor_type, latitude, longitude, query.radius_miles, location_text)
+                places = self.place_cache.get_or_fetch(
+                    key,
+                    partial(self._fetch_places, text_query, contractor_type, latitude, longitude, query.radius_miles)
+                )
+                if places is None:
+                    continue
+
+                print(f"[WebSearchAgent] Google Maps returned {len(places)} results")
+
+                for place in places:
+                    # Filter out directory websites
+                    if self._is_directory_website(place):
+                        print(f"[WebSearchAgent] Skipping directory: {place.get('displayName', {}).get('text', 'Unknown')}")
+                        continue
+
+                    # Extract location info
+                    address_components = place.get("addressComponents", [])
+                    city, state, zip_code = self._extract_address_components(address_components)
+
+                    contractor = PotentialContractor(
+                        discovery_source="google_maps_new",
+                        source_query=text_query,
+                        project_zip_code=query.zip_code,
+                        project_type=query.project_type,
+                        company_name=place.get("displayName", {}).get("text", "Unknown"),
+                        phone=place.get("nationalPhoneNumber"),
+                        website=place.get("websiteUri"),
+                        address=place.get("formattedAddress", ""),
+                        city=city,
+                        state=state,
+                        zip_code=zip_code,
+                        google_place_id=place.get("id"),
+                        google_rating=place.get("rating"),
+                        google_review_count=place.get("userRatingCount", 0),
+                        google_types=place.get("types", []),
+                        google_business_status=place.get("businessStatus", ""),
+                        search_rank=len(contractors) + 1,
+                        match_score=self._calculate_match_score_new(place, query)
+                    )
+                    contractors.append(contractor)
+
+                    print(f"[WebSearchAgent] Added contractor: {contractor.company_name}")
+
+                    if len(contractors) >= max_results:
+                        break
 
             print(f"[WebSearchAgent] Google Maps found: {len(contractors)} real contractors")
             return contractors[:max_results]
@@ -563,6 +566,68 @@ class WebSearchContractorAgent:
             traceback.print_exc()
             return []
 
+    def _fetch_places(self, text_query: str, contractor_type: Optional[str],
+                      latitude: float, longitude: float, radius_miles: int) -> Optional[list[dict[str, Any]]]:
+        """
+        Run one Places Text Search, reusing cached place data where possible
+
+        An IDs-only search (a free SKU) comes first; when every returned place
+        is already cached the full-field search is skipped. Returns None on
+        API errors so the result isn't cached.
+        """
+        request_body = {
+            "textQuery": text_query,
+            "pageSize": 20,  # Always a full page so the cached result serves any max_results
+            "locationBias": {
+                "circle": {
+                    "center": {"latitude": latitude, "longitude": longitude},
+                    "radius": radius_miles * 1609.34  # Convert miles to meters
+                }
+            },
+            "includePureServiceAreaBusinesses": True,  # Include service-only businesses
+            "rankPreference": "RELEVANCE"
+        }
+
+        # Add type filter only if we have a valid contractor type
+        if contractor_type:
+            request_body["includedType"] = contractor_type
+
+        place_ids = self._post_places_search(request_body, "places.id")
+        if place_ids is None:
+            return None
+
+        ids = [place["id"] for place in place_ids if place.get("id")]
+        known = self.place_cache.get_places(ids)
+        if ids and len(known) == len(ids):
+            print(f"[WebSearchAgent] All {len(ids)} places already cached, skipping full search")
+            return [known[place_id] for place_id in ids]
+
+        places = self._post_places_search(request_body, PLACES_FIELD_MASK)
+        if places:
+            self.place_cache.put_places(places)
+        return places
+
+    def _post_places_search(self, request_body: dict[str, Any], field_mask: str) -> Optional[list[dict[str, Any]]]:
+        headers = {
+            "Content-Type": "application/json",
+            "X-Goog-Api-Key": self.google_api_key,
+            "X-Goog-FieldMask": field_mask
+        }
+
+        try:
+            response = self.http.post(PLACES_SEARCH_URL, headers=headers, json=request_body, timeout=PLACES_TIMEOUT)
+        except requests.RequestException as e:
+            print(f"[WebSearchAgent ERROR] Google Maps request failed: {e}")
+            return None
+
+        if response.status_code == 200:
+            return response.json().get("places", [])
+        elif response.status_code == 403:
+            print("[WebSearchAgent ERROR] Google Maps API access denied. Check API key and billing.")
+        else:
+            print(f"[WebSearchAgent ERROR] Google Maps API error: {response.status_code} - {response.text}")
+        return None
+
     def _search_web_directories(self, query: ContractorSearchQuery, max_results: int) -> list[PotentialContractor]:
         """Search web directories (Yelp, Angie's List, etc.) - Mock implementation for now"""
         # TODO: Implement actual web scraping
@@ -651,36 +716,21 @@ class WebSearchContractorAgent:
         }
         return type_mapping.get(project_type, [])
 
+    def _has_city_coordinates(self, city: str) -> bool:
+        return city.lower().strip() in CITY_COORDINATES
+
     def _get_city_coordinates(self, city: str, state: str) -> tuple:
         """Get approximate coordinates for a city (hardcoded for common FL cities)"""
-        # In production, use Google Geocoding API
-        coordinates = {
-            "coconut creek": (26.2517, -80.1789),
-            "boca raton": (26.3683, -80.1289),
-            "coral springs": (26.2706, -80.2706),
-            "pompano beach": (26.2379, -80.1248),
-            "deerfield beach": (26.3184, -80.0997),
-            "orlando": (28.5383, -81.3792),
-            "miami": (25.7617, -80.1918),
-            "tampa": (27.9506, -82.4572),
-            "jacksonville": (30.3322, -81.6557),
-            "fort lauderdale": (26.1224, -80.1373),
-            "tallahassee": (30.4518, -84.27277),
-            "parkland": (26.3106, -80.2372),
-            "margate": (26.2445, -80.2064),
-            "coral gables": (25.7218, -80.2685)
-        }
-
         city_key = city.lower().strip()
         
         # FIXED: If city not found, use actual Florida center (near Lakeland)
         # or better yet, raise an error so we know something's wrong
-        if city_key not in coordinates:
+        if city_key not in CITY_COORDINATES:
             print(f"[WebSearchAgent WARNING] City '{city}' not in coordinates database!")
             print(f"[WebSearchAgent] Defaulting to Miami area for safety")
             return (25.7617, -80.1918)  # Default to Miami instead of St. Petersburg
             
-        return coordinates.get(city_key)
+        return CITY_COORDINATES[city_key]
 
     def _is_directory_website(self, place: dict[str, Any]) -> bool:
         """Check if place is a directory website to avoid"""
@@ -823,48 +873,9 @@ class WebSearchContractorAgent:
         return min(100.0, score)
 
     def _store_potential_contractors(self, contractors: list[PotentialContractor], bid_card_id: str) -> list[dict[str, Any]]:
-        """Store contractors in potential_contractors table"""
-        stored_contractors = []
-
+        """Store contractors in potential_contractors table (one upsert, deduplicated per business)"""
         try:
-            for contractor in contractors:
-                # Convert dataclass to dict for Supabase
-                contractor_data = {
-                    "discovery_source": contractor.discovery_source,
-                    "source_query": contractor.source_query,
-                    "project_zip_code": contractor.project_zip_code,
-                    "project_type": contractor.project_type,
-                    "company_name": contractor.company_name,
-                    "contact_name": contractor.contact_name,
-                    "phone": contractor.phone,
-                    "email": contractor.email,
-                    "website": contractor.website,
-                    "address": contractor.address,
-                    "city": contractor.city,
-                    "state": contractor.state,
-                    "zip_code": contractor.zip_code,
-                    "google_place_id": contractor.google_place_id,
-                    "google_rating": contractor.google_rating,
-                    "google_review_count": contractor.google_review_count,
-                    "google_types": contractor.google_types,
-                    "google_business_status": contractor.google_business_status,
-                    "specialties": contractor.specialties,
-                    "years_in_business": contractor.years_in_business,
-                    "license_number": contractor.license_number,
-                    "insurance_verified": contractor.insurance_verified,
-                    "bonded": contractor.bonded,
-                    "search_rank": contractor.search_rank,
-                    "distance_miles": contractor.distance_miles,
-                    "match_score": contractor.match_score
-                }
-
-                # Insert into database
-                result = self.supabase.table("potential_contractors").insert(contractor_data).execute()
-
-                if result.data:
-                    stored_contractors.append(result.data[0])
-                    print(f"[WebSearchAgent] Stored: {contractor.company_name}")
-
+            stored_contractors = upsert_potential_contractors(self.supabase, contractors)
             print(f"[WebSearchAgent] Successfully stored {len(stored_contractors)} contractors")
             return stored_contractors
 
@@ -872,18 +883,12 @@ class WebSearchContractorAgent:
             print(f"[WebSearchAgent ERROR] Failed to store contractors: {e}")
             import traceback
             traceback.print_exc()
-            return stored_contractors
+            return []
 
     def get_discovered_contractors(self, project_zip_code: str, project_type: str) -> list[dict[str, Any]]:
         """Get previously discovered contractors for a location and project type"""
         try:
-            result = self.supabase.table("potential_contractors").select("*").eq(
-                "project_zip_code", project_zip_code
-            ).eq(
-                "project_type", project_type
-            ).order("match_score", desc=True).execute()
-
-            return result.data if result.data else []
+            return discovered_contractors(self.supabase, project_type, project_zip_code)
 
         except Exception as e:
             print(f"[WebSearchAgent ERROR] Failed to get discovered contractors: {e}")
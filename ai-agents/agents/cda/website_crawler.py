@@ -0,0 +1,170 @@
+"""
+Website Crawler
+Polite concurrent page fetcher for contractor website scraping
+
+One aiohttp session (shared connection pool) serves a whole batch. Requests
+run concurrently across hosts up to a global limit, while each host still
+gets at most one request per `per_host_delay` seconds. robots.txt is honored
+and both robots rules and fetched pages are cached process-wide, so repeated
+discovery runs don't hit the same sites again.
+"""
+import asyncio
+import os
+import time
+from typing import Any, Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+from utils.session_cache import SessionCache
+
+
+CRAWLER_CONCURRENCY = int(os.getenv("CRAWLER_CONCURRENCY", "20"))
+CRAWLER_HOST_DELAY = float(os.getenv("CRAWLER_HOST_DELAY", "1.0"))
+CRAWLER_TIMEOUT = float(os.getenv("CRAWLER_TIMEOUT", "10"))
+CRAWLER_FAILURE_TTL = int(os.getenv("CRAWLER_FAILURE_TTL", "60"))
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+
+# url -> page text (None for pages that aren't HTML)
+_page_cache = SessionCache("crawled_pages", max_entries=5000, ttl_seconds=3600, max_bytes=128 * 1024 * 1024)
+# urls whose last fetch failed; kept briefly so a transient error doesn't block retries for an hour
+_failed_pages = SessionCache("failed_pages", max_entries=5000, ttl_seconds=CRAWLER_FAILURE_TTL, sizer=lambda _: 64)
+# url -> (ETag, Last-Modified) of the last 200 response
+_validator_cache = SessionCache("page_validators", max_entries=5000, ttl_seconds=3600, sizer=lambda _: 256)
+# scheme://host -> RobotFileParser
+_robots_cache = SessionCache("robots_rules", max_entries=5000, ttl_seconds=24 * 3600, sizer=lambda _: 2048)
+
+_MISSING = object()
+
+
+class WebsiteCrawler:
+    """Async fetcher with global concurrency, per-host delay, robots.txt and caching"""
+
+    def __init__(self,
+                 headers: Optional[dict[str, str]] = None,
+                 max_concurrency: int = CRAWLER_CONCURRENCY,
+                 per_host_delay: float = CRAWLER_HOST_DELAY,
+                 timeout: float = CRAWLER_TIMEOUT):
+        self.headers = headers or {}
+        self.user_agent = self.headers.get("User-Agent", "*")
+        self.max_concurrency = max_concurrency
+        self.per_host_delay = per_host_delay
+        self.timeout = timeout
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._host_locks: dict[str, asyncio.Lock] = {}
+        self._host_next_slot: dict[str, float] = {}
+        self._robots_pending: dict[str, asyncio.Task] = {}
+
+    async def __aenter__(self) -> "WebsiteCrawler":
+        self._session = aiohttp.ClientSession(
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency, ttl_dns_cache=300)
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    async def fetch(self, url: str) -> Optional[str]:
+        """Page text for url, or None if it's disallowed, missing or not HTML"""
+        cached = _page_cache.get(url, _MISSING)
+        if cached is not _MISSING:
+            return cached
+        if url in _failed_pages:
+            return None
+
+        if not await self.allowed(url):
+            print(f"[WebsiteCrawler] robots.txt disallows {url}")
+            return None
+
+        try:
+            status, headers, body = await self._get(url)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"[WebsiteCrawler] Error accessing {url}: {e}")
+            _failed_pages[url] = True
+            return None
+
+        if status != 200:
+            _failed_pages[url] = True
+            return None
+
+        text = None
+        if "html" in headers.get("Content-Type", "").lower():
+            text = body
+            _validator_cache[url] = (headers.get("ETag"), headers.get("Last-Modified"))
+        _page_cache[url] = text
+        return text
+
+    def validators(self, url: str) -> tuple[Optional[str], Optional[str]]:
+        """(ETag, Last-Modified) from the last successful fetch of url"""
+        return _validator_cache.get(url) or (None, None)
+
+    async def revalidate(self, url: str, headers: dict[str, str]) -> bool:
+        """Conditional GET with If-None-Match / If-Modified-Since; True on 304 Not Modified"""
+        if not headers or not await self.allowed(url):
+            return False
+        try:
+            status, _, _ = await self._get(url, headers)
+            return status == 304
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"[WebsiteCrawler] Error revalidating {url}: {e}")
+            return False
+
+    async def allowed(self, url: str) -> bool:
+        """Check robots.txt for url (fetched once per host and shared by concurrent callers)"""
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+
+        rules = _robots_cache.get(origin)
+        if rules is None:
+            task = self._robots_pending.get(origin)
+            if task is None:
+                task = asyncio.ensure_future(self._load_robots(origin))
+                self._robots_pending[origin] = task
+                task.add_done_callback(lambda _: self._robots_pending.pop(origin, None))
+            rules = await task
+
+        return rules.can_fetch(self.user_agent, url)
+
+    async def _load_robots(self, origin: str) -> RobotFileParser:
+        rules = RobotFileParser(f"{origin}/robots.txt")
+        try:
+            status, _, body = await self._get(f"{origin}/robots.txt")
+            if status in (401, 403):
+                rules.disallow_all = True
+            elif status == 200:
+                rules.parse(body.splitlines())
+            else:
+                rules.allow_all = True
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            rules.allow_all = True
+
+        _robots_cache[origin] = rules
+        return rules
+
+    async def _get(self, url: str, headers: Optional[dict[str, str]] = None) -> tuple[int, Any, str]:
+        """One polite GET: waits for the host's next slot, then the global limit"""
+        await self._wait_for_host(urlparse(url).netloc.lower())
+        async with self._semaphore:
+            async with self._session.get(url, headers=headers, allow_redirects=True) as response:
+                body = await response.content.read(MAX_PAGE_BYTES)
+                text = body.decode(response.charset or "utf-8", errors="replace")
+                return response.status, response.headers, text
+
+    async def _wait_for_host(self, host: str):
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            next_slot = self._host_next_slot.get(host, now)
+            if next_slot > now:
+                await asyncio.sleep(next_slot - now)
+            self._host_next_slot[host] = max(now, next_slot) + self.per_host_delay
+
+    def stats(self) -> dict[str, Any]:
+        return {"pages": _page_cache.stats(), "robots": _robots_cache.stats()}
@@ -1,8 +1,10 @@
 """CIA (Customer Interface Agent) Implementation - Using Claude Opus 4"""
+import asyncio
 import json
 import os
 import sys
 import time
+from collections.abc import Awaitable, Callable
 from datetime import datetime
 from typing import Any, Optional
 
@@ -23,6 +25,18 @@ from agents.cia.new_state import (
     SERVICE_TYPE_KEYWORDS,
 )
 from agents.cia.prompts import get_conversation_prompt
+from utils.bid_card_preview import invalidate_bid_card_preview
+from utils.context_cache import (
+    bid_card_key,
+    cached_system_prompt,
+    context_cache,
+    invalidate_bid_card,
+)
+from utils.conversation_log import ConversationLog
+from utils.conversation_summarizer import ConversationSummarizer, make_anthropic_summarize
+from utils.fast_extract import SETTLED_CONFIDENCE, fast_extractor
+from utils.image_store import get_image_store
+from utils.session_cache import SessionCache
 
 
 # from memory.langgraph_integration import (
@@ -32,6 +46,20 @@ from agents.cia.prompts import get_conversation_prompt
 # Temporarily disabled to fix timeout issue
 
 
+# Per-call deadlines for Claude calls made during a turn (seconds)
+RESPONSE_TIMEOUT = 45.0
+EXTRACTION_TIMEOUT = 30.0
+ANALYSIS_TIMEOUT = 15.0
+
+# Only the most recent user messages with photos send image bytes to Claude;
+# earlier photos were already seen and are summarized as a text note
+IMAGE_HISTORY_TURNS = 1
+
+# Token budget for conversation history in a response prompt; older turns
+# are carried by a rolling summary
+HISTORY_TOKEN_BUDGET = int(os.getenv("CIA_HISTORY_TOKEN_BUDGET", "4000"))
+
+
 class CustomerInterfaceAgent:
     """CIA - Handles all homeowner interactions for project scoping"""
 
@@ -39,12 +67,15 @@ class CustomerInterfaceAgent:
         """Initialize the CIA with Claude Opus 4"""
         print(f"[CIA] Initializing with API key: {anthropic_api_key[:20]}...")
 
+        self.async_client = None
         if anthropic_api_key == "demo_key":
             self.client = None  # Demo mode
             print("[CIA] Running in DEMO mode - no API key provided")
         else:
             try:
                 self.client = anthropic.Anthropic(api_key=anthropic_api_key)
+                # Async client for streaming responses without blocking the event loop
+                self.async_client = anthropic.AsyncAnthropic(api_key=anthropic_api_key)
                 print("[CIA] Successfully initialized Anthropic client")
             except Exception as e:
                 print(f"[CIA ERROR] Failed to initialize Anthropic client: {e}")
@@ -62,10 +93,26 @@ class CustomerInterfaceAgent:
         self.supabase_url = os.getenv("SUPABASE_URL")
         self.supabase_key = os.getenv("SUPABASE_ANON_KEY")
         self.supabase = create_client(self.supabase_url, self.supabase_key)
+        self.conversation_log = ConversationLog(self.supabase)
+        # Rolling summary of turns that no longer fit the history budget
+        self.summarizer = ConversationSummarizer(
+            "cia",
+            make_anthropic_summarize(self.async_client) if self.async_client else None,
+            token_budget=HISTORY_TOKEN_BUDGET
+        )
+
+        # Photos are kept in state as content-addressed references, not base64
+        self.image_store = get_image_store(self.supabase)
         print("[CIA] Initialized Supabase connection")
 
-        # In-memory session storage (in production, use database)
-        self.sessions = {}
+        # Bounded in-memory session storage; evicted sessions reload from agent_conversations
+        self.sessions = SessionCache(
+            "cia_sessions",
+            max_entries=int(os.getenv("CIA_SESSION_CACHE_MAX", "1000")),
+            ttl_seconds=float(os.getenv("CIA_SESSION_CACHE_TTL", "3600")),
+            max_bytes=int(os.getenv("CIA_SESSION_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+            loader=self._load_session_from_database
+        )
 
     async def handle_conversation(
         self,
@@ -74,9 +121,39 @@ class CustomerInterfaceAgent:
         images: Optional[list[str]] = None,
         session_id: Optional[str] = None,
         existing_state: Optional[dict[str, Any]] = None,
-        project_id: Optional[str] = None
+        project_id: Optional[str] = None,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None
     ) -> dict[str, Any]:
-        """Main entry point for handling user conversations - now project-aware"""
+        """
+        Main entry point for handling user conversations - now project-aware
+
+        When on_token is given, the Claude response is streamed and each text
+        delta is passed to it as it arrives; the return value is unchanged.
+
+        Modification analysis only depends on the message, so it starts right
+        away and runs alongside the bid card lookup and mode detection.
+        """
+        modification_task = asyncio.create_task(self._analyze_modification_with_claude(message, {}))
+        try:
+            return await self._handle_conversation_turn(
+                user_id, message, images, session_id, existing_state, project_id, on_token, modification_task
+            )
+        finally:
+            if not modification_task.done():
+                modification_task.cancel()
+
+    async def _handle_conversation_turn(
+        self,
+        user_id: str,
+        message: str,
+        images: Optional[list[str]],
+        session_id: Optional[str],
+        existing_state: Optional[dict[str, Any]],
+        project_id: Optional[str],
+        on_token: Optional[Callable[[str], Awaitable[None]]],
+        modification_task: "asyncio.Task[dict[str, Any]]"
+    ) -> dict[str, Any]:
+        """Run one conversation turn (see handle_conversation)"""
         print(f"\n[CIA] Handling conversation - User: {user_id}, Session: {session_id}")
         print(f"[CIA] Project ID: {project_id}")
         print(f"[CIA] Message: {message}")
@@ -90,7 +167,7 @@ class CustomerInterfaceAgent:
             state = self._migrate_to_new_structure(state)
             self.sessions[session_id] = state
             print(f"[CIA] Restored session from database: {session_id}")
-        elif not session_id or session_id not in self.sessions:
+        elif not session_id or await self.sessions.aget(session_id) is None:
             # Create new session - preserve provided session_id if given
             if not session_id:
                 session_id = f"session_{user_id}_{datetime.now().timestamp()}"
@@ -131,7 +208,7 @@ class CustomerInterfaceAgent:
             print(f"[CIA] ACTION MODE: State keys: {list(state.keys())}")
 
             # Check if this is a modification using Claude intelligence
-            modification_analysis = await self._analyze_modification_with_claude(message, state)
+            modification_analysis = await modification_task
             is_modification = modification_analysis.get("is_modification", False)
 
             if is_modification:
@@ -237,7 +314,9 @@ class CustomerInterfaceAgent:
             except Exception as e:
                 print(f"[CIA] Warning: Could not load project summaries: {e}")
 
-            project_decision = await self._determine_project_intent(user_id, message)
+            project_decision = await self._determine_project_intent(
+                user_id, message, state.get("user_project_summaries")
+            )
             if project_decision:
                 print(f"[CIA] Project decision: {project_decision}")
                 if project_decision.get("action") == "ask_clarification":
@@ -267,7 +346,9 @@ class CustomerInterfaceAgent:
         # Check if project_id is actually a bid card number
         if project_id and (project_id.startswith(("IBC-", "BC-"))):
             print(f"[CIA] Project ID is a bid card number: {project_id}")
-            bid_card_context = await self._get_bid_card_details(project_id)
+            bid_card_context = await context_cache.get_or_build(
+                bid_card_key(project_id), lambda: self._get_bid_card_details(project_id)
+            )
             if bid_card_context:
                 print(f"[CIA] Loaded bid card context for {project_id}")
                 # Add bid card to state for context awareness
@@ -319,7 +400,9 @@ class CustomerInterfaceAgent:
                             "description": f"User uploaded photo {idx + 1}"
                         }
 
-                        result = self.supabase.table("photo_storage").insert(photo_record).execute()
+                        result = await asyncio.to_thread(
+                            self.supabase.table("photo_storage").insert(photo_record).execute
+                        )
 
                         if result.data:
                             photo_id = result.data[0]["id"]
@@ -344,6 +427,13 @@ class CustomerInterfaceAgent:
                 print(f"[CIA] Error in image storage process: {e}")
                 images = []  # Continue without images
 
+        # Replace inline base64 with image store references before it enters state
+        if images:
+            try:
+                images = await asyncio.to_thread(self.image_store.offload, images)
+            except Exception as e:
+                print(f"[CIA] Warning: Could not offload images, keeping them inline: {e}")
+
         # Add user message
         state["messages"].append({
             "role": "user",
@@ -365,7 +455,7 @@ class CustomerInterfaceAgent:
                         await db.save_project_photo(
                             user_id=user_id,
                             project_id=state["active_bid_card"],
-                            photo_url=photo_url,
+                            photo_url=self.image_store.display_url(photo_url),
                             description="User uploaded project photo"
                         )
                     print(f"[CIA] Saved {len(images)} photos to database for project {state['active_bid_card']}")
@@ -373,7 +463,9 @@ class CustomerInterfaceAgent:
                     print(f"[CIA] Warning: Could not save photos to database: {e}")
 
         # Check for modification requests before generating response
-        modification_result = await self._handle_modification_requests(user_id, message, state)
+        modification_result = await self._handle_modification_requests(
+            user_id, message, state, await modification_task
+        )
         if modification_result:
             return modification_result
 
@@ -381,17 +473,29 @@ class CustomerInterfaceAgent:
         start_time = time.time()
 
         if self.client:
-            print("[CIA] Using Claude API for response...")
-            response_text = await self._generate_claude_response(state)
+            # Build the prompt from pre-extraction state, then run the response
+            # and extraction calls concurrently
+            request = await self._build_claude_request(state)
+            if on_token:
+                print("[CIA] Streaming Claude API response...")
+                response_call = self._stream_claude_response(state, on_token, request)
+            else:
+                print("[CIA] Using Claude API for response...")
+                response_call = self._generate_claude_response(state, request)
+
+            response_text, _ = await asyncio.gather(
+                response_call,
+                self._extract_and_update_info(state, message)
+            )
         else:
             print("[CIA] Using demo response (no API client)...")
             response_text = self._generate_demo_response(state)
 
-        response_time = time.time() - start_time
-        print(f"[CIA] Response generated in {response_time:.2f} seconds")
+            # Extract information using basic rules
+            await self._extract_and_update_info(state, message)
 
-        # Extract information using Claude Opus 4
-        await self._extract_and_update_info(state, message)
+        response_time = time.time() - start_time
+        print(f"[CIA] Response and extraction completed in {response_time:.2f} seconds")
 
         # Add assistant response
         state["messages"].append({
@@ -564,22 +668,85 @@ class CustomerInterfaceAgent:
 
         return state
 
-    async def _generate_claude_response(self, state: dict[str, Any]) -> str:
+    async def _create_message(self, timeout: float, **kwargs) -> Any:
+        """Make a Claude call on the async client with a hard deadline"""
+        return await asyncio.wait_for(self.async_client.messages.create(**kwargs), timeout)
+
+    async def _generate_claude_response(self, state: dict[str, Any],
+                                        request: Optional[tuple[list[dict[str, Any]], list[dict[str, Any]]]] = None) -> str:
         """Generate response using Claude Opus 4 API"""
-        print("[CIA] _generate_claude_response called")
+        system_prompt, messages = request or await self._build_claude_request(state)
+
+        try:
+            print("[CIA] Calling Claude API...")
+            response = await self._create_message(
+                RESPONSE_TIMEOUT,
+                model="claude-opus-4-20250514",  # Updated to Claude Opus 4
+                max_tokens=1000,
+                temperature=0.7,
+                system=system_prompt,
+                messages=messages
+            )
+            print("[CIA] Claude API call successful")
+            return response.content[0].text
+        except Exception as e:
+            print(f"[CIA ERROR] Claude API error: {e}")
+            print(f"[CIA ERROR] Error type: {type(e).__name__}")
+            print("[CIA] Falling back to demo response")
+            return self._generate_demo_response(state)
+
+    async def _stream_claude_response(self, state: dict[str, Any],
+                                      on_token: Callable[[str], Awaitable[None]],
+                                      request: Optional[tuple[list[dict[str, Any]], list[dict[str, Any]]]] = None) -> str:
+        """Stream a Claude Opus 4 response, passing each text delta to on_token"""
+        system_prompt, messages = request or await self._build_claude_request(state)
+
+        chunks = []
+        try:
+            async with self.async_client.messages.stream(
+                model="claude-opus-4-20250514",
+                max_tokens=1000,
+                temperature=0.7,
+                system=system_prompt,
+                messages=messages
+            ) as stream:
+                async for text in stream.text_stream:
+                    chunks.append(text)
+                    await on_token(text)
+            print("[CIA] Claude API stream complete")
+            return "".join(chunks)
+        except Exception as e:
+            print(f"[CIA ERROR] Claude API stream error: {e}")
+            if chunks:
+                # Keep what the user already saw
+                return "".join(chunks)
+            print("[CIA] Falling back to demo response")
+            fallback = self._generate_demo_response(state)
+            await on_token(fallback)
+            return fallback
+
+    async def _build_claude_request(self, state: dict[str, Any]) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        """Assemble the system prompt and message list for a response call"""
+        print("[CIA] _build_claude_request called")
         print(f"[CIA] Has bid_card_context: {'bid_card_context' in state}")
         if "bid_card_context" in state:
             print(f"[CIA] Bid card number: {state['bid_card_context'].get('bid_card_number')}")
 
         messages = []
 
-        # Add conversation context
-        total_messages = len(state["messages"])
+        # Recent turns within the token budget; everything older is summarized
+        summary_key = state.get("session_id") or state.get("user_id", "")
+        summary, recent_messages = self.summarizer.window(
+            summary_key, state["messages"], state.get("conversation_summary")
+        )
+        state["conversation_summary"] = self.summarizer.get_summary(summary_key)
 
-        # If long conversation, add a simple summary of key facts
-        if total_messages > 20:
+        # If earlier turns were left out, add a summary plus the key facts
+        if len(recent_messages) < len(state["messages"]):
             # Build a quick context summary from collected info
             context_summary = "Earlier in this conversation:\n"
+            if summary:
+                context_summary += f"{summary}\n"
 
             # Add key project details if available
             if state.get("collected_info"):
@@ -601,35 +768,28 @@ class CustomerInterfaceAgent:
                 "content": f"[Context from earlier messages: {context_summary}]"
             })
 
-        # Add last 10 messages
-        for msg in state["messages"][-10:]:  # Last 10 messages
+        image_messages = [i for i, msg in enumerate(recent_messages) if msg["role"] == "user" and msg.get("images")]
+        send_images_from = image_messages[-IMAGE_HISTORY_TURNS] if image_messages else len(recent_messages)
+
+        for idx, msg in enumerate(recent_messages):
             if msg["role"] == "user":
-                if msg.get("images") and len(msg["images"]) > 0:
-                    # Handle image messages - convert base64 to proper format for Claude
+                if msg.get("images") and idx < send_images_from:
+                    # Photos from earlier turns were already analyzed; don't resend the bytes
+                    messages.append({
+                        "role": "user",
+                        "content": f"{msg['content']}\n[{len(msg['images'])} photo(s) shared earlier]"
+                    })
+                elif msg.get("images") and len(msg["images"]) > 0:
+                    # Materialize image references (or legacy inline base64) for Claude;
+                    # photo_id references are stored in the DB and skipped
                     content = [{"type": "text", "text": msg["content"]}]
-                    has_valid_images = False
-
                     for image_data in msg["images"]:
-                        # Skip photo_id references (these are stored in DB)
-                        if image_data.startswith("photo_id:"):
-                            continue
-                        elif image_data.startswith("data:image/"):
-                            # Extract media type and base64 data
-                            header, base64_data = image_data.split(",", 1)
-                            media_type = header.split(":")[1].split(";")[0]
-
-                            content.append({
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": media_type,
-                                    "data": base64_data
-                                }
-                            })
-                            has_valid_images = True
+                        block = await asyncio.to_thread(self.image_store.to_claude_block, image_data)
+                        if block:
+                            content.append(block)
 
                     # Only add message with images if we have actual image content
-                    if has_valid_images:
+                    if len(content) > 1:
                         messages.append({
                             "role": "user",
                             "content": content
@@ -651,13 +811,18 @@ class CustomerInterfaceAgent:
                     "content": msg["content"]
                 })
 
-        # Use NEW InstaBids-focused system prompt
-        system_prompt = NEW_SYSTEM_PROMPT
+        # Per-session context (bid card, projects, preferences); sits between the
+        # static NEW_SYSTEM_PROMPT and the per-turn phase prompt so both the
+        # global and the session prefix hit the provider prompt cache
+        session_context = ""
 
         # Add active bid card context if available
         if state.get("active_bid_card"):
-            # Always refresh bid card details to get latest updates
-            fresh_bid_card = await self._get_bid_card_details(state["active_bid_card"])
+            # Cached per bid card; invalidated when the bid card is modified
+            fresh_bid_card = await context_cache.get_or_build(
+                bid_card_key(state["active_bid_card"]),
+                lambda: self._get_bid_card_details(state["active_bid_card"])
+            )
             if fresh_bid_card:
                 state["bid_card_context"] = fresh_bid_card
 
@@ -688,7 +853,7 @@ class CustomerInterfaceAgent:
                         bid_info += f"\nSpecial Requirements: {', '.join(data['special_requirements'])}"
 
             bid_info += "\n\nThe user is asking about modifying this specific bid card. Acknowledge the project details and help them with their modifications."
-            system_prompt += bid_info
+            session_context += bid_info
 
         # Add user's project summaries for general conversation context
         if state.get("user_project_summaries"):
@@ -706,8 +871,8 @@ class CustomerInterfaceAgent:
                     project_info += f" - Features: {features}"
                 projects_info.append(project_info)
 
-            system_prompt += f"\n\nUSER'S CURRENT PROJECTS:\n{chr(10).join(projects_info)}"
-            system_prompt += "\n\nWhen the user asks about their projects, reference these specific details to show you remember their work."
+            session_context += f"\n\nUSER'S CURRENT PROJECTS:\n{chr(10).join(projects_info)}"
+            session_context += "\n\nWhen the user asks about their projects, reference these specific details to show you remember their work."
 
         # Add project awareness to system prompt if available
         if state.get("project_context"):
@@ -718,13 +883,13 @@ class CustomerInterfaceAgent:
                 user_prefs = project_ctx["user_preferences"]
                 if user_prefs.get("communication_preferences"):
                     comm_style = user_prefs["communication_preferences"].get("preferred_communication_style", "detailed")
-                    system_prompt += f"\n\nUser Communication Preference: {comm_style}"
+                    session_context += f"\n\nUser Communication Preference: {comm_style}"
 
                 if user_prefs.get("budget_preferences"):
                     budget_info = user_prefs["budget_preferences"]
                     if budget_info.get("recent_budget_ranges"):
                         recent_budgets = budget_info["recent_budget_ranges"][-3:]  # Last 3
-                        system_prompt += f"\n\nUser's Recent Budget Ranges: {recent_budgets}"
+                        session_context += f"\n\nUser's Recent Budget Ranges: {recent_budgets}"
 
             # Add related projects context
             if project_ctx.get("related_projects", {}).get("related_projects"):
@@ -732,40 +897,24 @@ class CustomerInterfaceAgent:
                 related_info = []
                 for proj in related:
                     related_info.append(f"{proj['title']} ({proj['category']})")
-                system_prompt += f"\n\nUser's Other Projects: {', '.join(related_info)}"
+                session_context += f"\n\nUser's Other Projects: {', '.join(related_info)}"
 
                 # Add analysis for intelligent questions
                 analysis = project_ctx["related_projects"].get("analysis", "")
                 if analysis:
-                    system_prompt += f"\n\nProject Context: {analysis}"
+                    session_context += f"\n\nProject Context: {analysis}"
 
-        system_prompt += "\n\n" + get_conversation_prompt(
+        phase_prompt = get_conversation_prompt(
             state["current_phase"],
             {"collected_info": state["collected_info"], "missing_fields": state.get("missing_fields", [])}
         )
 
-        try:
-            print("[CIA] Calling Claude API...")
-            response = self.client.messages.create(
-                model="claude-opus-4-20250514",  # Updated to Claude Opus 4
-                max_tokens=1000,
-                temperature=0.7,
-                system=system_prompt,
-                messages=messages
-            )
-            print("[CIA] Claude API call successful")
-            return response.content[0].text
-        except Exception as e:
-            print(f"[CIA ERROR] Claude API error: {e}")
-            print(f"[CIA ERROR] Error type: {type(e).__name__}")
-            print("[CIA] Falling back to demo response")
-            return self._generate_demo_response(state)
+        system_prompt = cached_system_prompt(NEW_SYSTEM_PROMPT, session_context.strip(), phase_prompt, cached_blocks=2)
+
+        return system_prompt, messages
 
     def _generate_demo_response(self, state: dict[str, Any]) -> str:
         """Generate intelligent responses without API"""
-        # Add artificial delay to simulate API call
-        time.sleep(0.5)
-
         last_message = state["messages"][-1]["content"] if state["messages"] else ""
         phase = state["current_phase"]
         collected = state["collected_info"]
@@ -822,30 +971,57 @@ class CustomerInterfaceAgent:
             return "Is there anything else about your project you'd like me to know? Any specific concerns or must-have features?"
 
     async def _extract_and_update_info(self, state: dict[str, Any], message: str) -> None:
-        """Extract information using Claude Opus 4 intelligence"""
+        """Extract information: deterministic rules first, Claude Opus 4 for the rest"""
         collected = state["collected_info"]
 
-        # Use Claude Opus 4 for intelligent information extraction
-        if self.client:
+        # Tier 1: compiled rules for ZIP, budget, urgency, dates and project type
+        matches = fast_extractor.extract(message)
+        # Confidence of rule values Claude may still correct (e.g. a ZIP read from a busy sentence)
+        unsettled = state.setdefault("fast_extracted_fields", {})
+        for key, value in fast_extractor.confident(matches).items():
+            if not collected.get(key):
+                collected[key] = value
+                if matches[key].confidence < SETTLED_CONFIDENCE:
+                    unsettled[key] = matches[key].confidence
+                print(f"[CIA] Fast-extracted {key}: {value}")
+
+        if fast_extractor.covers(message, matches):
+            # Nothing left for the model to find in this turn
+            print("[CIA] Turn covered by fast extraction, skipping Claude extraction")
+        elif self.client:
             try:
                 extracted_info = await self._claude_extract_information(message, collected)
 
                 # Update collected info with extracted data
                 for key, value in extracted_info.items():
-                    if value and not collected.get(key):  # Only update if we don't have it yet
+                    if not value:
+                        continue
+                    if not collected.get(key):  # Only update if we don't have it yet
                         collected[key] = value
                         print(f"[CIA] Extracted {key}: {value}")
+                    elif key in unsettled and value != collected[key]:
+                        print(f"[CIA] Claude corrected {key}: {collected[key]} -> {value}")
+                        collected[key] = value
+                    unsettled.pop(key, None)
 
             except Exception as e:
                 print(f"[CIA] Claude extraction failed: {e}, falling back to basic extraction")
+                self._apply_tentative_matches(collected, matches)
                 self._basic_extract_and_update_info(state, message)
         else:
             # Fallback to basic extraction
+            self._apply_tentative_matches(collected, matches)
             self._basic_extract_and_update_info(state, message)
 
         # Update state
         state["collected_info"] = collected
 
+    def _apply_tentative_matches(self, collected: dict[str, Any], matches: dict) -> None:
+        """Use low-confidence rule matches when there is no model answer to prefer"""
+        for key, value in fast_extractor.tentative(matches).items():
+            if not collected.get(key):
+                collected[key] = value
+
     async def _claude_extract_information(self, message: str, existing_info: dict) -> dict[str, Any]:
         """Use Claude Opus 4 to intelligently extract InstaBids project information"""
 
@@ -917,7 +1093,8 @@ Return valid JSON only.
 """
 
         try:
-            response = self.client.messages.create(
+            response = await self._create_message(
+                EXTRACTION_TIMEOUT,
                 model="claude-opus-4-20250514",
                 max_tokens=1000,
                 temperature=0.1,
@@ -944,14 +1121,16 @@ Return valid JSON only.
             print(f"[CIA] Claude information extraction failed: {e}")
             return {}
 
-    async def _determine_project_intent(self, user_id: str, message: str) -> Optional[dict[str, Any]]:
+    async def _determine_project_intent(self, user_id: str, message: str,
+                                        summaries: Optional[list[dict[str, Any]]] = None) -> Optional[dict[str, Any]]:
         """Determine if user wants to continue existing project or create new one"""
         try:
-            from memory.multi_project_store import MultiProjectMemoryStore
-            store = MultiProjectMemoryStore()
+            if summaries is None:
+                from memory.multi_project_store import MultiProjectMemoryStore
+                store = MultiProjectMemoryStore()
 
-            # Get user's existing projects
-            summaries = await store.get_user_projects_summary(user_id)
+                # Get user's existing projects
+                summaries = await store.get_user_projects_summary(user_id)
 
             if not summaries:
                 # No existing projects - definitely new
@@ -993,7 +1172,8 @@ Return JSON response:
     "response": "if ask_clarification - exact question to ask user"
 }}"""
 
-            response = self.client.messages.create(
+            response = await self._create_message(
+                ANALYSIS_TIMEOUT,
                 model="claude-opus-4-20250514",
                 max_tokens=400,
                 temperature=0.1,
@@ -1181,11 +1361,13 @@ Return JSON response:
         else:
             state["current_phase"] = "complete"
 
-    async def _handle_modification_requests(self, user_id: str, message: str, state: dict[str, Any]) -> Optional[dict[str, Any]]:
+    async def _handle_modification_requests(self, user_id: str, message: str, state: dict[str, Any],
+                                            modification_analysis: Optional[dict[str, Any]] = None) -> Optional[dict[str, Any]]:
         """Handle bid card modification requests through CIA orchestration"""
 
         # Use Claude Opus 4 to intelligently detect modifications
-        modification_analysis = await self._analyze_modification_with_claude(message, state)
+        if modification_analysis is None:
+            modification_analysis = await self._analyze_modification_with_claude(message, state)
 
         if not modification_analysis.get("is_modification", False):
             return None  # Not a modification request
@@ -1370,7 +1552,8 @@ Return JSON:
 
 Only return modifications that are clearly stated in the message."""
 
-            response = self.client.messages.create(
+            response = await self._create_message(
+                ANALYSIS_TIMEOUT,
                 model="claude-opus-4-20250514",
                 max_tokens=600,
                 temperature=0.1,
@@ -1403,18 +1586,21 @@ Only return modifications that are clearly stated in the message."""
 
             # Get bid cards through conversations only (bid_cards table doesn't have user_id column)
             # Method 1: Get through conversations
-            conversations = db.client.table("agent_conversations").select("thread_id").eq("user_id", user_id).execute()
-
-            if conversations.data:
+            def query() -> list[dict[str, Any]]:
+                conversations = db.client.table("agent_conversations").select("thread_id").eq("user_id", user_id).execute()
+                if not conversations.data:
+                    return []
                 thread_ids = [c["thread_id"] for c in conversations.data]
                 thread_cards = db.client.table("bid_cards").select("*").in_("cia_thread_id", thread_ids).order("created_at", desc=True).execute()
-            else:
-                thread_cards = {"data": []}
+                return thread_cards.data or []
+
+            # Blocking Supabase calls run off the event loop
+            thread_cards = await asyncio.to_thread(query)
 
             # Return thread cards if found
-            if thread_cards.data:
-                print(f"[CIA] Found {len(thread_cards.data)} bid cards for user through conversations")
-                return thread_cards.data
+            if thread_cards:
+                print(f"[CIA] Found {len(thread_cards)} bid cards for user through conversations")
+                return thread_cards
             else:
                 print("[CIA] No bid cards found for user")
                 return []
@@ -1444,7 +1630,9 @@ Only return modifications that are clearly stated in the message."""
         """Get existing bid card details for validation"""
         try:
             from database_simple import db
-            result = db.client.table("bid_cards").select("*").eq("bid_card_number", bid_card_number).single().execute()
+            result = await asyncio.to_thread(
+                db.client.table("bid_cards").select("*").eq("bid_card_number", bid_card_number).single().execute
+            )
             return result.data if result.data else {}
         except Exception as e:
             print(f"[CIA] Error getting bid card details: {e}")
@@ -1458,7 +1646,9 @@ Only return modifications that are clearly stated in the message."""
             print(f"[CIA] Applying modifications to bid card {bid_card_number}: {modifications}")
 
             # Get current bid card details
-            bid_card_result = db.client.table("bid_cards").select("*").eq("bid_card_number", bid_card_number).execute()
+            bid_card_result = await asyncio.to_thread(
+                db.client.table("bid_cards").select("*").eq("bid_card_number", bid_card_number).execute
+            )
 
             if not bid_card_result.data:
                 return {"success": False, "error": f"Bid card {bid_card_number} not found"}
@@ -1484,9 +1674,13 @@ Only return modifications that are clearly stated in the message."""
 
             if updates:
                 # Update the bid card in database
-                update_result = db.client.table("bid_cards").update(updates).eq("bid_card_number", bid_card_number).execute()
+                update_result = await asyncio.to_thread(
+                    db.client.table("bid_cards").update(updates).eq("bid_card_number", bid_card_number).execute
+                )
 
                 if update_result.data:
+                    invalidate_bid_card(bid_card_number)
+                    invalidate_bid_card_preview(update_result.data[0].get("id"))
                     print(f"[CIA] Successfully updated bid card {bid_card_number}")
                     return {
                         "success": True,
@@ -1587,7 +1781,8 @@ Only return modifications that are clearly stated in the message."""
             if not self.client:
                 return {"is_modification": False, "confidence": 0.0}
 
-            response = self.client.messages.create(
+            response = await self._create_message(
+                ANALYSIS_TIMEOUT,
                 model="claude-3-5-sonnet-20241022",
                 max_tokens=500,
                 temperature=0.1,
@@ -1866,30 +2061,34 @@ Only return modifications that are clearly stated in the message."""
             "bid_card_number": state.get("bid_card_number")
         }
 
-    async def _save_conversation_to_database(self, state: dict[str, Any], user_id: str, session_id: str):
-        """Save conversation state to database for JAA processing"""
+    async def _load_session_from_database(self, session_id: str) -> Optional[dict[str, Any]]:
+        """Reload a session evicted from memory from its persisted conversation state"""
         try:
-            conversation_data = {
-                "thread_id": session_id,
-                "user_id": user_id,
-                "agent_type": "CIA",
-                "state": json.dumps(state),
-                "created_at": datetime.now().isoformat()
-            }
+            conversation = await asyncio.to_thread(self.conversation_log.load, session_id)
+            if not conversation or not conversation.get("state"):
+                return None
 
-            # Check if conversation already exists
-            existing = self.supabase.table("agent_conversations").select("*").eq("thread_id", session_id).execute()
+            print(f"[CIA] Reloaded session from database: {session_id}")
+            return self._migrate_to_new_structure(conversation["state"])
 
-            if existing.data:
-                # Update existing conversation
-                result = self.supabase.table("agent_conversations").update(conversation_data).eq("thread_id", session_id).execute()
-                print(f"[CIA] Updated existing conversation in database: {session_id}")
-            else:
-                # Insert new conversation
-                result = self.supabase.table("agent_conversations").insert(conversation_data).execute()
-                print(f"[CIA] Inserted new conversation to database: {session_id}")
+        except Exception as e:
+            print(f"[CIA] Could not reload session {session_id}: {e}")
+            return None
+
+    async def _save_conversation_to_database(self, state: dict[str, Any], user_id: str, session_id: str):
+        """Save conversation state to database for JAA processing
 
-            return result.data[0] if result.data else None
+        Only this turn's new messages are appended to the turn log; the rest
+        of the state is written as one snapshot upsert.
+        """
+        try:
+            print(f"[CIA] Saving conversation to database: {session_id}")
+            return await asyncio.to_thread(
+                self.conversation_log.save,
+                session_id,
+                state,
+                {"user_id": user_id, "agent_type": "CIA"}
+            )
 
         except Exception as e:
             print(f"[CIA] Error saving conversation to database: {e}")
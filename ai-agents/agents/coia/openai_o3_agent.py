@@ -17,6 +17,8 @@ from dotenv import load_dotenv
 from openai import OpenAI
 from supabase import Client, create_client
 
+from utils.conversation_summarizer import ConversationSummarizer, make_openai_summarize, message_role, message_text
+
 from .persistent_memory import persistent_coia_state_manager
 from .state import CoIAConversationState
 
@@ -26,6 +28,9 @@ load_dotenv(override=True)
 
 logger = logging.getLogger(__name__)
 
+# History budget for the understanding prompt; earlier turns go into a rolling summary
+UNDERSTANDING_HISTORY_TOKEN_BUDGET = 1500
+
 @dataclass
 class RealBusinessData:
     """Real business data from web research"""
@@ -64,6 +69,9 @@ class OpenAIO3CoIA:
             raise ValueError("OpenAI API key not found. Please set OPENAI_API_KEY environment variable.")
 
         self.client = OpenAI(api_key=openai_key)
+        self.summarizer = ConversationSummarizer(
+            "coia_o3", make_openai_summarize(self.client), token_budget=UNDERSTANDING_HISTORY_TOKEN_BUDGET
+        )
         logger.info("OpenAI O3 CoIA initialized")
 
         # Initialize Supabase
@@ -166,16 +174,15 @@ class OpenAIO3CoIA:
     async def _understand_with_o3(self, message: str, state: CoIAConversationState) -> dict[str, Any]:
         """Use OpenAI O3 to understand the user's message with advanced reasoning"""
 
-        # Build conversation history for context
+        # Build conversation history for context: rolling summary + recent turns within budget
         history = []
         if hasattr(state, "messages") and state.messages:
-            for msg in state.messages[-5:]:  # Last 5 messages for context
-                # Handle ConversationMessage object
-                if hasattr(msg, "role") and hasattr(msg, "content"):
-                    history.append(f"{msg.role}: {msg.content}")
-                else:
-                    # Fallback for dict-like objects
-                    history.append(f"{msg.get('role', 'unknown')}: {msg.get('content', '')}")
+            # The current message is passed separately
+            summary, recent = self.summarizer.window(state.session_id, state.messages[:-1])
+            if summary:
+                history.append(f"Summary of earlier conversation: {summary}")
+            for msg in recent:
+                history.append(f"{message_role(msg)}: {message_text(msg)}")
 
         history_text = "\n".join(history) if history else "No previous conversation"
 
@@ -12,6 +12,9 @@ from typing import Any, Optional
 from dotenv import load_dotenv
 from supabase import Client, create_client
 
+from utils.conversation_log import ConversationLog
+from utils.session_cache import SessionCache
+
 from .state import CoIAConversationState, ContractorProfile, ConversationMessage
 
 
@@ -31,12 +34,14 @@ class CoIAPersistentMemory:
         if not supabase_url or not supabase_key:
             logger.warning("Supabase not available - memory will not persist")
             self.supabase = None
+            self.conversation_log = None
         else:
             self.supabase: Client = create_client(supabase_url, supabase_key)
+            self.conversation_log = ConversationLog(self.supabase)
             logger.info("CoIA Persistent Memory initialized with Supabase")
 
     async def save_conversation_state(self, state: CoIAConversationState) -> bool:
-        """Save complete conversation state to database"""
+        """Save conversation state to database (new messages + state snapshot)"""
         if not self.supabase:
             logger.warning("No database connection - state not saved")
             return False
@@ -45,34 +50,14 @@ class CoIAPersistentMemory:
             # Convert state to JSON-serializable format
             state_data = self._serialize_state(state)
 
-            # Check if conversation already exists
-            existing = self.supabase.table("agent_conversations").select("*").eq(
-                "thread_id", state.session_id
-            ).execute()
-
-            conversation_data = {
+            # New messages go to the turn log; the rest is one snapshot upsert
+            result = self.conversation_log.save(state.session_id, state_data, {
                 "user_id": state.user_id or "00000000-0000-0000-0000-000000000000",  # Use auth user ID
-                "agent_type": "coia",
-                "thread_id": state.session_id,
-                "state": state_data,
-                "updated_at": datetime.utcnow().isoformat()
-            }
-
-            if existing.data:
-                # Update existing conversation
-                result = self.supabase.table("agent_conversations").update(
-                    conversation_data
-                ).eq("thread_id", state.session_id).execute()
-                logger.info(f"Updated contractor conversation: {state.session_id}")
-            else:
-                # Create new conversation
-                conversation_data["created_at"] = datetime.utcnow().isoformat()
-                result = self.supabase.table("agent_conversations").insert(
-                    conversation_data
-                ).execute()
-                logger.info(f"Saved new contractor conversation: {state.session_id}")
+                "agent_type": "coia"
+            })
+            logger.info(f"Saved contractor conversation: {state.session_id}")
 
-            return result.data is not None
+            return result is not None
 
         except Exception as e:
             logger.error(f"Error saving contractor conversation: {e}")
@@ -85,12 +70,9 @@ class CoIAPersistentMemory:
             return None
 
         try:
-            result = self.supabase.table("agent_conversations").select("*").eq(
-                "thread_id", session_id
-            ).eq("agent_type", "coia").execute()
+            conversation = self.conversation_log.load(session_id, {"agent_type": "coia"})
 
-            if result.data:
-                conversation = result.data[0]
+            if conversation:
                 state_data = conversation.get("state", {})
 
                 # Deserialize state from JSON
@@ -124,7 +106,7 @@ class CoIAPersistentMemory:
                     "updated_at": conv["updated_at"],
                     "current_stage": state_data.get("current_stage", "unknown"),
                     "completed": state_data.get("completed", False),
-                    "message_count": len(state_data.get("messages", [])),
+                    "message_count": conv.get("message_count") or len(state_data.get("messages", [])),
                     "business_name": state_data.get("research_data", {}).get("company_name", "Unknown")
                 })
 
@@ -332,7 +314,13 @@ class PersistentCoIAStateManager:
 
     def __init__(self):
         self.memory = CoIAPersistentMemory()
-        self._states: dict[str, CoIAConversationState] = {}
+        # Bounded in-memory cache; evicted sessions reload from the database on access
+        self._states = SessionCache(
+            "coia_sessions",
+            max_entries=int(os.getenv("COIA_SESSION_CACHE_MAX", "1000")),
+            ttl_seconds=float(os.getenv("COIA_SESSION_CACHE_TTL", "3600")),
+            loader=self.memory.load_conversation_state
+        )
 
     async def create_session(self, session_id: str, contractor_lead_id: Optional[str] = None,
                             original_project_id: Optional[str] = None) -> CoIAConversationState:
@@ -361,17 +349,8 @@ class PersistentCoIAStateManager:
     async def get_session(self, session_id: str) -> Optional[CoIAConversationState]:
         """Get existing conversation session"""
 
-        # Check memory first
-        if session_id in self._states:
-            return self._states[session_id]
-
-        # Try to load from database
-        state = await self.memory.load_conversation_state(session_id)
-        if state:
-            self._states[session_id] = state
-            return state
-
-        return None
+        # Check memory first, falling back to the database on a miss
+        return await self._states.aget(session_id)
 
     async def update_session(self, session_id: str, state: CoIAConversationState):
         """Update conversation session"""
@@ -390,8 +369,7 @@ class PersistentCoIAStateManager:
 
     def delete_session(self, session_id: str):
         """Delete conversation session from memory (keeps database record)"""
-        if session_id in self._states:
-            del self._states[session_id]
+        self._states.pop(session_id)
 
     def get_active_sessions(self) -> list[str]:
         """Get list of active session IDs in memory"""
@@ -4,9 +4,11 @@ Purpose: Track conversation state and profile building progress
 """
 
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any, Optional
 
+from utils.session_cache import SessionCache
+
 
 @dataclass
 class ContractorProfile:
@@ -216,7 +218,7 @@ class CoIAStateManager:
     """Manages CoIA conversation states"""
 
     def __init__(self):
-        self._states: dict[str, CoIAConversationState] = {}
+        self._states = SessionCache("coia_state_sessions")
 
     def create_session(self, session_id: str, contractor_lead_id: Optional[str] = None,
                       original_project_id: Optional[str] = None) -> CoIAConversationState:
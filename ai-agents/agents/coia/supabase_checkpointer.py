@@ -1,10 +1,19 @@
 """
 Supabase-based LangGraph Checkpointer for Unified COIA Agent
 Provides persistent state management using Supabase PostgreSQL backend
+
+Channel values are stored once per (channel, version) in
+langgraph_checkpoint_blobs, so a step only writes the channels it changed;
+the checkpoint row itself holds just versions and bookkeeping. Versions carry
+a random suffix (as in langgraph's PostgresSaver) so a fork or replay that
+reaches the same step number writes a new blob instead of reusing the old one. Writes are
+batched (executemany / pipeline mode) and old checkpoints are pruned per
+thread to keep the tables bounded.
 """
 
 import os
 import json
+import random
 import asyncio
 from datetime import datetime
 from typing import Any, Dict, Optional, List, Tuple, AsyncIterator
@@ -29,25 +38,176 @@ except ImportError:
                 return json.loads(data)
         JsonPlusSerializer = SimpleJsonSerializer
 
+from utils.session_cache import SessionCache
+
 from .unified_state import UnifiedCoIAState
 
 
+# Checkpoints kept per (thread, namespace); older ones are pruned
+CHECKPOINT_RETENTION = int(os.getenv("COIA_CHECKPOINT_RETENTION", "20"))
+# Prune every N checkpoints saved for a thread rather than on every step
+CHECKPOINT_PRUNE_EVERY = int(os.getenv("COIA_CHECKPOINT_PRUNE_EVERY", "10"))
+
+SETUP_SQL = """
+    CREATE TABLE IF NOT EXISTS langgraph_checkpoints (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        checkpoint_id TEXT NOT NULL,
+        parent_checkpoint_id TEXT,
+        type TEXT,
+        checkpoint JSONB NOT NULL,
+        metadata JSONB NOT NULL DEFAULT '{}',
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+    );
+
+    CREATE TABLE IF NOT EXISTS langgraph_checkpoint_blobs (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        channel TEXT NOT NULL,
+        version TEXT NOT NULL,
+        type TEXT NOT NULL,
+        blob BYTEA,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+        PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+    );
+
+    CREATE TABLE IF NOT EXISTS langgraph_checkpoint_writes (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        checkpoint_id TEXT NOT NULL,
+        task_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        channel TEXT NOT NULL,
+        type TEXT,
+        value JSONB,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+    );
+
+    -- Serialized write values (JSONB value is kept for rows written before this column)
+    ALTER TABLE langgraph_checkpoint_writes ADD COLUMN IF NOT EXISTS blob BYTEA;
+
+    -- Latest-checkpoint lookups and retention pruning
+    CREATE INDEX IF NOT EXISTS idx_checkpoints_thread_ns_created
+    ON langgraph_checkpoints(thread_id, checkpoint_ns, created_at DESC);
+
+    CREATE INDEX IF NOT EXISTS idx_checkpoints_created_at
+    ON langgraph_checkpoints(created_at DESC);
+
+    CREATE INDEX IF NOT EXISTS idx_checkpoint_writes_thread_id
+    ON langgraph_checkpoint_writes(thread_id);
+"""
+
+# Checkpoint row plus its channel blobs and pending writes in one round trip
+SELECT_SQL = """
+    SELECT
+        c.thread_id, c.checkpoint_ns, c.checkpoint_id, c.parent_checkpoint_id,
+        c.checkpoint, c.metadata, c.created_at,
+        (
+            SELECT array_agg(array[b.channel::bytea, b.type::bytea, b.blob])
+            FROM jsonb_each_text(c.checkpoint -> 'channel_versions') AS v
+            JOIN langgraph_checkpoint_blobs b
+                ON b.thread_id = c.thread_id
+                AND b.checkpoint_ns = c.checkpoint_ns
+                AND b.channel = v.key
+                AND b.version = v.value
+        ) AS channel_blobs,
+        (
+            SELECT array_agg(
+                array[w.task_id::bytea, w.channel::bytea, w.type::bytea,
+                      coalesce(w.blob, convert_to(w.value::text, 'UTF8'))]
+                ORDER BY w.task_id, w.idx
+            )
+            FROM langgraph_checkpoint_writes w
+            WHERE w.thread_id = c.thread_id
+                AND w.checkpoint_ns = c.checkpoint_ns
+                AND w.checkpoint_id = c.checkpoint_id
+        ) AS pending_writes
+    FROM langgraph_checkpoints c
+"""
+
+UPSERT_BLOBS_SQL = """
+    INSERT INTO langgraph_checkpoint_blobs (thread_id, checkpoint_ns, channel, version, type, blob)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON CONFLICT (thread_id, checkpoint_ns, channel, version) DO NOTHING
+"""
+
+UPSERT_CHECKPOINT_SQL = """
+    INSERT INTO langgraph_checkpoints
+    (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata)
+    VALUES (%s, %s, %s, %s, %s, %s::jsonb, %s::jsonb)
+    ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id)
+    DO UPDATE SET
+        checkpoint = EXCLUDED.checkpoint,
+        metadata = EXCLUDED.metadata,
+        created_at = NOW()
+"""
+
+UPSERT_WRITES_SQL = """
+    INSERT INTO langgraph_checkpoint_writes
+    (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, blob)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+    DO UPDATE SET
+        channel = EXCLUDED.channel,
+        type = EXCLUDED.type,
+        blob = EXCLUDED.blob,
+        value = NULL,
+        created_at = NOW()
+"""
+
+PRUNE_SQL = [
+    """
+    DELETE FROM langgraph_checkpoints
+    WHERE thread_id = %(thread_id)s AND checkpoint_ns = %(checkpoint_ns)s AND checkpoint_id IN (
+        SELECT checkpoint_id FROM langgraph_checkpoints
+        WHERE thread_id = %(thread_id)s AND checkpoint_ns = %(checkpoint_ns)s
+        ORDER BY created_at DESC
+        OFFSET %(keep)s
+    )
+    """,
+    """
+    DELETE FROM langgraph_checkpoint_writes w
+    WHERE w.thread_id = %(thread_id)s AND w.checkpoint_ns = %(checkpoint_ns)s AND NOT EXISTS (
+        SELECT 1 FROM langgraph_checkpoints c
+        WHERE c.thread_id = w.thread_id AND c.checkpoint_ns = w.checkpoint_ns
+            AND c.checkpoint_id = w.checkpoint_id
+    )
+    """,
+    """
+    DELETE FROM langgraph_checkpoint_blobs b
+    WHERE b.thread_id = %(thread_id)s AND b.checkpoint_ns = %(checkpoint_ns)s AND NOT EXISTS (
+        SELECT 1 FROM langgraph_checkpoints c
+        WHERE c.thread_id = b.thread_id AND c.checkpoint_ns = b.checkpoint_ns
+            AND c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+    )
+    """
+]
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
 class SupabaseCheckpointer(BaseCheckpointSaver):
     """
     LangGraph checkpointer using Supabase PostgreSQL as backend.
     Provides persistent state management for unified COIA agent across multiple interfaces.
     """
-    
-    def __init__(self, pool: Optional[AsyncConnectionPool] = None):
+
+    def __init__(self, pool: Optional[AsyncConnectionPool] = None, retention: int = CHECKPOINT_RETENTION):
         """Initialize checkpointer with connection pool"""
         super().__init__(serde=JsonPlusSerializer())
-        
+
         if pool is None:
             # Create connection pool from environment variables
             db_url = os.getenv("SUPABASE_DB_URL")
             if not db_url:
                 raise ValueError("SUPABASE_DB_URL environment variable required")
-            
+
             self.pool = AsyncConnectionPool(
                 conninfo=db_url,
                 min_size=2,
@@ -60,138 +220,132 @@ class SupabaseCheckpointer(BaseCheckpointSaver):
             )
         else:
             self.pool = pool
-        
+
+        self.retention = retention
         self.is_setup = False
-    
+        self._setup_lock = asyncio.Lock()
+        # (thread_id, checkpoint_ns) -> checkpoints saved since the last prune
+        self._saves_since_prune = SessionCache(
+            "coia_checkpoint_prune",
+            max_entries=10000,
+            ttl_seconds=24 * 3600,
+            sizer=lambda _: 64
+        )
+
     async def setup(self) -> None:
-        """Create necessary tables in Supabase if they don't exist"""
+        """Create necessary tables in Supabase if they don't exist (once per process)"""
         if self.is_setup:
             return
-        
-        async with self.pool.connection() as conn:
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS langgraph_checkpoints (
-                    thread_id TEXT NOT NULL,
-                    checkpoint_ns TEXT NOT NULL DEFAULT '',
-                    checkpoint_id TEXT NOT NULL,
-                    parent_checkpoint_id TEXT,
-                    type TEXT,
-                    checkpoint JSONB NOT NULL,
-                    metadata JSONB NOT NULL DEFAULT '{}',
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
-                );
-            """)
-            
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS langgraph_checkpoint_blobs (
-                    thread_id TEXT NOT NULL,
-                    checkpoint_ns TEXT NOT NULL DEFAULT '',
-                    channel TEXT NOT NULL,
-                    version TEXT NOT NULL,
-                    type TEXT NOT NULL,
-                    blob BYTEA,
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
-                );
-            """)
-            
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS langgraph_checkpoint_writes (
-                    thread_id TEXT NOT NULL,
-                    checkpoint_ns TEXT NOT NULL DEFAULT '',
-                    checkpoint_id TEXT NOT NULL,
-                    task_id TEXT NOT NULL,
-                    idx INTEGER NOT NULL,
-                    channel TEXT NOT NULL,
-                    type TEXT,
-                    value JSONB,
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
-                );
-            """)
-            
-            # Create indexes for better performance
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_checkpoints_thread_id 
-                ON langgraph_checkpoints(thread_id);
-            """)
-            
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_checkpoints_created_at 
-                ON langgraph_checkpoints(created_at DESC);
-            """)
-            
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_checkpoint_writes_thread_id 
-                ON langgraph_checkpoint_writes(thread_id);
-            """)
-            
-        self.is_setup = True
-    
+
+        async with self._setup_lock:
+            if self.is_setup:
+                return
+
+            # One round trip for all DDL
+            async with self.pool.connection() as conn:
+                await conn.execute(SETUP_SQL)
+
+            self.is_setup = True
+
+    def get_next_version(self, current: Optional[Any], channel: Any = None) -> str:
+        """Next channel version: zero-padded step counter plus a random suffix, unique per write"""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, (int, float)):
+            current_v = int(current)
+        else:
+            current_v = int(str(current).split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def _dump(self, value: Any) -> Tuple[str, bytes]:
+        """Serialize a value to (type, bytes) with whichever serializer is configured"""
+        dumped = self.serde.dumps_typed(value)
+        if isinstance(dumped, tuple):
+            return dumped
+        return "json", dumped.encode("utf-8")
+
+    def _load(self, type_: Optional[str], data: Optional[bytes]) -> Any:
+        if data is None or type_ == "empty":
+            return None
+        if type_ in (None, "json", "write"):
+            # Fallback serializer output and writes stored as JSONB
+            return json.loads(bytes(data).decode("utf-8"))
+        return self.serde.loads_typed((type_, bytes(data)))
+
+    def _row_to_tuple(self, row: Dict[str, Any]) -> CheckpointTuple:
+        """Rebuild a CheckpointTuple from a SELECT_SQL row"""
+        checkpoint = row["checkpoint"]
+        if isinstance(checkpoint, str):
+            checkpoint = json.loads(checkpoint)
+
+        # Checkpoints saved before blob storage carry their values inline
+        channel_values = dict(checkpoint.get("channel_values") or {})
+        for channel, type_, blob in row.get("channel_blobs") or []:
+            if type_.decode() != "empty":
+                channel_values[channel.decode()] = self._load(type_.decode(), blob)
+        checkpoint = {**checkpoint, "channel_values": channel_values}
+
+        metadata = row["metadata"]
+        if isinstance(metadata, str):
+            metadata = json.loads(metadata)
+
+        pending_writes = [
+            (task_id.decode(), channel.decode(), self._load(type_.decode() if type_ else None, value))
+            for task_id, channel, type_, value in row.get("pending_writes") or []
+        ]
+
+        config = {
+            "configurable": {
+                "thread_id": row["thread_id"],
+                "checkpoint_ns": row["checkpoint_ns"],
+                "checkpoint_id": row["checkpoint_id"]
+            }
+        }
+        parent_config = None
+        if row.get("parent_checkpoint_id"):
+            parent_config = {
+                "configurable": {
+                    "thread_id": row["thread_id"],
+                    "checkpoint_ns": row["checkpoint_ns"],
+                    "checkpoint_id": row["parent_checkpoint_id"]
+                }
+            }
+
+        return CheckpointTuple(
+            config=config,
+            checkpoint=checkpoint,
+            metadata=CheckpointMetadata(**metadata),
+            pending_writes=pending_writes,
+            parent_config=parent_config
+        )
+
     async def aget_tuple(self, config: Dict[str, Any]) -> Optional[CheckpointTuple]:
         """Get a checkpoint tuple by thread_id and checkpoint_id"""
         await self.setup()
-        
+
         thread_id = config["configurable"]["thread_id"]
         checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
         checkpoint_id = config["configurable"].get("checkpoint_id")
-        
+
         if checkpoint_id:
             # Get specific checkpoint
-            query = """
-                SELECT checkpoint, metadata, parent_checkpoint_id, created_at
-                FROM langgraph_checkpoints 
-                WHERE thread_id = %s AND checkpoint_ns = %s AND checkpoint_id = %s
-            """
+            query = SELECT_SQL + " WHERE c.thread_id = %s AND c.checkpoint_ns = %s AND c.checkpoint_id = %s"
             params = (thread_id, checkpoint_ns, checkpoint_id)
         else:
             # Get latest checkpoint
-            query = """
-                SELECT checkpoint, metadata, parent_checkpoint_id, created_at, checkpoint_id
-                FROM langgraph_checkpoints 
-                WHERE thread_id = %s AND checkpoint_ns = %s
-                ORDER BY created_at DESC 
-                LIMIT 1
-            """
+            query = SELECT_SQL + " WHERE c.thread_id = %s AND c.checkpoint_ns = %s ORDER BY c.created_at DESC LIMIT 1"
             params = (thread_id, checkpoint_ns)
-        
+
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 await cur.execute(query, params)
                 row = await cur.fetchone()
-                
-                if not row:
-                    return None
-                
-                # Deserialize checkpoint
-                checkpoint = self.serde.loads_typed(row["checkpoint"])
-                metadata = CheckpointMetadata(**row["metadata"])
-                
-                # Get pending writes
-                writes_query = """
-                    SELECT task_id, channel, value, type
-                    FROM langgraph_checkpoint_writes
-                    WHERE thread_id = %s AND checkpoint_ns = %s AND checkpoint_id = %s
-                    ORDER BY task_id, idx
-                """
-                checkpoint_id_for_writes = checkpoint_id or row.get("checkpoint_id")
-                await cur.execute(writes_query, (thread_id, checkpoint_ns, checkpoint_id_for_writes))
-                writes_rows = await cur.fetchall()
-                
-                pending_writes = []
-                for write_row in writes_rows:
-                    value = self.serde.loads_typed(write_row["value"]) if write_row["value"] else None
-                    pending_writes.append((write_row["task_id"], write_row["channel"], value))
-                
-                return CheckpointTuple(
-                    config=config,
-                    checkpoint=checkpoint,
-                    metadata=metadata,
-                    pending_writes=pending_writes,
-                    parent_config=None  # TODO: implement parent config lookup if needed
-                )
-    
+
+        if not row:
+            return None
+
+        return self._row_to_tuple(row)
+
     async def alist(
         self,
         config: Optional[Dict[str, Any]] = None,
@@ -202,70 +356,52 @@ class SupabaseCheckpointer(BaseCheckpointSaver):
     ) -> AsyncIterator[CheckpointTuple]:
         """List checkpoints with optional filtering"""
         await self.setup()
-        
-        query_parts = ["SELECT checkpoint, metadata, checkpoint_id, thread_id, checkpoint_ns, created_at"]
-        query_parts.append("FROM langgraph_checkpoints")
-        
+
+        query_parts = [SELECT_SQL]
+
         conditions = []
         params = []
-        
+
         # Apply config filtering
         if config:
             thread_id = config["configurable"].get("thread_id")
             if thread_id:
-                conditions.append("thread_id = %s")
+                conditions.append("c.thread_id = %s")
                 params.append(thread_id)
-            
+
             checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
-            conditions.append("checkpoint_ns = %s")
+            conditions.append("c.checkpoint_ns = %s")
             params.append(checkpoint_ns)
-        
+
         # Apply additional filters
         if filter:
             for key, value in filter.items():
                 if key in ["thread_id", "checkpoint_ns", "type"]:
-                    conditions.append(f"{key} = %s")
+                    conditions.append(f"c.{key} = %s")
                     params.append(value)
-        
+
         # Apply before filter
         if before and "created_at" in before:
-            conditions.append("created_at < %s")
+            conditions.append("c.created_at < %s")
             params.append(before["created_at"])
-        
+
         if conditions:
             query_parts.append("WHERE " + " AND ".join(conditions))
-        
-        query_parts.append("ORDER BY created_at DESC")
-        
+
+        query_parts.append("ORDER BY c.created_at DESC")
+
         if limit:
-            query_parts.append(f"LIMIT {limit}")
-        
+            query_parts.append(f"LIMIT {int(limit)}")
+
         query = " ".join(query_parts)
-        
+
         async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 await cur.execute(query, params)
-                
+
                 async for row in cur:
-                    checkpoint = self.serde.loads_typed(row["checkpoint"])
-                    metadata = CheckpointMetadata(**row["metadata"])
-                    
-                    config_dict = {
-                        "configurable": {
-                            "thread_id": row["thread_id"],
-                            "checkpoint_ns": row["checkpoint_ns"],
-                            "checkpoint_id": row["checkpoint_id"]
-                        }
-                    }
-                    
-                    yield CheckpointTuple(
-                        config=config_dict,
-                        checkpoint=checkpoint,
-                        metadata=metadata,
-                        pending_writes=[],  # Not loading writes for list view
-                        parent_config=None
-                    )
-    
+                    yield self._row_to_tuple(row)
+
     async def aput(
         self,
         config: Dict[str, Any],
@@ -273,39 +409,49 @@ class SupabaseCheckpointer(BaseCheckpointSaver):
         metadata: CheckpointMetadata,
         new_versions: Dict[str, str],
     ) -> Dict[str, Any]:
-        """Save a checkpoint"""
+        """Save a checkpoint, writing blobs only for channels whose version changed"""
         await self.setup()
-        
+
         thread_id = config["configurable"]["thread_id"]
         checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
         checkpoint_id = checkpoint["id"]
         parent_checkpoint_id = config["configurable"].get("checkpoint_id")
-        
-        # Serialize checkpoint and metadata
-        checkpoint_data = self.serde.dumps_typed(checkpoint)
-        metadata_data = self.serde.dumps_typed(metadata)
-        
+
+        channel_values = checkpoint.get("channel_values") or {}
+        blob_rows = []
+        for channel, version in new_versions.items():
+            if channel in channel_values:
+                type_, blob = self._dump(channel_values[channel])
+            else:
+                type_, blob = "empty", None
+            blob_rows.append((thread_id, checkpoint_ns, channel, str(version), type_, blob))
+
+        # The row keeps versions only; values live in langgraph_checkpoint_blobs.
+        # Metadata "writes" would duplicate the channel values, so it's dropped.
+        checkpoint_row = {key: value for key, value in checkpoint.items() if key != "channel_values"}
+        metadata_row = {key: value for key, value in dict(metadata).items() if key != "writes"}
+
         async with self.pool.connection() as conn:
-            # Insert checkpoint
-            await conn.execute("""
-                INSERT INTO langgraph_checkpoints 
-                (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id) 
-                DO UPDATE SET 
-                    checkpoint = EXCLUDED.checkpoint,
-                    metadata = EXCLUDED.metadata,
-                    created_at = NOW()
-            """, (
-                thread_id,
-                checkpoint_ns, 
-                checkpoint_id,
-                parent_checkpoint_id,
-                "checkpoint",
-                checkpoint_data,
-                metadata_data
-            ))
-        
+            async with conn.pipeline():
+                async with conn.cursor() as cur:
+                    if blob_rows:
+                        await cur.executemany(UPSERT_BLOBS_SQL, blob_rows)
+
+                    await cur.execute(UPSERT_CHECKPOINT_SQL, (
+                        thread_id,
+                        checkpoint_ns,
+                        checkpoint_id,
+                        parent_checkpoint_id,
+                        "checkpoint",
+                        json.dumps(checkpoint_row, default=_json_default),
+                        json.dumps(metadata_row, default=_json_default)
+                    ))
+
+                    if self._should_prune(thread_id, checkpoint_ns):
+                        prune_params = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "keep": self.retention}
+                        for statement in PRUNE_SQL:
+                            await cur.execute(statement, prune_params)
+
         return {
             "configurable": {
                 "thread_id": thread_id,
@@ -313,47 +459,45 @@ class SupabaseCheckpointer(BaseCheckpointSaver):
                 "checkpoint_id": checkpoint_id
             }
         }
-    
+
     async def aput_writes(
         self,
         config: Dict[str, Any],
         writes: List[Tuple[str, str, Any]],
         task_id: str,
     ) -> None:
-        """Save pending writes"""
+        """Save pending writes in one batched statement"""
         await self.setup()
-        
+
         if not writes:
             return
-        
+
         thread_id = config["configurable"]["thread_id"]
         checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
         checkpoint_id = config["configurable"]["checkpoint_id"]
-        
+
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, blob = self._dump(value) if value is not None else ("empty", None)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type_, blob))
+
         async with self.pool.connection() as conn:
-            for idx, (channel, value) in enumerate(writes):
-                value_data = self.serde.dumps_typed(value) if value is not None else None
-                
-                await conn.execute("""
-                    INSERT INTO langgraph_checkpoint_writes
-                    (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
-                    DO UPDATE SET 
-                        channel = EXCLUDED.channel,
-                        type = EXCLUDED.type,
-                        value = EXCLUDED.value,
-                        created_at = NOW()
-                """, (
-                    thread_id,
-                    checkpoint_ns,
-                    checkpoint_id,
-                    task_id,
-                    idx,
-                    channel,
-                    "write",
-                    value_data
-                ))
+            async with conn.cursor() as cur:
+                # psycopg pipelines executemany: one round trip for all rows
+                await cur.executemany(UPSERT_WRITES_SQL, rows)
+
+    def _should_prune(self, thread_id: str, checkpoint_ns: str) -> bool:
+        """Count saves per thread; prune every CHECKPOINT_PRUNE_EVERY of them"""
+        if self.retention <= 0:
+            return False
+
+        key = f"{thread_id}:{checkpoint_ns}"
+        saves = (self._saves_since_prune.get(key) or 0) + 1
+        if saves >= CHECKPOINT_PRUNE_EVERY:
+            self._saves_since_prune[key] = 0
+            return True
+        self._saves_since_prune[key] = saves
+        return False
 
 
 async def create_supabase_checkpointer() -> SupabaseCheckpointer:
@@ -2,20 +2,117 @@
 Template Engine for EAA
 Dynamic message generation based on project type and contractor info
 """
+import re
 from datetime import datetime
-from typing import Any
+from functools import lru_cache
+from typing import Any, Optional
+
+
+PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\}")
+
+
+class CompiledTemplate:
+    """Template pre-split into literal and variable segments for O(output) rendering"""
+
+    __slots__ = ("segments", "variables")
+
+    def __init__(self, template: str):
+        # Segments are plain strings (literals) or 1-tuples holding a variable name
+        self.segments: list[Any] = []
+        pos = 0
+        for match in PLACEHOLDER_PATTERN.finditer(template):
+            if match.start() > pos:
+                self.segments.append(template[pos:match.start()])
+            self.segments.append((match.group(1),))
+            pos = match.end()
+        if pos < len(template):
+            self.segments.append(template[pos:])
+
+        self.variables = {seg[0] for seg in self.segments if isinstance(seg, tuple)}
+
+    def render(self, variables: dict[str, Any]) -> str:
+        """Render the template; unknown placeholders are left as-is"""
+        parts = []
+        for seg in self.segments:
+            if isinstance(seg, tuple):
+                name = seg[0]
+                parts.append(str(variables[name]) if name in variables else f"{{{name}}}")
+            else:
+                parts.append(seg)
+        return "".join(parts)
+
+
+@lru_cache(maxsize=256)
+def resolve_email_template_key(project_type: str, urgency: str) -> str:
+    """Map project type + urgency to an email template key"""
+    project_lower = project_type.lower()
+
+    if "kitchen" in project_lower:
+        category = "kitchen"
+    elif "bathroom" in project_lower:
+        category = "bathroom"
+    elif "roof" in project_lower:
+        category = "roofing"
+    elif "mold" in project_lower:
+        category = "mold"
+    else:
+        category = "general"
+
+    if urgency == "emergency":
+        return f"{category}_urgent_email"
+    return f"{category}_standard_email"
+
+
+@lru_cache(maxsize=256)
+def resolve_sms_template_key(project_type: str, urgency: str) -> str:
+    """Map project type + urgency to an SMS template key"""
+    project_lower = project_type.lower()
+
+    if urgency == "emergency":
+        return "urgent_sms"
+    elif "kitchen" in project_lower:
+        return "kitchen_sms"
+    elif "bathroom" in project_lower:
+        return "bathroom_sms"
+    elif "roof" in project_lower:
+        return "roofing_sms"
+    else:
+        return "general_sms"
 
 
 class TemplateEngine:
     """Dynamic message template engine for contractor outreach"""
 
+    # Templates are built and compiled once per process, shared by all instances
+    _email_templates: Optional[dict[str, dict[str, str]]] = None
+    _sms_templates: Optional[dict[str, dict[str, str]]] = None
+    _compiled_email: Optional[dict[str, dict[str, CompiledTemplate]]] = None
+    _compiled_sms: Optional[dict[str, dict[str, CompiledTemplate]]] = None
+
     def __init__(self):
         """Initialize template engine with project-specific templates"""
-        self.email_templates = self._load_email_templates()
-        self.sms_templates = self._load_sms_templates()
+        cls = type(self)
+        if cls._compiled_email is None:
+            cls._email_templates = self._load_email_templates()
+            cls._sms_templates = self._load_sms_templates()
+            cls._compiled_email = self._compile_templates(cls._email_templates)
+            cls._compiled_sms = self._compile_templates(cls._sms_templates)
+
+        self.email_templates = cls._email_templates
+        self.sms_templates = cls._sms_templates
+        self.compiled_email = cls._compiled_email
+        self.compiled_sms = cls._compiled_sms
 
         print("[TemplateEngine] Initialized with project-specific templates")
 
+    @staticmethod
+    def _compile_templates(templates: dict[str, dict[str, str]]) -> dict[str, dict[str, CompiledTemplate]]:
+        """Compile every part of every template into segment lists"""
+        return {
+            key: {part: CompiledTemplate(text) for part, text in parts.items()}
+            for key, parts in templates.items()
+        }
+
     def generate_messages(self, contractor: dict[str, Any], bid_card_data: dict[str, Any],
                          channels: list[str], urgency: str) -> dict[str, dict[str, Any]]:
         """
@@ -57,13 +154,62 @@ class TemplateEngine:
             print(f"[TemplateEngine ERROR] Failed to generate messages: {e}")
             return {}
 
+    def render_batch(self, contractors: list[dict[str, Any]], bid_card_data: dict[str, Any],
+                     channels: list[str], urgency: Optional[str] = None) -> list[dict[str, dict[str, Any]]]:
+        """
+        Generate messages for every contractor in a campaign
+
+        Bid-card variables and template selection are computed once and
+        shared; only the contractor variables change per message.
+
+        Args:
+            contractors: Contractors to message
+            bid_card_data: Project details from bid card
+            channels: List of channels to generate for
+            urgency: Project urgency level (defaults to the bid card's)
+
+        Returns:
+            One channel-specific message dict per contractor, in order
+        """
+        try:
+            urgency = urgency or bid_card_data.get("urgency_level", "flexible")
+            project_type = bid_card_data["project_type"]
+            shared_vars = self._prepare_bid_card_variables(bid_card_data, urgency)
+
+            batch = []
+            for contractor in contractors:
+                template_vars = {**shared_vars, **self._prepare_contractor_variables(contractor)}
+                messages = {}
+                if "email" in channels:
+                    messages["email"] = self._generate_email_message(template_vars, project_type, urgency)
+                if "sms" in channels:
+                    messages["sms"] = self._generate_sms_message(template_vars, project_type, urgency)
+                batch.append(messages)
+
+            print(f"[TemplateEngine] Generated batch messages for {len(batch)} contractors")
+            return batch
+
+        except Exception as e:
+            print(f"[TemplateEngine ERROR] Failed to generate batch messages: {e}")
+            return [{} for _ in contractors]
+
     def _prepare_template_variables(self, contractor: dict[str, Any],
                                    bid_card_data: dict[str, Any], urgency: str) -> dict[str, Any]:
         """Prepare variables for template substitution"""
+        return {
+            **self._prepare_bid_card_variables(bid_card_data, urgency),
+            **self._prepare_contractor_variables(contractor)
+        }
+
+    def _prepare_contractor_variables(self, contractor: dict[str, Any]) -> dict[str, Any]:
+        """Prepare the per-contractor template variables"""
+        return {
+            "contractor_name": contractor.get("contact_name", contractor.get("company_name", "there")),
+            "company_name": contractor.get("company_name", "your company")
+        }
 
-        # Extract contractor info
-        contractor_name = contractor.get("contact_name", contractor.get("company_name", "there"))
-        company_name = contractor.get("company_name", "your company")
+    def _prepare_bid_card_variables(self, bid_card_data: dict[str, Any], urgency: str) -> dict[str, Any]:
+        """Prepare the template variables shared by every contractor on a bid card"""
 
         # Extract project details
         project_type = bid_card_data.get("project_type", "home improvement")
@@ -102,8 +248,6 @@ class TemplateEngine:
         bid_card_link = f"https://instabids.com/bid/{bid_card_data.get('id', 'demo')}"
 
         template_vars = {
-            "contractor_name": contractor_name,
-            "company_name": company_name,
             "project_type": project_type.title(),
             "location": location,
             "budget_min": f"{budget_min:,}",
@@ -125,16 +269,16 @@ class TemplateEngine:
 
         # Select appropriate template
         template_key = self._select_email_template(project_type, urgency)
-        template = self.email_templates[template_key]
+        template = self.compiled_email[template_key]
 
         # Generate subject line
-        subject = self._substitute_variables(template["subject"], template_vars)
+        subject = template["subject"].render(template_vars)
 
         # Generate HTML content
-        html_content = self._substitute_variables(template["html_body"], template_vars)
+        html_content = template["html_body"].render(template_vars)
 
         # Generate plain text version
-        plain_content = self._substitute_variables(template["plain_body"], template_vars)
+        plain_content = template["plain_body"].render(template_vars)
 
         return {
             "subject": subject,
@@ -150,10 +294,10 @@ class TemplateEngine:
 
         # Select appropriate template
         template_key = self._select_sms_template(project_type, urgency)
-        template = self.sms_templates[template_key]
+        template = self.compiled_sms[template_key]
 
         # Generate SMS content
-        content = self._substitute_variables(template["content"], template_vars)
+        content = template["content"].render(template_vars)
 
         # Ensure SMS is under 160 characters if possible
         if len(content) > 160:
@@ -168,55 +312,15 @@ class TemplateEngine:
 
     def _select_email_template(self, project_type: str, urgency: str) -> str:
         """Select appropriate email template"""
-        project_lower = project_type.lower()
-
-        if urgency == "emergency":
-            if "kitchen" in project_lower:
-                return "kitchen_urgent_email"
-            elif "bathroom" in project_lower:
-                return "bathroom_urgent_email"
-            elif "roof" in project_lower:
-                return "roofing_urgent_email"
-            elif "mold" in project_lower:
-                return "mold_urgent_email"
-            else:
-                return "general_urgent_email"
-        else:
-            if "kitchen" in project_lower:
-                return "kitchen_standard_email"
-            elif "bathroom" in project_lower:
-                return "bathroom_standard_email"
-            elif "roof" in project_lower:
-                return "roofing_standard_email"
-            elif "mold" in project_lower:
-                return "mold_standard_email"
-            else:
-                return "general_standard_email"
+        return resolve_email_template_key(project_type, urgency)
 
     def _select_sms_template(self, project_type: str, urgency: str) -> str:
         """Select appropriate SMS template"""
-        project_lower = project_type.lower()
-
-        if urgency == "emergency":
-            return "urgent_sms"
-        elif "kitchen" in project_lower:
-            return "kitchen_sms"
-        elif "bathroom" in project_lower:
-            return "bathroom_sms"
-        elif "roof" in project_lower:
-            return "roofing_sms"
-        else:
-            return "general_sms"
+        return resolve_sms_template_key(project_type, urgency)
 
     def _substitute_variables(self, template: str, variables: dict[str, Any]) -> str:
         """Replace template variables with actual values"""
-        result = template
-
-        for key, value in variables.items():
-            placeholder = f"{{{key}}}"
-            result = result.replace(placeholder, str(value))
-
-        return result
+        return CompiledTemplate(template).render(variables)
 
     def _get_urgency_content(self, urgency: str) -> tuple:
         """Get urgency-specific content"""
@@ -4,7 +4,7 @@ Parse and analyze contractor responses from email and SMS
 """
 import re
 from datetime import datetime
-from typing import Any
+from typing import Any, Optional
 
 
 class ResponseParser:
@@ -23,7 +23,7 @@ class ResponseParser:
             "no", "not interested", "pass", "decline", "busy", "booked",
             "unavailable", "can't", "cannot", "won't", "will not",
             "not available", "too far", "outside area", "not my specialty",
-            "wrong type", "unsubscribe", "stop", "remove"
+            "wrong type", "unsubscribe"
         ]
 
         self.info_request_keywords = [
@@ -33,8 +33,77 @@ class ResponseParser:
             "questions", "clarification", "need to know"
         ]
 
+        # Short explicit answers checked ahead of density
+        self.explicit_yes_keywords = ["yes", "y", "yeah", "yep", "sure"]
+        self.explicit_no_keywords = ["no", "n", "nope", "not interested", "pass"]
+
+        # Opt-outs only on unambiguous phrasing: carrier keywords as the whole
+        # message ("STOP"), or explicit requests anywhere. Bare "stop"/"remove"
+        # appear in ordinary replies ("I can stop by Tuesday").
+        self.opt_out_standalone_keywords = ["stop", "stopall", "unsubscribe", "cancel", "end", "quit"]
+        self.opt_out_keywords = [
+            "unsubscribe", "opt out", "opt-out", "remove me", "take me off",
+            "stop texting", "stop messaging", "stop emailing", "stop contacting", "stop sending"
+        ]
+
+        self.keyword_matcher = self._compile_keyword_matcher({
+            "positive": self.positive_keywords,
+            "negative": self.negative_keywords,
+            "info": self.info_request_keywords,
+            "yes": self.explicit_yes_keywords,
+            "no": self.explicit_no_keywords,
+            "opt_out": self.opt_out_keywords
+        })
+        standalone = "|".join(re.escape(keyword) for keyword in self.opt_out_standalone_keywords)
+        self.opt_out_standalone_pattern = re.compile(rf"^\W*(?:{standalone})\W*$")
+        self.abbreviation_pattern = re.compile(r"\b(?:u|ur|r|y|n|thx|k)\b")
+
         print("[ResponseParser] Initialized with sentiment analysis rules")
 
+    def _compile_keyword_matcher(self, categories: dict[str, list[str]]) -> re.Pattern:
+        """
+        Compile every keyword list into one word-bounded alternation
+
+        Longer phrases are tried first so "not interested" or "no problem" win
+        over "no". Matched phrases are mapped back to their categories through
+        self.keyword_categories.
+        """
+        self.keyword_categories: dict[str, set[str]] = {}
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                self.keyword_categories.setdefault(keyword, set()).add(category)
+
+        phrases = sorted(self.keyword_categories, key=len, reverse=True)
+        alternation = "|".join(re.escape(phrase) for phrase in phrases)
+        return re.compile(rf"(?<![\w'])(?:{alternation})(?![\w'])")
+
+    def _scan_keywords(self, content: str) -> dict[str, int]:
+        """Count keyword hits per category in a single pass over the content"""
+        counts = dict.fromkeys(("positive", "negative", "info", "yes", "no", "opt_out"), 0)
+        for match in self.keyword_matcher.finditer(content):
+            for category in self.keyword_categories[match.group(0)]:
+                counts[category] += 1
+        if self.opt_out_standalone_pattern.match(content):
+            counts["opt_out"] += 1
+        return counts
+
+    def parse_batch(self, responses: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Parse a burst of inbound responses
+
+        Args:
+            responses: Items with "content" and "channel" keys (webhook payloads)
+
+        Returns:
+            Parsed responses in the same order
+        """
+        results = [
+            self._parse(response.get("content", ""), response.get("channel", "sms"))
+            for response in responses
+        ]
+        print(f"[ResponseParser] Parsed batch of {len(results)} responses")
+        return results
+
     def parse_response(self, response_content: str, channel: str) -> dict[str, Any]:
         """
         Parse contractor response and extract intent, sentiment, and data
@@ -46,15 +115,21 @@ class ResponseParser:
         Returns:
             Parsed response with intent, sentiment, and extracted data
         """
+        result = self._parse(response_content, channel)
+        if "error" not in result:
+            print(f"[ResponseParser] Parsed {channel} response: {result['intent']} ({result['interest_level']} interest)")
+        return result
+
+    def _parse(self, response_content: str, channel: str) -> dict[str, Any]:
+        """Parse a single response without logging"""
         try:
             # Clean and normalize content
             cleaned_content = self._clean_content(response_content)
 
-            # Determine intent
-            intent = self._classify_intent(cleaned_content)
-
-            # Calculate sentiment score
-            sentiment = self._calculate_sentiment(cleaned_content)
+            # Classify intent and sentiment from one keyword scan
+            counts = self._scan_keywords(cleaned_content)
+            intent = self._classify_intent(cleaned_content, counts)
+            sentiment = self._calculate_sentiment(cleaned_content, counts)
 
             # Determine interest level
             interest_level = self._determine_interest_level(intent, sentiment)
@@ -75,8 +150,6 @@ class ResponseParser:
                 "confidence_score": self._calculate_confidence(intent, sentiment, cleaned_content)
             }
 
-            print(f"[ResponseParser] Parsed {channel} response: {intent} ({interest_level} interest)")
-
             return result
 
         except Exception as e:
@@ -108,30 +181,33 @@ class ResponseParser:
 
         return cleaned
 
-    def _classify_intent(self, content: str) -> str:
+    def _classify_intent(self, content: str, counts: Optional[dict[str, int]] = None) -> str:
         """Classify the intent of the response"""
         if not content:
             return "no_response"
 
+        if counts is None:
+            counts = self._scan_keywords(content)
+
+        # Opt-out requests must always be honored
+        if counts["opt_out"]:
+            return "opt_out"
+
         # Check for explicit positive responses
-        if any(keyword in content for keyword in ["yes", "y", "yeah", "yep", "sure"]):
+        if counts["yes"]:
             return "interested"
 
         # Check for explicit negative responses
-        if any(keyword in content for keyword in ["no", "n", "nope", "not interested", "pass"]):
+        if counts["no"]:
             return "not_interested"
 
         # Check for information requests
-        if any(keyword in content for keyword in self.info_request_keywords):
+        if counts["info"]:
             return "need_info"
 
-        # Check for opt-out requests
-        if any(keyword in content for keyword in ["stop", "unsubscribe", "remove", "opt out"]):
-            return "opt_out"
-
         # Check based on positive/negative keyword density
-        positive_count = sum(1 for keyword in self.positive_keywords if keyword in content)
-        negative_count = sum(1 for keyword in self.negative_keywords if keyword in content)
+        positive_count = counts["positive"]
+        negative_count = counts["negative"]
 
         if positive_count > negative_count and positive_count > 0:
             return "interested"
@@ -142,37 +218,35 @@ class ResponseParser:
         else:
             return "mixed"
 
-    def _calculate_sentiment(self, content: str) -> float:
+    def _calculate_sentiment(self, content: str, counts: Optional[dict[str, int]] = None) -> float:
         """Calculate sentiment score from -1.0 (negative) to 1.0 (positive)"""
         if not content:
             return 0.0
 
-        words = content.split()
-        total_words = len(words)
+        total_words = len(content.split())
 
         if total_words == 0:
             return 0.0
 
-        # Count positive and negative words
-        positive_count = sum(1 for word in words if any(keyword in word for keyword in self.positive_keywords))
-        negative_count = sum(1 for word in words if any(keyword in word for keyword in self.negative_keywords))
+        if counts is None:
+            counts = self._scan_keywords(content)
 
         # Calculate sentiment score
-        sentiment_score = (positive_count - negative_count) / total_words
+        sentiment_score = (counts["positive"] - counts["negative"]) / total_words
 
         # Normalize to -1.0 to 1.0 range
         return max(-1.0, min(1.0, sentiment_score * 5))  # Amplify the score
 
     def _determine_interest_level(self, intent: str, sentiment: float) -> str:
         """Determine overall interest level"""
-        if intent == "interested" or (intent == "mixed" and sentiment > 0.3):
+        if intent == "opt_out":
+            return "opt_out"
+        elif intent == "interested" or (intent == "mixed" and sentiment > 0.3):
             return "high"
         elif intent == "need_info" or (intent == "neutral" and sentiment >= -0.1):
             return "medium"
         elif intent == "not_interested" or sentiment < -0.3:
             return "low"
-        elif intent == "opt_out":
-            return "opt_out"
         else:
             return "unknown"
 
@@ -236,8 +310,8 @@ class ResponseParser:
                                           ["sent from my", "sent via", "from my iphone", "from my android"])
         elif channel == "sms":
             metadata["character_count"] = len(content)
-            metadata["likely_abbreviated"] = len(content) < 20 or any(abbrev in content.lower() for abbrev in
-                                                                    ["u", "ur", "r", "y", "n", "thx", "k"])
+            metadata["likely_abbreviated"] = (len(content) < 20
+                                              or bool(self.abbreviation_pattern.search(content.lower())))
 
         return metadata
 
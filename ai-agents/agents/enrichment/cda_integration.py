@@ -18,8 +18,9 @@ from typing import Any, Optional
 # Add the root directory to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-# Import the proper LangChain MCP architecture
-from agents.enrichment.test_langchain_architecture import LangChainMCPArchitecture
+from agents.enrichment.domain_enrichment_store import get_domain_enrichment_store
+from agents.enrichment.enrichment_pipeline import EnrichmentPipeline
+from agents.enrichment.playwright_enrichment_agent import PlaywrightEnrichmentAgent
 
 
 # Import CDA components
@@ -47,9 +48,6 @@ class CDAwithLangChainEnrichment:
         """Initialize CDA with LangChain MCP enrichment"""
         print("[CDAwithLangChainEnrichment] Initializing CDA with LangChain MCP enrichment...")
 
-        # Initialize the proper LangChain MCP enrichment agent
-        self.enrichment_agent = LangChainMCPArchitecture()
-
         # Initialize CDA components (if available)
         try:
             self.web_search_agent = WebSearchContractorAgent(db.client)
@@ -60,6 +58,13 @@ class CDAwithLangChainEnrichment:
             self.cda_available = False
             print("[CDAwithLangChainEnrichment] Running in demonstration mode (CDA not available)")
 
+        # Pool of Playwright enrichment sessions shared by every batch; domains
+        # enriched on earlier runs come from the enrichment store
+        supabase = self.web_search_agent.supabase if self.web_search_agent else None
+        self.enrichment_pipeline = EnrichmentPipeline(
+            PlaywrightEnrichmentAgent, store=get_domain_enrichment_store(supabase)
+        )
+
         print("[CDAwithLangChainEnrichment] Integration initialized successfully")
 
     async def discover_and_enrich_contractors(
@@ -98,14 +103,9 @@ class CDAwithLangChainEnrichment:
 
         print(f"[CDAwithLangChainEnrichment] Discovered {len(contractors)} contractors")
 
-        # Step 2: Enrich each contractor using LangChain MCP agent
-        enriched_contractors = []
-
-        for i, contractor in enumerate(contractors):
-            print(f"\n--- Enriching Contractor {i+1}/{len(contractors)} ---")
-
-            # Prepare contractor data for enrichment
-            contractor_data = {
+        # Step 2: Enrich all contractors through the browser pool
+        contractor_batch = [
+            {
                 "company_name": contractor.get("company_name") or contractor.get("name"),
                 "website": contractor.get("website"),
                 "phone": contractor.get("phone"),
@@ -114,10 +114,13 @@ class CDAwithLangChainEnrichment:
                 "address": contractor.get("address"),
                 "project_type": project_type
             }
+            for contractor in contractors
+        ]
+        enrichment_results = await self.enrichment_pipeline.enrich_batch(contractor_batch)
 
-            # Enrich using LangChain MCP agent
-            enriched_data = await self.enrichment_agent.enrich_contractor_with_agent(contractor_data)
+        enriched_contractors = []
 
+        for contractor_data, enriched_data in zip(contractor_batch, enrichment_results, strict=True):
             # Combine original and enriched data
             complete_contractor = {
                 **contractor_data,
@@ -0,0 +1,226 @@
+"""
+Domain Enrichment Store
+What contractor website enrichment learned, kept per website domain
+
+The same contractor shows up for bid card after bid card. Emails, business
+size, services, service areas and social links are stored per domain (memory
+and Supabase domain_enrichment) together with the home page's ETag /
+Last-Modified. Records inside the freshness window are used as-is; older ones
+are revalidated with a conditional GET and only re-crawled if the site changed.
+"""
+import os
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from utils.session_cache import SessionCache
+
+
+ENRICHMENT_FRESHNESS_HOURS = float(os.getenv("ENRICHMENT_FRESHNESS_HOURS", "168"))
+REVALIDATE_TIMEOUT = float(os.getenv("ENRICHMENT_REVALIDATE_TIMEOUT", "10"))
+
+# Facets callers can ask for; each is None until something extracted it
+EMAIL_FACETS = ["emails"]
+CLASSIFICATION_FACETS = ["business_size", "service_types"]
+
+
+def website_domain(website: Optional[str]) -> Optional[str]:
+    """Lowercase host without www, or None"""
+    if not website:
+        return None
+    host = urlparse(website if "//" in website else f"//{website}").hostname
+    return host.lower().removeprefix("www.") if host else None
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime) or value is None:
+        return value
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class DomainEnrichment:
+    """Stored enrichment for one website domain"""
+    domain: str
+    emails: Optional[list[str]] = None
+    business_size: Optional[str] = None
+    service_types: Optional[list[str]] = None
+    service_description: Optional[str] = None
+    service_areas: Optional[list[str]] = None
+    social_media: Optional[dict[str, str]] = None
+    enrichment_data: Optional[dict[str, Any]] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    enriched_at: Optional[datetime] = None
+    validated_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row: dict[str, Any]) -> "DomainEnrichment":
+        known = {f.name for f in fields(cls)}
+        record = cls(**{key: value for key, value in row.items() if key in known})
+        record.enriched_at = _parse_time(record.enriched_at)
+        record.validated_at = _parse_time(record.validated_at)
+        return record
+
+    def has(self, facets: list[str]) -> bool:
+        return all(getattr(self, facet) is not None for facet in facets)
+
+    def revalidation_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class DomainEnrichmentStore:
+    """Per-domain enrichment records with a freshness window"""
+
+    def __init__(self, supabase: Any = None, freshness_hours: float = ENRICHMENT_FRESHNESS_HOURS):
+        self.supabase = supabase
+        self.freshness = timedelta(hours=freshness_hours)
+        self._records = SessionCache("domain_enrichment", max_entries=10000, ttl_seconds=freshness_hours * 3600)
+        self.http = requests.Session()
+
+    def get_many(self, domains: list[str]) -> dict[str, DomainEnrichment]:
+        """Stored records by domain (memory first, then one Supabase query)"""
+        found = {}
+        missing = []
+        for domain in dict.fromkeys(d for d in domains if d):
+            record = self._records.get(domain)
+            if record is not None:
+                found[domain] = record
+            else:
+                missing.append(domain)
+
+        if missing and self.supabase is not None:
+            try:
+                result = self.supabase.table("domain_enrichment").select("*").in_("domain", missing).execute()
+                for row in result.data or []:
+                    record = DomainEnrichment.from_row(row)
+                    found[record.domain] = record
+                    self._records[record.domain] = record
+            except Exception as e:
+                print(f"[DomainEnrichmentStore] Could not read enrichment store: {e}")
+
+        return found
+
+    def get(self, domain: Optional[str]) -> Optional[DomainEnrichment]:
+        return self.get_many([domain]).get(domain) if domain else None
+
+    def is_fresh(self, record: DomainEnrichment) -> bool:
+        return record.validated_at is not None and _now() - record.validated_at < self.freshness
+
+    def save(self, domain: str, etag: Optional[str] = None, last_modified: Optional[str] = None,
+             **facets: Any) -> Optional[DomainEnrichment]:
+        """
+        Store freshly extracted facets for a domain
+
+        Only the facets passed are written, so email discovery and business
+        classification can fill in the same record independently.
+        """
+        if not domain:
+            return None
+
+        now = _now()
+        record = self._records.get(domain) or DomainEnrichment(domain=domain)
+        for facet, value in facets.items():
+            setattr(record, facet, value)
+        if etag or last_modified:
+            record.etag, record.last_modified = etag, last_modified
+        record.enriched_at = record.validated_at = now
+        self._records[domain] = record
+
+        if self.supabase is not None:
+            row = {"domain": domain, **facets, "enriched_at": now.isoformat(), "validated_at": now.isoformat()}
+            if etag or last_modified:
+                row.update({"etag": etag, "last_modified": last_modified})
+            try:
+                self.supabase.table("domain_enrichment").upsert(row, on_conflict="domain").execute()
+            except Exception as e:
+                print(f"[DomainEnrichmentStore] Could not write enrichment for {domain}: {e}")
+
+        return record
+
+    def mark_validated(self, record: DomainEnrichment):
+        """The site hasn't changed; restart the record's freshness window"""
+        record.validated_at = _now()
+        self._records[record.domain] = record
+        if self.supabase is not None:
+            try:
+                self.supabase.table("domain_enrichment").update(
+                    {"validated_at": record.validated_at.isoformat()}
+                ).eq("domain", record.domain).execute()
+            except Exception as e:
+                print(f"[DomainEnrichmentStore] Could not mark {record.domain} validated: {e}")
+
+    def lookup(self, records: dict[str, DomainEnrichment], domain: Optional[str],
+               facets: list[str], website: Optional[str] = None) -> Optional[DomainEnrichment]:
+        """
+        A usable record for domain, or None if it has to be crawled again
+
+        Stale records are revalidated with a blocking conditional GET against
+        website; async callers revalidate through their own client instead
+        and pass website=None.
+        """
+        record = records.get(domain) if domain else None
+        if record is None or not record.has(facets):
+            return None
+        if self.is_fresh(record):
+            return record
+        if website and self.revalidate(record, website):
+            return record
+        return None
+
+    def revalidate(self, record: DomainEnrichment, website: str) -> bool:
+        """Conditional GET of the home page; True (and refreshed) if it's unchanged"""
+        headers = record.revalidation_headers()
+        if not headers:
+            return False
+        url = website if "//" in website else f"https://{website}"
+        try:
+            response = self.http.get(url, headers=headers, timeout=REVALIDATE_TIMEOUT, stream=True)
+            response.close()
+        except requests.RequestException as e:
+            print(f"[DomainEnrichmentStore] Could not revalidate {record.domain}: {e}")
+            return False
+
+        if response.status_code == 304:
+            print(f"[DomainEnrichmentStore] {record.domain} unchanged, reusing enrichment")
+            self.mark_validated(record)
+            return True
+        return False
+
+    def fetch_validators(self, website: str) -> tuple[Optional[str], Optional[str]]:
+        """(ETag, Last-Modified) of a home page, for callers whose crawler doesn't expose headers"""
+        url = website if "//" in website else f"https://{website}"
+        try:
+            response = self.http.head(url, timeout=REVALIDATE_TIMEOUT, allow_redirects=True)
+            return response.headers.get("ETag"), response.headers.get("Last-Modified")
+        except requests.RequestException:
+            return None, None
+
+    def stats(self) -> dict[str, Any]:
+        return self._records.stats()
+
+
+_domain_enrichment_store: Optional[DomainEnrichmentStore] = None
+
+
+def get_domain_enrichment_store(supabase: Any = None) -> DomainEnrichmentStore:
+    """Process-wide store shared by every discovery and enrichment agent"""
+    global _domain_enrichment_store
+    if _domain_enrichment_store is None:
+        _domain_enrichment_store = DomainEnrichmentStore(supabase)
+    elif _domain_enrichment_store.supabase is None and supabase is not None:
+        _domain_enrichment_store.supabase = supabase
+    return _domain_enrichment_store
@@ -0,0 +1,221 @@
+"""
+Enrichment Pipeline
+Batch contractor website enrichment over a pool of reusable browser sessions
+
+Enrichment is split into two stages that run at the same time:
+1. Capture - a pooled browser session visits the site (home page, About page,
+   social links, gallery) under a per-site timeout
+2. Analyze - contact extraction, classification and any LLM calls run on the
+   captured snapshot after its browser session has been handed back
+
+Bounded queues between the stages keep browsers busy while earlier sites are
+still being analyzed. Analysis results are cached by domain + content hash, so
+unchanged sites skip analysis entirely. With a DomainEnrichmentStore, domains
+enriched on earlier runs skip the browser as well.
+
+Enrichers plug in by implementing capture_site(contractor) -> SiteSnapshot,
+analyze_site(contractor, snapshot) and failed_result(contractor, error), plus
+domain_facets(result) / from_domain_record(contractor, record) for the store.
+"""
+import asyncio
+import copy
+import hashlib
+import os
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from agents.enrichment.domain_enrichment_store import CLASSIFICATION_FACETS, DomainEnrichmentStore, website_domain
+from utils.session_cache import SessionCache
+
+
+ENRICHMENT_BROWSERS = int(os.getenv("ENRICHMENT_BROWSERS", "5"))
+ENRICHMENT_ANALYZERS = int(os.getenv("ENRICHMENT_ANALYZERS", "5"))
+ENRICHMENT_SITE_TIMEOUT = float(os.getenv("ENRICHMENT_SITE_TIMEOUT", "30"))
+
+# domain:content-hash -> analysis result
+_result_cache = SessionCache("enrichment_results", max_entries=5000, ttl_seconds=24 * 3600, max_bytes=64 * 1024 * 1024)
+
+# Contractor fields the analysis stage reads besides the site itself
+ANALYSIS_INPUT_FIELDS = ["company_name", "phone", "google_review_count", "project_type"]
+
+
+@dataclass
+class SiteSnapshot:
+    """Everything the capture stage read from a contractor website"""
+    url: str
+    page_text: str = ""
+    page_html: str = ""
+    about_text: str = ""
+    social_media: dict[str, str] = field(default_factory=dict)
+    gallery_images: list[str] = field(default_factory=list)
+    # Home page validators, kept with stored enrichment for revalidation
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def content_hash(self) -> str:
+        digest = hashlib.sha256()
+        for part in (self.page_text, self.page_html, self.about_text):
+            digest.update(part.encode("utf-8", errors="replace"))
+            digest.update(b"\0")
+        digest.update(repr(sorted(self.social_media.items())).encode())
+        digest.update(repr(self.gallery_images).encode())
+        return digest.hexdigest()
+
+
+def result_cache_key(contractor: dict[str, Any], snapshot: SiteSnapshot) -> str:
+    inputs = repr([contractor.get(name) for name in ANALYSIS_INPUT_FIELDS])
+    content = hashlib.sha256(f"{snapshot.content_hash()}|{inputs}".encode()).hexdigest()
+    return f"{website_domain(snapshot.url)}:{content}"
+
+
+class BrowserPool:
+    """
+    Fixed set of reusable browser sessions, one enricher instance each
+
+    A session whose capture raised or was cancelled (a site timeout) may be
+    stuck mid-navigation, so it's replaced with a fresh one instead of reused.
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int = ENRICHMENT_BROWSERS):
+        self.factory = factory
+        self.size = size
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._created = 0
+
+    @asynccontextmanager
+    async def session(self):
+        if self._idle.empty() and self._created < self.size:
+            self._created += 1
+            enricher = self.factory()
+        else:
+            enricher = await self._idle.get()
+        try:
+            yield enricher
+        except BaseException:
+            self._idle.put_nowait(self.factory())
+            raise
+        self._idle.put_nowait(enricher)
+
+
+class EnrichmentPipeline:
+    """Enrich batches of contractors with overlapping capture and analysis"""
+
+    def __init__(self,
+                 enricher_factory: Callable[[], Any],
+                 browsers: int = ENRICHMENT_BROWSERS,
+                 analyzers: int = ENRICHMENT_ANALYZERS,
+                 site_timeout: float = ENRICHMENT_SITE_TIMEOUT,
+                 store: Optional[DomainEnrichmentStore] = None):
+        self.pool = BrowserPool(enricher_factory, browsers)
+        # Analysis never touches the browser, so one instance serves every analyzer
+        self.analyzer = enricher_factory()
+        self.browsers = browsers
+        self.analyzers = analyzers
+        self.site_timeout = site_timeout
+        self.store = store
+
+    async def enrich_batch(self, contractors: list[dict[str, Any]]) -> list[Any]:
+        """Enrichment results in the same order as contractors"""
+        results: list[Any] = [None] * len(contractors)
+        records = {}
+        if self.store is not None:
+            records = await asyncio.to_thread(
+                self.store.get_many, [website_domain(contractor.get("website")) for contractor in contractors]
+            )
+        capture_queue: asyncio.Queue = asyncio.Queue(maxsize=self.browsers * 2)
+        analyze_queue: asyncio.Queue = asyncio.Queue(maxsize=self.analyzers * 2)
+
+        async def produce():
+            for index, contractor in enumerate(contractors):
+                await capture_queue.put((index, contractor))
+            for _ in range(self.browsers):
+                await capture_queue.put(None)
+
+        async def capture_worker():
+            while (item := await capture_queue.get()) is not None:
+                index, contractor = item
+                snapshot = await self._capture(contractor, results, index, records)
+                if snapshot is not False:
+                    await analyze_queue.put((index, contractor, snapshot))
+
+        async def analyze_worker():
+            while (item := await analyze_queue.get()) is not None:
+                index, contractor, snapshot = item
+                results[index] = await self._analyze(contractor, snapshot)
+
+        analyze_tasks = [asyncio.create_task(analyze_worker()) for _ in range(self.analyzers)]
+        try:
+            await asyncio.gather(produce(), *(capture_worker() for _ in range(self.browsers)))
+            for _ in range(self.analyzers):
+                await analyze_queue.put(None)
+            await asyncio.gather(*analyze_tasks)
+        finally:
+            for task in analyze_tasks:
+                task.cancel()
+
+        return results
+
+    async def _capture(self, contractor: dict[str, Any], results: list[Any], index: int, records: dict[str, Any]):
+        """Snapshot for contractor, None when it has no website, False once its result is already set"""
+        website = contractor.get("website")
+        if not website:
+            return None
+
+        try:
+            validators = (None, None)
+            if self.store is not None:
+                stored, validators = await asyncio.wait_for(
+                    self._stored_result(contractor, website, records), timeout=self.site_timeout
+                )
+                if stored is not None:
+                    results[index] = stored
+                    return False
+
+            async with self.pool.session() as enricher:
+                snapshot = await asyncio.wait_for(enricher.capture_site(contractor), timeout=self.site_timeout)
+            snapshot.etag, snapshot.last_modified = validators
+            return snapshot
+        except asyncio.TimeoutError:
+            error = f"Timed out after {self.site_timeout:.0f}s loading {website}"
+        except Exception as e:
+            error = f"Could not load {website}: {e}"
+
+        print(f"[EnrichmentPipeline] {error}")
+        results[index] = self.analyzer.failed_result(contractor, error)
+        return False
+
+    async def _stored_result(self, contractor: dict[str, Any], website: str, records: dict[str, Any]):
+        """(result rebuilt from the store, None) or (None, validators to save with a fresh capture)"""
+        domain = website_domain(website)
+        record = await asyncio.to_thread(self.store.lookup, records, domain, CLASSIFICATION_FACETS, website)
+        if record is not None:
+            print(f"[EnrichmentPipeline] Using stored enrichment for {domain}")
+            return self.analyzer.from_domain_record(contractor, record), None
+        return None, await asyncio.to_thread(self.store.fetch_validators, website)
+
+    async def _analyze(self, contractor: dict[str, Any], snapshot: Optional[SiteSnapshot]) -> Any:
+        if snapshot is None:
+            return await self.analyzer.analyze_site(contractor, None)
+
+        key = result_cache_key(contractor, snapshot)
+        cached = _result_cache.get(key)
+        if cached is not None:
+            print(f"[EnrichmentPipeline] Unchanged site, reusing analysis for {snapshot.url}")
+            return copy.deepcopy(cached)
+
+        try:
+            result = await self.analyzer.analyze_site(contractor, snapshot)
+        except Exception as e:
+            print(f"[EnrichmentPipeline] Analysis failed for {snapshot.url}: {e}")
+            return self.analyzer.failed_result(contractor, str(e))
+
+        if getattr(result, "enrichment_status", None) != "FAILED":
+            _result_cache[key] = copy.deepcopy(result)
+            if self.store is not None:
+                facets = self.analyzer.domain_facets(result)
+                if facets:
+                    await asyncio.to_thread(
+                        self.store.save, website_domain(snapshot.url), snapshot.etag, snapshot.last_modified, **facets
+                    )
+        return result
@@ -8,6 +8,9 @@ import re
 from dataclasses import dataclass
 from typing import Any, Optional
 
+from agents.enrichment.domain_enrichment_store import DomainEnrichment
+from agents.enrichment.enrichment_pipeline import SiteSnapshot
+
 
 @dataclass
 class ContractorEnrichmentData:
@@ -62,13 +65,54 @@ class PlaywrightEnrichmentAgent:
     async def enrich_contractor(self, contractor_data: dict[str, Any]) -> ContractorEnrichmentData:
         """
         Main enrichment method - extracts all possible data from contractor website
+
+        For batches use EnrichmentPipeline, which runs capture_site and
+        analyze_site over a pool of browser sessions.
         """
-        website = contractor_data.get("website")
         company_name = contractor_data.get("company_name", "Unknown")
-
         print(f"[PlaywrightEnricher] Starting enrichment for {company_name}")
 
+        try:
+            snapshot = await self.capture_site(contractor_data)
+        except Exception as e:
+            print(f"[PlaywrightEnricher] Error enriching {company_name}: {e}")
+            return self.failed_result(contractor_data, str(e))
+
+        return await self.analyze_site(contractor_data, snapshot)
+
+    async def capture_site(self, contractor_data: dict[str, Any]) -> Optional[SiteSnapshot]:
+        """Browser stage: read everything enrichment needs from the website"""
+        website = contractor_data.get("website")
         if not website:
+            return None
+
+        # Step 1: Navigate to website
+        print(f"[PlaywrightEnricher] Navigating to {website}")
+        await self._navigate_to_website(website)
+
+        # Step 2: Get page content for analysis
+        snapshot = SiteSnapshot(
+            url=website,
+            page_text=await self._get_page_text(),
+            page_html=await self._get_page_html()
+        )
+
+        # Step 3: Find social media links and gallery/portfolio on the home page
+        print("[PlaywrightEnricher] Finding social media...")
+        snapshot.social_media = await self._extract_social_media()
+        snapshot.gallery_images = await self._extract_gallery_images()
+
+        # Step 4: Look for About page
+        print("[PlaywrightEnricher] Looking for About page...")
+        snapshot.about_text = await self._get_about_page_text()
+
+        return snapshot
+
+    async def analyze_site(self, contractor_data: dict[str, Any], snapshot: Optional[SiteSnapshot]) -> ContractorEnrichmentData:
+        """Analysis stage: extract and classify from a captured site (no browser needed)"""
+        company_name = contractor_data.get("company_name", "Unknown")
+
+        if snapshot is None:
             return ContractorEnrichmentData(
                 enrichment_status="NO_WEBSITE",
                 errors=["No website provided"]
@@ -77,22 +121,16 @@ class PlaywrightEnrichmentAgent:
         enriched = ContractorEnrichmentData()
 
         try:
-            # Step 1: Navigate to website
-            print(f"[PlaywrightEnricher] Navigating to {website}")
-            await self._navigate_to_website(website)
-
-            # Step 2: Get page content for analysis
-            page_text = await self._get_page_text()
-            page_html = await self._get_page_html()
+            page_text = snapshot.page_text
 
-            # Step 3: Extract contact information
+            # Extract contact information
             print("[PlaywrightEnricher] Extracting contact information...")
-            contact_info = await self._extract_contact_info(page_text, page_html)
+            contact_info = await self._extract_contact_info(page_text, snapshot.page_html)
             enriched.email = contact_info.get("email")
             enriched.phone = contact_info.get("phone") or contractor_data.get("phone")
             enriched.business_hours = contact_info.get("hours")
 
-            # Step 4: Classify business size
+            # Classify business size
             print("[PlaywrightEnricher] Classifying business size...")
             enriched.business_size = await self._classify_business_size(
                 page_text,
@@ -100,30 +138,25 @@ class PlaywrightEnrichmentAgent:
                 contractor_data.get("google_review_count", 0)
             )
 
-            # Step 5: Extract service information
+            # Extract service information
             print("[PlaywrightEnricher] Extracting service information...")
             service_info = await self._extract_service_info(page_text)
             enriched.service_types = service_info.get("types", [])
             enriched.service_description = service_info.get("description")
             enriched.certifications = service_info.get("certifications", [])
 
-            # Step 6: Extract service areas
+            # Extract service areas
             print("[PlaywrightEnricher] Finding service areas...")
             enriched.service_areas = await self._extract_service_areas(page_text)
 
-            # Step 7: Look for About page
-            print("[PlaywrightEnricher] Looking for About page...")
-            about_info = await self._find_and_extract_about_info()
+            # About page details
+            about_info = self._parse_about_info(snapshot.about_text)
             enriched.about_text = about_info.get("about_text")
             enriched.years_in_business = about_info.get("years_in_business")
             enriched.team_size = about_info.get("team_size")
 
-            # Step 8: Find social media links
-            print("[PlaywrightEnricher] Finding social media...")
-            enriched.social_media = await self._extract_social_media()
-
-            # Step 9: Look for gallery/portfolio
-            enriched.gallery_images = await self._extract_gallery_images()
+            enriched.social_media = dict(snapshot.social_media)
+            enriched.gallery_images = list(snapshot.gallery_images)
 
             enriched.enrichment_status = "ENRICHED"
             print(f"[PlaywrightEnricher] Successfully enriched {company_name}")
@@ -135,6 +168,51 @@ class PlaywrightEnrichmentAgent:
 
         return enriched
 
+    def failed_result(self, contractor_data: dict[str, Any], error: str) -> ContractorEnrichmentData:
+        return ContractorEnrichmentData(enrichment_status="FAILED", errors=[error])
+
+    def domain_facets(self, enriched: ContractorEnrichmentData) -> dict[str, Any]:
+        """What DomainEnrichmentStore keeps from an enrichment result"""
+        if enriched.enrichment_status != "ENRICHED":
+            return {}
+        facets = {
+            "business_size": enriched.business_size,
+            "service_types": enriched.service_types,
+            "service_description": enriched.service_description,
+            "service_areas": enriched.service_areas,
+            "social_media": enriched.social_media,
+            "enrichment_data": {
+                "business_hours": enriched.business_hours,
+                "years_in_business": enriched.years_in_business,
+                "team_size": enriched.team_size,
+                "about_text": enriched.about_text,
+                "certifications": enriched.certifications,
+                "gallery_images": enriched.gallery_images
+            }
+        }
+        if enriched.email:
+            facets["emails"] = [enriched.email]
+        return facets
+
+    def from_domain_record(self, contractor_data: dict[str, Any], record: DomainEnrichment) -> ContractorEnrichmentData:
+        details = record.enrichment_data or {}
+        return ContractorEnrichmentData(
+            email=record.emails[0] if record.emails else None,
+            phone=contractor_data.get("phone"),
+            business_hours=details.get("business_hours"),
+            business_size=record.business_size,
+            service_types=list(record.service_types or []),
+            service_description=record.service_description,
+            service_areas=list(record.service_areas or []),
+            years_in_business=details.get("years_in_business"),
+            team_size=details.get("team_size"),
+            about_text=details.get("about_text"),
+            certifications=list(details.get("certifications") or []),
+            social_media=dict(record.social_media or {}),
+            gallery_images=list(details.get("gallery_images") or []),
+            enrichment_status="ENRICHED"
+        )
+
     async def _navigate_to_website(self, website: str):
         """Navigate to contractor website using Playwright MCP"""
         if not self.browser_started:
@@ -350,14 +428,8 @@ class PlaywrightEnrichmentAgent:
         # Remove duplicates and return
         return list(set(valid_zips))
 
-    async def _find_and_extract_about_info(self) -> dict[str, Any]:
-        """Navigate to About page if it exists and extract company info"""
-        about_info = {
-            "about_text": None,
-            "years_in_business": None,
-            "team_size": None
-        }
-
+    async def _get_about_page_text(self) -> str:
+        """Navigate to About page if it exists and return its text"""
         try:
             # Look for About link
             # In real implementation:
@@ -380,48 +452,64 @@ class PlaywrightEnrichmentAgent:
                 # await mcp_client.call('mcp__playwright__browser_navigate', {'url': about_link})
 
                 # Get About page content
-                about_text = await self._get_page_text()
-
-                # Extract years in business
-                year_patterns = [
-                    r"established\\s*(?:in\\s*)?(\\d{4})",
-                    r"since\\s*(\\d{4})",
-                    r"founded\\s*(?:in\\s*)?(\\d{4})",
-                    r"(\\d+)\\s*years?\\s*(?:of\\s*)?(?:experience|business|service)"
-                ]
-
-                import datetime
-                current_year = datetime.datetime.now().year
-
-                for pattern in year_patterns:
-                    match = re.search(pattern, about_text.lower())
-                    if match:
-                        year_or_count = int(match.group(1))
-                        if 1900 <= year_or_count <= current_year:
-                            about_info["years_in_business"] = current_year - year_or_count
-                        elif 1 <= year_or_count <= 100:
-                            about_info["years_in_business"] = year_or_count
-                        break
-
-                # Extract team size
-                team_patterns = [
-                    r"team of\\s*(\\d+)",
-                    r"(\\d+)\\s*employees",
-                    r"(\\d+)\\s*technicians",
-                    r"(\\d+)\\s*specialists"
-                ]
-
-                for pattern in team_patterns:
-                    match = re.search(pattern, about_text.lower())
-                    if match:
-                        about_info["team_size"] = f"{match.group(1)} employees"
-                        break
-
-                # Get summary text
-                sentences = about_text.split(".")
-                about_sentences = [s.strip() for s in sentences[:5] if len(s.strip()) > 30]
-                if about_sentences:
-                    about_info["about_text"] = ". ".join(about_sentences)[:1000]
+                return await self._get_page_text()
+
+        except Exception as e:
+            print(f"[PlaywrightEnricher] Error loading About page: {e}")
+
+        return ""
+
+    def _parse_about_info(self, about_text: str) -> dict[str, Any]:
+        """Extract company info from About page text"""
+        about_info = {
+            "about_text": None,
+            "years_in_business": None,
+            "team_size": None
+        }
+        if not about_text:
+            return about_info
+
+        try:
+            # Extract years in business
+            year_patterns = [
+                r"established\\s*(?:in\\s*)?(\\d{4})",
+                r"since\\s*(\\d{4})",
+                r"founded\\s*(?:in\\s*)?(\\d{4})",
+                r"(\\d+)\\s*years?\\s*(?:of\\s*)?(?:experience|business|service)"
+            ]
+
+            import datetime
+            current_year = datetime.datetime.now().year
+
+            for pattern in year_patterns:
+                match = re.search(pattern, about_text.lower())
+                if match:
+                    year_or_count = int(match.group(1))
+                    if 1900 <= year_or_count <= current_year:
+                        about_info["years_in_business"] = current_year - year_or_count
+                    elif 1 <= year_or_count <= 100:
+                        about_info["years_in_business"] = year_or_count
+                    break
+
+            # Extract team size
+            team_patterns = [
+                r"team of\\s*(\\d+)",
+                r"(\\d+)\\s*employees",
+                r"(\\d+)\\s*technicians",
+                r"(\\d+)\\s*specialists"
+            ]
+
+            for pattern in team_patterns:
+                match = re.search(pattern, about_text.lower())
+                if match:
+                    about_info["team_size"] = f"{match.group(1)} employees"
+                    break
+
+            # Get summary text
+            sentences = about_text.split(".")
+            about_sentences = [s.strip() for s in sentences[:5] if len(s.strip()) > 30]
+            if about_sentences:
+                about_info["about_text"] = ". ".join(about_sentences)[:1000]
 
         except Exception as e:
             print(f"[PlaywrightEnricher] Error extracting About info: {e}")
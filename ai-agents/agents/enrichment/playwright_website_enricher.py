@@ -6,6 +6,9 @@ import re
 from dataclasses import asdict, dataclass
 from typing import Any, Optional
 
+from agents.enrichment.domain_enrichment_store import DomainEnrichment
+from agents.enrichment.enrichment_pipeline import SiteSnapshot
+
 
 @dataclass
 class EnrichedContractorData:
@@ -44,6 +47,9 @@ class PlaywrightWebsiteEnricher:
     async def enrich_contractor_from_website(self, contractor_data: dict[str, Any]) -> EnrichedContractorData:
         """
         Main enrichment method - uses Playwright to extract everything from website
+
+        For batches use EnrichmentPipeline, which runs capture_site and
+        analyze_site over a pool of browser sessions.
         """
         website = contractor_data.get("website")
         if not website:
@@ -51,19 +57,45 @@ class PlaywrightWebsiteEnricher:
 
         try:
             print(f"[PlaywrightEnricher] Starting enrichment for {website}")
+            snapshot = await self.capture_site(contractor_data)
+        except Exception as e:
+            print(f"[PlaywrightEnricher] Error enriching {website}: {e}")
+            return EnrichedContractorData()
+
+        return await self.analyze_site(contractor_data, snapshot)
+
+    async def capture_site(self, contractor_data: dict[str, Any]) -> Optional[SiteSnapshot]:
+        """Browser stage: read everything enrichment needs from the website"""
+        website = contractor_data.get("website")
+        if not website:
+            return None
+
+        # Initialize browser if needed
+        if not self.browser_initialized:
+            await self._initialize_browser()
+
+        # Navigate to website
+        await self._navigate_to_website(website)
 
-            # Initialize browser if needed
-            if not self.browser_initialized:
-                await self._initialize_browser()
+        # Take screenshot for visual analysis
+        await self._capture_screenshot()
 
-            # Navigate to website
-            await self._navigate_to_website(website)
+        # Get page content
+        snapshot = SiteSnapshot(url=website, page_text=await self._get_page_content())
 
-            # Take screenshot for visual analysis
-            await self._capture_screenshot()
+        # Social media links and gallery/portfolio
+        snapshot.social_media = await self._extract_social_media_links()
+        snapshot.gallery_images = await self._extract_gallery_images()
 
-            # Get page content
-            page_content = await self._get_page_content()
+        return snapshot
+
+    async def analyze_site(self, contractor_data: dict[str, Any], snapshot: Optional[SiteSnapshot]) -> EnrichedContractorData:
+        """Analysis stage: extract, classify and ask the LLM about a captured site"""
+        if snapshot is None:
+            return EnrichedContractorData()
+
+        try:
+            page_content = snapshot.page_text
 
             # Extract structured data using multiple strategies
             enriched = EnrichedContractorData()
@@ -96,13 +128,11 @@ class PlaywrightWebsiteEnricher:
             enriched.years_in_business = about_data.get("years_in_business")
             enriched.team_size_estimate = about_data.get("team_size")
 
-            # 6. Find social media links
-            enriched.social_media = await self._extract_social_media_links()
-
-            # 7. Check for gallery/portfolio
-            enriched.gallery_images = await self._extract_gallery_images()
+            # 6. Social media links and gallery/portfolio
+            enriched.social_media = dict(snapshot.social_media)
+            enriched.gallery_images = list(snapshot.gallery_images)
 
-            # 8. Use LLM for intelligent analysis if available
+            # 7. Use LLM for intelligent analysis if available
             if self.llm_client and page_content:
                 llm_insights = await self._get_llm_insights(
                     page_content,
@@ -115,13 +145,56 @@ class PlaywrightWebsiteEnricher:
                 if llm_insights.get("business_size") and not enriched.business_size:
                     enriched.business_size = llm_insights["business_size"]
 
-            print(f"[PlaywrightEnricher] Enrichment complete for {website}")
+            print(f"[PlaywrightEnricher] Enrichment complete for {snapshot.url}")
             return enriched
 
         except Exception as e:
-            print(f"[PlaywrightEnricher] Error enriching {website}: {e}")
+            print(f"[PlaywrightEnricher] Error enriching {snapshot.url}: {e}")
             return EnrichedContractorData()
 
+    def failed_result(self, contractor_data: dict[str, Any], error: str) -> EnrichedContractorData:
+        return EnrichedContractorData()
+
+    def domain_facets(self, enriched: EnrichedContractorData) -> dict[str, Any]:
+        """What DomainEnrichmentStore keeps from an enrichment result"""
+        if not enriched.business_size:
+            return {}
+        facets = {
+            "business_size": enriched.business_size,
+            "service_types": enriched.service_types or [],
+            "service_description": enriched.service_description,
+            "service_areas": enriched.service_areas or [],
+            "social_media": enriched.social_media or {},
+            "enrichment_data": {
+                "business_hours": enriched.business_hours,
+                "years_in_business": enriched.years_in_business,
+                "team_size_estimate": enriched.team_size_estimate,
+                "about_text": enriched.about_text,
+                "certifications": enriched.certifications,
+                "gallery_images": enriched.gallery_images
+            }
+        }
+        if enriched.email:
+            facets["emails"] = [enriched.email]
+        return facets
+
+    def from_domain_record(self, contractor_data: dict[str, Any], record: DomainEnrichment) -> EnrichedContractorData:
+        details = record.enrichment_data or {}
+        return EnrichedContractorData(
+            email=record.emails[0] if record.emails else None,
+            business_size=record.business_size,
+            service_types=list(record.service_types or []),
+            service_description=record.service_description,
+            service_areas=list(record.service_areas or []),
+            team_size_estimate=details.get("team_size_estimate"),
+            years_in_business=details.get("years_in_business"),
+            about_text=details.get("about_text"),
+            business_hours=details.get("business_hours"),
+            social_media=dict(record.social_media or {}),
+            certifications=list(details.get("certifications") or []),
+            gallery_images=list(details.get("gallery_images") or [])
+        )
+
     async def _initialize_browser(self):
         """Initialize Playwright browser"""
         # This would call mcp__playwright__browser_install if needed
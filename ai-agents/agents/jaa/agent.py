@@ -2,6 +2,7 @@
 Intelligent Job Assessment Agent - LangGraph + Claude Opus 4 Implementation
 Replaces regex-based extraction with real AI intelligence
 """
+import asyncio
 import json
 import os
 import sys
@@ -11,6 +12,7 @@ from typing import Annotated, Any
 from dotenv import load_dotenv
 from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import add_messages
 from supabase import create_client
@@ -21,7 +23,14 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from typing_extensions import TypedDict
 
 from database_simple import SupabaseDB
-from bid_card_utils import create_bid_card_with_defaults
+from bid_card_utils import create_bid_card_with_defaults, create_bid_cards_bulk
+from utils.context_cache import invalidate_bid_card
+from utils.conversation_log import ConversationLog
+from utils.fast_extract import JAA_PROJECT_TYPES, fast_extractor
+
+
+# Conversations processed at once in batch mode (each run makes two Opus calls)
+JAA_BATCH_CONCURRENCY = int(os.getenv("JAA_BATCH_CONCURRENCY", "5"))
 
 
 class IntelligentJAAState(TypedDict):
@@ -61,6 +70,7 @@ class JobAssessmentAgent:
         self.supabase_key = os.getenv("SUPABASE_ANON_KEY")
         self.supabase = create_client(self.supabase_url, self.supabase_key)
         self.db = SupabaseDB()
+        self.conversation_log = ConversationLog(self.supabase)
 
         # Build the LangGraph workflow
         self.workflow = self._build_workflow()
@@ -73,8 +83,9 @@ class JobAssessmentAgent:
         workflow = StateGraph(IntelligentJAAState)
 
         # Add nodes
-        workflow.add_node("analyze_conversation", self._analyze_conversation)
-        workflow.add_node("extract_project_data", self._extract_project_data)
+        # LLM steps have async versions so ainvoke never blocks the event loop
+        workflow.add_node("analyze_conversation", RunnableLambda(self._analyze_conversation, afunc=self._aanalyze_conversation))
+        workflow.add_node("extract_project_data", RunnableLambda(self._extract_project_data, afunc=self._aextract_project_data))
         workflow.add_node("validate_extraction", self._validate_extraction)
         workflow.add_node("generate_bid_card", self._generate_bid_card)
 
@@ -102,119 +113,220 @@ class JobAssessmentAgent:
         try:
             # Step 1: Load conversation from database
             print("[INTELLIGENT JAA] Loading conversation from database...")
-            result = self.supabase.table("agent_conversations").select("*").eq("thread_id", thread_id).execute()
-
-            if not result.data or len(result.data) == 0:
-                return {
-                    "success": False,
-                    "error": f"No conversation found for thread_id: {thread_id}"
-                }
-
-            conversation_data = result.data[0]
-
-            # Parse state if it's JSON string
-            state = conversation_data.get("state", {})
-            if isinstance(state, str):
-                state = json.loads(state)
-                conversation_data["state"] = state
-
-            print(f"[INTELLIGENT JAA] Loaded conversation with {len(state.get('messages', []))} messages")
-
-            # Step 2: Initialize state and run LangGraph workflow
-            initial_state = {
-                "messages": [],
-                "conversation_data": conversation_data,
-                "extracted_data": {},
-                "bid_card_data": {},
-                "thread_id": thread_id,
-                "stage": "analysis",
-                "errors": []
-            }
+            # State snapshot + turn log, with messages rebuilt
+            conversation_data = self.conversation_log.load(thread_id)
+            if not conversation_data:
+                return self._missing_conversation(thread_id)
+
+            # Step 2: Run the intelligent workflow
+            final_state = self.workflow.invoke(self._initial_state(thread_id, conversation_data))
+            if final_state["errors"]:
+                return self._workflow_failed(final_state)
+
+            # Step 3: Save to database
+            return self._save_bid_card(final_state, thread_id)
 
-            # Run the intelligent workflow
-            final_state = self.workflow.invoke(initial_state)
+        except Exception as e:
+            return self._processing_error(e)
+
+    async def aprocess_conversation(self, thread_id: str) -> dict[str, Any]:
+        """Async process_conversation: runs the workflow with ainvoke and keeps DB calls off the loop"""
+        print(f"\n[INTELLIGENT JAA] Processing conversation (async): {thread_id}")
+
+        try:
+            conversation_data = await asyncio.to_thread(self.conversation_log.load, thread_id)
+            if not conversation_data:
+                return self._missing_conversation(thread_id)
 
+            final_state = await self.workflow.ainvoke(self._initial_state(thread_id, conversation_data))
             if final_state["errors"]:
-                return {
-                    "success": False,
-                    "error": f'Processing errors: {"; ".join(final_state["errors"])}'
-                }
-
-            # Step 3: Save to database using new utility
-            print("[INTELLIGENT JAA] Creating bid card with fixed database schema...")
-            
-            # Prepare project data for the new utility
-            project_data = {
-                "project_type": final_state["bid_card_data"].get("project_type", "general_renovation"),
-                "title": final_state["bid_card_data"].get("title", "New Project"),
-                "description": final_state["bid_card_data"].get("description", ""),
-                "urgency_level": final_state["bid_card_data"].get("urgency_level", "week"),
-                "complexity_score": final_state["bid_card_data"].get("complexity_score", 3),
-                "contractor_count_needed": final_state["bid_card_data"].get("contractor_count_needed", 3),
-                "budget_min": final_state["bid_card_data"].get("budget_min"),
-                "budget_max": final_state["bid_card_data"].get("budget_max"),
-                "requirements": final_state["bid_card_data"].get("requirements", []),
-                "location_city": final_state["bid_card_data"].get("location_city"),
-                "location_state": final_state["bid_card_data"].get("location_state"),
-                "location_zip": final_state["bid_card_data"].get("location_zip"),
-                "cia_thread_id": thread_id[-20:],  # Truncate to fit VARCHAR(20)
-                "timeline_start": final_state["bid_card_data"].get("timeline_start"),
-                "timeline_end": final_state["bid_card_data"].get("timeline_end")
-            }
-            
-            # Create bid card using the new utility
-            create_result = create_bid_card_with_defaults(project_data)
-            
-            if create_result["success"]:
-                bid_card_data = create_result["bid_card"]
-                bid_card_number = create_result["bid_card_number"]
-                
-                # Update the bid_document with AI analysis
-                bid_document = {
-                    "bid_card_number": bid_card_number,
-                    "full_cia_thread_id": thread_id,
-                    "all_extracted_data": final_state["extracted_data"],
-                    "ai_analysis": final_state["bid_card_data"],
-                    "generated_at": datetime.now().isoformat(),
-                    "extraction_method": "IntelligentJAA_ClaudeOpus4",
-                    "instabids_version": "3.0"
-                }
-                
-                # Update the bid_document field
-                update_result = self.supabase.table("bid_cards").update({
-                    "bid_document": bid_document
-                }).eq("id", bid_card_data["id"]).execute()
-                
-                print(f"[INTELLIGENT JAA] SUCCESS: Created bid card {bid_card_number}")
-                print(f"[INTELLIGENT JAA] Project: {final_state['bid_card_data'].get('project_type')}")
-                print(f"[INTELLIGENT JAA] Budget: ${final_state['bid_card_data'].get('budget_min')}-${final_state['bid_card_data'].get('budget_max')}")
-                
-                return {
-                    "success": True,
-                    "bid_card_number": bid_card_number,
-                    "bid_card_data": final_state["bid_card_data"],
-                    "cia_thread_id": thread_id,
-                    "database_id": bid_card_data["id"]
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": f"Failed to create bid card: {create_result['error']}"
-                }
+                return self._workflow_failed(final_state)
+
+            return await asyncio.to_thread(self._save_bid_card, final_state, thread_id)
 
         except Exception as e:
-            print(f"[INTELLIGENT JAA ERROR] {e}")
-            import traceback
-            traceback.print_exc()
+            return self._processing_error(e)
+
+    async def aprocess_conversations(self, thread_ids: list[str],
+                                     concurrency: int = JAA_BATCH_CONCURRENCY) -> list[dict[str, Any]]:
+        """
+        Batch mode: turn many completed CIA threads into bid cards
+
+        Conversations are loaded with one query, workflows run concurrently
+        (bounded by concurrency) and all resulting bid cards are written with
+        a single bulk insert.
+
+        Returns:
+            One result per thread_id, in order, shaped like process_conversation
+        """
+        print(f"\n[INTELLIGENT JAA] Batch processing {len(thread_ids)} conversations")
+        conversations = await asyncio.to_thread(self.conversation_log.load_many, thread_ids)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(thread_id: str) -> Any:
+            if thread_id not in conversations:
+                return self._missing_conversation(thread_id)
+            async with semaphore:
+                try:
+                    final_state = await self.workflow.ainvoke(self._initial_state(thread_id, conversations[thread_id]))
+                except Exception as e:
+                    return self._processing_error(e)
+            return self._workflow_failed(final_state) if final_state["errors"] else final_state
+
+        outcomes = await asyncio.gather(*(run(thread_id) for thread_id in thread_ids))
+
+        # Bulk insert every successful run, with its bid_document included up front
+        ready = [(index, outcome) for index, outcome in enumerate(outcomes) if "bid_card_data" in outcome]
+        created = await asyncio.to_thread(create_bid_cards_bulk, [
+            {**self._bid_card_project_data(final_state, thread_ids[index]),
+             "bid_document": self._bid_document(final_state, thread_ids[index])}
+            for index, final_state in ready
+        ])
+
+        results = list(outcomes)
+        for (index, final_state), create_result in zip(ready, created, strict=True):
+            results[index] = self._bid_card_result(final_state, thread_ids[index], create_result)
+
+        succeeded = sum(1 for result in results if result.get("success"))
+        print(f"[INTELLIGENT JAA] Batch complete: {succeeded}/{len(thread_ids)} bid cards created")
+        return results
+
+    def _initial_state(self, thread_id: str, conversation_data: dict[str, Any]) -> IntelligentJAAState:
+        """Initial LangGraph state for a loaded conversation"""
+        print(f"[INTELLIGENT JAA] Loaded conversation with {len(conversation_data['state'].get('messages', []))} messages")
+        return {
+            "messages": [],
+            "conversation_data": conversation_data,
+            "extracted_data": {},
+            "bid_card_data": {},
+            "thread_id": thread_id,
+            "stage": "analysis",
+            "errors": []
+        }
+
+    def _bid_card_project_data(self, final_state: IntelligentJAAState, thread_id: str) -> dict[str, Any]:
+        """Map the workflow's bid card data onto bid_cards columns"""
+        bid_card_data = final_state["bid_card_data"]
+        return {
+            "project_type": bid_card_data.get("project_type", "general_renovation"),
+            "title": bid_card_data.get("title", "New Project"),
+            "description": bid_card_data.get("description", ""),
+            "urgency_level": bid_card_data.get("urgency_level", "week"),
+            "complexity_score": bid_card_data.get("complexity_score", 3),
+            "contractor_count_needed": bid_card_data.get("contractor_count_needed", 3),
+            "budget_min": bid_card_data.get("budget_min"),
+            "budget_max": bid_card_data.get("budget_max"),
+            "requirements": bid_card_data.get("requirements", []),
+            "location_city": bid_card_data.get("location_city"),
+            "location_state": bid_card_data.get("location_state"),
+            "location_zip": bid_card_data.get("location_zip"),
+            "cia_thread_id": thread_id[-20:],  # Truncate to fit VARCHAR(20)
+            "timeline_start": bid_card_data.get("timeline_start"),
+            "timeline_end": bid_card_data.get("timeline_end")
+        }
+
+    def _bid_document(self, final_state: IntelligentJAAState, thread_id: str, bid_card_number: str = None) -> dict[str, Any]:
+        """bid_document with the full AI analysis"""
+        bid_document = {
+            "full_cia_thread_id": thread_id,
+            "all_extracted_data": final_state["extracted_data"],
+            "ai_analysis": final_state["bid_card_data"],
+            "generated_at": datetime.now().isoformat(),
+            "extraction_method": "IntelligentJAA_ClaudeOpus4",
+            "instabids_version": "3.0"
+        }
+        if bid_card_number:
+            bid_document = {"bid_card_number": bid_card_number, **bid_document}
+        return bid_document
+
+    def _save_bid_card(self, final_state: IntelligentJAAState, thread_id: str) -> dict[str, Any]:
+        """Create the bid card for a finished workflow run"""
+        print("[INTELLIGENT JAA] Creating bid card with fixed database schema...")
+
+        # Create bid card using the new utility
+        create_result = create_bid_card_with_defaults(self._bid_card_project_data(final_state, thread_id))
+
+        if create_result["success"]:
+            bid_card_number = create_result["bid_card_number"]
+
+            # Update the bid_document field
+            self.supabase.table("bid_cards").update({
+                "bid_document": self._bid_document(final_state, thread_id, bid_card_number)
+            }).eq("id", create_result["bid_card"]["id"]).execute()
+
+        return self._bid_card_result(final_state, thread_id, create_result)
+
+    def _bid_card_result(self, final_state: IntelligentJAAState, thread_id: str,
+                         create_result: dict[str, Any]) -> dict[str, Any]:
+        """Result dict for a bid card creation attempt"""
+        if not create_result["success"]:
             return {
                 "success": False,
-                "error": str(e)
+                "error": f"Failed to create bid card: {create_result['error']}"
             }
 
+        bid_card_number = create_result["bid_card_number"]
+        invalidate_bid_card(bid_card_number)
+
+        print(f"[INTELLIGENT JAA] SUCCESS: Created bid card {bid_card_number}")
+        print(f"[INTELLIGENT JAA] Project: {final_state['bid_card_data'].get('project_type')}")
+        print(f"[INTELLIGENT JAA] Budget: ${final_state['bid_card_data'].get('budget_min')}-${final_state['bid_card_data'].get('budget_max')}")
+
+        return {
+            "success": True,
+            "bid_card_number": bid_card_number,
+            "bid_card_data": final_state["bid_card_data"],
+            "cia_thread_id": thread_id,
+            "database_id": create_result["bid_card"]["id"]
+        }
+
+    def _missing_conversation(self, thread_id: str) -> dict[str, Any]:
+        return {
+            "success": False,
+            "error": f"No conversation found for thread_id: {thread_id}"
+        }
+
+    def _workflow_failed(self, final_state: IntelligentJAAState) -> dict[str, Any]:
+        return {
+            "success": False,
+            "error": f'Processing errors: {"; ".join(final_state["errors"])}'
+        }
+
+    def _processing_error(self, e: Exception) -> dict[str, Any]:
+        print(f"[INTELLIGENT JAA ERROR] {e}")
+        import traceback
+        traceback.print_exc()
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
     def _analyze_conversation(self, state: IntelligentJAAState) -> IntelligentJAAState:
         """Step 1: Analyze conversation with AI to understand project scope"""
         print("[INTELLIGENT JAA] Stage 1: Analyzing conversation with Claude Opus 4...")
 
+        try:
+            response = self.llm.invoke(self._analysis_messages(state))
+            return self._apply_analysis(state, response)
+
+        except Exception as e:
+            state["errors"].append(f"Analysis failed: {e!s}")
+            return state
+
+    async def _aanalyze_conversation(self, state: IntelligentJAAState) -> IntelligentJAAState:
+        """Step 1 (async)"""
+        print("[INTELLIGENT JAA] Stage 1: Analyzing conversation with Claude Opus 4...")
+
+        try:
+            response = await self.llm.ainvoke(self._analysis_messages(state))
+            return self._apply_analysis(state, response)
+
+        except Exception as e:
+            state["errors"].append(f"Analysis failed: {e!s}")
+            return state
+
+    def _analysis_messages(self, state: IntelligentJAAState) -> list[BaseMessage]:
+        """Prompt for Step 1"""
         # Extract conversation messages
         conversation_state = state["conversation_data"].get("state", {})
         messages = conversation_state.get("messages", [])
@@ -270,27 +382,51 @@ Please analyze and provide:
 Provide your analysis in clear, structured format.
 """
 
-        try:
-            response = self.llm.invoke([
-                SystemMessage(content="You are an expert project analyst for InstaBids contractor marketplace."),
-                HumanMessage(content=analysis_prompt)
-            ])
+        return [
+            SystemMessage(content="You are an expert project analyst for InstaBids contractor marketplace."),
+            HumanMessage(content=analysis_prompt)
+        ]
 
-            # Store analysis
-            state["extracted_data"]["ai_analysis"] = response.content
-            state["stage"] = "extraction"
+    def _apply_analysis(self, state: IntelligentJAAState, response: Any) -> IntelligentJAAState:
+        # Store analysis
+        state["extracted_data"]["ai_analysis"] = response.content
+        state["stage"] = "extraction"
 
-            print("[INTELLIGENT JAA] Conversation analysis complete")
-            return state
+        print("[INTELLIGENT JAA] Conversation analysis complete")
+        return state
+
+    def _extract_project_data(self, state: IntelligentJAAState) -> IntelligentJAAState:
+        """Step 2: Extract structured data points using AI intelligence"""
+        print("[INTELLIGENT JAA] Stage 2: Extracting structured data with AI...")
+
+        try:
+            response = self.llm.invoke(self._extraction_messages(state))
+            return self._apply_extraction(state, response)
 
+        except json.JSONDecodeError as e:
+            state["errors"].append(f"JSON parsing failed: {e!s}")
+            return state
         except Exception as e:
-            state["errors"].append(f"Analysis failed: {e!s}")
+            state["errors"].append(f"Extraction failed: {e!s}")
             return state
 
-    def _extract_project_data(self, state: IntelligentJAAState) -> IntelligentJAAState:
-        """Step 2: Extract structured data points using AI intelligence"""
+    async def _aextract_project_data(self, state: IntelligentJAAState) -> IntelligentJAAState:
+        """Step 2 (async)"""
         print("[INTELLIGENT JAA] Stage 2: Extracting structured data with AI...")
 
+        try:
+            response = await self.llm.ainvoke(self._extraction_messages(state))
+            return self._apply_extraction(state, response)
+
+        except json.JSONDecodeError as e:
+            state["errors"].append(f"JSON parsing failed: {e!s}")
+            return state
+        except Exception as e:
+            state["errors"].append(f"Extraction failed: {e!s}")
+            return state
+
+    def _extraction_messages(self, state: IntelligentJAAState) -> list[BaseMessage]:
+        """Prompt for Step 2"""
         # Get conversation data
         conversation_state = state["conversation_data"].get("state", {})
         messages = conversation_state.get("messages", [])
@@ -318,6 +454,9 @@ COLLECTED INFO:
 PREVIOUS ANALYSIS:
 {state["extracted_data"].get('ai_analysis', 'No previous analysis')}
 
+ALREADY EXTRACTED (exact rule matches, kept as-is - use null for these and focus on the other fields):
+{json.dumps(self._deterministic_fields(messages), indent=2)}
+
 Extract the following data points in JSON format:
 
 {{
@@ -365,34 +504,72 @@ IMPORTANT:
 Return ONLY the JSON, no additional text.
 """
 
-        try:
-            response = self.llm.invoke([
-                SystemMessage(content="You are a data extraction specialist. Return only valid JSON."),
-                HumanMessage(content=extraction_prompt)
-            ])
-
-            # Clean the response - remove markdown code blocks if present
-            response_content = response.content.strip()
-            if response_content.startswith("```json"):
-                response_content = response_content[7:]  # Remove ```json
-            if response_content.endswith("```"):
-                response_content = response_content[:-3]  # Remove ```
-            response_content = response_content.strip()
-
-            # Parse the JSON response
-            extracted_data = json.loads(response_content)
-            state["extracted_data"].update(extracted_data)
-            state["stage"] = "validation"
-
-            print("[INTELLIGENT JAA] Data extraction complete")
-            return state
+        return [
+            SystemMessage(content="You are a data extraction specialist. Return only valid JSON."),
+            HumanMessage(content=extraction_prompt)
+        ]
+
+    def _apply_extraction(self, state: IntelligentJAAState, response: Any) -> IntelligentJAAState:
+        # Clean the response - remove markdown code blocks if present
+        response_content = response.content.strip()
+        if response_content.startswith("```json"):
+            response_content = response_content[7:]  # Remove ```json
+        if response_content.endswith("```"):
+            response_content = response_content[:-3]  # Remove ```
+        response_content = response_content.strip()
+
+        # Parse the JSON response
+        extracted_data = json.loads(response_content)
+        state["extracted_data"].update(extracted_data)
+
+        # Rule matches are exact; they win over the model's reading
+        messages = state["conversation_data"].get("state", {}).get("messages", [])
+        for key, value in self._deterministic_fields(messages).items():
+            if key == "location":
+                state["extracted_data"]["location"] = {**(state["extracted_data"].get("location") or {}), **value}
+            else:
+                state["extracted_data"][key] = value
+        state["stage"] = "validation"
 
-        except json.JSONDecodeError as e:
-            state["errors"].append(f"JSON parsing failed: {e!s}")
-            return state
-        except Exception as e:
-            state["errors"].append(f"Extraction failed: {e!s}")
-            return state
+        print("[INTELLIGENT JAA] Data extraction complete")
+        return state
+
+    def _deterministic_fields(self, messages: list[dict[str, Any]]) -> dict[str, Any]:
+        """
+        Confident rule-based matches from the user's messages, in bid card field names
+
+        These override the model, so only unambiguous values are returned: a
+        later message that mentions a field without a confident match (a
+        negation, a correction) drops the earlier value and leaves it to the model.
+        """
+        found = {}
+        project_types = set()
+        # Later messages win: homeowners correct themselves as they go
+        for msg in messages:
+            if msg.get("role") == "user":
+                matches = fast_extractor.extract(msg.get("content", ""))
+                matched = fast_extractor.confident(matches)
+                project_types.add(matched.pop("project_type", None))
+                found.update(matched)
+                for field in matches.keys() - matched.keys() - {"project_type"}:
+                    found.pop(field, None)
+        project_types.discard(None)
+
+        fields: dict[str, Any] = {}
+        if "budget_min" in found and "budget_max" in found:
+            fields["budget_min"] = found["budget_min"]
+            fields["budget_max"] = found["budget_max"]
+            fields["budget_confidence"] = "high"
+        if "timeline_urgency" in found:
+            fields["urgency_level"] = "flexible" if found["timeline_urgency"] == "planning" else found["timeline_urgency"]
+        if "timeline_start" in found:
+            fields["timeline_start"] = found["timeline_start"]
+        # Only when every message that names a project type agrees
+        if len(project_types) == 1 and next(iter(project_types)) in JAA_PROJECT_TYPES:
+            fields["project_type"] = JAA_PROJECT_TYPES[project_types.pop()]
+        if "location_zip" in found:
+            fields["location"] = {"zip_code": found["location_zip"]}
+        return fields
 
     def _validate_extraction(self, state: IntelligentJAAState) -> IntelligentJAAState:
         """Step 3: Validate extracted data and fill in missing pieces"""
@@ -9,7 +9,7 @@ from 'contacted' status to 'interested' based on positive engagement patterns.
 
 import os
 import sys
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 
 # Add the root directory to Python path for imports
@@ -23,6 +23,13 @@ from database_simple import SupabaseDB
 # Load environment variables
 load_dotenv(override=True)
 
+
+def _parse_timestamp(value: str) -> datetime:
+    """Timezone-aware datetime from a Postgres timestamp string (naive means UTC)"""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
 class ContractorInterestClassifier:
     """Agent that identifies interested contractors based on engagement data"""
 
@@ -37,7 +44,12 @@ class ContractorInterestClassifier:
             "tier_1_promotion_threshold": 2  # positive responses needed for Tier 1
         }
 
-    def classify_interested_contractors(self) -> dict[str, int]:
+    WATERMARK_NAME = "contractor_interest_classifier"
+    # Re-read a little before the watermark: rows stamped inside a transaction
+    # that committed after our last read would otherwise be skipped
+    WATERMARK_OVERLAP = timedelta(minutes=5)
+
+    def classify_interested_contractors(self, incremental: bool = True, verbose: bool = False) -> dict[str, int]:
         """
         Find and classify interested contractors based on engagement patterns
 
@@ -47,16 +59,29 @@ class ContractorInterestClassifier:
         3. Quick response times
         4. Multiple interactions
 
+        Scores are computed for the whole batch in memory and every promotion
+        is applied with a single apply_contractor_interest_updates() call.
+        With incremental=True only engagements updated since the last
+        successful run are evaluated. The watermark is the newest updated_at
+        seen (database time), so app clock skew can't skip rows; re-evaluating
+        a row is harmless since promotions are idempotent.
+
         Returns dict with classification results
         """
         try:
             print("🔍 Finding contractors with positive engagement...")
 
             # Get contractors with positive engagement
-            result = self.db.client.table("contractor_engagement_summary")\
+            query = self.db.client.table("contractor_engagement_summary")\
                 .select("*, potential_contractors(id, company_name, lead_status, tier)")\
-                .gte("positive_responses", self.interest_criteria["minimum_positive_responses"])\
-                .execute()
+                .gte("positive_responses", self.interest_criteria["minimum_positive_responses"])
+
+            last_run_at = self._get_last_run_at() if incremental else None
+            if last_run_at:
+                query = query.gte("updated_at", (last_run_at - self.WATERMARK_OVERLAP).isoformat())
+                print(f"⏱️ Incremental run - engagements changed since {last_run_at.isoformat()}")
+
+            result = query.execute()
 
             engagements = result.data if result.data else []
             print(f"📊 Found {len(engagements)} contractors with positive engagement")
@@ -69,65 +94,11 @@ class ContractorInterestClassifier:
                     "message": "No contractors with positive engagement found"
                 }
 
-            newly_interested = 0
-            promoted_to_tier1 = 0
-            already_interested = 0
+            updates, already_interested = self._plan_interest_updates(engagements, verbose)
+            newly_interested = self._apply_interest_updates(updates)
+            promoted_to_tier1 = sum(1 for u in updates if u["tier"] == 1) if newly_interested else 0
 
-            for engagement in engagements:
-                contractor_id = engagement["contractor_lead_id"]
-                contractor_info = engagement.get("potential_contractors")
-
-                if not contractor_info:
-                    print(f"⚠️ No contractor info found for engagement {contractor_id}")
-                    continue
-
-                company_name = contractor_info.get("company_name", "Unknown")
-                current_status = contractor_info.get("lead_status", "unknown")
-                current_tier = contractor_info.get("tier", 3)
-
-                # Evaluate interest level
-                interest_assessment = self._evaluate_interest(engagement)
-
-                print(f"📋 Evaluating {company_name}")
-                print(f"   Current: {current_status}, Tier {current_tier}")
-                print(f"   Interest Level: {interest_assessment['level']}")
-                print(f"   Score: {interest_assessment['score']}")
-
-                # Skip if already interested
-                if current_status == "interested":
-                    already_interested += 1
-                    print("   📌 Already marked as interested")
-                    continue
-
-                # Determine if contractor should be marked as interested
-                should_be_interested = interest_assessment["level"] in ["high", "very_high"]
-                should_promote_tier = interest_assessment["score"] >= self.interest_criteria["tier_1_promotion_threshold"]
-
-                if should_be_interested:
-                    # Update to interested status
-                    new_tier = 1 if should_promote_tier else max(1, current_tier - 1)  # Promote tier
-
-                    update_data = {
-                        "lead_status": "interested",
-                        "tier": new_tier,
-                        "last_interest_shown_at": datetime.now().isoformat(),
-                        "interest_score": interest_assessment["score"],
-                        "interest_reason": interest_assessment["reason"]
-                    }
-
-                    # Execute update
-                    self.db.client.table("potential_contractors")\
-                        .update(update_data)\
-                        .eq("id", contractor_id)\
-                        .execute()
-
-                    newly_interested += 1
-                    if new_tier == 1:
-                        promoted_to_tier1 += 1
-
-                    print(f"   ✅ INTERESTED - Promoted from Tier {current_tier} to Tier {new_tier}")
-                else:
-                    print(f"   📋 Not quite interested yet - {interest_assessment['reason']}")
+            self._set_last_run_at(self._newest_update(engagements, last_run_at))
 
             results = {
                 "newly_interested": newly_interested,
@@ -149,6 +120,87 @@ class ContractorInterestClassifier:
             print(f"❌ {error_msg}")
             return {"error": error_msg}
 
+    def _plan_interest_updates(self, engagements: list[dict], verbose: bool = False) -> tuple[list[dict], int]:
+        """Score every engagement and collect the contractors to promote"""
+        updates = []
+        already_interested = 0
+
+        for engagement in engagements:
+            contractor_id = engagement["contractor_lead_id"]
+            contractor_info = engagement.get("potential_contractors")
+
+            if not contractor_info:
+                if verbose:
+                    print(f"⚠️ No contractor info found for engagement {contractor_id}")
+                continue
+
+            # Skip if already interested
+            if contractor_info.get("lead_status") == "interested":
+                already_interested += 1
+                continue
+
+            interest_assessment = self._evaluate_interest(engagement)
+            current_tier = contractor_info.get("tier") or 3
+
+            if verbose:
+                print(f"📋 {contractor_info.get('company_name', 'Unknown')}: "
+                      f"{interest_assessment['level']} ({interest_assessment['score']})")
+
+            # Determine if contractor should be marked as interested
+            if interest_assessment["level"] not in ["high", "very_high"]:
+                continue
+
+            should_promote_tier = interest_assessment["score"] >= self.interest_criteria["tier_1_promotion_threshold"]
+            updates.append({
+                "id": contractor_id,
+                "tier": 1 if should_promote_tier else max(1, current_tier - 1),  # Promote tier
+                "interest_score": interest_assessment["score"],
+                "interest_reason": interest_assessment["reason"]
+            })
+
+        return updates, already_interested
+
+    def _apply_interest_updates(self, updates: list[dict]) -> int:
+        """Apply all status/tier changes in one server-side call"""
+        if not updates:
+            return 0
+
+        result = self.db.client.rpc("apply_contractor_interest_updates", {"updates": updates}).execute()
+        return result.data if isinstance(result.data, int) else len(updates)
+
+    def _get_last_run_at(self) -> datetime | None:
+        """Get the watermark of the last successful classification run"""
+        try:
+            result = self.db.client.table("agent_run_watermarks")\
+                .select("last_run_at")\
+                .eq("agent_name", self.WATERMARK_NAME)\
+                .execute()
+            return _parse_timestamp(result.data[0]["last_run_at"]) if result.data else None
+        except Exception as e:
+            print(f"⚠️ Could not read classifier watermark, running full pass: {e}")
+            return None
+
+    @staticmethod
+    def _newest_update(engagements: list[dict], last_run_at: datetime | None) -> datetime | None:
+        """Newest updated_at among the evaluated rows, never moving the watermark back"""
+        stamps = [_parse_timestamp(e["updated_at"]) for e in engagements if e.get("updated_at")]
+        if last_run_at:
+            stamps.append(last_run_at)
+        return max(stamps) if stamps else None
+
+    def _set_last_run_at(self, last_run_at: datetime | None):
+        """Advance the watermark to the newest engagement update processed"""
+        if last_run_at is None:
+            return
+        try:
+            self.db.client.table("agent_run_watermarks").upsert({
+                "agent_name": self.WATERMARK_NAME,
+                "last_run_at": last_run_at.isoformat(),
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }, on_conflict="agent_name").execute()
+        except Exception as e:
+            print(f"⚠️ Could not save classifier watermark: {e}")
+
     def _evaluate_interest(self, engagement: dict) -> dict:
         """
         Evaluate interest level based on engagement patterns
@@ -260,6 +260,42 @@ class BidDistributionTracker:
             print(f"[BidTracker ERROR] Failed to record follow-up: {e}")
             return {"success": False, "error": str(e)}
 
+    def record_follow_ups_bulk(self, follow_ups: list[dict[str, Any]]) -> dict[str, Any]:
+        """
+        Record many follow-ups with a single upsert
+
+        Each entry needs distribution_id, bid_card_id, contractor_id,
+        distribution_method, the new follow_up_count and the method used.
+        The identifying columns are included so the upsert satisfies the
+        table's NOT NULL constraints; it only ever hits existing rows.
+        """
+        if not follow_ups:
+            return {"success": True, "updated": 0}
+
+        try:
+            now = datetime.now().isoformat()
+            rows = [
+                {
+                    "id": f["distribution_id"],
+                    "bid_card_id": f["bid_card_id"],
+                    "contractor_id": f["contractor_id"],
+                    "distribution_method": f["distribution_method"],
+                    "follow_up_count": f["follow_up_count"],
+                    "last_follow_up_at": now,
+                    "last_follow_up_method": f["method"]
+                }
+                for f in follow_ups
+            ]
+            result = self.supabase.table("bid_card_distributions").upsert(
+                rows, on_conflict="id"
+            ).execute()
+
+            return {"success": True, "updated": len(result.data or [])}
+
+        except Exception as e:
+            print(f"[BidTracker ERROR] Failed to record follow-ups in bulk: {e}")
+            return {"success": False, "error": str(e)}
+
     def get_distribution_analytics(self, bid_card_id: Optional[str] = None) -> dict[str, Any]:
         """Get analytics on bid distribution performance"""
         try:
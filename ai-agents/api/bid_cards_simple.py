@@ -1,15 +1,20 @@
 """
 Simplified Bid Cards API - Works with existing database structure
 """
+import asyncio
 import os
 from datetime import datetime
 from typing import Any, Optional
 
 from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from pydantic import BaseModel
 from supabase import create_client
 
+from utils.bid_card_preview import cached_preview, render_preview
+from utils.context_cache import invalidate_bid_card_rows
+from utils.og_image_generator import get_og_image_cache, og_image_key
+
 
 # Initialize Supabase
 supabase_url = os.getenv("SUPABASE_URL")
@@ -52,27 +57,6 @@ def get_client_ip(request: Request) -> str:
 
     return request.client.host if request.client else "unknown"
 
-def load_html_template() -> str:
-    """Load HTML template for bid card previews"""
-    template_path = os.path.join(os.path.dirname(__file__), "..", "templates", "bid_card_preview.html")
-    try:
-        with open(template_path, encoding="utf-8") as f:
-            return f.read()
-    except FileNotFoundError:
-        # Fallback minimal template
-        return """<!DOCTYPE html>
-<html><head>
-<title>{{project_type}} Project - Instabids</title>
-<meta property="og:title" content="{{project_type}} - {{budget_display}}">
-<meta property="og:description" content="{{project_type}} in {{location_city}}{{location_state}}. {{timeline}}">
-<meta property="og:image" content="{{og_image_url}}">
-</head><body>
-<h1>{{project_type}}</h1>
-<p>Budget: {{budget_display}}</p>
-<p>Location: {{location_city}}{{location_state}}</p>
-<p>Timeline: {{timeline}}</p>
-</body></html>"""
-
 def get_project_icon(project_type: str) -> str:
     """Get emoji icon for project type"""
     project_icons = {
@@ -93,16 +77,10 @@ def get_project_icon(project_type: str) -> str:
     }
     return project_icons.get(project_type.lower(), "🔨")
 
-def generate_simple_og_image(bid_card_data: dict[str, Any]) -> str:
-    """Generate a simple Open Graph image URL"""
-    # For now, return a placeholder image service URL
-    # In production, this would use the OG image generator
-    project_type = bid_card_data.get("project_type", "project").replace("_", "%20")
-    budget = bid_card_data.get("budget_display", "Budget%20TBD").replace("$", "%24").replace(" ", "%20")
-    location = f"{bid_card_data.get('location', {}).get('city', 'Location')}".replace(" ", "%20")
-
-    # Use a placeholder image service (in production, use our OG generator)
-    return f"https://via.placeholder.com/1200x630/667eea/ffffff?text={project_type}+{budget}+{location}"
+def og_image_url(request: Request, bid_card_id: str, bid_card_data: dict[str, Any]) -> str:
+    """URL of the bid card's rendered OG image, versioned by its content hash"""
+    url = request.url_for("get_bid_card_og_image", bid_card_id=bid_card_id)
+    return f"{url}?v={og_image_key(bid_card_data)}"
 
 @router.get("/{bid_card_id}/preview", response_class=HTMLResponse)
 async def get_bid_card_preview(
@@ -113,45 +91,46 @@ async def get_bid_card_preview(
     """
     Get rich HTML preview of bid card with Open Graph meta tags
     Perfect for sharing in social media, emails, SMS, etc.
+
+    Rendered pages are cached per bid card until it is updated, so bursts of
+    link unfurls are served without a database query.
     """
     try:
-        # Get bid card data (reuse logic from JSON endpoint)
-        bid_card_data = await _get_bid_card_data(bid_card_id, request, background_tasks)
-
-        # Load HTML template
-        template = load_html_template()
-
-        # Prepare template variables
-        location_city = bid_card_data["location"].get("city", "Location")
-        location_state = bid_card_data["location"].get("state", "")
-        location_state_formatted = f", {location_state}" if location_state else ""
-
-        project_type_display = bid_card_data["project_type"].replace("_", " ").title()
-        current_url = str(request.url)
-        api_url = current_url.replace("/preview", "")
-        og_image_url = generate_simple_og_image(bid_card_data)
-
-        # Template replacements
-        template_vars = {
-            "project_type": project_type_display,
-            "project_icon": get_project_icon(bid_card_data["project_type"]),
-            "budget_display": bid_card_data["budget_display"],
-            "timeline": bid_card_data["timeline"],
-            "location_city": location_city,
-            "location_state": location_state_formatted,
-            "bid_card_id": bid_card_id,
-            "bid_card_id_short": bid_card_id[:8],
-            "current_url": current_url,
-            "api_url": api_url,
-            "og_image_url": og_image_url
-        }
+        base_url = str(request.base_url)
+        page = cached_preview(bid_card_id, base_url)
+
+        if page is None:
+            # Get bid card data (reuse logic from JSON endpoint)
+            bid_card_data = await _get_bid_card_data(bid_card_id, request, background_tasks)
+
+            # Prepare template variables
+            location_city = bid_card_data["location"].get("city", "Location")
+            location_state = bid_card_data["location"].get("state", "")
+            location_state_formatted = f", {location_state}" if location_state else ""
+
+            # Canonical links so one cached page serves every tracking variant of the URL
+            current_url = str(request.url_for("get_bid_card_preview", bid_card_id=bid_card_id))
+            api_url = str(request.url_for("get_public_bid_card", bid_card_id=bid_card_id))
+
+            page = render_preview(bid_card_id, base_url, {
+                "project_type": bid_card_data["project_type"].replace("_", " ").title(),
+                "project_icon": get_project_icon(bid_card_data["project_type"]),
+                "budget_display": bid_card_data["budget_display"],
+                "timeline": bid_card_data["timeline"],
+                "location_city": location_city,
+                "location_state": location_state_formatted,
+                "bid_card_id": bid_card_id,
+                "bid_card_id_short": bid_card_id[:8],
+                "current_url": current_url,
+                "api_url": api_url,
+                "og_image_url": og_image_url(request, bid_card_id, bid_card_data)
+            })
 
-        # Replace template variables
-        html_content = template
-        for key, value in template_vars.items():
-            html_content = html_content.replace(f"{{{{{key}}}}}", str(value))
+        headers = {"ETag": page.etag, "Cache-Control": "public, max-age=300"}
+        if page.etag in request.headers.get("If-None-Match", ""):
+            return Response(status_code=304, headers=headers)
 
-        return HTMLResponse(content=html_content, status_code=200)
+        return HTMLResponse(content=page.html, status_code=200, headers=headers)
 
     except HTTPException:
         raise
@@ -159,6 +138,45 @@ async def get_bid_card_preview(
         print(f"Error generating preview: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/og-image/{bid_card_id}.png")
+async def get_bid_card_og_image(
+    bid_card_id: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    v: Optional[str] = None
+):
+    """
+    Open Graph preview image for a bid card (1200x630 PNG)
+
+    Images are cached by a hash of the fields they show. Links from the
+    preview page carry that hash as ?v=, so crawlers are answered straight
+    from the cache without a database lookup.
+    """
+    try:
+        cache = get_og_image_cache(supabase)
+        png = await asyncio.to_thread(cache.get, v) if v and len(v) == 64 and v.isalnum() else None
+        key = v if png is not None else None
+
+        if png is None:
+            bid_card_data = await _get_bid_card_data(bid_card_id, request, background_tasks)
+            key = og_image_key(bid_card_data)
+
+        etag = f'"{key}"'
+        headers = {"ETag": etag, "Cache-Control": "public, max-age=86400"}
+        if etag in request.headers.get("If-None-Match", ""):
+            return Response(status_code=304, headers=headers)
+
+        if png is None:
+            png = await cache.get_or_render(key, bid_card_data)
+
+        return Response(content=png, media_type="image/png", headers=headers)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error generating OG image: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 async def _get_bid_card_data(bid_card_id: str, request: Request, background_tasks: BackgroundTasks) -> dict[str, Any]:
     """
     Shared helper function to get bid card data
@@ -345,9 +363,10 @@ async def increment_view_count(bid_card_id: str):
             new_count = current_count + 1
 
             # Update count
-            supabase.table("bid_cards").update({
+            update_result = supabase.table("bid_cards").update({
                 "view_count": new_count
             }).eq("id", bid_card_id).execute()
+            invalidate_bid_card_rows(update_result.data)
 
     except Exception as e:
         print(f"Error incrementing view count: {e}")
@@ -3,16 +3,20 @@ AI Image Generation API for Dream Space Creation
 Uses OpenAI's GPT-Image-1 model to merge ideal + current space images
 """
 
+import asyncio
 import os
+import uuid
 from datetime import datetime
 from typing import Optional
 
-import requests
 from fastapi import APIRouter, HTTPException
-from openai import OpenAI
+from openai import AsyncOpenAI
 from pydantic import BaseModel
 from supabase import Client, create_client
 
+from utils.context_cache import invalidate_board
+from utils.session_cache import SessionCache
+
 
 # Initialize router
 router = APIRouter(prefix="/api/image-generation", tags=["image-generation"])
@@ -33,7 +37,7 @@ if not openai_key:
 else:
     print(f"OpenAI API key loaded: {openai_key[:20]}...")
 
-client = OpenAI(api_key=openai_key)
+client = AsyncOpenAI(api_key=openai_key)
 
 # Initialize Supabase client - use anon key since service role key is invalid
 supabase_url = os.getenv("SUPABASE_URL")
@@ -58,210 +62,263 @@ class RegenerateRequest(BaseModel):
     previous_generation_id: str
     user_feedback: str
 
-@router.post("/generate-dream-space")
-async def generate_dream_space(request: GenerateDreamSpaceRequest):
-    # Ensure Supabase client is available in async context
-    global supabase
-    """
-    Generate a dream space by merging ideal inspiration with current space
-    Uses GPT-Image-1 for advanced image composition
-    """
-    try:
-        # 1. Fetch image records from database (with fallback to demo data)
-        try:
-            ideal_image = supabase.table("inspiration_images").select("*").eq("id", request.ideal_image_id).single().execute()
-            current_image = supabase.table("inspiration_images").select("*").eq("id", request.current_image_id).single().execute()
-
-            if not ideal_image.data or not current_image.data:
-                raise Exception("Images not found in database")
-
-            # 2. Download images from Supabase storage
-            ideal_url = ideal_image.data["image_url"]
-            current_url = current_image.data["image_url"]
-
-        except Exception as db_error:
-            print(f"Database error: {db_error} - Using demo image URLs")
-            # Fallback to demo URLs if database fails
-            ideal_url = "http://localhost:8008/test-images/inspiration/kitchen-modern-1.webp"
-            current_url = "http://localhost:8008/test-images/current-state/kitchen-outdated-2.webp"
-
-            # Create mock data for analysis
-            ideal_image = type("obj", (object,), {
-                "data": {
-                    "ai_analysis": {
-                        "description": "Modern industrial kitchen with exposed brick wall and pendant lighting",
-                        "style": "Modern Industrial",
-                        "key_features": ["exposed brick wall", "pendant lights", "open shelving"],
-                        "materials": ["brick", "wood", "metal accents"]
-                    }
-                }
-            })()
-
-            current_image = type("obj", (object,), {
-                "data": {
-                    "ai_analysis": {
-                        "description": "Compact kitchen with white cabinets and limited counter space",
-                        "style": "Traditional builder-grade",
-                        "condition": "Functional but dated",
-                        "key_elements": ["white cabinets", "limited counter", "basic appliances"]
-                    }
-                }
-            })()
-
-        # 2. Download images from URLs (with timeout and fallback)
-        try:
-            ideal_response = requests.get(ideal_url, timeout=5)
-            current_response = requests.get(current_url, timeout=5)
-
-            if ideal_response.status_code != 200 or current_response.status_code != 200:
-                raise Exception("Image download failed")
-        except Exception as download_error:
-            print(f"Image download error: {download_error} - Proceeding without image data")
-            # Create mock response objects for prompt generation
-            ideal_response = type("obj", (object,), {"content": b"", "status_code": 200})()
-            current_response = type("obj", (object,), {"content": b"", "status_code": 200})()
-
-        # 3. Generate intelligent prompt based on AI analysis
-        dalle_prompt = generate_dalle_prompt(
-            ideal_analysis=ideal_image.data.get("ai_analysis", {}),
-            current_analysis=current_image.data.get("ai_analysis", {}),
-            user_preferences=request.user_preferences,
-            custom_prompt=request.custom_prompt
-        )
+# Generation jobs by id; polled through /jobs/{job_id} (in-process, like the app's other caches)
+_generation_jobs = SessionCache("dream_space_jobs", max_entries=1000, ttl_seconds=3600)
 
-        # 4. Call OpenAI DALL-E 3 API (make actual AI generation)
-        try:
-            print(f"Attempting DALL-E generation with prompt: {dalle_prompt[:100]}...")
+# Strong references so fire-and-forget tasks aren't garbage collected mid-run
+_background_tasks: set[asyncio.Task] = set()
 
-            # Always try DALL-E generation - don't require image content
-            response = client.images.generate(
-                model="dall-e-3",
-                prompt=dalle_prompt,
-                size="1024x1024",
-                quality="hd",
-                style="natural",  # More realistic for home/outdoor projects
-                n=1
-            )
 
-            generated_image_url = response.data[0].url
-            print(f"SUCCESS: DALL-E 3 generation successful! Image URL: {generated_image_url[:50]}...")
+def _run_in_background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
 
-        except Exception as e:
-            print(f"OpenAI API error: {e!s} - Using demo image for development")
-            # For development/demo, use a high-quality kitchen transformation image
-            generated_image_url = "https://images.unsplash.com/photo-1556909114-f6e7ad7d3136?ixlib=rb-4.0.3&ixid=M3wxMjA3fDB8MHxwaG90by1wYWdlfHx8fGVufDB8fHx8fA%3D%3D&auto=format&fit=crop&w=2070&q=80"
-            print("Demo mode: Using Unsplash kitchen image as generated result")
 
-        # 4.5. Create generation ID first for filename
-        generation_id = f"gen_{datetime.now().timestamp()}"
+# Persistence tasks by job id, so a synchronous request can wait for its image's permanent URL
+_persistence_tasks: dict[str, asyncio.Task] = {}
 
-        # Note: Skipping Supabase storage upload since bucket doesn't exist
-        # Using original OpenAI URL directly for now
-        print(f"Using original OpenAI URL for database save: {generated_image_url[:50]}...")
+# Longest a synchronous request waits for persistence before returning the temporary URL
+PERSIST_TIMEOUT = 15.0
 
-        # 5. Store generated image record in database (with fallback for development)
 
-        try:
-            # Remove homeowner_id since it's causing foreign key constraint
-            generation_record = {
-                "board_id": request.board_id,
-                # "homeowner_id": ideal_image.data['homeowner_id'],  # Removed - causing FK error
-                "ideal_image_id": request.ideal_image_id,
-                "current_image_id": request.current_image_id,
-                "generated_image_url": generated_image_url,
-                "dalle_prompt": dalle_prompt,
-                "generation_metadata": {
-                    "model": "dall-e-3",
-                    "size": "1024x1024",
-                    "quality": "hd",
-                    "style": "natural",
-                    "timestamp": datetime.now().isoformat()
-                },
-                "status": "generated"
-            }
+# Used when the image records can't be read (development without a database)
+DEMO_IDEAL_ANALYSIS = {
+    "description": "Modern industrial kitchen with exposed brick wall and pendant lighting",
+    "style": "Modern Industrial",
+    "key_features": ["exposed brick wall", "pendant lights", "open shelving"],
+    "materials": ["brick", "wood", "metal accents"]
+}
 
-            result = supabase.table("generated_dream_spaces").insert(generation_record).execute()
-            if result.data:
-                generation_id = result.data[0]["id"]
-        except Exception as db_error:
-            print(f"Database save error: {db_error} - Generation still successful")
+DEMO_CURRENT_ANALYSIS = {
+    "description": "Compact kitchen with white cabinets and limited counter space",
+    "style": "Traditional builder-grade",
+    "condition": "Functional but dated",
+    "key_elements": ["white cabinets", "limited counter", "basic appliances"]
+}
 
-        # 6. Also save the generated image as a 'vision' image in the inspiration_images table
-        vision_saved = False
-        print("DEBUG: About to save vision image...")
+DEMO_GENERATED_IMAGE_URL = "https://images.unsplash.com/photo-1556909114-f6e7ad7d3136?ixlib=rb-4.0.3&ixid=M3wxMjA3fDB8MHxwaG90by1wYWdlfHx8fGVufDB8fHx8fA%3D%3D&auto=format&fit=crop&w=2070&q=80"
 
-        # Recreate Supabase client to ensure it works in async context
-        from supabase import create_client
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_ANON_KEY")
-        supabase_local = create_client(supabase_url, supabase_key)
 
-        print("DEBUG: Created local Supabase client")
+@router.post("/generate-dream-space")
+async def generate_dream_space(request: GenerateDreamSpaceRequest, background: bool = False):
+    """
+    Generate a dream space by merging ideal inspiration with current space
+    Uses DALL-E 3 for advanced image composition
 
+    With ?background=true the generation runs as a job and this returns its
+    job_id straight away; poll /jobs/{job_id} for the result. Otherwise the
+    result is returned when generation finishes, with the image's permanent
+    URL unless persisting it takes longer than PERSIST_TIMEOUT.
+    """
+    job_id = f"gen_job_{uuid.uuid4().hex}"
+    job = {
+        "job_id": job_id,
+        "status": "queued",
+        "board_id": request.board_id,
+        "created_at": datetime.now().isoformat(),
+        "result": None,
+        "error": None
+    }
+    _generation_jobs[job_id] = job
+    task = _run_in_background(_run_generation_job(job, request))
+
+    if background:
+        return {"success": True, "job_id": job_id, "status": job["status"],
+                "status_url": f"{router.prefix}/jobs/{job_id}"}
+
+    # shield: a dropped client connection doesn't cancel the generation itself
+    await asyncio.shield(task)
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=job["error"])
+
+    # The DALL-E URL expires in about an hour and callers embed what we return
+    persistence = _persistence_tasks.get(job_id)
+    if persistence is not None:
         try:
-            vision_image_record = {
-                "board_id": request.board_id,
-                "homeowner_id": "550e8400-e29b-41d4-a716-446655440001",  # Demo user (now exists)
-                "image_url": generated_image_url,
-                "thumbnail_url": generated_image_url,
-                "source": "url",
-                "tags": ["vision", "ai_generated", "dream_space", "kitchen"],
-                "ai_analysis": {
-                    "description": "AI-generated dream space combining current layout with inspiration elements",
-                    "style": "AI Transformation",
-                    "generated_from": {
-                        "current_image_id": request.current_image_id,
-                        "ideal_image_id": request.ideal_image_id,
-                        "prompt": dalle_prompt
-                    }
-                },
-                "user_notes": "AI-generated vision of my transformed space",
-                "category": "ideal",  # Changed from "vision" to "ideal" to match database constraint
-                "position": 0
-            }
+            await asyncio.wait_for(asyncio.shield(persistence), PERSIST_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"WARNING: Image persistence still running after {PERSIST_TIMEOUT}s, returning temporary URL")
+    return job["result"]
 
-            vision_result = supabase_local.table("inspiration_images").insert(vision_image_record).execute()
-            if vision_result.data:
-                vision_id = vision_result.data[0]["id"]
-                print(f"SUCCESS: Generated image saved as vision image: {vision_id}")
-                vision_saved = True
-
-                # Immediately make the image persistent
-                try:
-                    from services.image_persistence_service import image_service
-                    persistent_url = await image_service.make_image_persistent(vision_id, generated_image_url)
-                    if persistent_url:
-                        print(f"SUCCESS: Image made persistent: {persistent_url}")
-                        generated_image_url = persistent_url  # Use persistent URL in response
-                    else:
-                        print("WARNING: Failed to make image persistent, using temporary URL")
-                except Exception as persistence_error:
-                    print(f"WARNING: Image persistence failed: {persistence_error}")
-            else:
-                print("ERROR: Vision image insert returned no data")
-
-        except Exception as vision_save_error:
-            print(f"ERROR: Could not save as vision image: {vision_save_error}")
-            print(f"ERROR TYPE: {type(vision_save_error)}")
-            print(f"VISION RECORD: {vision_image_record}")
-            import traceback
-            traceback.print_exc()
 
-        return {
-            "success": True,
-            "generated_image_url": generated_image_url,
-            "generation_id": generation_id,
-            "prompt_used": dalle_prompt,
-            "message": "Dream space generated successfully!",
-            "saved_as_vision": vision_saved,
-            "debug_vision_save": f"vision_saved={vision_saved}, saved_to_db={vision_saved}"
-        }
+@router.get("/jobs/{job_id}")
+async def get_generation_job(job_id: str):
+    """Status of a dream space generation job; result is set once status is completed"""
+    job = _generation_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Generation job not found")
+    return job
 
-    except HTTPException:
-        raise
+
+async def _run_generation_job(job: dict, request: GenerateDreamSpaceRequest):
+    try:
+        job["status"] = "generating"
+        job["result"] = await _generate_dream_space(job, request)
+        if job.get("persistent_url"):
+            job["result"]["generated_image_url"] = job["persistent_url"]
+        job["status"] = "completed"
     except Exception as e:
         print(f"Unexpected error: {e!s}")
-        raise HTTPException(status_code=500, detail=str(e))
+        job["status"] = "failed"
+        job["error"] = str(e)
+    job["finished_at"] = datetime.now().isoformat()
+
+
+async def _fetch_image_analyses(ideal_image_id: str, current_image_id: str) -> tuple[dict, dict]:
+    """AI analyses of the ideal and current images, read in one query"""
+    result = await asyncio.to_thread(
+        supabase.table("inspiration_images").select("id, ai_analysis").in_(
+            "id", [ideal_image_id, current_image_id]
+        ).execute
+    )
+    images = {image["id"]: image for image in result.data or []}
+    if ideal_image_id not in images or current_image_id not in images:
+        raise Exception("Images not found in database")
+    return images[ideal_image_id].get("ai_analysis") or {}, images[current_image_id].get("ai_analysis") or {}
+
+
+async def _generate_dream_space(job: dict, request: GenerateDreamSpaceRequest) -> dict:
+    # 1. Fetch image analyses from database (with fallback to demo data)
+    try:
+        ideal_analysis, current_analysis = await _fetch_image_analyses(request.ideal_image_id, request.current_image_id)
+    except Exception as db_error:
+        print(f"Database error: {db_error} - Using demo image analysis")
+        ideal_analysis, current_analysis = DEMO_IDEAL_ANALYSIS, DEMO_CURRENT_ANALYSIS
+
+    # 2. Generate intelligent prompt based on AI analysis
+    dalle_prompt = generate_dalle_prompt(
+        ideal_analysis=ideal_analysis,
+        current_analysis=current_analysis,
+        user_preferences=request.user_preferences,
+        custom_prompt=request.custom_prompt
+    )
+
+    # 3. Call OpenAI DALL-E 3 API (make actual AI generation)
+    try:
+        print(f"Attempting DALL-E generation with prompt: {dalle_prompt[:100]}...")
+
+        response = await client.images.generate(
+            model="dall-e-3",
+            prompt=dalle_prompt,
+            size="1024x1024",
+            quality="hd",
+            style="natural",  # More realistic for home/outdoor projects
+            n=1
+        )
+
+        generated_image_url = response.data[0].url
+        print(f"SUCCESS: DALL-E 3 generation successful! Image URL: {generated_image_url[:50]}...")
+
+    except Exception as e:
+        print(f"OpenAI API error: {e!s} - Using demo image for development")
+        # For development/demo, use a high-quality kitchen transformation image
+        generated_image_url = DEMO_GENERATED_IMAGE_URL
+        print("Demo mode: Using Unsplash kitchen image as generated result")
+
+    job["status"] = "saving"
+    generation_id = f"gen_{datetime.now().timestamp()}"
+
+    # 4. Store generated image record in database (with fallback for development)
+    try:
+        # Remove homeowner_id since it's causing foreign key constraint
+        generation_record = {
+            "board_id": request.board_id,
+            "ideal_image_id": request.ideal_image_id,
+            "current_image_id": request.current_image_id,
+            "generated_image_url": generated_image_url,
+            "dalle_prompt": dalle_prompt,
+            "generation_metadata": {
+                "model": "dall-e-3",
+                "size": "1024x1024",
+                "quality": "hd",
+                "style": "natural",
+                "timestamp": datetime.now().isoformat()
+            },
+            "status": "generated"
+        }
+
+        result = await asyncio.to_thread(supabase.table("generated_dream_spaces").insert(generation_record).execute)
+        if result.data:
+            generation_id = result.data[0]["id"]
+    except Exception as db_error:
+        print(f"Database save error: {db_error} - Generation still successful")
+
+    # 5. Also save the generated image as a 'vision' image in the inspiration_images table
+    vision_saved = False
+    vision_image_record = {
+        "board_id": request.board_id,
+        "homeowner_id": "550e8400-e29b-41d4-a716-446655440001",  # Demo user (now exists)
+        "image_url": generated_image_url,
+        "thumbnail_url": generated_image_url,
+        "source": "url",
+        "tags": ["vision", "ai_generated", "dream_space", "kitchen"],
+        "ai_analysis": {
+            "description": "AI-generated dream space combining current layout with inspiration elements",
+            "style": "AI Transformation",
+            "generated_from": {
+                "current_image_id": request.current_image_id,
+                "ideal_image_id": request.ideal_image_id,
+                "prompt": dalle_prompt
+            }
+        },
+        "user_notes": "AI-generated vision of my transformed space",
+        "category": "ideal",  # Changed from "vision" to "ideal" to match database constraint
+        "position": 0
+    }
+
+    try:
+        vision_result = await asyncio.to_thread(supabase.table("inspiration_images").insert(vision_image_record).execute)
+        invalidate_board(request.board_id)
+        if vision_result.data:
+            vision_id = vision_result.data[0]["id"]
+            print(f"SUCCESS: Generated image saved as vision image: {vision_id}")
+            vision_saved = True
+
+            # The DALL-E URL is good for about an hour; persist it alongside the rest of the job
+            job["persistence"] = "pending"
+            persistence = _run_in_background(_persist_vision_image(job, vision_id, generated_image_url))
+            _persistence_tasks[job["job_id"]] = persistence
+            persistence.add_done_callback(lambda _: _persistence_tasks.pop(job["job_id"], None))
+        else:
+            print("ERROR: Vision image insert returned no data")
+
+    except Exception as vision_save_error:
+        print(f"ERROR: Could not save as vision image: {vision_save_error}")
+        print(f"VISION RECORD: {vision_image_record}")
+
+    return {
+        "success": True,
+        "generated_image_url": generated_image_url,
+        "generation_id": generation_id,
+        "job_id": job["job_id"],
+        "prompt_used": dalle_prompt,
+        "message": "Dream space generated successfully!",
+        "saved_as_vision": vision_saved,
+        "debug_vision_save": f"vision_saved={vision_saved}, saved_to_db={vision_saved}"
+    }
+
+
+async def _persist_vision_image(job: dict, vision_id: str, generated_image_url: str):
+    """Copy the temporary image into storage; the vision record is updated by the service"""
+    try:
+        from services.image_persistence_service import image_service
+        persistent_url = await image_service.make_image_persistent(vision_id, generated_image_url)
+    except Exception as persistence_error:
+        print(f"WARNING: Image persistence failed: {persistence_error}")
+        persistent_url = None
+
+    if persistent_url:
+        print(f"SUCCESS: Image made persistent: {persistent_url}")
+        job["persistence"] = "completed"
+        job["persistent_url"] = persistent_url
+        if job["result"] is not None:
+            job["result"]["generated_image_url"] = persistent_url
+    else:
+        # fix_all_expired_images picks it up on its next run
+        print("WARNING: Failed to make image persistent, using temporary URL")
+        job["persistence"] = "failed"
 
 @router.post("/regenerate-with-feedback")
 async def regenerate_with_feedback(request: RegenerateRequest):
@@ -270,7 +327,9 @@ async def regenerate_with_feedback(request: RegenerateRequest):
     """
     try:
         # Get previous generation record
-        prev_gen = supabase.table("generated_dream_spaces").select("*").eq("id", request.previous_generation_id).single().execute()
+        prev_gen = await asyncio.to_thread(
+            supabase.table("generated_dream_spaces").select("*").eq("id", request.previous_generation_id).single().execute
+        )
 
         if not prev_gen.data:
             raise HTTPException(status_code=404, detail="Previous generation not found")
@@ -279,7 +338,7 @@ async def regenerate_with_feedback(request: RegenerateRequest):
         new_prompt = f"{prev_gen.data['dalle_prompt']}\n\nUser feedback: {request.user_feedback}"
 
         # Generate new image
-        response = client.images.generate(
+        response = await client.images.generate(
             model="dall-e-3",
             prompt=new_prompt,
             size="1024x1024",
@@ -295,9 +354,11 @@ async def regenerate_with_feedback(request: RegenerateRequest):
             "timestamp": datetime.now().isoformat()
         })
 
-        supabase.table("generated_dream_spaces").update({
-            "user_feedback": feedback_data
-        }).eq("id", request.previous_generation_id).execute()
+        await asyncio.to_thread(
+            supabase.table("generated_dream_spaces").update({
+                "user_feedback": feedback_data
+            }).eq("id", request.previous_generation_id).execute
+        )
 
         # Create new generation record
         new_generation = {
@@ -315,7 +376,7 @@ async def regenerate_with_feedback(request: RegenerateRequest):
             "status": "generated"
         }
 
-        result = supabase.table("generated_dream_spaces").insert(new_generation).execute()
+        result = await asyncio.to_thread(supabase.table("generated_dream_spaces").insert(new_generation).execute)
 
         return {
             "success": True,
@@ -395,7 +456,9 @@ async def get_generation_history(board_id: str):
     Get all generated images for a board
     """
     try:
-        result = supabase.table("generated_dream_spaces").select("*").eq("board_id", board_id).order("created_at", desc=True).execute()
+        result = await asyncio.to_thread(
+            supabase.table("generated_dream_spaces").select("*").eq("board_id", board_id).order("created_at", desc=True).execute
+        )
         return {
             "success": True,
             "generations": result.data,
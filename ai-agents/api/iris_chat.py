@@ -3,6 +3,7 @@ Iris Chat API - Real AI assistant with Claude Opus 4
 Provides persistent memory, board ownership, and image context
 """
 
+import asyncio
 import logging
 import os
 import uuid
@@ -16,6 +17,9 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from supabase import Client, create_client
 
+from utils.context_cache import board_history_key, board_key, cached_system_prompt, context_cache, invalidate_board
+from utils.conversation_summarizer import ConversationSummarizer, make_anthropic_summarize
+
 
 # Load environment variables
 load_dotenv()
@@ -45,6 +49,10 @@ if not supabase_url or not supabase_service_key:
 else:
     supabase: Client = create_client(supabase_url, supabase_service_key)
 
+# Board conversations keep a rolling summary so prompts stay within this budget
+IRIS_HISTORY_TOKEN_BUDGET = int(os.getenv("IRIS_HISTORY_TOKEN_BUDGET", "4000"))
+summarizer = ConversationSummarizer("iris", make_anthropic_summarize(claude), token_budget=IRIS_HISTORY_TOKEN_BUDGET)
+
 class IrisChatRequest(BaseModel):
     message: str
     homeowner_id: str
@@ -68,6 +76,10 @@ async def iris_chat(request: IrisChatRequest):
         board_id = await get_or_create_board(request.homeowner_id, request.board_id, request.message)
         created_board = not request.board_id
 
+        # New uploads change the board's images; drop the cached board context
+        if request.image_uploads:
+            invalidate_board(board_id)
+
         # 2. Load full context for this homeowner and board
         context = await build_conversation_context(
             homeowner_id=request.homeowner_id,
@@ -224,6 +236,11 @@ async def get_or_create_board(homeowner_id: str, board_id: Optional[str], messag
     """Get existing board or create new one based on conversation"""
 
     if board_id:
+        # Board already cached for this homeowner: no need to verify again
+        cached = context_cache.get(board_key(board_id))
+        if cached and cached["board"] and cached["board"].get("homeowner_id") == homeowner_id:
+            return board_id
+
         # Verify board exists and belongs to homeowner
         result = supabase.table("inspiration_boards").select("*").eq("id", board_id).eq("homeowner_id", homeowner_id).execute()
         if result.data:
@@ -275,28 +292,46 @@ def determine_board_topic(message: str) -> dict[str, str]:
         }
 
 async def build_conversation_context(homeowner_id: str, board_id: str, conversation_context: list[dict]) -> dict[str, Any]:
-    """Build complete context for Claude including board images and history"""
+    """Build complete context for Claude including board images and history
 
-    # Get board details
-    board_result = supabase.table("inspiration_boards").select("*").eq("id", board_id).execute()
-    board = board_result.data[0] if board_result.data else None
-
-    # Get all images for this board
-    images_result = supabase.table("inspiration_images").select("*").eq("board_id", board_id).execute()
-    images = images_result.data or []
+    Board + images and the conversation history are cached per board. The
+    board entry is invalidated when images change; the history is kept
+    current by save_conversation_turn, so neither is reloaded every message.
+    """
 
-    # Get conversation history for this board
-    history_result = supabase.table("inspiration_conversations").select("*").eq("board_id", board_id).order("created_at").execute()
-    history = history_result.data or []
+    board_context = await context_cache.get_or_build(board_key(board_id), lambda: load_board_context(board_id))
+    history = await context_cache.get_or_build(board_history_key(board_id), lambda: load_board_history(board_id))
 
     return {
         "homeowner_id": homeowner_id,
-        "board": board,
-        "images": images,
-        "conversation_history": history,
+        "board": board_context["board"],
+        "images": board_context["images"],
+        # A copy, so the request never sees (or changes) the cached list
+        "conversation_history": list(history["turns"]),
         "current_conversation": conversation_context
     }
 
+async def load_board_context(board_id: str) -> dict[str, Any]:
+    """Load board details and all its images"""
+
+    board_result, images_result = await asyncio.gather(
+        asyncio.to_thread(supabase.table("inspiration_boards").select("*").eq("id", board_id).execute),
+        asyncio.to_thread(supabase.table("inspiration_images").select("*").eq("board_id", board_id).execute)
+    )
+
+    return {
+        "board": board_result.data[0] if board_result.data else None,
+        "images": images_result.data or []
+    }
+
+async def load_board_history(board_id: str) -> dict[str, Any]:
+    """Load conversation history for a board"""
+
+    history_result = await asyncio.to_thread(
+        supabase.table("inspiration_conversations").select("*").eq("board_id", board_id).order("created_at").execute
+    )
+    return {"turns": history_result.data or []}
+
 async def get_claude_response(message: str, context: dict[str, Any], board_id: str) -> dict[str, Any]:
     """Get response from Claude Opus 4 with full context"""
 
@@ -343,7 +378,8 @@ async def get_claude_response(message: str, context: dict[str, Any], board_id: s
             model="claude-3-5-sonnet-20241022",  # Latest Claude model
             max_tokens=1000,
             temperature=0.7,
-            system=system_prompt,
+            # Board context only changes with the board, so cache it as a prompt prefix
+            system=cached_system_prompt(system_prompt, context.get("history_summary")),
             messages=claude_messages
         )
 
@@ -430,20 +466,31 @@ Image: {img.get('title', 'Untitled')}
     return "\n".join(formatted)
 
 def build_claude_messages(context: dict[str, Any], current_message: str) -> list[dict]:
-    """Build conversation history for Claude"""
-    messages = []
+    """Build conversation history for Claude
+
+    Only the most recent turns that fit IRIS_HISTORY_TOKEN_BUDGET are sent;
+    older turns are carried by the board's rolling summary, which is left in
+    context["history_summary"].
+    """
+    history = []
 
     # Add conversation history
     for turn in context.get("conversation_history", []):
         if turn.get("user_message"):
-            messages.append({"role": "user", "content": turn["user_message"]})
+            history.append({"role": "user", "content": turn["user_message"]})
         if turn.get("assistant_response"):
-            messages.append({"role": "assistant", "content": turn["assistant_response"]})
+            history.append({"role": "assistant", "content": turn["assistant_response"]})
 
     # Add current conversation context
     for msg in context.get("current_conversation", []):
         if msg.get("role") in ["user", "assistant"]:
-            messages.append({"role": msg["role"], "content": msg["content"]})
+            history.append({"role": msg["role"], "content": msg["content"]})
+
+    board_id = (context.get("board") or {}).get("id") or context["homeowner_id"]
+    summary, messages = summarizer.window(board_id, history)
+
+    # Picked up by get_claude_response as an uncached system block
+    context["history_summary"] = f"EARLIER CONVERSATION (summary):\n{summary}" if summary else None
 
     # Add current message
     messages.append({"role": "user", "content": current_message})
@@ -546,6 +593,12 @@ async def save_conversation_turn(homeowner_id: str, board_id: str, user_message:
 
     try:
         supabase.table("inspiration_conversations").insert(conversation_data).execute()
+
+        # Keep the cached history current instead of reloading it next message
+        history = context_cache.get(board_history_key(board_id))
+        if history is not None:
+            # Replace rather than append in place; earlier readers keep their own lists
+            context_cache.put(board_history_key(board_id), {**history, "turns": [*history["turns"], conversation_data]})
     except Exception as e:
         logger.error(f"Error saving conversation: {e!s}")
         # Don't fail the request if conversation saving fails
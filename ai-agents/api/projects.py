@@ -15,11 +15,15 @@ from pydantic import BaseModel
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database_simple import db
+from utils.conversation_log import ConversationLog
 
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# CIA conversations: snapshot in agent_conversations, messages in the turn log
+agent_conversation_log = ConversationLog(db.client)
+
 # Pydantic models for request/response
 class CreateProjectRequest(BaseModel):
     homeowner_id: str
@@ -327,11 +331,9 @@ async def get_project_conversations(project_id: str):
 
         if cia_conversation_id:
             # Get the linked conversation
-            conversation_result = db.client.table("agent_conversations").select("*").eq(
-                "thread_id", cia_conversation_id
-            ).execute()
+            conversation = agent_conversation_log.load(cia_conversation_id)
 
-            conversations = conversation_result.data or []
+            conversations = [conversation] if conversation else []
 
         return {
             "project_id": project_id,
@@ -5,37 +5,39 @@ Helper functions for bid card creation and management
 """
 
 import time
-from typing import Dict, Any
+from typing import Dict, Any, List
 import database_simple
 
 
-def generate_bid_card_number(prefix: str = "CLAUDE") -> str:
+def generate_bid_card_number(prefix: str = "CLAUDE", sequence: int = None) -> str:
     """
     Generate a unique bid card number following the pattern BC-[PREFIX]-[TIMESTAMP]
     
     Args:
         prefix: Project prefix (default: "CLAUDE" for Claude-created cards)
+        sequence: Index within a bulk insert, appended so cards created in the
+                  same millisecond stay unique
     
     Returns:
         str: Unique bid card number like "BC-CLAUDE-1754347994"
     """
     timestamp = int(time.time() * 1000)  # Use milliseconds for better uniqueness
+    if sequence is not None:
+        return f"BC-{prefix.upper()}-{timestamp}-{sequence}"
     return f"BC-{prefix.upper()}-{timestamp}"
 
 
-def create_bid_card_with_defaults(project_data: Dict[str, Any]) -> Dict[str, Any]:
+def build_bid_card_record(project_data: Dict[str, Any], bid_card_number: str) -> Dict[str, Any]:
     """
-    Create a bid card with all required fields and intelligent defaults
+    Build a bid_cards row with all required fields and intelligent defaults
     
     Args:
-        project_data: Basic project information
+        project_data: Basic project information (may include a bid_document)
+        bid_card_number: Number to assign to the card
         
     Returns:
-        Dict containing the created bid card data
+        Dict ready to insert into bid_cards
     """
-    # Generate required bid card number
-    bid_card_number = generate_bid_card_number()
-    
     # Set up bid card with required fields and intelligent defaults
     # Valid urgency levels: week, emergency, month, flexible
     bid_card_data = {
@@ -59,11 +61,28 @@ def create_bid_card_with_defaults(project_data: Dict[str, Any]) -> Dict[str, Any
         "requirements": project_data.get("requirements") if isinstance(project_data.get("requirements"), list) 
                        else [project_data.get("requirements")] if project_data.get("requirements") 
                        else None,  # Fixed: requirements must be array
-        "cia_thread_id": project_data.get("cia_thread_id")
+        "cia_thread_id": project_data.get("cia_thread_id"),
+        "bid_document": {"bid_card_number": bid_card_number, **project_data["bid_document"]}
+                        if project_data.get("bid_document") else None
     }
     
     # Remove None values to let database defaults take effect
-    bid_card_data = {k: v for k, v in bid_card_data.items() if v is not None}
+    return {k: v for k, v in bid_card_data.items() if v is not None}
+
+
+def create_bid_card_with_defaults(project_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Create a bid card with all required fields and intelligent defaults
+    
+    Args:
+        project_data: Basic project information
+        
+    Returns:
+        Dict containing the created bid card data
+    """
+    # Generate required bid card number
+    bid_card_number = generate_bid_card_number()
+    bid_card_data = build_bid_card_record(project_data, bid_card_number)
     
     try:
         db = database_simple.get_client()
@@ -90,6 +109,71 @@ def create_bid_card_with_defaults(project_data: Dict[str, Any]) -> Dict[str, Any
         }
 
 
+def create_bid_cards_bulk(projects: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Create many bid cards with a single insert
+    
+    If the bulk insert fails, each record is retried on its own so one bad
+    row doesn't fail the whole batch.
+    
+    Args:
+        projects: List of project_data dicts (see create_bid_card_with_defaults)
+        
+    Returns:
+        One result dict per project, in order, shaped like create_bid_card_with_defaults
+    """
+    if not projects:
+        return []
+
+    records = [
+        build_bid_card_record(project_data, generate_bid_card_number(sequence=index))
+        for index, project_data in enumerate(projects)
+    ]
+    
+    try:
+        db = database_simple.get_client()
+        result = db.table("bid_cards").insert(records).execute()
+    except Exception as e:
+        print(f"Bulk bid card insert failed, inserting one at a time: {e}")
+        return [_insert_bid_card(record) for record in records]
+
+    created = {row["bid_card_number"]: row for row in result.data or []}
+    results = []
+    for record in records:
+        row = created.get(record["bid_card_number"])
+        if row:
+            results.append({
+                "success": True,
+                "bid_card": row,
+                "bid_card_number": record["bid_card_number"],
+                "message": "Bid card created successfully"
+            })
+        else:
+            results.append({
+                "success": False,
+                "error": "Failed to create bid card - no data returned"
+            })
+    return results
+
+
+def _insert_bid_card(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Insert one prepared bid card record; result shaped like create_bid_card_with_defaults"""
+    try:
+        db = database_simple.get_client()
+        result = db.table("bid_cards").insert(record).execute()
+    except Exception as e:
+        return {"success": False, "error": f"Database error: {str(e)}"}
+
+    if not result.data:
+        return {"success": False, "error": "Failed to create bid card - no data returned"}
+    return {
+        "success": True,
+        "bid_card": result.data[0],
+        "bid_card_number": record["bid_card_number"],
+        "message": "Bid card created successfully"
+    }
+
+
 def test_bid_card_creation():
     """
     Test bid card creation with various scenarios
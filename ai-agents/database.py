@@ -10,6 +10,8 @@ from typing import Any, Optional
 from dotenv import load_dotenv
 from supabase import Client, create_client
 
+from utils.conversation_log import ConversationLog
+
 
 # Load environment variables
 load_dotenv()
@@ -26,6 +28,7 @@ class SupabaseDB:
             raise ValueError("SUPABASE_URL and SUPABASE_ANON_KEY must be set in environment variables")
 
         self.client: Client = create_client(supabase_url, supabase_key)
+        self.conversation_log = ConversationLog(self.client, "ai_conversations", "ai_conversation_turns")
         logger.info("Supabase client initialized")
 
     async def save_conversation_state(
@@ -38,6 +41,9 @@ class SupabaseDB:
         """
         Save or update conversation state in the database
 
+        Only messages added since the last save are written, plus a snapshot
+        of the remaining state.
+
         Args:
             user_id: User's profile ID
             thread_id: LangGraph thread ID
@@ -48,34 +54,13 @@ class SupabaseDB:
             Saved conversation record
         """
         try:
-            # Check if conversation already exists
-            existing = self.client.table("ai_conversations").select("*").eq(
-                "thread_id", thread_id
-            ).execute()
-
-            conversation_data = {
+            # New messages go to the turn log; the rest is one snapshot upsert
+            result = self.conversation_log.save(thread_id, state, {
                 "user_id": user_id,
-                "agent_type": agent_type,
-                "thread_id": thread_id,
-                "state": state,
-                "updated_at": datetime.utcnow().isoformat()
-            }
-
-            if existing.data:
-                # Update existing conversation
-                result = self.client.table("ai_conversations").update(
-                    conversation_data
-                ).eq("thread_id", thread_id).execute()
-                logger.info(f"Updated conversation state for thread {thread_id}")
-            else:
-                # Create new conversation
-                conversation_data["created_at"] = datetime.utcnow().isoformat()
-                result = self.client.table("ai_conversations").insert(
-                    conversation_data
-                ).execute()
-                logger.info(f"Created new conversation state for thread {thread_id}")
-
-            return result.data[0] if result.data else None
+                "agent_type": agent_type
+            })
+            logger.info(f"Saved conversation state for thread {thread_id}")
+            return result
 
         except Exception as e:
             logger.error(f"Error saving conversation state: {e!s}")
@@ -88,6 +73,8 @@ class SupabaseDB:
         """
         Load conversation state from the database
 
+        The returned row's state has its messages rebuilt from the turn log.
+
         Args:
             thread_id: LangGraph thread ID
 
@@ -95,13 +82,11 @@ class SupabaseDB:
             Conversation state or None if not found
         """
         try:
-            result = self.client.table("ai_conversations").select("*").eq(
-                "thread_id", thread_id
-            ).execute()
+            conversation = self.conversation_log.load(thread_id)
 
-            if result.data:
+            if conversation:
                 logger.info(f"Loaded conversation state for thread {thread_id}")
-                return result.data[0]
+                return conversation
             else:
                 logger.info(f"No conversation state found for thread {thread_id}")
                 return None
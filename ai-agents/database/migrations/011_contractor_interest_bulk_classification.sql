@@ -0,0 +1,57 @@
+-- Migration: Bulk contractor interest classification
+-- Purpose: Let ContractorInterestClassifier apply all status/tier changes in one call
+--          and only re-evaluate engagements changed since its last run
+
+-- =============================================================================
+-- PART 1: KEEP contractor_engagement_summary.updated_at CURRENT
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION touch_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_engagement_summary_updated_at ON contractor_engagement_summary;
+CREATE TRIGGER trg_engagement_summary_updated_at
+    BEFORE UPDATE ON contractor_engagement_summary
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_engagement_updated_at ON contractor_engagement_summary(updated_at);
+
+-- =============================================================================
+-- PART 2: PER-AGENT RUN WATERMARKS
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS agent_run_watermarks (
+    agent_name VARCHAR(100) PRIMARY KEY,
+    last_run_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- =============================================================================
+-- PART 3: SET-BASED INTEREST UPDATES
+-- =============================================================================
+
+-- updates: [{"id": uuid, "tier": int, "interest_score": int, "interest_reason": text}, ...]
+CREATE OR REPLACE FUNCTION apply_contractor_interest_updates(updates JSONB)
+RETURNS INT AS $$
+DECLARE
+    updated_count INT;
+BEGIN
+    UPDATE potential_contractors pc
+    SET lead_status = 'interested',
+        tier = u.tier,
+        interest_score = u.interest_score,
+        interest_reason = u.interest_reason,
+        last_interest_shown_at = NOW()
+    FROM jsonb_to_recordset(updates) AS u(id UUID, tier INT, interest_score INT, interest_reason TEXT)
+    WHERE pc.id = u.id
+      AND pc.lead_status IS DISTINCT FROM 'interested';
+
+    GET DIAGNOSTICS updated_count = ROW_COUNT;
+    RETURN updated_count;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,68 @@
+-- Migration: Delta-based conversation persistence
+-- Purpose: Store conversation messages as an append-only turn log and keep
+--          agent_conversations / ai_conversations as compact, versioned snapshots
+--          written with a single upsert (see utils/conversation_log.py)
+
+-- =============================================================================
+-- PART 1: SNAPSHOT COLUMNS + UPSERT KEY
+-- =============================================================================
+
+ALTER TABLE agent_conversations
+    ADD COLUMN IF NOT EXISTS message_count INT NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS state_version INT NOT NULL DEFAULT 0;
+
+ALTER TABLE agent_conversations ALTER COLUMN created_at SET DEFAULT NOW();
+
+-- Older writers inserted a new snapshot per save; keep only the newest per thread
+-- (ctid breaks timestamp ties) so the unique index can be built
+DELETE FROM agent_conversations older
+USING agent_conversations newer
+WHERE older.thread_id = newer.thread_id
+  AND (COALESCE(older.updated_at, older.created_at, 'epoch'), older.ctid)
+    < (COALESCE(newer.updated_at, newer.created_at, 'epoch'), newer.ctid);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_agent_conversations_thread_id
+    ON agent_conversations(thread_id);
+
+ALTER TABLE IF EXISTS ai_conversations
+    ADD COLUMN IF NOT EXISTS message_count INT NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS state_version INT NOT NULL DEFAULT 0;
+
+ALTER TABLE IF EXISTS ai_conversations ALTER COLUMN created_at SET DEFAULT NOW();
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.tables WHERE table_name = 'ai_conversations') THEN
+        DELETE FROM ai_conversations older
+        USING ai_conversations newer
+        WHERE older.thread_id = newer.thread_id
+          AND (COALESCE(older.updated_at, older.created_at, 'epoch'), older.ctid)
+            < (COALESCE(newer.updated_at, newer.created_at, 'epoch'), newer.ctid);
+
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_ai_conversations_thread_id
+            ON ai_conversations(thread_id);
+    END IF;
+END $$;
+
+-- =============================================================================
+-- PART 2: APPEND-ONLY TURN LOGS
+-- =============================================================================
+
+-- One row per message; seq is the message's index in the conversation
+CREATE TABLE IF NOT EXISTS agent_conversation_turns (
+    thread_id VARCHAR(255) NOT NULL,
+    seq INT NOT NULL,
+    role VARCHAR(50),
+    message JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (thread_id, seq)
+);
+
+CREATE TABLE IF NOT EXISTS ai_conversation_turns (
+    thread_id VARCHAR(255) NOT NULL,
+    seq INT NOT NULL,
+    role VARCHAR(50),
+    message JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (thread_id, seq)
+);
@@ -0,0 +1,29 @@
+-- Migration: Google Places search cache for Tier 3 contractor discovery
+-- Purpose: Let WebSearchContractorAgent reuse place searches per query + location
+--          cell and place payloads per place ID across processes
+--          (see agents/cda/place_search_cache.py)
+
+-- =============================================================================
+-- PART 1: TEXT SEARCH RESULTS
+-- =============================================================================
+
+-- query_key = normalized term | type filter | location cell | radius
+CREATE TABLE IF NOT EXISTS place_search_cache (
+    query_key TEXT PRIMARY KEY,
+    places JSONB NOT NULL,
+    fetched_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_place_search_cache_fetched_at ON place_search_cache(fetched_at);
+
+-- =============================================================================
+-- PART 2: PLACE PAYLOADS BY ID
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS google_place_cache (
+    place_id TEXT PRIMARY KEY,
+    place JSONB NOT NULL,
+    fetched_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_google_place_cache_fetched_at ON google_place_cache(fetched_at);
@@ -0,0 +1,132 @@
+-- Migration: Deduplicated bulk upsert for discovered contractors
+-- Purpose: Store each discovered business once in potential_contractors, keyed on
+--          Google place ID (or normalized phone / website domain), and let discovery
+--          agents write a whole batch in one call (see agents/cda/contractor_store.py)
+
+-- =============================================================================
+-- PART 1: DEDUPE KEY
+-- =============================================================================
+
+-- Columns written by EnrichedWebSearchAgent (no-ops where they already exist)
+ALTER TABLE potential_contractors
+    ADD COLUMN IF NOT EXISTS business_size TEXT,
+    ADD COLUMN IF NOT EXISTS service_types TEXT[],
+    ADD COLUMN IF NOT EXISTS service_description TEXT,
+    ADD COLUMN IF NOT EXISTS service_areas TEXT[],
+    ADD COLUMN IF NOT EXISTS enrichment_status TEXT,
+    ADD COLUMN IF NOT EXISTS enrichment_data JSONB;
+
+-- 'place:<google_place_id>' | 'phone:<10 digits>' | 'domain:<host>' | 'name:<name>|<zip>'
+ALTER TABLE potential_contractors
+    ADD COLUMN IF NOT EXISTS dedupe_key TEXT,
+    ADD COLUMN IF NOT EXISTS last_discovered_at TIMESTAMP WITH TIME ZONE;
+
+-- Backfill place-keyed rows; older duplicates keep a NULL key and stay untouched
+WITH ranked AS (
+    SELECT id,
+           ROW_NUMBER() OVER (PARTITION BY google_place_id ORDER BY created_at DESC NULLS LAST) AS rn
+    FROM potential_contractors
+    WHERE google_place_id IS NOT NULL AND dedupe_key IS NULL
+)
+UPDATE potential_contractors pc
+SET dedupe_key = 'place:' || pc.google_place_id
+FROM ranked
+WHERE pc.id = ranked.id
+  AND ranked.rn = 1
+  AND NOT EXISTS (
+      SELECT 1 FROM potential_contractors other
+      WHERE other.dedupe_key = 'place:' || pc.google_place_id
+  );
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_potential_contractors_dedupe_key
+    ON potential_contractors(dedupe_key);
+
+-- =============================================================================
+-- PART 2: SET-BASED MERGING UPSERT
+-- =============================================================================
+
+-- contractors: JSON array of potential_contractors rows, each with a distinct dedupe_key.
+-- New values win; NULLs never overwrite what is already known, and a fresh
+-- 'PENDING' enrichment status doesn't reset a finished enrichment.
+CREATE OR REPLACE FUNCTION upsert_potential_contractors(contractors JSONB)
+RETURNS SETOF potential_contractors AS $$
+BEGIN
+    RETURN QUERY
+    INSERT INTO potential_contractors AS pc (
+        dedupe_key, discovery_source, source_query, project_zip_code, project_type,
+        company_name, contact_name, phone, email, website, address, city, state, zip_code,
+        google_place_id, google_rating, google_review_count, google_types, google_business_status,
+        specialties, years_in_business, license_number, insurance_verified, bonded,
+        search_rank, distance_miles, match_score,
+        business_size, service_types, service_description, service_areas,
+        enrichment_status, enrichment_data, last_discovered_at
+    )
+    SELECT
+        c.dedupe_key, c.discovery_source, c.source_query, c.project_zip_code, c.project_type,
+        c.company_name, c.contact_name, c.phone, c.email, c.website, c.address, c.city, c.state, c.zip_code,
+        c.google_place_id, c.google_rating, c.google_review_count, c.google_types, c.google_business_status,
+        c.specialties, c.years_in_business, c.license_number,
+        COALESCE(c.insurance_verified, FALSE), COALESCE(c.bonded, FALSE),
+        c.search_rank, c.distance_miles, c.match_score,
+        c.business_size, c.service_types, c.service_description, c.service_areas,
+        c.enrichment_status, c.enrichment_data, NOW()
+    FROM jsonb_populate_recordset(NULL::potential_contractors, contractors) AS c
+    ON CONFLICT (dedupe_key) DO UPDATE SET
+        discovery_source = COALESCE(EXCLUDED.discovery_source, pc.discovery_source),
+        source_query = COALESCE(EXCLUDED.source_query, pc.source_query),
+        project_zip_code = COALESCE(EXCLUDED.project_zip_code, pc.project_zip_code),
+        project_type = COALESCE(EXCLUDED.project_type, pc.project_type),
+        company_name = COALESCE(EXCLUDED.company_name, pc.company_name),
+        contact_name = COALESCE(EXCLUDED.contact_name, pc.contact_name),
+        phone = COALESCE(EXCLUDED.phone, pc.phone),
+        email = COALESCE(EXCLUDED.email, pc.email),
+        website = COALESCE(EXCLUDED.website, pc.website),
+        address = COALESCE(EXCLUDED.address, pc.address),
+        city = COALESCE(EXCLUDED.city, pc.city),
+        state = COALESCE(EXCLUDED.state, pc.state),
+        zip_code = COALESCE(EXCLUDED.zip_code, pc.zip_code),
+        google_place_id = COALESCE(EXCLUDED.google_place_id, pc.google_place_id),
+        google_rating = COALESCE(EXCLUDED.google_rating, pc.google_rating),
+        google_review_count = COALESCE(EXCLUDED.google_review_count, pc.google_review_count),
+        google_types = COALESCE(EXCLUDED.google_types, pc.google_types),
+        google_business_status = COALESCE(EXCLUDED.google_business_status, pc.google_business_status),
+        specialties = COALESCE(EXCLUDED.specialties, pc.specialties),
+        years_in_business = COALESCE(EXCLUDED.years_in_business, pc.years_in_business),
+        license_number = COALESCE(EXCLUDED.license_number, pc.license_number),
+        insurance_verified = pc.insurance_verified OR EXCLUDED.insurance_verified,
+        bonded = pc.bonded OR EXCLUDED.bonded,
+        search_rank = COALESCE(EXCLUDED.search_rank, pc.search_rank),
+        distance_miles = COALESCE(EXCLUDED.distance_miles, pc.distance_miles),
+        match_score = COALESCE(EXCLUDED.match_score, pc.match_score),
+        business_size = COALESCE(EXCLUDED.business_size, pc.business_size),
+        service_types = COALESCE(EXCLUDED.service_types, pc.service_types),
+        service_description = COALESCE(EXCLUDED.service_description, pc.service_description),
+        service_areas = COALESCE(EXCLUDED.service_areas, pc.service_areas),
+        enrichment_status = CASE
+            WHEN EXCLUDED.enrichment_status IS NULL OR EXCLUDED.enrichment_status = 'PENDING'
+                THEN COALESCE(pc.enrichment_status, EXCLUDED.enrichment_status)
+            ELSE EXCLUDED.enrichment_status
+        END,
+        enrichment_data = COALESCE(EXCLUDED.enrichment_data, pc.enrichment_data),
+        last_discovered_at = NOW()
+    RETURNING pc.*;
+END;
+$$ LANGUAGE plpgsql;
+
+-- =============================================================================
+-- PART 3: ONE MATCH ROW PER (BID CARD, CONTRACTOR)
+-- =============================================================================
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.tables WHERE table_name = 'contractor_bid_matches') THEN
+        DELETE FROM contractor_bid_matches older
+        USING contractor_bid_matches newer
+        WHERE older.bid_card_id = newer.bid_card_id
+          AND older.contractor_id = newer.contractor_id
+          AND older.created_at < newer.created_at;
+
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_contractor_bid_matches_bid_contractor
+            ON contractor_bid_matches(bid_card_id, contractor_id);
+    END IF;
+END $$;
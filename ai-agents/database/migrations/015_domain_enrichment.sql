@@ -0,0 +1,23 @@
+-- Migration: Website enrichment store keyed by domain
+-- Purpose: Remember what crawling and classification learned about a contractor
+--          website so later discovery runs reuse it instead of crawling again
+--          (see agents/enrichment/domain_enrichment_store.py)
+
+-- NULL facets were never extracted; an empty array means "looked, found none"
+CREATE TABLE IF NOT EXISTS domain_enrichment (
+    domain TEXT PRIMARY KEY,
+    emails TEXT[],
+    business_size TEXT,
+    service_types TEXT[],
+    service_description TEXT,
+    service_areas TEXT[],
+    social_media JSONB,
+    enrichment_data JSONB,
+    -- Home page validators for conditional revalidation
+    etag TEXT,
+    last_modified TEXT,
+    enriched_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    validated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_domain_enrichment_validated_at ON domain_enrichment(validated_at);
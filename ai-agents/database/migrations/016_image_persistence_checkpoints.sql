@@ -0,0 +1,25 @@
+-- Migration: Resumable batch persistence of temporary DALL-E image URLs
+-- Purpose: Checkpoint ImagePersistenceService.fix_all_expired_images between
+--          batches and let it select only rows that still need persisting
+--          (see services/image_persistence_service.py)
+
+-- =============================================================================
+-- PART 1: JOB CHECKPOINTS
+-- =============================================================================
+
+-- last_image_id is the cursor after the last finished batch; NULL once a run completes
+CREATE TABLE IF NOT EXISTS image_persistence_checkpoints (
+    job_name TEXT PRIMARY KEY,
+    last_image_id UUID,
+    last_batch_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- =============================================================================
+-- PART 2: TEMPORARY URL LOOKUP
+-- =============================================================================
+
+-- Partial index: only rows still on a temporary URL, in cursor order
+CREATE INDEX IF NOT EXISTS idx_inspiration_images_temporary_url
+    ON inspiration_images(id)
+    WHERE image_url LIKE '%oaidalleapiprodscus.blob.core.windows.net%';
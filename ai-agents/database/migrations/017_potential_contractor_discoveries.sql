@@ -0,0 +1,137 @@
+-- Migration: Per-discovery context for deduplicated contractors
+-- Purpose: potential_contractors holds one row per business (migration 014), but the
+--          search that found it (ZIP, project type, query, rank, score) differs per
+--          discovery. Keep that context in potential_contractor_discoveries so a
+--          business found for one bid card stays listed for it after being found
+--          again for another (see agents/cda/contractor_store.py)
+
+-- =============================================================================
+-- PART 1: DISCOVERY LINK TABLE
+-- =============================================================================
+
+-- One row per (business, ZIP, project type); '' stands for "not given"
+CREATE TABLE IF NOT EXISTS potential_contractor_discoveries (
+    contractor_id UUID NOT NULL REFERENCES potential_contractors(id) ON DELETE CASCADE,
+    project_zip_code TEXT NOT NULL DEFAULT '',
+    project_type TEXT NOT NULL DEFAULT '',
+    discovery_source TEXT,
+    source_query TEXT,
+    search_rank INTEGER,
+    distance_miles NUMERIC,
+    match_score NUMERIC,
+    discovered_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (contractor_id, project_zip_code, project_type)
+);
+
+CREATE INDEX IF NOT EXISTS idx_potential_contractor_discoveries_zip_type
+    ON potential_contractor_discoveries(project_zip_code, project_type, match_score DESC);
+
+CREATE INDEX IF NOT EXISTS idx_potential_contractor_discoveries_type
+    ON potential_contractor_discoveries(project_type, match_score DESC);
+
+-- Context already on potential_contractors rows becomes their first discovery
+INSERT INTO potential_contractor_discoveries (
+    contractor_id, project_zip_code, project_type, discovery_source, source_query,
+    search_rank, distance_miles, match_score, discovered_at
+)
+SELECT id, COALESCE(project_zip_code, ''), COALESCE(project_type, ''), discovery_source, source_query,
+       search_rank, distance_miles, match_score, COALESCE(last_discovered_at, created_at, NOW())
+FROM potential_contractors
+WHERE project_zip_code IS NOT NULL OR project_type IS NOT NULL
+ON CONFLICT (contractor_id, project_zip_code, project_type) DO NOTHING;
+
+-- =============================================================================
+-- PART 2: UPSERT RECORDS EACH DISCOVERY
+-- =============================================================================
+
+-- Same merge as migration 014 for business fields. Per-discovery columns on
+-- potential_contractors keep the first discovery's values; every discovery's
+-- context is upserted into potential_contractor_discoveries.
+CREATE OR REPLACE FUNCTION upsert_potential_contractors(contractors JSONB)
+RETURNS SETOF potential_contractors AS $$
+BEGIN
+    RETURN QUERY
+    WITH input AS (
+        SELECT * FROM jsonb_populate_recordset(NULL::potential_contractors, contractors)
+    ),
+    upserted AS (
+        INSERT INTO potential_contractors AS pc (
+            dedupe_key, discovery_source, source_query, project_zip_code, project_type,
+            company_name, contact_name, phone, email, website, address, city, state, zip_code,
+            google_place_id, google_rating, google_review_count, google_types, google_business_status,
+            specialties, years_in_business, license_number, insurance_verified, bonded,
+            search_rank, distance_miles, match_score,
+            business_size, service_types, service_description, service_areas,
+            enrichment_status, enrichment_data, last_discovered_at
+        )
+        SELECT
+            c.dedupe_key, c.discovery_source, c.source_query, c.project_zip_code, c.project_type,
+            c.company_name, c.contact_name, c.phone, c.email, c.website, c.address, c.city, c.state, c.zip_code,
+            c.google_place_id, c.google_rating, c.google_review_count, c.google_types, c.google_business_status,
+            c.specialties, c.years_in_business, c.license_number,
+            COALESCE(c.insurance_verified, FALSE), COALESCE(c.bonded, FALSE),
+            c.search_rank, c.distance_miles, c.match_score,
+            c.business_size, c.service_types, c.service_description, c.service_areas,
+            c.enrichment_status, c.enrichment_data, NOW()
+        FROM input AS c
+        ON CONFLICT (dedupe_key) DO UPDATE SET
+            discovery_source = COALESCE(pc.discovery_source, EXCLUDED.discovery_source),
+            source_query = COALESCE(pc.source_query, EXCLUDED.source_query),
+            project_zip_code = COALESCE(pc.project_zip_code, EXCLUDED.project_zip_code),
+            project_type = COALESCE(pc.project_type, EXCLUDED.project_type),
+            company_name = COALESCE(EXCLUDED.company_name, pc.company_name),
+            contact_name = COALESCE(EXCLUDED.contact_name, pc.contact_name),
+            phone = COALESCE(EXCLUDED.phone, pc.phone),
+            email = COALESCE(EXCLUDED.email, pc.email),
+            website = COALESCE(EXCLUDED.website, pc.website),
+            address = COALESCE(EXCLUDED.address, pc.address),
+            city = COALESCE(EXCLUDED.city, pc.city),
+            state = COALESCE(EXCLUDED.state, pc.state),
+            zip_code = COALESCE(EXCLUDED.zip_code, pc.zip_code),
+            google_place_id = COALESCE(EXCLUDED.google_place_id, pc.google_place_id),
+            google_rating = COALESCE(EXCLUDED.google_rating, pc.google_rating),
+            google_review_count = COALESCE(EXCLUDED.google_review_count, pc.google_review_count),
+            google_types = COALESCE(EXCLUDED.google_types, pc.google_types),
+            google_business_status = COALESCE(EXCLUDED.google_business_status, pc.google_business_status),
+            specialties = COALESCE(EXCLUDED.specialties, pc.specialties),
+            years_in_business = COALESCE(EXCLUDED.years_in_business, pc.years_in_business),
+            license_number = COALESCE(EXCLUDED.license_number, pc.license_number),
+            insurance_verified = pc.insurance_verified OR EXCLUDED.insurance_verified,
+            bonded = pc.bonded OR EXCLUDED.bonded,
+            search_rank = COALESCE(pc.search_rank, EXCLUDED.search_rank),
+            distance_miles = COALESCE(pc.distance_miles, EXCLUDED.distance_miles),
+            match_score = COALESCE(pc.match_score, EXCLUDED.match_score),
+            business_size = COALESCE(EXCLUDED.business_size, pc.business_size),
+            service_types = COALESCE(EXCLUDED.service_types, pc.service_types),
+            service_description = COALESCE(EXCLUDED.service_description, pc.service_description),
+            service_areas = COALESCE(EXCLUDED.service_areas, pc.service_areas),
+            enrichment_status = CASE
+                WHEN EXCLUDED.enrichment_status IS NULL OR EXCLUDED.enrichment_status = 'PENDING'
+                    THEN COALESCE(pc.enrichment_status, EXCLUDED.enrichment_status)
+                ELSE EXCLUDED.enrichment_status
+            END,
+            enrichment_data = COALESCE(EXCLUDED.enrichment_data, pc.enrichment_data),
+            last_discovered_at = NOW()
+        RETURNING pc.*
+    ),
+    discovered AS (
+        INSERT INTO potential_contractor_discoveries AS d (
+            contractor_id, project_zip_code, project_type, discovery_source, source_query,
+            search_rank, distance_miles, match_score
+        )
+        SELECT u.id, COALESCE(c.project_zip_code, ''), COALESCE(c.project_type, ''), c.discovery_source,
+               c.source_query, c.search_rank, c.distance_miles, c.match_score
+        FROM upserted AS u
+        JOIN input AS c ON c.dedupe_key = u.dedupe_key
+        WHERE c.project_zip_code IS NOT NULL OR c.project_type IS NOT NULL
+        ON CONFLICT (contractor_id, project_zip_code, project_type) DO UPDATE SET
+            discovery_source = COALESCE(EXCLUDED.discovery_source, d.discovery_source),
+            source_query = COALESCE(EXCLUDED.source_query, d.source_query),
+            search_rank = COALESCE(EXCLUDED.search_rank, d.search_rank),
+            distance_miles = COALESCE(EXCLUDED.distance_miles, d.distance_miles),
+            match_score = COALESCE(EXCLUDED.match_score, d.match_score),
+            discovered_at = NOW()
+    )
+    SELECT u.* FROM upserted AS u;
+END;
+$$ LANGUAGE plpgsql;
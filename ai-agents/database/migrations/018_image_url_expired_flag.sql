@@ -0,0 +1,16 @@
+-- Migration: Retire expired temporary image URLs from the persistence job
+-- Purpose: Rows whose temporary DALL-E URL has expired can never be persisted.
+--          ImagePersistenceService.fix_all_expired_images stamps them with
+--          image_url_expired_at so later runs (and the partial index) skip them
+--          (see services/image_persistence_service.py)
+
+ALTER TABLE inspiration_images
+    ADD COLUMN IF NOT EXISTS image_url_expired_at TIMESTAMP WITH TIME ZONE;
+
+-- Replaces the index from migration 016: only rows that can still be persisted
+DROP INDEX IF EXISTS idx_inspiration_images_temporary_url;
+
+CREATE INDEX IF NOT EXISTS idx_inspiration_images_temporary_url
+    ON inspiration_images(id)
+    WHERE image_url LIKE '%oaidalleapiprodscus.blob.core.windows.net%'
+      AND image_url_expired_at IS NULL;
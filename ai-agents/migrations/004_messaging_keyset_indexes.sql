@@ -0,0 +1,14 @@
+-- Indexes for keyset-paginated message history and batched unread counts
+
+-- Keyset pagination on (created_at, id) within a conversation
+CREATE INDEX IF NOT EXISTS idx_messaging_system_messages_keyset
+    ON messaging_system_messages(conversation_id, created_at DESC, id DESC);
+
+-- Attachments for a whole page are loaded with message_id IN (...)
+CREATE INDEX IF NOT EXISTS idx_message_attachments_message
+    ON message_attachments(message_id, created_at);
+
+-- Unread counts for all of a homeowner's bid cards in one query
+CREATE INDEX IF NOT EXISTS idx_bid_card_messages_unread
+    ON bid_card_messages(recipient_id, bid_card_id)
+    WHERE is_read = FALSE;
@@ -14,6 +14,7 @@ from supabase import Client
 
 # Import auth and database utilities from existing project structure
 from database_simple import db
+from utils.bid_card_preview import invalidate_bid_card_preview
 
 logger = logging.getLogger(__name__)
 
@@ -253,6 +254,7 @@ async def update_bid_card(
             update_data["published_at"] = datetime.utcnow().isoformat()
 
         response = db.table("bid_cards").update(update_data).eq("id", bid_card_id).execute()
+        invalidate_bid_card_preview(bid_card_id)
         return serialize_bid_card(response.data[0])
 
     except Exception as e:
@@ -286,23 +288,33 @@ async def get_homeowner_bid_cards(
 ):
     """Get all bid cards for the current homeowner with enhanced view data"""
     try:
+        current_user = get_current_user()
         response = db.table("bid_cards").select("*").eq("homeowner_id", current_user["id"]).execute()
 
+        # Unread and pending-question counts for every card in one query
+        unread_counts: dict[str, int] = {}
+        question_counts: dict[str, int] = {}
+        card_ids = [card["id"] for card in response.data]
+        if card_ids:
+            unread_response = db.table("bid_card_messages").select("bid_card_id, reply_to_id").in_(
+                "bid_card_id", card_ids
+            ).eq("recipient_id", current_user["id"]).eq("is_read", False).execute()
+
+            for message in unread_response.data:
+                card_id = message["bid_card_id"]
+                unread_counts[card_id] = unread_counts.get(card_id, 0) + 1
+                if message.get("reply_to_id") is None:
+                    question_counts[card_id] = question_counts.get(card_id, 0) + 1
+
         bid_cards = []
         for card in response.data:
-            # Get unread message count
-            unread_response = db.table("bid_card_messages").select("id").eq("bid_card_id", card["id"]).eq("recipient_id", current_user["id"]).eq("is_read", False).execute()
-
-            # Get pending questions count
-            questions_response = db.table("bid_card_messages").select("id").eq("bid_card_id", card["id"]).eq("recipient_id", current_user["id"]).eq("is_read", False).is_("reply_to_id", None).execute()
-
             enhanced_card = serialize_bid_card(card)
             enhanced_card.update({
                 "can_edit": card["status"] in ["draft", "active"],
                 "can_delete": card["status"] == "draft",
                 "can_publish": card["status"] == "draft",
-                "unread_messages_count": len(unread_response.data),
-                "pending_questions": len(questions_response.data)
+                "unread_messages_count": unread_counts.get(card["id"], 0),
+                "pending_questions": question_counts.get(card["id"], 0)
             })
             bid_cards.append(enhanced_card)
 
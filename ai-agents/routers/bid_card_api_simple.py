@@ -12,6 +12,7 @@ from pydantic import BaseModel
 import json
 
 from database_simple import db
+from utils.context_cache import invalidate_bid_card_rows
 
 
 router = APIRouter(tags=["bid-cards"])
@@ -453,7 +454,8 @@ async def submit_contractor_bid(bid_data: BidSubmissionRequest):
         if new_bid_count >= contractor_count_needed:
             update_data["status"] = "bids_complete"
         
-        supabase_client.table("bid_cards").update(update_data).eq("id", bid_data.bid_card_id).execute()
+        update_result = supabase_client.table("bid_cards").update(update_data).eq("id", bid_data.bid_card_id).execute()
+        invalidate_bid_card_rows(update_result.data)
         
         return {
             "success": True,
@@ -10,6 +10,7 @@ from typing import Any
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 
+from agents.cda.contractor_store import discovered_contractors
 from database_simple import db
 
 
@@ -223,11 +224,10 @@ async def get_discovery_data(bid_card_id: str, database) -> dict[str, Any]:
     bid_card = database.client.table("bid_cards").select("project_type").eq("id", bid_card_id).execute()
     project_type = bid_card.data[0]["project_type"] if bid_card.data else None
 
-    # Get potential contractors by project type
+    # Get potential contractors discovered for this project type
     potential_contractors = []
     if project_type:
-        potential_contractors_result = database.client.table("potential_contractors").select("*").eq("project_type", project_type).limit(20).execute()
-        potential_contractors = potential_contractors_result.data or []
+        potential_contractors = discovered_contractors(database.client, project_type, limit=20)
 
     # Get contractor leads from discovery runs
     contractor_leads = []
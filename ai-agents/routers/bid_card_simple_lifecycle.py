@@ -11,6 +11,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
 from database_simple import get_client
+from utils.context_cache import invalidate_bid_card_rows
 
 
 router = APIRouter(prefix="/api/bid-cards-simple", tags=["bid-card-simple"])
@@ -223,6 +224,7 @@ async def submit_simple_bid(bid_card_id: str, bid_data: dict):
         
         if not update_result.data:
             raise HTTPException(status_code=500, detail="Failed to update bid card")
+        invalidate_bid_card_rows(update_result.data)
         
         return {
             "success": True,
@@ -3,15 +3,19 @@ CIA Routes - Customer Interface Agent API Endpoints
 Owner: Agent 1 (Frontend Flow)
 """
 
+import asyncio
+import json
 from datetime import datetime
 from typing import Any, Optional
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 # Import CIA agent and related models
 from agents.cia.agent import CustomerInterfaceAgent
 from database_simple import db
+from utils.image_store import get_image_store
 
 
 # Create router
@@ -62,7 +66,6 @@ async def get_cia_conversation_history(session_id: str):
 
         # Handle case where state might be a JSON string
         if isinstance(state, str):
-            import json
             try:
                 state = json.loads(state)
             except:
@@ -70,7 +73,8 @@ async def get_cia_conversation_history(session_id: str):
 
         messages = state.get("messages", []) if isinstance(state, dict) else []
 
-        # Convert to frontend-compatible format
+        # Convert to frontend-compatible format; image references become displayable URLs
+        image_store = get_image_store(db.client)
         formatted_messages = []
         for msg in messages:
             formatted_messages.append({
@@ -78,7 +82,7 @@ async def get_cia_conversation_history(session_id: str):
                 "role": msg.get("role", "assistant"),
                 "content": msg.get("content", ""),
                 "timestamp": msg.get("timestamp", conversation_state.get("created_at", "")),
-                "images": msg.get("images", [])
+                "images": [image_store.display_url(image) for image in msg.get("images") or []]
             })
 
         return {
@@ -100,6 +104,113 @@ async def get_cia_conversation_history(session_id: str):
             "total_messages": 0
         }
 
+async def _prepare_chat(chat_data: ChatMessage) -> tuple[str, str, Optional[str], Optional[dict[str, Any]], list[str]]:
+    """Resolve user, session, bid card context and persisted state for a chat turn"""
+    # Use authenticated user ID if provided, otherwise use anonymous UUID
+    user_id = chat_data.user_id or "00000000-0000-0000-0000-000000000000"
+    if chat_data.user_id:
+        print(f"[CIA] Using authenticated user ID: {user_id}")
+    else:
+        print(f"[CIA] Using anonymous user ID: {user_id}")
+
+    # Handle project awareness
+    project_id = chat_data.project_id
+    bid_card_context = None
+    if project_id:
+        print(f"[CIA] Using project ID: {project_id}")
+        # Load bid card data
+        try:
+            # Try to load bid card data
+            bid_card_result = db.client.table("bid_cards").select("*").eq("id", project_id).execute()
+            if bid_card_result.data:
+                bid_card_context = bid_card_result.data[0]
+                print(f"[CIA] Loaded bid card: {bid_card_context.get('bid_card_number')}")
+            else:
+                print(f"[CIA] No bid card found for project ID: {project_id}")
+
+            # Verify user access if authenticated
+            if user_id != "00000000-0000-0000-0000-000000000000" and bid_card_context:
+                # For authenticated users, check homeowner relationship
+                homeowner_result = db.client.table("homeowners").select("id").eq("user_id", user_id).execute()
+                if homeowner_result.data:
+                    homeowner_id = homeowner_result.data[0]["id"]
+                    if bid_card_context.get("homeowner_id") != homeowner_id:
+                        raise HTTPException(status_code=403, detail="Bid card access denied")
+                    print(f"[CIA] Verified bid card access for homeowner {homeowner_id}")
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"[CIA] Bid card loading warning: {e}")
+
+    # Generate session ID - include project if specified
+    if not chat_data.session_id:
+        if project_id:
+            session_id = f"project_{project_id}_{datetime.now().timestamp()}"
+        else:
+            session_id = f"cia_anonymous_{datetime.now().timestamp()}"
+    else:
+        session_id = chat_data.session_id
+
+    # Load existing conversation state from Supabase
+    existing_conversation = await db.load_conversation_state(session_id)
+
+    # Extract state if conversation exists
+    if existing_conversation:
+        print(f"[CIA] Loaded existing conversation for session {session_id}")
+        existing_state = existing_conversation.get("state", {})
+    else:
+        print(f"[CIA] Starting new conversation for session {session_id}")
+        existing_state = None
+
+    # Process images if provided
+    image_urls = []
+    if chat_data.images:
+        for img_data in chat_data.images:
+            # In production, save to Supabase storage
+            # For now, we'll just pass the base64 data
+            image_urls.append(img_data)
+
+    # Enhance existing state with bid card context if available
+    if existing_state and bid_card_context:
+        existing_state["bid_card_context"] = bid_card_context
+        existing_state["project_id"] = project_id
+    elif bid_card_context:
+        existing_state = {
+            "bid_card_context": bid_card_context,
+            "project_id": project_id
+        }
+
+    return user_id, session_id, project_id, existing_state, image_urls
+
+async def _persist_chat_result(result: dict[str, Any], user_id: str, session_id: str, project_id: Optional[str]):
+    """Save the turn's conversation state and link it to the project when ready"""
+    # Save conversation state to Supabase
+    if "state" in result:
+        # Add project information to state if available
+        enhanced_state = result["state"].copy()
+        if project_id:
+            enhanced_state["project_id"] = project_id
+            enhanced_state["project_context"] = True
+
+        await db.save_conversation_state(
+            user_id=user_id,
+            thread_id=session_id,
+            agent_type="CIA",
+            state=enhanced_state
+        )
+        print(f"[CIA] Saved conversation state for session {session_id}")
+
+        # If project is specified and conversation is ready for JAA, link them
+        if project_id and result.get("ready_for_jaa", False):
+            try:
+                db.client.table("projects").update({
+                    "cia_conversation_id": session_id,
+                    "status": "in_progress"
+                }).eq("id", project_id).execute()
+                print(f"[CIA] Linked conversation {session_id} to project {project_id}")
+            except Exception as e:
+                print(f"[CIA] Warning: Could not link conversation to project: {e}")
+
 @router.post("/chat", response_model=ChatResponse)
 async def cia_chat(chat_data: ChatMessage):
     """Handle chat messages for the CIA agent with Supabase persistence"""
@@ -114,79 +225,7 @@ async def cia_chat(chat_data: ChatMessage):
         )
 
     try:
-        # Use authenticated user ID if provided, otherwise use anonymous UUID
-        user_id = chat_data.user_id or "00000000-0000-0000-0000-000000000000"
-        if chat_data.user_id:
-            print(f"[CIA] Using authenticated user ID: {user_id}")
-        else:
-            print(f"[CIA] Using anonymous user ID: {user_id}")
-
-        # Handle project awareness
-        project_id = chat_data.project_id
-        bid_card_context = None
-        if project_id:
-            print(f"[CIA] Using project ID: {project_id}")
-            # Load bid card data
-            try:
-                # Try to load bid card data
-                bid_card_result = db.client.table("bid_cards").select("*").eq("id", project_id).execute()
-                if bid_card_result.data:
-                    bid_card_context = bid_card_result.data[0]
-                    print(f"[CIA] Loaded bid card: {bid_card_context.get('bid_card_number')}")
-                else:
-                    print(f"[CIA] No bid card found for project ID: {project_id}")
-
-                # Verify user access if authenticated
-                if user_id != "00000000-0000-0000-0000-000000000000" and bid_card_context:
-                    # For authenticated users, check homeowner relationship
-                    homeowner_result = db.client.table("homeowners").select("id").eq("user_id", user_id).execute()
-                    if homeowner_result.data:
-                        homeowner_id = homeowner_result.data[0]["id"]
-                        if bid_card_context.get("homeowner_id") != homeowner_id:
-                            raise HTTPException(status_code=403, detail="Bid card access denied")
-                        print(f"[CIA] Verified bid card access for homeowner {homeowner_id}")
-            except HTTPException:
-                raise
-            except Exception as e:
-                print(f"[CIA] Bid card loading warning: {e}")
-
-        # Generate session ID - include project if specified
-        if not chat_data.session_id:
-            if project_id:
-                session_id = f"project_{project_id}_{datetime.now().timestamp()}"
-            else:
-                session_id = f"cia_anonymous_{datetime.now().timestamp()}"
-        else:
-            session_id = chat_data.session_id
-
-        # Load existing conversation state from Supabase
-        existing_conversation = await db.load_conversation_state(session_id)
-
-        # Extract state if conversation exists
-        if existing_conversation:
-            print(f"[CIA] Loaded existing conversation for session {session_id}")
-            existing_state = existing_conversation.get("state", {})
-        else:
-            print(f"[CIA] Starting new conversation for session {session_id}")
-            existing_state = None
-
-        # Process images if provided
-        image_urls = []
-        if chat_data.images:
-            for img_data in chat_data.images:
-                # In production, save to Supabase storage
-                # For now, we'll just pass the base64 data
-                image_urls.append(img_data)
-
-        # Enhance existing state with bid card context if available
-        if existing_state and bid_card_context:
-            existing_state["bid_card_context"] = bid_card_context
-            existing_state["project_id"] = project_id
-        elif bid_card_context:
-            existing_state = {
-                "bid_card_context": bid_card_context,
-                "project_id": project_id
-            }
+        user_id, session_id, project_id, existing_state, image_urls = await _prepare_chat(chat_data)
 
         # Call the actual CIA agent with existing state
         result = await cia_agent.handle_conversation(
@@ -198,32 +237,7 @@ async def cia_chat(chat_data: ChatMessage):
             project_id=project_id
         )
 
-        # Save conversation state to Supabase
-        if "state" in result:
-            # Add project information to state if available
-            enhanced_state = result["state"].copy()
-            if project_id:
-                enhanced_state["project_id"] = project_id
-                enhanced_state["project_context"] = True
-
-            await db.save_conversation_state(
-                user_id=user_id,
-                thread_id=session_id,
-                agent_type="CIA",
-                state=enhanced_state
-            )
-            print(f"[CIA] Saved conversation state for session {session_id}")
-
-            # If project is specified and conversation is ready for JAA, link them
-            if project_id and result.get("ready_for_jaa", False):
-                try:
-                    db.client.table("projects").update({
-                        "cia_conversation_id": session_id,
-                        "status": "in_progress"
-                    }).eq("id", project_id).execute()
-                    print(f"[CIA] Linked conversation {session_id} to project {project_id}")
-                except Exception as e:
-                    print(f"[CIA] Warning: Could not link conversation to project: {e}")
+        await _persist_chat_result(result, user_id, session_id, project_id)
 
         return ChatResponse(**result)
 
@@ -240,6 +254,92 @@ async def cia_chat(chat_data: ChatMessage):
             missing_fields=["project_type", "budget", "timeline"]
         )
 
+# Strong references to streamed turns so they outlive a closed stream
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _run_in_background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def _persist_streamed_turn(result: dict[str, Any], user_id: str, session_id: str, project_id: Optional[str]):
+    try:
+        await _persist_chat_result(result, user_id, session_id, project_id)
+    except Exception as e:
+        print(f"[CIA] Warning: Could not persist streamed turn: {e}")
+
+
+@router.post("/chat/stream")
+async def cia_chat_stream(chat_data: ChatMessage):
+    """
+    Stream a CIA turn as Server-Sent Events
+
+    Emits {"type": "token", "text": ...} events as Claude tokens arrive, then a
+    single {"type": "done", ...} event with the turn metadata once extraction
+    has run. The turn and its persistence run in a task of their own, so a
+    client closing the stream (normally right after "done") can't cancel
+    saving the conversation.
+    """
+    if not cia_agent:
+        raise HTTPException(status_code=503, detail="CIA agent not initialized")
+
+    user_id, session_id, project_id, existing_state, image_urls = await _prepare_chat(chat_data)
+
+    async def event_stream():
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def on_token(text: str):
+            await queue.put({"type": "token", "text": text})
+
+        async def run_turn():
+            try:
+                result = await cia_agent.handle_conversation(
+                    user_id=user_id,
+                    message=chat_data.message,
+                    images=image_urls,
+                    session_id=session_id,
+                    existing_state=existing_state,
+                    project_id=project_id,
+                    on_token=on_token
+                )
+            finally:
+                await queue.put(None)
+
+            # Persist in the background; the client doesn't wait for it
+            _run_in_background(_persist_streamed_turn(result, user_id, session_id, project_id))
+            return result
+
+        turn = _run_in_background(run_turn())
+
+        while (event := await queue.get()) is not None:
+            yield f"data: {json.dumps(event)}\n\n"
+
+        try:
+            result = await turn
+        except Exception as e:
+            print(f"Error in CIA chat stream: {e}")
+            yield f"data: {json.dumps({'type': 'error', 'error': str(e), 'session_id': session_id})}\n\n"
+            return
+
+        done = {
+            "type": "done",
+            "response": result["response"],
+            "session_id": result["session_id"],
+            "current_phase": result["current_phase"],
+            "ready_for_jaa": result["ready_for_jaa"],
+            "missing_fields": result.get("missing_fields", [])
+        }
+        yield f"data: {json.dumps(done)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 def generate_intelligent_response(message: str, images: Optional[list[str]] = None) -> str:
     """Generate contextually appropriate responses without LLM"""
     message_lower = message.lower()
@@ -16,6 +16,8 @@ except ImportError:
     from database import SupabaseDB
     db = SupabaseDB()
 
+from utils.context_cache import invalidate_bid_card_rows
+
 router = APIRouter(prefix="/api/contractor-proposals", tags=["contractor-proposals"])
 
 
@@ -97,9 +99,10 @@ async def submit_proposal(proposal: ContractorProposal):
                     update_data["status"] = "bids_complete"
                     update_data["bid_document"]["bids_target_met"] = True
                 
-                db.client.table("bid_cards").update(update_data).eq(
+                update_result = db.client.table("bid_cards").update(update_data).eq(
                     "id", proposal.bid_card_id
                 ).execute()
+                invalidate_bid_card_rows(update_result.data)
             
             return {
                 "success": True,
@@ -262,10 +265,11 @@ async def update_proposal_status(proposal_id: str, status: str, homeowner_id: st
         if result.data:
             # If accepting, update bid card status
             if status == "accepted":
-                db.client.table("bid_cards").update({
+                update_result = db.client.table("bid_cards").update({
                     "status": "awarded",
                     "updated_at": datetime.utcnow().isoformat()
                 }).eq("id", proposal.data["bid_card_id"]).execute()
+                invalidate_bid_card_rows(update_result.data)
             
             return {
                 "success": True,
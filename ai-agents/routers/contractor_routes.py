@@ -13,6 +13,7 @@ from pydantic import BaseModel
 # Import COIA agent for contractor communication (now using OpenAI O3)
 # Import database connection
 from database_simple import db
+from utils.context_cache import invalidate_bid_card_rows
 
 
 # Create router
@@ -262,6 +263,7 @@ async def submit_contractor_bid(bid_data: BidSubmissionRequest):
 
         # Update bid card with new bid
         update_response = supabase_client.table("bid_cards").update(update_data).eq("id", bid_data.bid_card_id).execute()
+        invalidate_bid_card_rows(update_response.data)
 
         # Also create entry in bids table for tracking
         bid_record = {
@@ -6,6 +6,7 @@ Owner: Agent 2 (Backend Core)
 from typing import Optional
 
 from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
 
 # Import JAA agent
 from agents.jaa.agent import JobAssessmentAgent
@@ -29,7 +30,7 @@ async def process_with_jaa(thread_id: str):
         raise HTTPException(500, "JAA agent not initialized")
 
     try:
-        result = jaa_agent.process_conversation(thread_id)
+        result = await jaa_agent.aprocess_conversation(thread_id)
 
         if result["success"]:
             return {
@@ -45,3 +46,29 @@ async def process_with_jaa(thread_id: str):
     except Exception as e:
         print(f"[JAA API ERROR] {e}")
         raise HTTPException(500, f"JAA processing failed: {e!s}")
+
+class BatchProcessRequest(BaseModel):
+    thread_ids: list[str] = Field(..., min_length=1, max_length=100)
+
+@router.post("/process-batch")
+async def process_batch_with_jaa(request: BatchProcessRequest):
+    """Process many completed CIA conversations concurrently into bid cards"""
+    if not jaa_agent:
+        raise HTTPException(500, "JAA agent not initialized")
+
+    try:
+        results = await jaa_agent.aprocess_conversations(request.thread_ids)
+
+        return {
+            "success": True,
+            "processed": len(results),
+            "created": sum(1 for result in results if result["success"]),
+            "results": [
+                {"thread_id": thread_id, **result}
+                for thread_id, result in zip(request.thread_ids, results, strict=True)
+            ]
+        }
+
+    except Exception as e:
+        print(f"[JAA API ERROR] {e}")
+        raise HTTPException(500, f"JAA batch processing failed: {e!s}")
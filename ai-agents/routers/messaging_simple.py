@@ -3,12 +3,13 @@ Fixed Messaging API with Proper Conversation Targeting
 Ensures messages go to the correct contractor conversation 100% of the time
 """
 
+import base64
 import re
 import uuid
 from datetime import datetime
 from typing import Any, Optional
 
-from fastapi import APIRouter, File, Form, UploadFile
+from fastapi import APIRouter, File, Form, Query, UploadFile
 
 import database_simple
 
@@ -346,30 +347,82 @@ async def get_conversations_for_bid_card(bid_card_id: str, user_type: str, user_
             "conversations": []
         }
 
+def encode_message_cursor(message: dict[str, Any]) -> str:
+    """Encode a message's (created_at, id) keyset position as an opaque cursor"""
+    raw = f"{message['created_at']}|{message['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_message_cursor(cursor: str) -> tuple[str, str]:
+    """Decode a cursor back into (created_at, id)"""
+    created_at, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+    return created_at, message_id
+
+
+MESSAGE_PAGE_SIZE = 100
+
+
 @router.get("/{conversation_id}")
-async def get_messages(conversation_id: str):
-    """Get all messages in a conversation with attachments"""
+async def get_messages(conversation_id: str, limit: Optional[int] = Query(None, ge=1, le=500), before: Optional[str] = None):
+    """
+    Get messages in a conversation with attachments
+
+    Without `limit` or `before` the whole conversation is returned, oldest to
+    newest. Passing either pages it instead: pages are keyset-paginated on
+    (created_at, id), newest page first, with messages in each page returned
+    oldest to newest. Pass next_cursor back as `before` to load older
+    messages. Attachments are loaded with a single query.
+    """
     try:
         db = database_simple.get_client()
 
-        # Get messages
-        messages_result = db.table("messaging_system_messages").select("*").eq(
+        query = db.table("messaging_system_messages").select("*").eq(
             "conversation_id", conversation_id
-        ).order("created_at", desc=False).execute()
-
-        messages = messages_result.data or []
+        )
 
-        # For each message, get its attachments
-        for message in messages:
-            attachments_result = db.table("message_attachments").select("*").eq(
-                "message_id", message["id"]
+        if limit is None and not before:
+            messages_result = query.order("created_at", desc=False).order("id", desc=False).execute()
+            messages = messages_result.data or []
+            has_more = False
+            next_cursor = None
+        else:
+            limit = limit or MESSAGE_PAGE_SIZE
+            if before:
+                created_at, message_id = decode_message_cursor(before)
+                query = query.or_(
+                    f'created_at.lt."{created_at}",'
+                    f'and(created_at.eq."{created_at}",id.lt.{message_id})'
+                )
+
+            # Fetch one extra row to know whether an older page exists
+            messages_result = query.order("created_at", desc=True).order(
+                "id", desc=True
+            ).limit(limit + 1).execute()
+
+            messages = messages_result.data or []
+            has_more = len(messages) > limit
+            messages = messages[:limit]
+            next_cursor = encode_message_cursor(messages[-1]) if has_more else None
+            messages.reverse()
+
+        # Load attachments for the whole page in one round trip
+        attachments_by_message: dict[str, list[dict[str, Any]]] = {m["id"]: [] for m in messages}
+        if messages:
+            attachments_result = db.table("message_attachments").select("*").in_(
+                "message_id", list(attachments_by_message)
             ).order("created_at", desc=False).execute()
 
-            message["attachments"] = attachments_result.data or []
+            for attachment in attachments_result.data or []:
+                attachments_by_message[attachment["message_id"]].append(attachment)
+
+        for message in messages:
+            message["attachments"] = attachments_by_message[message["id"]]
 
         return {
             "success": True,
-            "messages": messages
+            "messages": messages,
+            "has_more": has_more,
+            "next_cursor": next_cursor
         }
 
     except Exception as e:
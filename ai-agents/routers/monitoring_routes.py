@@ -8,6 +8,7 @@ from datetime import datetime
 from fastapi import APIRouter, HTTPException
 
 import database_simple as database
+from utils.session_cache import get_session_cache_stats
 
 
 # Create router
@@ -171,6 +172,14 @@ async def get_all_agents_status():
         print(f"[ALL AGENTS STATUS ERROR] {e}")
         raise HTTPException(500, f"Failed to get agent statuses: {e!s}")
 
+@router.get("/session-caches")
+async def get_session_caches():
+    """Size and hit-rate metrics for the in-memory agent session caches"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "caches": get_session_cache_stats()
+    }
+
 @router.get("/")
 async def health_check():
     """Main health check endpoint"""
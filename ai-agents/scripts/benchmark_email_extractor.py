@@ -0,0 +1,93 @@
+"""
+Benchmark contractor website email extraction
+Compares the single-pass extractor with the previous BeautifulSoup-based scan
+over the saved contractor pages in test-sites (or any HTML files given) plus
+a few hand-written edge cases, and checks that both find the same emails
+
+Usage: python scripts/benchmark_email_extractor.py [page.html ...] [--repeat N]
+"""
+
+import glob
+import os
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.cda.email_extractor import EMAIL_RE, TEXT_MAILTO_RE, VALID_EMAIL_RE, extract_emails
+
+
+TEST_SITES = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "test-sites")
+
+# Snippets the saved pages don't cover: addresses split across inline tags
+EDGE_CASES = {
+    "bold-local-part": "<p><b>info</b>@acme.com</p>",
+    "span-domain": "<p>info@<span>acme</span>.com</p>",
+}
+
+
+def soup_extract_emails(html: str) -> list[str]:
+    """The previous EmailDiscoveryAgent._extract_emails_from_html"""
+    soup = BeautifulSoup(html, "html.parser")
+    for script in soup(["script", "style"]):
+        script.decompose()
+    text_content = soup.get_text()
+
+    emails = list(EMAIL_RE.findall(text_content)) + list(TEXT_MAILTO_RE.findall(text_content))
+    for link in soup.find_all("a", href=re.compile(r"^mailto:", re.IGNORECASE)):
+        email_match = re.search(r"mailto:([^?&\s]+)", link.get("href", ""), re.IGNORECASE)
+        if email_match:
+            emails.append(email_match.group(1))
+
+    emails = [email.strip().lower() for email in emails]
+    return [email for email in emails if VALID_EMAIL_RE.match(email)]
+
+
+def timed(extract, pages: list[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            extract(html)
+    return time.perf_counter() - start
+
+
+def main():
+    args = sys.argv[1:]
+    repeat = 50
+    if "--repeat" in args:
+        idx = args.index("--repeat")
+        repeat = int(args[idx + 1])
+        del args[idx:idx + 2]
+
+    paths = args or sorted(glob.glob(os.path.join(TEST_SITES, "**", "*.html"), recursive=True))
+    pages = []
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            pages.append(f.read())
+    paths += EDGE_CASES.keys()
+    pages += EDGE_CASES.values()
+
+    mismatches = 0
+    for path, html in zip(paths, pages, strict=True):
+        expected, actual = soup_extract_emails(html), extract_emails(html)
+        if set(expected) != set(actual):
+            mismatches += 1
+            print(f"MISMATCH {path}: soup={expected} single-pass={actual}")
+
+    total_kb = sum(len(html) for html in pages) / 1024
+    soup_time = timed(soup_extract_emails, pages, repeat)
+    fast_time = timed(extract_emails, pages, repeat)
+
+    print(f"\n{len(pages)} pages ({total_kb:.0f} KB) x {repeat}")
+    print(f"BeautifulSoup: {soup_time * 1000:.1f} ms ({soup_time / (len(pages) * repeat) * 1e3:.2f} ms/page)")
+    print(f"Single-pass:   {fast_time * 1000:.1f} ms ({fast_time / (len(pages) * repeat) * 1e3:.2f} ms/page)")
+    print(f"Speedup: {soup_time / fast_time:.1f}x, mismatched pages: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
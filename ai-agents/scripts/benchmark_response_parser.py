@@ -0,0 +1,66 @@
+"""
+Benchmark ResponseParser intent/sentiment classification
+Run against a JSONL export of contractor replies (one {"content", "channel"} per line),
+or the built-in sample replies when no file is given
+
+Usage: python scripts/benchmark_response_parser.py [replies.jsonl] [--repeat N]
+"""
+
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.eaa.response_tracking.response_parser import ResponseParser
+
+
+SAMPLE_REPLIES = [
+    {"content": "Yes, I'm interested! Send me the details.", "channel": "sms"},
+    {"content": "Y", "channel": "sms"},
+    {"content": "STOP", "channel": "sms"},
+    {"content": "No thanks, we're booked through next month.", "channel": "email"},
+    {"content": "What's the timeline and how much is the budget? Any specific materials?", "channel": "email"},
+    {"content": "Sounds good, no problem. Call me at 555-123-4567.", "channel": "sms"},
+    {"content": "Not my specialty, sorry. Too far outside area anyway.", "channel": "email"},
+    {"content": "Please remove me from your list", "channel": "email"},
+    {"content": "Happy to take a look. We can do it this week.\n\nSent from my iPhone", "channel": "email"},
+    {"content": "Great project but we are busy until spring. On Mon, Jan 6 Instabids wrote:\n> Kitchen remodel in Miami", "channel": "email"},
+]
+
+
+def load_replies(path: str) -> list[dict]:
+    """Load replies from a JSONL export"""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    args = sys.argv[1:]
+    repeat = 200
+    if "--repeat" in args:
+        idx = args.index("--repeat")
+        repeat = int(args[idx + 1])
+        del args[idx:idx + 2]
+
+    replies = load_replies(args[0]) if args else SAMPLE_REPLIES
+    corpus = replies * repeat
+
+    parser = ResponseParser()
+
+    start = time.perf_counter()
+    results = parser.parse_batch(corpus)
+    elapsed = time.perf_counter() - start
+
+    intents = Counter(r["intent"] for r in results[:len(replies)])
+    print(f"\nParsed {len(corpus)} replies in {elapsed * 1000:.1f} ms "
+          f"({elapsed / len(corpus) * 1e6:.1f} us/reply)")
+    print(f"Intent distribution: {dict(intents)}")
+
+
+if __name__ == "__main__":
+    main()
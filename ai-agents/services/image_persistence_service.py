@@ -2,16 +2,28 @@
 Image Persistence Service
 Handles downloading and storing images permanently in Supabase Storage
 Replaces temporary OpenAI URLs with permanent storage URLs
+
+Downloads share one aiohttp session and are streamed straight into the
+Storage REST API, so an image is never held in memory whole. The batch job
+only reads rows that still point at a live temporary URL, works through them
+with bounded concurrency and checkpoints its cursor after every batch. Rows
+whose URL has already expired are stamped (image_url_expired_at) so later
+runs don't read them again.
 """
+import asyncio
 import logging
 import os
-from datetime import datetime
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
 from typing import Any, Optional
+from urllib.parse import parse_qs, quote, urlparse
 
 import aiohttp
 from dotenv import load_dotenv
 from supabase import Client, create_client
 
+from utils.context_cache import invalidate_board
+
 
 # Load environment variables
 env_path = os.path.join(os.path.dirname(__file__), "..", "..", ".env")
@@ -21,6 +33,32 @@ load_dotenv(env_path, override=True)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# DALL-E result URLs are Azure blob SAS links that expire after about an hour
+TEMPORARY_URL_HOST = "oaidalleapiprodscus.blob.core.windows.net"
+TEMPORARY_URL_LIFETIME = timedelta(hours=1)
+
+PERSISTENCE_CONCURRENCY = int(os.getenv("IMAGE_PERSISTENCE_CONCURRENCY", "8"))
+PERSISTENCE_BATCH_SIZE = int(os.getenv("IMAGE_PERSISTENCE_BATCH_SIZE", "100"))
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def temporary_url_expiry(url: str) -> Optional[datetime]:
+    """Expiry time (`se` SAS parameter) of a temporary image URL, if it has one"""
+    expiry = parse_qs(urlparse(url).query).get("se")
+    if not expiry:
+        return None
+    try:
+        parsed = datetime.fromisoformat(expiry[0].replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def is_expired(url: str) -> bool:
+    expiry = temporary_url_expiry(url)
+    return expiry is not None and expiry <= datetime.now(timezone.utc)
+
+
 class ImagePersistenceService:
     def __init__(self):
         # Initialize Supabase client
@@ -31,20 +69,42 @@ class ImagePersistenceService:
             raise ValueError("Missing SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY environment variables")
 
         self.supabase: Client = create_client(supabase_url, supabase_key)
+        self.supabase_url = supabase_url.rstrip("/")
+        self.supabase_key = supabase_key
         self.bucket_name = "iris-images"
+        self.checkpoint_table = "image_persistence_checkpoints"
+
+        self._bucket_ready = False
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Shared HTTP session for downloads and storage uploads"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120, sock_read=30))
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
 
     async def ensure_bucket_exists(self) -> bool:
-        """Ensure the iris-images bucket exists, create if it doesn't"""
+        """Ensure the iris-images bucket exists, create if it doesn't (checked once per process)"""
+        if self._bucket_ready:
+            return True
+        self._bucket_ready = await asyncio.to_thread(self._ensure_bucket_exists)
+        return self._bucket_ready
+
+    def _ensure_bucket_exists(self) -> bool:
         try:
             # Try to get bucket info
-            result = self.supabase.storage.get_bucket(self.bucket_name)
+            self.supabase.storage.get_bucket(self.bucket_name)
             logger.info(f"Bucket {self.bucket_name} already exists")
             return True
         except Exception:
             logger.info(f"Bucket {self.bucket_name} doesn't exist, creating it...")
             try:
                 # Create the bucket as public
-                result = self.supabase.storage.create_bucket(
+                self.supabase.storage.create_bucket(
                     self.bucket_name,
                     options={"public": True}
                 )
@@ -58,6 +118,10 @@ class ImagePersistenceService:
         """
         Download image from URL and store it permanently in Supabase Storage
         
+        The body is streamed from the source into the upload in chunks. The
+        storage path is derived from the image ID, so a retried or resumed
+        run overwrites its own earlier upload instead of adding a copy.
+        
         Args:
             image_url: The temporary URL (e.g., OpenAI DALL-E URL)
             image_id: Unique identifier for the image
@@ -71,44 +135,36 @@ class ImagePersistenceService:
             if not await self.ensure_bucket_exists():
                 return None
 
-            # Download the image
-            async with aiohttp.ClientSession() as session:
-                async with session.get(image_url) as response:
-                    if response.status != 200:
-                        logger.error(f"Failed to download image: HTTP {response.status}")
-                        return None
+            session = self._get_session()
+            file_path = f"iris_visions/{image_id}.{image_type}"
 
-                    image_data = await response.read()
-                    logger.info(f"Downloaded image: {len(image_data)} bytes")
+            async with session.get(image_url) as response:
+                if response.status != 200:
+                    logger.error(f"Failed to download image {image_id}: HTTP {response.status}")
+                    return None
 
-            # Generate storage path
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            file_path = f"iris_visions/{timestamp}_{image_id}.{image_type}"
+                content_type = response.headers.get("Content-Type", "")
+                if not content_type.startswith("image/"):
+                    content_type = f"image/{image_type}"
+                headers = {
+                    "Authorization": f"Bearer {self.supabase_key}",
+                    "apikey": self.supabase_key,
+                    "Content-Type": content_type,
+                    "x-upsert": "true"
+                }
+                # Content-Length is the encoded size; only forward it when bytes pass through unchanged
+                if response.content_length is not None and "Content-Encoding" not in response.headers:
+                    headers["Content-Length"] = str(response.content_length)
+
+                upload_url = f"{self.supabase_url}/storage/v1/object/{self.bucket_name}/{quote(file_path)}"
+                async with session.post(upload_url, data=self._stream_body(response), headers=headers) as upload:
+                    if upload.status not in (200, 201):
+                        logger.error(f"Upload failed for {image_id}: HTTP {upload.status} {await upload.text()}")
+                        return None
 
-            # Upload to Supabase Storage
-            try:
-                result = self.supabase.storage.from_(self.bucket_name).upload(
-                    path=file_path,
-                    file=image_data,
-                    file_options={"content-type": f"image/{image_type}"}
-                )
-                logger.info(f"Upload successful to path: {file_path}")
-            except Exception as upload_error:
-                # If file already exists, try with a different name
-                if "duplicate" in str(upload_error).lower():
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S%f")
-                    file_path = f"iris_visions/{timestamp}_{image_id}.{image_type}"
-                    result = self.supabase.storage.from_(self.bucket_name).upload(
-                        path=file_path,
-                        file=image_data,
-                        file_options={"content-type": f"image/{image_type}"}
-                    )
-                    logger.info(f"Upload successful to alternate path: {file_path}")
-                else:
-                    logger.error(f"Upload failed: {upload_error}")
-                    return None
+            logger.info(f"Upload successful to path: {file_path}")
 
-            # Get public URL
+            # Public URLs are built locally, no request needed
             public_url = self.supabase.storage.from_(self.bucket_name).get_public_url(file_path)
             logger.info(f"Image stored successfully: {public_url}")
 
@@ -118,15 +174,23 @@ class ImagePersistenceService:
             logger.error(f"Error storing image: {e}")
             return None
 
+    @staticmethod
+    async def _stream_body(response: aiohttp.ClientResponse) -> AsyncIterator[bytes]:
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            yield chunk
+
     async def update_image_record(self, image_id: str, new_url: str) -> bool:
         """Update the database record with the new permanent URL"""
         try:
-            result = self.supabase.table("inspiration_images").update({
-                "image_url": new_url,
-                "thumbnail_url": new_url  # Update thumbnail too
-            }).eq("id", image_id).execute()
+            result = await asyncio.to_thread(
+                self.supabase.table("inspiration_images").update({
+                    "image_url": new_url,
+                    "thumbnail_url": new_url  # Update thumbnail too
+                }).eq("id", image_id).execute
+            )
 
             if result.data:
+                invalidate_board(result.data[0].get("board_id"))
                 logger.info(f"Updated image record {image_id} with permanent URL")
                 return True
             else:
@@ -165,58 +229,91 @@ class ImagePersistenceService:
             logger.error(f"Error making image persistent: {e}")
             return None
 
-    async def fix_all_expired_images(self) -> dict[str, Any]:
+    async def fix_all_expired_images(self,
+                                     batch_size: int = PERSISTENCE_BATCH_SIZE,
+                                     concurrency: int = PERSISTENCE_CONCURRENCY,
+                                     resume: bool = True) -> dict[str, Any]:
         """
         Find all images with temporary URLs and make them persistent
+
+        Rows are read in ID order, batch_size at a time, filtered server-side
+        to temporary URLs not yet marked expired. Each batch is persisted with
+        up to concurrency images in flight, its expired rows are marked, then
+        the cursor is checkpointed. An interrupted run resumes after the last
+        finished batch, then goes back over the IDs below the checkpoint for
+        rows added since the interruption (IDs are random UUIDs); a completed run clears the checkpoint so
+        the next one starts from the beginning. Checkpoints older than a
+        temporary URL's lifetime are ignored.
         """
         try:
-            # Get all inspiration images that might have temporary URLs
-            result = self.supabase.table("inspiration_images").select("*").execute()
-
-            if not result.data:
-                return {"success": False, "error": "No images found"}
+            cursor = await asyncio.to_thread(self._load_checkpoint) if resume else None
+            resumed_from = cursor
+            semaphore = asyncio.Semaphore(concurrency)
 
             fixed_count = 0
             failed_count = 0
+            expired_count = 0
+            total_processed = 0
             results = []
 
-            for image in result.data:
-                image_id = image.get("id")
+            async def persist(image: dict[str, Any]) -> dict[str, Any]:
+                image_id = image["id"]
                 current_url = image.get("image_url", "")
 
-                # Check if it's an OpenAI URL (temporary)
-                if "oaidalleapiprodscus.blob.core.windows.net" in current_url:
-                    logger.info(f"Processing temporary image: {image_id}")
+                # The source is gone; downloading would only fail
+                if is_expired(current_url):
+                    return {"id": image_id, "status": "expired", "old_url": current_url}
 
-                    # Try to make it persistent
+                async with semaphore:
+                    logger.info(f"Processing temporary image: {image_id}")
                     permanent_url = await self.make_image_persistent(image_id, current_url)
 
-                    if permanent_url:
-                        fixed_count += 1
-                        results.append({
-                            "id": image_id,
-                            "status": "fixed",
-                            "new_url": permanent_url
-                        })
-                    else:
-                        failed_count += 1
-                        results.append({
-                            "id": image_id,
-                            "status": "failed",
-                            "old_url": current_url
-                        })
-                else:
-                    results.append({
-                        "id": image_id,
-                        "status": "already_persistent",
-                        "url": current_url
-                    })
+                if permanent_url:
+                    return {"id": image_id, "status": "fixed", "new_url": permanent_url}
+                return {"id": image_id, "status": "failed", "old_url": current_url}
+
+            # (after, up to) ID ranges; a resumed run goes back for IDs below where it stopped
+            passes = [(cursor, None), (None, cursor)] if cursor else [(None, None)]
+            for cursor, until in passes:
+                while True:
+                    batch = await asyncio.to_thread(self._fetch_temporary_images, cursor, batch_size, until)
+                    if not batch:
+                        break
+
+                    # Soonest-expiring first so a slow batch loses as few images as possible
+                    batch.sort(key=lambda image: temporary_url_expiry(image.get("image_url", ""))
+                               or datetime.max.replace(tzinfo=timezone.utc))
+                    batch_results = await asyncio.gather(*(persist(image) for image in batch))
+
+                    for result in batch_results:
+                        if result["status"] == "fixed":
+                            fixed_count += 1
+                        elif result["status"] == "expired":
+                            expired_count += 1
+                        else:
+                            failed_count += 1
+                    results.extend(batch_results)
+                    total_processed += len(batch)
+
+                    expired_ids = [result["id"] for result in batch_results if result["status"] == "expired"]
+                    if expired_ids:
+                        await asyncio.to_thread(self._mark_expired, expired_ids)
+
+                    cursor = max(image["id"] for image in batch)
+                    await asyncio.to_thread(self._save_checkpoint, cursor, len(batch))
+
+                    if len(batch) < batch_size:
+                        break
+
+            await asyncio.to_thread(self._save_checkpoint, None, 0)
 
             return {
                 "success": True,
                 "fixed_count": fixed_count,
                 "failed_count": failed_count,
-                "total_processed": len(result.data),
+                "expired_count": expired_count,
+                "total_processed": total_processed,
+                "resumed_from": resumed_from,
                 "results": results
             }
 
@@ -224,5 +321,59 @@ class ImagePersistenceService:
             logger.error(f"Error fixing expired images: {e}")
             return {"success": False, "error": str(e)}
 
+    def _fetch_temporary_images(self, cursor: Optional[str], limit: int,
+                                until: Optional[str] = None) -> list[dict[str, Any]]:
+        """Next page of images still pointing at a temporary URL, after cursor and up to until"""
+        query = self.supabase.table("inspiration_images").select(
+            "id, board_id, image_url"
+        ).like("image_url", f"%{TEMPORARY_URL_HOST}%").is_("image_url_expired_at", "null")
+        if cursor:
+            query = query.gt("id", cursor)
+        if until:
+            query = query.lte("id", until)
+        result = query.order("id").limit(limit).execute()
+        return result.data or []
+
+    def _mark_expired(self, image_ids: list[str]):
+        """Take images whose temporary URL expired out of later runs"""
+        try:
+            self.supabase.table("inspiration_images").update({
+                "image_url_expired_at": datetime.now(timezone.utc).isoformat()
+            }).in_("id", image_ids).execute()
+        except Exception as e:
+            logger.warning(f"Could not mark {len(image_ids)} expired images: {e}")
+
+    def _load_checkpoint(self) -> Optional[str]:
+        try:
+            result = self.supabase.table(self.checkpoint_table).select("last_image_id, updated_at").eq(
+                "job_name", "fix_expired_images"
+            ).execute()
+        except Exception as e:
+            logger.warning(f"Could not load image persistence checkpoint: {e}")
+            return None
+        if not result.data or not result.data[0]["last_image_id"]:
+            return None
+
+        # Every temporary URL the interrupted run hadn't reached has expired by now
+        checkpoint = result.data[0]
+        saved_at = datetime.fromisoformat(checkpoint["updated_at"].replace("Z", "+00:00"))
+        if saved_at.tzinfo is None:
+            saved_at = saved_at.replace(tzinfo=timezone.utc)
+        if datetime.now(timezone.utc) - saved_at > TEMPORARY_URL_LIFETIME:
+            logger.info(f"Ignoring image persistence checkpoint from {checkpoint['updated_at']}")
+            return None
+        return checkpoint["last_image_id"]
+
+    def _save_checkpoint(self, last_image_id: Optional[str], batch_count: int):
+        try:
+            self.supabase.table(self.checkpoint_table).upsert({
+                "job_name": "fix_expired_images",
+                "last_image_id": last_image_id,
+                "last_batch_count": batch_count,
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }, on_conflict="job_name").execute()
+        except Exception as e:
+            logger.warning(f"Could not save image persistence checkpoint: {e}")
+
 # Initialize service instance
 image_service = ImagePersistenceService()
@@ -0,0 +1,72 @@
+"""
+Test the compiled bid card preview template and rendered-page cache
+"""
+
+import os
+import sys
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bid_card_preview import (
+    TEMPLATE_PATH,
+    CompiledHtmlTemplate,
+    cached_preview,
+    invalidate_bid_card_preview,
+    preview_template,
+    render_preview,
+)
+from utils.context_cache import invalidate_bid_card_rows
+
+
+VARIABLES = {
+    "project_type": "Kitchen Remodel",
+    "project_icon": "🏠",
+    "budget_display": "$10,000 - $20,000",
+    "timeline": "Within 1 week",
+    "location_city": "Miami",
+    "location_state": ", FL",
+    "bid_card_id": "bc-123456789",
+    "bid_card_id_short": "bc-12345",
+    "current_url": "https://instabids.test/api/bid-cards/bc-123456789/preview",
+    "api_url": "https://instabids.test/api/bid-cards/bc-123456789",
+    "og_image_url": "https://instabids.test/api/bid-cards/og-image/bc-123456789.png?v=abc"
+}
+
+
+def test_compiled_render_matches_string_replacement():
+    with open(TEMPLATE_PATH, encoding="utf-8") as f:
+        expected = f.read()
+    for key, value in VARIABLES.items():
+        expected = expected.replace(f"{{{{{key}}}}}", str(value))
+
+    assert preview_template().render(VARIABLES) == expected
+
+
+def test_unknown_placeholders_are_left_as_is():
+    template = CompiledHtmlTemplate("<b>{{known}}</b>{{unknown}}")
+    assert template.render({"known": "x"}) == "<b>x</b>{{unknown}}"
+
+
+def test_pages_are_cached_until_invalidated():
+    base_url = "https://instabids.test/"
+    page = render_preview("bc-cache", base_url, VARIABLES)
+
+    assert cached_preview("bc-cache", base_url) is page
+    assert cached_preview("bc-cache", "http://localhost:8008/") is None
+
+    changed = render_preview("bc-cache-2", base_url, {**VARIABLES, "budget_display": "$5,000+"})
+    assert changed.etag != page.etag
+
+    invalidate_bid_card_preview("bc-cache")
+    assert cached_preview("bc-cache", base_url) is None
+
+
+def test_bid_card_writers_invalidate_the_page():
+    base_url = "https://instabids.test/"
+    render_preview("bc-updated", base_url, VARIABLES)
+
+    # Routers that update bid cards by id pass the returned rows here
+    invalidate_bid_card_rows([{"id": "bc-updated", "bid_card_number": "BC-UPDATED", "status": "awarded"}])
+
+    assert cached_preview("bc-updated", base_url) is None
@@ -0,0 +1,123 @@
+"""
+Test the CIA response and extraction calls within a turn
+Checks that they overlap and that a response timeout falls back to the demo response
+"""
+
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-key")
+
+from agents.cia import agent as cia_agent
+from agents.cia.agent import CustomerInterfaceAgent
+from agents.cia.mode_manager import ModeManager
+from utils.session_cache import SessionCache
+
+
+CALL_SECONDS = 0.3
+
+
+class FakeMessages:
+    def __init__(self, delay):
+        self.delay = delay
+
+    async def create(self, **kwargs):
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(content=[SimpleNamespace(text="Claude reply")])
+
+
+def make_agent(response_delay):
+    agent = CustomerInterfaceAgent.__new__(CustomerInterfaceAgent)
+    agent.client = object()
+    agent.async_client = SimpleNamespace(messages=FakeMessages(response_delay))
+    agent.mode_manager = ModeManager()
+    agent.sessions = SessionCache("test_cia_sessions", max_entries=10)
+    agent.extracted = []
+
+    async def no_bid_cards(user_id):
+        return []
+
+    async def no_modification(*args):
+        return None
+
+    async def analyze_modification(message, state):
+        return {"is_modification": False}
+
+    async def build_request(state):
+        return "system", [{"role": "user", "content": state["messages"][-1]["content"]}]
+
+    async def extract(state, message):
+        await asyncio.sleep(CALL_SECONDS)
+        agent.extracted.append(message)
+
+    async def save(state, user_id, session_id):
+        return None
+
+    agent._find_user_bid_cards = no_bid_cards
+    agent._handle_modification_requests = no_modification
+    agent._analyze_modification_with_claude = analyze_modification
+    agent._build_claude_request = build_request
+    agent._extract_and_update_info = extract
+    agent._save_conversation_to_database = save
+    return agent
+
+
+def run_turn(agent):
+    agent.sessions["session-1"] = agent._create_new_session_with_instabids_structure("user-1", "session-1")
+    return asyncio.run(agent.handle_conversation(
+        "user-1", "My roof is leaking", session_id="session-1", project_id="project-1"
+    ))
+
+
+def test_response_and_extraction_run_concurrently():
+    agent = make_agent(response_delay=CALL_SECONDS)
+
+    started = time.perf_counter()
+    result = run_turn(agent)
+    elapsed = time.perf_counter() - started
+
+    assert result["response"] == "Claude reply"
+    assert agent.extracted == ["My roof is leaking"]
+    # Sequential calls would take two call durations
+    assert elapsed < CALL_SECONDS * 1.8
+
+
+def test_response_timeout_falls_back_to_demo_response(monkeypatch):
+    monkeypatch.setattr(cia_agent, "RESPONSE_TIMEOUT", 0.05)
+    agent = make_agent(response_delay=5)
+
+    started = time.perf_counter()
+    result = run_turn(agent)
+    elapsed = time.perf_counter() - started
+
+    state = result["state"]
+    assert result["response"] == state["messages"][-1]["content"]
+    assert result["response"] != "Claude reply"
+    assert agent.extracted == ["My roof is leaking"]
+    # Bounded by the extraction call, not the stalled response
+    assert elapsed < 2
+
+
+def test_claude_corrects_low_confidence_fast_values():
+    agent = CustomerInterfaceAgent.__new__(CustomerInterfaceAgent)
+    agent.client = object()
+
+    async def claude_extract(message, collected):
+        return {"location_zip": "78702", "timeline_urgency": "flexible", "property_type": "lake house"}
+
+    agent._claude_extract_information = claude_extract
+    state = {"collected_info": {}}
+    # The rules read the office ZIP at 0.85; "asap" is a settled rule match
+    message = "the leak is at our lake house, my office is in 33101. need it asap"
+    asyncio.run(agent._extract_and_update_info(state, message))
+
+    assert state["collected_info"]["location_zip"] == "78702"
+    assert state["collected_info"]["timeline_urgency"] == "emergency"
+    assert state["collected_info"]["property_type"] == "lake house"
+    assert state["fast_extracted_fields"] == {}
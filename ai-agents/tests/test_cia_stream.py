@@ -0,0 +1,65 @@
+"""
+Test the CIA SSE streaming endpoint
+Checks token/done events and that the turn is persisted even when the client
+closes the stream as soon as it sees "done"
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-key")
+
+from routers import cia_routes
+
+
+class FakeAgent:
+    async def handle_conversation(self, on_token=None, session_id=None, **kwargs):
+        for text in ["Hello", " there"]:
+            await on_token(text)
+        return {
+            "response": "Hello there",
+            "session_id": session_id,
+            "current_phase": "discovery",
+            "ready_for_jaa": False,
+            "missing_fields": []
+        }
+
+
+def test_turn_is_persisted_after_client_closes_on_done(monkeypatch):
+    persisted = []
+
+    async def prepare_chat(chat_data):
+        return "user-1", "session-1", None, None, []
+
+    async def persist_chat_result(result, user_id, session_id, project_id):
+        await asyncio.sleep(0.01)
+        persisted.append((result["response"], session_id))
+
+    monkeypatch.setattr(cia_routes, "cia_agent", FakeAgent())
+    monkeypatch.setattr(cia_routes, "_prepare_chat", prepare_chat)
+    monkeypatch.setattr(cia_routes, "_persist_chat_result", persist_chat_result)
+
+    async def stream_until_done():
+        response = await cia_routes.cia_chat_stream(cia_routes.ChatMessage(message="hi"))
+        events = []
+        async for chunk in response.body_iterator:
+            event = json.loads(chunk.removeprefix("data: "))
+            events.append(event)
+            if event["type"] == "done":
+                # Like a browser EventSource handler closing on "done"
+                await response.body_iterator.aclose()
+                break
+
+        await asyncio.gather(*cia_routes._background_tasks)
+        return events
+
+    events = asyncio.run(stream_until_done())
+
+    assert [e["text"] for e in events if e["type"] == "token"] == ["Hello", " there"]
+    assert events[-1]["type"] == "done" and events[-1]["response"] == "Hello there"
+    assert persisted == [("Hello there", "session-1")]
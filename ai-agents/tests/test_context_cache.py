@@ -0,0 +1,64 @@
+"""
+Test prompt context caching
+Checks build-once/invalidate behavior and prompt-cache system blocks
+"""
+
+import asyncio
+import os
+import sys
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.context_cache import (
+    ContextCache,
+    bid_card_key,
+    cached_system_prompt,
+    context_cache,
+    invalidate_bid_card_rows,
+)
+
+
+def test_builds_once_until_invalidated():
+    cache = ContextCache("test_context")
+    builds = []
+
+    async def build():
+        builds.append(1)
+        return {"bid_card_number": "BC-1"}
+
+    async def run():
+        await cache.get_or_build("bid_card:BC-1", build)
+        await cache.get_or_build("bid_card:BC-1", build)
+        cache.invalidate("bid_card:BC-1")
+        return await cache.get_or_build("bid_card:BC-1", build)
+
+    assert asyncio.run(run()) == {"bid_card_number": "BC-1"}
+    assert len(builds) == 2
+
+
+def test_updates_by_id_invalidate_returned_bid_cards():
+    context_cache.put(bid_card_key("BC-7"), {"status": "collecting_bids"})
+    context_cache.put(bid_card_key("BC-8"), {"status": "collecting_bids"})
+
+    # What a bid_cards update(...).eq("id", ...) returns
+    invalidate_bid_card_rows([{"id": "uuid-7", "bid_card_number": "BC-7", "status": "bids_complete"}])
+    invalidate_bid_card_rows(None)
+
+    assert context_cache.get(bid_card_key("BC-7")) is None
+    assert context_cache.get(bid_card_key("BC-8")) == {"status": "collecting_bids"}
+
+
+def test_cached_system_prompt_marks_stable_prefix():
+    system = cached_system_prompt("static", "session", "turn", cached_blocks=2)
+
+    assert [block["text"] for block in system] == ["static", "session", "turn"]
+    assert [("cache_control" in block) for block in system] == [True, True, False]
+
+
+def test_empty_stable_block_does_not_move_the_breakpoint():
+    # CIA passes an empty session context on early turns; the phase prompt stays uncached
+    system = cached_system_prompt("static", "", "phase", cached_blocks=2)
+
+    assert [block["text"] for block in system] == ["static", "phase"]
+    assert [("cache_control" in block) for block in system] == [True, False]
@@ -0,0 +1,100 @@
+"""
+Test incremental contractor interest classification
+Checks that the watermark follows database timestamps, not the app clock
+"""
+
+import os
+import sys
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-key")
+
+from agents.orchestration.contractor_interest_classifier import ContractorInterestClassifier
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.filters = []
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        return self
+
+    def gte(self, column, value):
+        self.filters.append((column, value))
+        return self
+
+    def upsert(self, row, on_conflict=None):
+        self.client.watermark = row["last_run_at"]
+        return self
+
+    def execute(self):
+        if self.table == "agent_run_watermarks":
+            rows = [{"last_run_at": self.client.watermark}] if self.client.watermark else []
+        else:
+            self.client.engagement_filters.append(dict(self.filters))
+            rows = self.client.engagements
+        return SimpleNamespace(data=rows)
+
+
+class FakeClient:
+    def __init__(self, engagements, watermark=None):
+        self.engagements = engagements
+        self.watermark = watermark
+        self.engagement_filters = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=len(params["updates"])))
+
+
+def make_classifier(client):
+    classifier = ContractorInterestClassifier.__new__(ContractorInterestClassifier)
+    classifier.db = SimpleNamespace(client=client)
+    classifier.interest_criteria = {"minimum_positive_responses": 1, "tier_1_promotion_threshold": 2}
+    return classifier
+
+
+def engagement(contractor_id, updated_at):
+    return {
+        "contractor_lead_id": contractor_id,
+        "positive_responses": 1,
+        "updated_at": updated_at,
+        "potential_contractors": {"id": contractor_id, "lead_status": "interested", "tier": 2}
+    }
+
+
+def test_watermark_is_newest_database_timestamp():
+    # Database clock far ahead of the app clock: watermark must not come from datetime.now()
+    client = FakeClient([
+        engagement("c1", "2099-01-01T10:00:00+00:00"),
+        engagement("c2", "2099-01-01T12:30:00.123456+00:00"),
+    ])
+    classifier = make_classifier(client)
+
+    classifier.classify_interested_contractors()
+    assert client.watermark == "2099-01-01T12:30:00.123456+00:00"
+
+    # Next run reads from the watermark (minus the overlap), timezone-aware
+    classifier.classify_interested_contractors()
+    since = datetime.fromisoformat(client.engagement_filters[-1]["updated_at"])
+    assert since.tzinfo is not None
+    assert since == datetime(2099, 1, 1, 12, 25, 0, 123456, tzinfo=timezone.utc)
+
+
+def test_empty_run_keeps_watermark():
+    client = FakeClient([], watermark="2024-05-01T08:00:00")
+    classifier = make_classifier(client)
+
+    classifier.classify_interested_contractors()
+    assert client.watermark == "2024-05-01T08:00:00"
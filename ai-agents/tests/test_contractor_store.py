@@ -0,0 +1,110 @@
+"""
+Test deduplicated contractor storage
+Checks dedupe keys, in-batch merging and the single RPC round trip
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.cda.contractor_store import (
+    contractor_dedupe_key,
+    discovered_contractors,
+    upsert_potential_contractors,
+)
+
+
+class FakeDiscoveryQuery:
+    def __init__(self, rows):
+        self.rows = rows
+        self.row_limit = None
+
+    def select(self, columns):
+        assert "potential_contractors(*)" in columns
+        return self
+
+    def eq(self, column, value):
+        self.rows = [row for row in self.rows if row[column] == value]
+        return self
+
+    def order(self, column, desc=False):
+        self.rows = sorted(self.rows, key=lambda row: row[column], reverse=desc)
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=self.rows[:self.row_limit])
+
+
+class FakeSupabase:
+    def __init__(self, discoveries=None):
+        self.calls = []
+        self.discoveries = discoveries or []
+
+    def table(self, name):
+        assert name == "potential_contractor_discoveries"
+        return FakeDiscoveryQuery(list(self.discoveries))
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        rows = [{**row, "id": f"id-{index}"} for index, row in enumerate(reversed(params["contractors"]))]
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=rows))
+
+
+def test_dedupe_key_priority():
+    assert contractor_dedupe_key({"google_place_id": "abc", "phone": "555-123-4567"}) == "place:abc"
+    assert contractor_dedupe_key({"phone": "+1 (555) 123-4567"}) == "phone:5551234567"
+    assert contractor_dedupe_key({"website": "https://www.AcmeRoofing.com/about"}) == "domain:acmeroofing.com"
+    # Shared hosts don't identify a business
+    assert contractor_dedupe_key({"website": "https://facebook.com/acme", "company_name": "Acme Roofing, LLC",
+                                  "zip_code": "33101"}) == "name:acme roofing llc|33101"
+
+
+def test_batch_is_merged_and_written_once():
+    supabase = FakeSupabase()
+    stored = upsert_potential_contractors(supabase, [
+        {"google_place_id": "p1", "company_name": "Acme", "email": None},
+        {"google_place_id": "p2", "company_name": "Beta"},
+        {"google_place_id": "p1", "company_name": None, "email": "hi@acme.com"},
+    ])
+
+    assert len(supabase.calls) == 1
+    rows = supabase.calls[0][1]["contractors"]
+    assert [row["dedupe_key"] for row in rows] == ["place:p1", "place:p2"]
+    assert rows[0]["company_name"] == "Acme" and rows[0]["email"] == "hi@acme.com"
+    # Returned in input order regardless of RPC order
+    assert [row["dedupe_key"] for row in stored] == ["place:p1", "place:p2"]
+
+
+def test_discoveries_keep_their_own_context():
+    acme = {"id": "c1", "company_name": "Acme", "project_zip_code": "33101", "match_score": 90}
+    beta = {"id": "c2", "company_name": "Beta", "project_zip_code": "33101", "match_score": 70}
+    supabase = FakeSupabase([
+        # Acme found for a Miami roofing card, then again for a Tampa one
+        {"project_zip_code": "33101", "project_type": "roofing", "source_query": "roofing 33101",
+         "match_score": 90, "potential_contractors": acme},
+        {"project_zip_code": "33602", "project_type": "roofing", "source_query": "roofing 33602",
+         "match_score": 0, "potential_contractors": acme},
+        {"project_zip_code": "33101", "project_type": "roofing", "source_query": "roofing 33101",
+         "match_score": 70, "potential_contractors": beta},
+        {"project_zip_code": "", "project_type": "plumbing", "source_query": None,
+         "match_score": 50, "potential_contractors": beta},
+    ])
+
+    miami = discovered_contractors(supabase, "roofing", "33101")
+    assert [c["company_name"] for c in miami] == ["Acme", "Beta"]
+
+    tampa = discovered_contractors(supabase, "roofing", "33602")
+    assert [(c["company_name"], c["source_query"], c["match_score"]) for c in tampa] == [("Acme", "roofing 33602", 0)]
+
+    # One row per business, from its best discovery
+    by_type = discovered_contractors(supabase, "roofing", limit=20)
+    assert [(c["id"], c["project_zip_code"]) for c in by_type] == [("c1", "33101"), ("c2", "33101")]
+
+    assert discovered_contractors(supabase, "plumbing")[0]["project_zip_code"] is None
@@ -0,0 +1,147 @@
+"""
+Test delta-based conversation persistence
+Checks that saves only write new messages and loads rebuild the full state
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import conversation_log
+from utils.conversation_log import ConversationLog
+
+
+class FakeQuery:
+    """Just enough of the postgrest query builder for ConversationLog"""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.ordering = []
+        self.window = None
+        self.rows = None
+
+    def select(self, _columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: row[column] >= value)
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda row: row[column] < value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column):
+        self.ordering.append(column)
+        return self
+
+    def range(self, start, end):
+        self.window = (start, end + 1)
+        return self
+
+    def limit(self, _count):
+        return self
+
+    def upsert(self, rows, on_conflict):
+        self.rows = rows if isinstance(rows, list) else [rows]
+        self.keys = on_conflict.split(",")
+        return self
+
+    def execute(self):
+        table = self.db.setdefault(self.table, [])
+        if self.rows is not None:
+            self.db.setdefault("writes", []).append((self.table, len(self.rows)))
+            for row in self.rows:
+                key = tuple(row[k] for k in self.keys)
+                table[:] = [r for r in table if tuple(r.get(k) for k in self.keys) != key]
+                table.append(dict(row))
+            return SimpleNamespace(data=self.rows)
+        self.db.setdefault("reads", []).append(self.table)
+        rows = [r for r in table if all(f(r) for f in self.filters)]
+        rows = sorted(rows, key=lambda r: tuple(r.get(column) for column in self.ordering or ["seq"]))
+        return SimpleNamespace(data=rows[slice(*self.window)] if self.window else rows)
+
+
+class FakeClient:
+    def __init__(self):
+        self.db = {}
+
+    def table(self, name):
+        return FakeQuery(self.db, name)
+
+
+def test_save_appends_only_new_messages_and_load_rebuilds():
+    client = FakeClient()
+    log = ConversationLog(client, "conversations_a", "turns_a")
+    state = {"phase": "intro", "messages": [{"role": "user", "content": "hi"}]}
+    log.save("t1", state, {"user_id": "u1"})
+
+    state["messages"].append({"role": "assistant", "content": "hello"})
+    state["phase"] = "discovery"
+    log.save("t1", state, {"user_id": "u1"})
+
+    turn_writes = [count for table, count in client.db["writes"] if table == "turns_a"]
+    assert turn_writes == [1, 1]
+    assert "messages" not in client.db["conversations_a"][0]["state"]
+    assert client.db["conversations_a"][0]["state_version"] == 2
+
+    loaded = ConversationLog(client, "conversations_a", "turns_a").load("t1")
+    assert loaded["state"]["phase"] == "discovery"
+    assert [m["content"] for m in loaded["state"]["messages"]] == ["hi", "hello"]
+
+
+def test_legacy_inline_messages_are_kept_and_migrated():
+    client = FakeClient()
+    client.db["conversations_b"] = [{
+        "thread_id": "t2",
+        "state": '{"messages": [{"role": "user", "content": "old"}]}'
+    }]
+    log = ConversationLog(client, "conversations_b", "turns_b")
+
+    loaded = log.load("t2")
+    assert [m["content"] for m in loaded["state"]["messages"]] == ["old"]
+
+    loaded["state"]["messages"].append({"role": "assistant", "content": "new"})
+    log.save("t2", loaded["state"])
+    assert len(client.db["turns_b"]) == 2
+
+    reloaded = ConversationLog(client, "conversations_b", "turns_b").load("t2")
+    assert [m["content"] for m in reloaded["state"]["messages"]] == ["old", "new"]
+
+
+def test_load_many_reads_all_tails_in_one_paged_query(monkeypatch):
+    monkeypatch.setattr(conversation_log, "TURN_PAGE_SIZE", 3)
+    client = FakeClient()
+    log = ConversationLog(client, "conversations_c", "turns_c")
+    for thread_id, count in [("t1", 3), ("t2", 2)]:
+        log.save(thread_id, {"messages": [{"role": "user", "content": f"{thread_id}-{i}"} for i in range(count)]})
+    client.db["conversations_c"].append({
+        "thread_id": "t3",
+        "message_count": 2,
+        "state": '{"messages": [{"role": "user", "content": "t3-0"}]}'
+    })
+    client.db["turns_c"].append({"thread_id": "t3", "seq": 1, "message": {"role": "assistant", "content": "t3-1"}})
+    client.db["reads"] = []
+
+    loaded = ConversationLog(client, "conversations_c", "turns_c").load_many(["t1", "t2", "t3", "missing"])
+
+    assert {thread_id: [m["content"] for m in row["state"]["messages"]] for thread_id, row in loaded.items()} == {
+        "t1": ["t1-0", "t1-1", "t1-2"],
+        "t2": ["t2-0", "t2-1"],
+        "t3": ["t3-0", "t3-1"],
+    }
+    # One snapshot query, then six log rows in pages of three (no per-row reads)
+    assert client.db["reads"] == ["conversations_c", "turns_c", "turns_c", "turns_c"]
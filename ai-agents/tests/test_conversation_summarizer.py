@@ -0,0 +1,116 @@
+"""
+Test rolling conversation summarization
+Checks the budgeted history window and background summary updates
+"""
+
+import asyncio
+import os
+import sys
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.conversation_summarizer import ConversationSummarizer, estimate_tokens
+
+
+def make_messages(count, size=400):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"{i} " + "x" * size} for i in range(count)]
+
+
+def test_window_stays_within_budget():
+    summarizer = ConversationSummarizer("test_window", summarize=None, token_budget=500)
+
+    summary, recent = summarizer.window("s1", make_messages(40))
+    assert summary == ""
+    assert 4 <= len(recent) < 40
+    assert recent[-1]["content"].startswith("39 ")
+
+    _, short = summarizer.window("s2", make_messages(3))
+    assert len(short) == 3
+
+
+def test_older_messages_are_summarized_in_background():
+    prompts = []
+
+    async def summarize(prompt):
+        prompts.append(prompt)
+        return "user wants a kitchen remodel"
+
+    summarizer = ConversationSummarizer("test_bg", summarize=summarize, token_budget=500, every_messages=6)
+
+    async def run():
+        messages = make_messages(40)
+        summarizer.window("s1", messages)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return summarizer.window("s1", messages)
+
+    summary, recent = asyncio.run(run())
+    assert summary == "user wants a kitchen remodel"
+    assert len(prompts) == 1
+    assert summarizer.get_summary("s1")["covered"] == 40 - len(recent)
+
+
+def window_tokens(summary, recent):
+    return estimate_tokens(summary) + sum(estimate_tokens(message["content"]) for message in recent)
+
+
+def test_messages_wait_in_window_until_summarized():
+    async def run():
+        release = asyncio.Event()
+
+        async def summarize(prompt):
+            await release.wait()
+            return "user wants a deck"
+
+        summarizer = ConversationSummarizer("test_gap", summarize=summarize, token_budget=300, every_messages=6)
+        messages = make_messages(40, size=40)
+
+        # Summary still pending: older messages fill the rest of the budget, newest first
+        summary, pending_window = summarizer.window("s1", messages)
+        _, truncated = ConversationSummarizer("test_gap_plain", summarize=None, token_budget=300).window("s1", messages)
+        assert summary == ""
+        assert len(truncated) < len(pending_window) < len(messages)
+        assert pending_window == messages[-len(pending_window):]
+        assert window_tokens(summary, pending_window) <= 300
+
+        release.set()
+        await asyncio.gather(*summarizer._pending.values())
+
+        # Two more turns, fewer than every_messages: they stay in the window
+        messages = messages + make_messages(2, size=40)
+        summary, recent = summarizer.window("s1", messages)
+        covered = summarizer.get_summary("s1")["covered"]
+        assert summary == "user wants a deck"
+        assert recent == messages[covered:]
+        return covered, len(messages)
+
+    covered, total = asyncio.run(run())
+    assert 0 < covered < total - 4
+
+
+def test_failing_summarizer_keeps_the_cap_and_backs_off():
+    calls = []
+
+    async def summarize(prompt):
+        calls.append(prompt)
+        raise RuntimeError("overloaded")
+
+    summarizer = ConversationSummarizer("test_failing", summarize=summarize, token_budget=500)
+    messages = make_messages(300)
+
+    async def turns(count):
+        for _ in range(count):
+            summary, recent = summarizer.window("s1", messages)
+            assert window_tokens(summary, recent) <= 500
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+
+    asyncio.run(turns(5))
+    assert len(calls) == 1
+
+    # Once the backoff has passed the summary is tried again
+    failures, _ = summarizer._backoff["s1"]
+    summarizer._backoff["s1"] = (failures, 0)
+    asyncio.run(turns(1))
+    assert len(calls) == 2
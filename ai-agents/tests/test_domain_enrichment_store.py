@@ -0,0 +1,71 @@
+"""
+Test the per-domain enrichment store
+Checks facet tracking, the freshness window and ETag revalidation
+"""
+
+import os
+import sys
+from datetime import timedelta
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.enrichment.domain_enrichment_store import (
+    CLASSIFICATION_FACETS,
+    EMAIL_FACETS,
+    DomainEnrichmentStore,
+    website_domain,
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def close(self):
+        pass
+
+
+class FakeHttp:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.sent_headers = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.sent_headers.append(headers)
+        return FakeResponse(self.status_code)
+
+
+def test_domains_normalize():
+    assert website_domain("https://www.AcmeRoofing.com/contact") == "acmeroofing.com"
+    assert website_domain("acmeroofing.com") == "acmeroofing.com"
+    assert website_domain(None) is None
+
+
+def test_facets_are_filled_independently():
+    store = DomainEnrichmentStore()
+    store.save("acme.test", emails=["info@acme.test"])
+    records = store.get_many(["acme.test"])
+
+    assert store.lookup(records, "acme.test", EMAIL_FACETS) is not None
+    assert store.lookup(records, "acme.test", CLASSIFICATION_FACETS) is None
+
+    store.save("acme.test", business_size="OWNER_OPERATOR", service_types=["REPAIR"])
+    record = store.lookup(store.get_many(["acme.test"]), "acme.test", CLASSIFICATION_FACETS)
+    assert record.business_size == "OWNER_OPERATOR"
+    assert record.emails == ["info@acme.test"]
+
+
+def test_stale_records_are_revalidated():
+    store = DomainEnrichmentStore(freshness_hours=1)
+    record = store.save("acme.test", etag='"v1"', emails=["info@acme.test"])
+    record.validated_at -= timedelta(hours=2)
+    records = {"acme.test": record}
+
+    store.http = FakeHttp(200)
+    assert store.lookup(records, "acme.test", EMAIL_FACETS, "https://acme.test") is None
+
+    store.http = FakeHttp(304)
+    assert store.lookup(records, "acme.test", EMAIL_FACETS, "https://acme.test") is record
+    assert store.http.sent_headers == [{"If-None-Match": '"v1"'}]
+    assert store.is_fresh(record)
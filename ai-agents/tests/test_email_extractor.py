@@ -0,0 +1,48 @@
+"""
+Test single-pass email extraction from contractor pages
+"""
+
+import os
+import sys
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.cda.email_extractor import extract_emails
+
+
+def test_visible_text_and_mailto_links():
+    html = '<p>Email: <b>Info@Acme.com</b></p><a href="mailto:sales@acme.com?subject=Quote">Write us</a>'
+    assert extract_emails(html) == ["info@acme.com", "sales@acme.com"]
+
+
+def test_addresses_split_across_inline_tags():
+    assert extract_emails("<p><b>info</b>@acme.com</p>") == ["info@acme.com"]
+    assert extract_emails("<p>info@<span>acme</span>.com</p>") == ["info@acme.com"]
+    # Block tags still separate text
+    assert extract_emails("<div>info@acme.com</div><div>Call today</div>") == ["info@acme.com"]
+
+
+def test_scripts_styles_comments_and_attributes_are_ignored():
+    html = (
+        '<script>send({to: "js@acme.com"})</script><style>/* css@acme.com */</style>'
+        '<!-- old@acme.com --><img alt="alt@acme.com"><input placeholder="you@example.com">'
+    )
+    assert extract_emails(html) == []
+
+
+def test_entities_are_decoded_around_candidates():
+    html = "<p>info&#64;acme.com &lt;office@acme.com&gt;</p><a href='mailto:a&#64;acme.com'>x</a>"
+    assert extract_emails(html) == ["info@acme.com", "office@acme.com", "a@acme.com"]
+
+
+def test_obfuscated_addresses():
+    assert extract_emails("<p>quotes [at] acme [dot] com or bids(at)acme.co</p>") == ["quotes@acme.com", "bids@acme.co"]
+
+
+def test_saved_contractor_page():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                        "test-sites", "lawn-care-contractor", "index.html")
+    with open(path, encoding="utf-8") as f:
+        # Demo addresses inside the page's <script> must not show up
+        assert extract_emails(f.read()) == ["info@greenlawnpro.com"]
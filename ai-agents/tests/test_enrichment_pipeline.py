@@ -0,0 +1,155 @@
+"""
+Test the batch enrichment pipeline
+Checks ordering, per-site timeouts, stage overlap and the unchanged-site cache
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.enrichment.domain_enrichment_store import DomainEnrichmentStore
+from agents.enrichment.enrichment_pipeline import EnrichmentPipeline, SiteSnapshot
+from agents.enrichment.playwright_enrichment_agent import PlaywrightEnrichmentAgent
+
+
+class FakeEnricher:
+    """Capture takes 0.1s per site (slow.test hangs); analysis takes 0.1s"""
+    analyses = 0
+
+    async def capture_site(self, contractor):
+        if not contractor.get("website"):
+            return None
+        await asyncio.sleep(10 if "slow" in contractor["website"] else 0.1)
+        return SiteSnapshot(url=contractor["website"], page_text=f"About {contractor['company_name']}")
+
+    async def analyze_site(self, contractor, snapshot):
+        if snapshot is None:
+            return "NO_WEBSITE"
+        FakeEnricher.analyses += 1
+        await asyncio.sleep(0.1)
+        return f"ENRICHED {contractor['company_name']}"
+
+    def failed_result(self, contractor, error):
+        return f"FAILED {error}"
+
+    def domain_facets(self, result):
+        return {}
+
+
+def test_batch_runs_concurrently_in_order_with_timeouts():
+    contractors = [{"company_name": f"Co {i}", "website": f"https://co{i}.test"} for i in range(10)]
+    contractors[3] = {"company_name": "No Site", "website": None}
+    contractors[5] = {"company_name": "Slow", "website": "https://slow.test"}
+
+    pipeline = EnrichmentPipeline(FakeEnricher, browsers=5, analyzers=5, site_timeout=0.3)
+    start = time.perf_counter()
+    results = asyncio.run(pipeline.enrich_batch(contractors))
+    elapsed = time.perf_counter() - start
+
+    assert results[0] == "ENRICHED Co 0"
+    assert results[3] == "NO_WEBSITE"
+    assert results[5].startswith("FAILED Timed out")
+    assert results[9] == "ENRICHED Co 9"
+    # 10 sites x 0.2s of work serially; pooled it's bounded by the slow site's timeout
+    assert elapsed < 1.0
+
+
+def test_unchanged_sites_reuse_analysis():
+    contractors = [{"company_name": "Repeat Roofing", "website": "https://repeat-roofing.test"}]
+    pipeline = EnrichmentPipeline(FakeEnricher, browsers=1, analyzers=1)
+
+    FakeEnricher.analyses = 0
+    first = asyncio.run(pipeline.enrich_batch(contractors))
+    second = asyncio.run(pipeline.enrich_batch(contractors))
+
+    assert first == second == ["ENRICHED Repeat Roofing"]
+    assert FakeEnricher.analyses == 1
+
+
+def test_playwright_agent_runs_through_pipeline():
+    contractors = [
+        {"company_name": "ABC Lawn Care", "website": "https://abclawncare.test", "google_review_count": 85},
+        {"company_name": "No Website Lawn", "website": None},
+    ]
+    results = asyncio.run(EnrichmentPipeline(PlaywrightEnrichmentAgent, browsers=2).enrich_batch(contractors))
+
+    assert results[0].enrichment_status == "ENRICHED"
+    assert results[0].email == "info@abclawncare.com"
+    assert "facebook" in results[0].social_media
+    assert results[1].enrichment_status == "NO_WEBSITE"
+
+
+def test_stored_domains_skip_the_browser():
+    store = DomainEnrichmentStore()
+    store.fetch_validators = lambda website: ('"v1"', None)
+    contractors = [{"company_name": "Stored Lawn", "website": "https://stored-lawn.test", "google_review_count": 40}]
+
+    first = asyncio.run(EnrichmentPipeline(PlaywrightEnrichmentAgent, store=store).enrich_batch(contractors))
+    assert store.get("stored-lawn.test").etag == '"v1"'
+
+    pipeline = EnrichmentPipeline(PlaywrightEnrichmentAgent, store=store)
+    second = asyncio.run(pipeline.enrich_batch(contractors))
+
+    assert pipeline.pool._created == 0
+    assert second[0].business_size == first[0].business_size
+    assert second[0].email == first[0].email
+
+
+class TrackedEnricher(FakeEnricher):
+    """Records which session captured each site"""
+    created = []
+
+    def __init__(self):
+        TrackedEnricher.created.append(self)
+        self.captured = []
+
+    async def capture_site(self, contractor):
+        self.captured.append(contractor["website"])
+        return await super().capture_site(contractor)
+
+
+def test_timed_out_session_is_replaced():
+    TrackedEnricher.created = []
+    contractors = [{"company_name": "Slow", "website": "https://slow.test"},
+                   {"company_name": "Quick", "website": "https://quick.test"}]
+    pipeline = EnrichmentPipeline(TrackedEnricher, browsers=1, analyzers=1, site_timeout=0.2)
+
+    results = asyncio.run(pipeline.enrich_batch(contractors))
+
+    assert results[0].startswith("FAILED Timed out")
+    assert results[1] == "ENRICHED Quick"
+    # created[0] is the shared analyzer; the stuck session never captures again
+    stuck, fresh = TrackedEnricher.created[1], TrackedEnricher.created[2]
+    assert stuck.captured == ["https://slow.test"]
+    assert fresh.captured == ["https://quick.test"]
+
+
+def test_store_errors_and_slow_validators_fail_just_that_site():
+    store = DomainEnrichmentStore()
+
+    def lookup(records, domain, facets, website):
+        if domain == "broken.test":
+            raise RuntimeError("store unavailable")
+        return None
+
+    def fetch_validators(website):
+        if "stalled" in website:
+            time.sleep(0.5)
+        return (None, None)
+
+    store.lookup = lookup
+    store.fetch_validators = fetch_validators
+    contractors = [{"company_name": "Broken", "website": "https://broken.test"},
+                   {"company_name": "Stalled", "website": "https://stalled.test"},
+                   {"company_name": "Fine", "website": "https://fine.test"}]
+
+    pipeline = EnrichmentPipeline(FakeEnricher, browsers=2, analyzers=1, site_timeout=0.2, store=store)
+    results = asyncio.run(pipeline.enrich_batch(contractors))
+
+    assert results[0] == "FAILED Could not load https://broken.test: store unavailable"
+    assert results[1].startswith("FAILED Timed out")
+    assert results[2] == "ENRICHED Fine"
@@ -0,0 +1,78 @@
+"""
+Test deterministic fast-path extraction
+Checks the rule matches and when a turn can skip the LLM
+"""
+
+import os
+import sys
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.fast_extract import fast_extractor
+
+
+def values(text):
+    return fast_extractor.confident(fast_extractor.extract(text))
+
+
+def test_simple_fields():
+    assert values("My zip is 78701.") == {"location_zip": "78701"}
+    assert values("budget is around 5-10k") == {
+        "budget_min": 5000, "budget_max": 10000, "budget_context": "has_budget_range"
+    }
+    assert values("asap please") == {"timeline_urgency": "emergency"}
+    assert values("we want it done by march 15")["timeline_start"] == "by march 15"
+
+
+def test_ambiguous_numbers_are_not_fields():
+    assert values("it takes 2 to 3 weeks") == {}
+    assert "location_zip" not in fast_extractor.extract("We have about 20000 to spend")
+
+
+def test_simple_turns_skip_the_llm():
+    for text in ["78701", "$5,000 - $10,000", "no rush, sometime next month", "Under $8k"]:
+        assert fast_extractor.covers(text, fast_extractor.extract(text)), text
+
+
+def test_descriptive_turns_need_the_llm():
+    for text in ["roof is leaking, need it fixed asap in 33101",
+                 "78701 but the HOA has to approve the color first"]:
+        assert not fast_extractor.covers(text, fast_extractor.extract(text)), text
+
+
+def test_negated_phrases_are_not_matches():
+    for text in ["I dont need it asap", "no, not asap", "not urgent at all"]:
+        matches = fast_extractor.extract(text)
+        assert fast_extractor.confident(matches) == {}, text
+        assert fast_extractor.tentative(matches) == {}, text
+        assert matches["timeline_urgency"].value is None, text
+        assert not fast_extractor.covers(text, matches), text
+
+
+def test_corrections_are_left_to_the_llm():
+    text = "budget is not 5-10k, more like 20-30k"
+    matches = fast_extractor.extract(text)
+
+    assert fast_extractor.confident(matches) == {}
+    assert fast_extractor.tentative(matches)["budget_min"] == 20000
+    assert fast_extractor.tentative(matches)["budget_max"] == 30000
+    assert not fast_extractor.covers(text, matches)
+
+    # Negation scope ends at the clause
+    assert values("not sure about the budget. need it asap") == {"timeline_urgency": "emergency"}
+
+
+def test_leftover_numbers_and_units_need_the_llm():
+    for text in ["asap, 15k", "78701, about 20k", "in 33101 for 8k", "78701 3 bedrooms", "asap 2 bathrooms"]:
+        assert not fast_extractor.covers(text, fast_extractor.extract(text)), text
+
+
+def test_zip_skips_addresses_amounts_and_negations():
+    assert values("I live at 12345 Main St, Austin TX 78701") == {"location_zip": "78701"}
+    assert "location_zip" not in fast_extractor.extract("we spent 20000 last year")
+
+    matches = fast_extractor.extract("not in 78701, 33101")
+    assert matches["location_zip"].value == "33101"
+    assert fast_extractor.confident(matches) == {}
+    assert fast_extractor.extract("not in 78701")["location_zip"].value is None
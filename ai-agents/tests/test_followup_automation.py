@@ -0,0 +1,137 @@
+"""
+Test the batched follow-up pipeline
+Checks bulk prefetch, per-call Opus 4 fallback and the bulk distribution update
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.automation.followup_automation import FollowUpAutomation, FollowUpStrategy
+from agents.tracking.bid_distribution_tracker import BidDistributionTracker
+
+
+class FakeQuery:
+    def __init__(self, supabase, table):
+        self.supabase = supabase
+        self.table = table
+        self.ids = None
+
+    def select(self, *args):
+        return self
+
+    def in_(self, column, values):
+        self.ids = values
+        return self
+
+    def insert(self, rows):
+        self.supabase.writes.append((self.table, "insert", rows))
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.supabase.writes.append((self.table, "upsert", rows, on_conflict))
+        return self
+
+    def execute(self):
+        if self.ids is None:
+            rows = self.supabase.writes[-1][2]
+        else:
+            rows = [row for row in self.supabase.rows.get(self.table, []) if row["id"] in self.ids]
+        self.supabase.reads.append(self.table)
+        return SimpleNamespace(data=rows)
+
+
+class FakeSupabase:
+    def __init__(self, rows=None):
+        self.rows = rows or {}
+        self.reads = []
+        self.writes = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+class FakeTracker:
+    def __init__(self):
+        self.follow_ups = []
+
+    def record_follow_ups_bulk(self, follow_ups):
+        self.follow_ups.extend(follow_ups)
+        return {"success": True, "updated": len(follow_ups)}
+
+
+def candidate(contractor_id, match_score, follow_up_count=0):
+    return {
+        "distribution_id": f"dist-{contractor_id}",
+        "contractor_id": contractor_id,
+        "company_name": contractor_id.title(),
+        "bid_card_id": "bc-1",
+        "match_score": match_score,
+        "days_since_sent": 2,
+        "follow_up_count": follow_up_count,
+        "last_method": "email"
+    }
+
+
+def make_automation():
+    automation = FollowUpAutomation.__new__(FollowUpAutomation)
+    automation.supabase = FakeSupabase({
+        "potential_contractors": [
+            {"id": "acme", "company_name": "Acme", "primary_email": "a@acme.test"},
+            {"id": "beta", "company_name": "Beta", "primary_email": "b@beta.test"},
+            {"id": "gamma", "company_name": "Gamma", "primary_email": "g@gamma.test"},
+        ],
+        "bid_cards": [{"id": "bc-1", "project_type": "roofing", "location": {"city": "Miami"}}]
+    })
+    automation._bid_tracker = FakeTracker()
+    return automation
+
+
+def test_failed_opus_calls_fall_back_and_record_the_template_strategy():
+    automation = make_automation()
+    personalized = {"email": "Hi Acme", "sms": "Hi", "form": "Hi"}
+    automation._request_opus4_followup = lambda contractor, bid_card, cand: (
+        personalized if contractor["id"] == "acme" else None
+    )
+
+    results = automation._process_followup_batch([
+        candidate("acme", 90), candidate("beta", 90), candidate("gamma", 50), candidate("missing", 50)
+    ])
+
+    by_id = {result["contractor_id"]: result for result in results}
+    assert by_id["acme"]["strategy"] == FollowUpStrategy.PERSONALIZED.value
+    assert by_id["beta"]["strategy"] == FollowUpStrategy.VALUE_PROPOSITION.value
+    assert by_id["gamma"]["strategy"] == FollowUpStrategy.GENTLE_REMINDER.value
+    assert by_id["missing"]["success"] is False
+
+    # One read per table, one insert each for attempts and logs
+    assert sorted(automation.supabase.reads[:2]) == ["bid_cards", "potential_contractors"]
+    writes = {table: rows for table, _, rows, *_ in automation.supabase.writes}
+    logged = {row["contractor_id"]: row["strategy"] for row in writes["followup_logs"]}
+    assert logged == {"acme": "personalized", "beta": "value_proposition", "gamma": "gentle_reminder"}
+    assert {row["content"] for row in writes["followup_attempts"] if row["contractor_id"] == "acme"} == {"Hi Acme"}
+
+    assert [f["follow_up_count"] for f in automation._bid_tracker.follow_ups] == [1, 1, 1]
+
+
+def test_follow_ups_are_recorded_in_one_upsert():
+    tracker = BidDistributionTracker.__new__(BidDistributionTracker)
+    tracker.supabase = FakeSupabase()
+
+    result = tracker.record_follow_ups_bulk([
+        {"distribution_id": "d1", "bid_card_id": "bc-1", "contractor_id": "c1",
+         "distribution_method": "email", "follow_up_count": 2, "method": "sms"},
+        {"distribution_id": "d2", "bid_card_id": "bc-1", "contractor_id": "c2",
+         "distribution_method": "email", "follow_up_count": 1, "method": "email"},
+    ])
+
+    assert result == {"success": True, "updated": 2}
+    [(table, op, rows, on_conflict)] = tracker.supabase.writes
+    assert (table, op, on_conflict) == ("bid_card_distributions", "upsert", "id")
+    assert [(row["id"], row["follow_up_count"], row["last_follow_up_method"]) for row in rows] == [
+        ("d1", 2, "sms"), ("d2", 1, "email")
+    ]
+    assert tracker.record_follow_ups_bulk([]) == {"success": True, "updated": 0}
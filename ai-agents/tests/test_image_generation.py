@@ -0,0 +1,94 @@
+"""
+Test dream space generation
+Checks that a synchronous request returns the permanent image URL when it can
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-key")
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+from api import image_generation
+from api.image_generation import GenerateDreamSpaceRequest
+from services.image_persistence_service import image_service
+
+
+TEMPORARY_URL = "https://oaidalleapiprodscus.blob.core.windows.net/private/dream.png?se=soon"
+PERMANENT_URL = "https://storage.test/iris_visions/vision-1.png"
+
+
+class FakeQuery:
+    def __init__(self, table):
+        self.table = table
+
+    def select(self, *args):
+        return self
+
+    def in_(self, column, values):
+        return self
+
+    def insert(self, record):
+        return self
+
+    def execute(self):
+        if self.table == "inspiration_images":
+            return SimpleNamespace(data=[{"id": "vision-1"}])
+        return SimpleNamespace(data=[{"id": "generation-1"}])
+
+
+class FakeSupabase:
+    def table(self, name):
+        return FakeQuery(name)
+
+
+def setup(monkeypatch, persist_delay):
+    async def generate(**kwargs):
+        return SimpleNamespace(data=[SimpleNamespace(url=TEMPORARY_URL)])
+
+    async def make_image_persistent(image_id, current_url):
+        await asyncio.sleep(persist_delay)
+        return PERMANENT_URL
+
+    monkeypatch.setattr(image_generation, "supabase", FakeSupabase())
+    monkeypatch.setattr(image_generation, "invalidate_board", lambda board_id: None)
+    monkeypatch.setattr(image_generation.client.images, "generate", generate)
+    monkeypatch.setattr(image_service, "make_image_persistent", make_image_persistent)
+
+
+def request():
+    return GenerateDreamSpaceRequest(board_id="board-1", ideal_image_id="ideal-1", current_image_id="current-1")
+
+
+def test_sync_request_returns_permanent_url(monkeypatch):
+    setup(monkeypatch, persist_delay=0.05)
+
+    result = asyncio.run(image_generation.generate_dream_space(request()))
+
+    assert result["generated_image_url"] == PERMANENT_URL
+    job = image_generation._generation_jobs[result["job_id"]]
+    assert job["persistence"] == "completed"
+    assert result["job_id"] not in image_generation._persistence_tasks
+
+
+def test_slow_persistence_falls_back_to_temporary_url(monkeypatch):
+    monkeypatch.setattr(image_generation, "PERSIST_TIMEOUT", 0.05)
+    setup(monkeypatch, persist_delay=0.2)
+
+    async def run():
+        result = await image_generation.generate_dream_space(request())
+        returned_url = result["generated_image_url"]
+        # Persistence keeps going after the response; the job picks up the permanent URL
+        await image_generation._persistence_tasks[result["job_id"]]
+        return returned_url, image_generation._generation_jobs[result["job_id"]]
+
+    returned_url, job = asyncio.run(run())
+
+    assert returned_url == TEMPORARY_URL
+    assert job["persistence"] == "completed"
+    assert job["result"]["generated_image_url"] == PERMANENT_URL
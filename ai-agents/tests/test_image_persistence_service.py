@@ -0,0 +1,209 @@
+"""
+Test the batch image persistence job
+Checks expiry parsing, batching, checkpoint resume and retiring expired URLs
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-key")
+
+from services.image_persistence_service import (
+    TEMPORARY_URL_HOST,
+    ImagePersistenceService,
+    is_expired,
+    temporary_url_expiry,
+)
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.changes = None
+        self.row = None
+        self.row_limit = None
+
+    def select(self, *args):
+        return self
+
+    def like(self, column, pattern):
+        needle = pattern.strip("%")
+        self.filters.append(lambda row: needle in (row.get(column) or ""))
+        return self
+
+    def is_(self, column, value):
+        assert value == "null"
+        self.filters.append(lambda row: row.get(column) is None)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row[column] > value)
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(lambda row: row[column] <= value)
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def update(self, changes):
+        self.changes = changes
+        return self
+
+    def upsert(self, row, on_conflict=None):
+        self.row = row
+        return self
+
+    def execute(self):
+        rows = self.db.setdefault(self.table, [])
+        if self.row is not None:
+            rows[:] = [r for r in rows if r["job_name"] != self.row["job_name"]] + [dict(self.row)]
+            return SimpleNamespace(data=[self.row])
+
+        matched = sorted((r for r in rows if all(f(r) for f in self.filters)), key=lambda r: r.get("id", ""))
+        if self.changes is not None:
+            self.db.setdefault("updates", []).append((self.changes, [r["id"] for r in matched]))
+            for r in matched:
+                r.update(self.changes)
+            return SimpleNamespace(data=matched)
+        if self.table == "inspiration_images":
+            self.db.setdefault("image_reads", []).append([r["id"] for r in matched[:self.row_limit]])
+        return SimpleNamespace(data=[dict(r) for r in matched[:self.row_limit]])
+
+
+class FakeSupabase:
+    def __init__(self, images):
+        self.db = {"inspiration_images": images}
+
+    def table(self, name):
+        return FakeQuery(self.db, name)
+
+
+def temporary_url(name, expires_in):
+    expiry = (datetime.now(timezone.utc) + expires_in).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return f"https://{TEMPORARY_URL_HOST}/private/{name}.png?st=x&se={expiry.replace(':', '%3A')}&sig=abc"
+
+
+def make_service(images, failing=()):
+    service = ImagePersistenceService.__new__(ImagePersistenceService)
+    service.supabase = FakeSupabase(images)
+    service.checkpoint_table = "image_persistence_checkpoints"
+    service.persisted = []
+
+    async def make_image_persistent(image_id, current_url):
+        if image_id in failing:
+            return None
+        if image_id == "boom":
+            raise RuntimeError("storage unavailable")
+        service.persisted.append(image_id)
+        permanent = f"https://storage.test/iris_visions/{image_id}.png"
+        for row in service.supabase.db["inspiration_images"]:
+            if row["id"] == image_id:
+                row["image_url"] = permanent
+        return permanent
+
+    service.make_image_persistent = make_image_persistent
+    return service
+
+
+def checkpoint(service):
+    rows = service.supabase.db.get("image_persistence_checkpoints", [])
+    return rows[0]["last_image_id"] if rows else None
+
+
+def test_expiry_parsing():
+    url = f"https://{TEMPORARY_URL_HOST}/img.png?se=2024-05-01T10%3A30%3A00Z&sig=abc"
+    assert temporary_url_expiry(url) == datetime(2024, 5, 1, 10, 30, tzinfo=timezone.utc)
+    assert temporary_url_expiry(url.replace("Z", "%2B02%3A00")) == datetime(
+        2024, 5, 1, 10, 30, tzinfo=timezone(timedelta(hours=2)))
+    assert temporary_url_expiry("https://storage.test/img.png") is None
+    assert temporary_url_expiry(f"https://{TEMPORARY_URL_HOST}/img.png?se=soon") is None
+
+    assert is_expired(url)
+    assert not is_expired(temporary_url("fresh", timedelta(hours=1)))
+    assert not is_expired("https://storage.test/img.png")
+
+
+def test_batches_persist_live_urls_and_retire_expired_ones():
+    images = [
+        {"id": "i1", "board_id": "b1", "image_url": temporary_url("i1", timedelta(hours=1))},
+        {"id": "i2", "board_id": "b1", "image_url": temporary_url("i2", -timedelta(hours=1))},
+        {"id": "i3", "board_id": "b1", "image_url": "https://storage.test/iris_visions/i3.png"},
+        {"id": "i4", "board_id": "b1", "image_url": temporary_url("i4", timedelta(hours=1))},
+        {"id": "i5", "board_id": "b1", "image_url": temporary_url("i5", -timedelta(minutes=1))},
+        {"id": "i6", "board_id": "b1", "image_url": temporary_url("i6", timedelta(hours=1))},
+    ]
+    service = make_service(images, failing={"i6"})
+
+    result = asyncio.run(service.fix_all_expired_images(batch_size=2, concurrency=2, resume=False))
+
+    assert (result["fixed_count"], result["expired_count"], result["failed_count"]) == (2, 2, 1)
+    assert sorted(service.persisted) == ["i1", "i4"]
+    assert service.supabase.db["image_reads"] == [["i1", "i2"], ["i4", "i5"], ["i6"]]
+    marked = [ids for changes, ids in service.supabase.db["updates"] if "image_url_expired_at" in changes]
+    assert marked == [["i2"], ["i5"]]
+    assert checkpoint(service) is None
+
+    # The next run only retries the failed live URL
+    result = asyncio.run(service.fix_all_expired_images(batch_size=2, resume=True))
+    assert result["total_processed"] == 1
+    assert service.supabase.db["image_reads"][-1] == ["i6"]
+
+
+def test_interrupted_run_resumes_after_last_finished_batch():
+    images = [{"id": image_id, "board_id": "b1", "image_url": temporary_url(image_id, timedelta(hours=1))}
+              for image_id in ["a1", "a2", "boom", "a4"]]
+    service = make_service(images)
+
+    result = asyncio.run(service.fix_all_expired_images(batch_size=2))
+    assert result == {"success": False, "error": "storage unavailable"}
+    assert checkpoint(service) == "a2"
+
+    # Fix the failure; an image with a lower ID arrives before the resumed run
+    service.supabase.db["inspiration_images"][2]["id"] = "a3"
+    service.supabase.db["inspiration_images"].append(
+        {"id": "a0", "board_id": "b1", "image_url": temporary_url("a0", timedelta(hours=1))})
+    result = asyncio.run(service.fix_all_expired_images(batch_size=2))
+
+    assert result["success"] is True
+    assert result["resumed_from"] == "a2"
+    # a4 was saved before the failed batch stopped; a3 is after the checkpoint, a0 before it
+    assert [image["id"] for image in result["results"]] == ["a3", "a0"]
+    assert sorted(service.persisted) == ["a0", "a1", "a2", "a3", "a4"]
+    assert checkpoint(service) is None
+
+
+def test_stale_checkpoint_is_ignored():
+    images = [{"id": image_id, "board_id": "b1", "image_url": temporary_url(image_id, timedelta(hours=1))}
+              for image_id in ["c1", "c2"]]
+    service = make_service(images)
+    saved_at = datetime.now(timezone.utc) - timedelta(hours=2)
+    service.supabase.db["image_persistence_checkpoints"] = [
+        {"job_name": "fix_expired_images", "last_image_id": "c1", "updated_at": saved_at.isoformat()}
+    ]
+
+    result = asyncio.run(service.fix_all_expired_images(batch_size=2))
+
+    assert result["resumed_from"] is None
+    assert result["total_processed"] == 2
@@ -0,0 +1,52 @@
+"""
+Test content-addressed conversation image storage
+Checks that data URLs become references and materialize back for Claude
+"""
+
+import base64
+import os
+import sys
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import image_store
+from utils.image_store import ImageStore, LocalImageBackend, get_image_store, is_image_ref
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+DATA_URL = "data:image/png;base64," + base64.b64encode(PNG_BYTES).decode("ascii")
+
+
+def test_offload_stores_once_and_returns_references(tmp_path):
+    store = ImageStore(LocalImageBackend(str(tmp_path)))
+    refs = store.offload([DATA_URL, DATA_URL, "photo_id:123"])
+
+    assert is_image_ref(refs[0]) and refs[0] == refs[1]
+    assert refs[2] == "photo_id:123"
+    assert len(refs[0]) < 100
+    assert sum(len(files) for _, _, files in os.walk(tmp_path)) == 1
+
+
+def test_references_materialize_for_claude_and_display(tmp_path):
+    ref = ImageStore(LocalImageBackend(str(tmp_path))).put_data_url(DATA_URL)
+
+    # Fresh store: nothing cached, bytes come back from the backend
+    store = ImageStore(LocalImageBackend(str(tmp_path)))
+    block = store.to_claude_block(ref)
+    assert block["source"]["media_type"] == "image/png"
+    assert base64.b64decode(block["source"]["data"]) == PNG_BYTES
+    assert store.display_url(ref) == DATA_URL
+    assert store.to_claude_block("photo_id:123") is None
+
+
+def test_without_a_configured_backend_images_stay_inline(monkeypatch):
+    monkeypatch.delenv("IMAGE_STORE_BUCKET", raising=False)
+    monkeypatch.delenv("IMAGE_STORE_DIR", raising=False)
+    monkeypatch.setattr(image_store, "_image_store", None)
+
+    store = get_image_store(supabase_client=object())
+
+    assert store.offload([DATA_URL]) == [DATA_URL]
+    assert store.display_url(DATA_URL) == DATA_URL
+    assert base64.b64decode(store.to_claude_block(DATA_URL)["source"]["data"]) == PNG_BYTES
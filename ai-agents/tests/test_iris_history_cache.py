@@ -0,0 +1,48 @@
+"""
+Test the cached Iris conversation history
+Checks that requests get their own copy and saved turns don't change it
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-key")
+
+from api import iris_chat
+from utils.context_cache import board_history_key, board_key, context_cache
+
+
+class FakeInsert:
+    def insert(self, record):
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=[])
+
+
+class FakeSupabase:
+    def table(self, name):
+        return FakeInsert()
+
+
+def test_saved_turn_does_not_change_an_earlier_context(monkeypatch):
+    monkeypatch.setattr(iris_chat, "supabase", FakeSupabase())
+    board_id = "board-history-test"
+    context_cache.put(board_key(board_id), {"board": {"id": board_id}, "images": []})
+    context_cache.put(board_history_key(board_id), {"turns": [{"user_message": "first"}]})
+
+    async def run():
+        context = await iris_chat.build_conversation_context("owner-1", board_id, [])
+        await iris_chat.save_conversation_turn("owner-1", board_id, "second", "reply")
+        context["conversation_history"].append({"user_message": "local only"})
+        return context, await iris_chat.build_conversation_context("owner-1", board_id, [])
+
+    earlier, later = asyncio.run(run())
+
+    assert [turn["user_message"] for turn in earlier["conversation_history"]] == ["first", "local only"]
+    assert [turn["user_message"] for turn in later["conversation_history"]] == ["first", "second"]
@@ -0,0 +1,144 @@
+"""
+Test JAA batch mode
+Checks that results keep thread order and that one failure doesn't sink the batch
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-key")
+
+import bid_card_utils
+import database_simple
+from agents.jaa import agent as jaa_module
+from agents.jaa.agent import JobAssessmentAgent
+
+
+class FakeConversationLog:
+    def __init__(self, thread_ids):
+        self.calls = []
+        self.conversations = {
+            thread_id: {"thread_id": thread_id, "state": {"messages": []}} for thread_id in thread_ids
+        }
+
+    def load_many(self, thread_ids):
+        self.calls.append(list(thread_ids))
+        return {t: self.conversations[t] for t in thread_ids if t in self.conversations}
+
+
+class FakeWorkflow:
+    async def ainvoke(self, state):
+        thread_id = state["thread_id"]
+        if thread_id == "crash":
+            raise RuntimeError("model unavailable")
+        # Finish out of order so results must be put back by index
+        await asyncio.sleep(0.03 if thread_id == "a" else 0)
+        errors = ["Extraction failed: bad json"] if thread_id == "invalid" else []
+        return {
+            **state,
+            "errors": errors,
+            "extracted_data": {"project_type": "roofing"},
+            "bid_card_data": {"project_type": f"roofing-{thread_id}", "title": f"Roof {thread_id}"}
+        }
+
+
+def test_batch_results_keep_thread_order_with_partial_failures(monkeypatch):
+    created = []
+
+    def create_bid_cards_bulk(projects):
+        created.extend(projects)
+        results = []
+        for project in projects:
+            if project["title"] == "Roof rejected":
+                results.append({"success": False, "error": "Failed to create bid card - no data returned"})
+            else:
+                number = f"BC-{project['title'].split()[-1]}"
+                results.append({"success": True, "bid_card_number": number, "bid_card": {"id": f"id-{number}"}})
+        return results
+
+    monkeypatch.setattr(jaa_module, "create_bid_cards_bulk", create_bid_cards_bulk)
+    agent = JobAssessmentAgent.__new__(JobAssessmentAgent)
+    thread_ids = ["a", "missing", "crash", "b", "invalid", "rejected"]
+    agent.conversation_log = FakeConversationLog([t for t in thread_ids if t != "missing"])
+    agent.workflow = FakeWorkflow()
+
+    results = asyncio.run(agent.aprocess_conversations(thread_ids, concurrency=2))
+
+    assert agent.conversation_log.calls == [thread_ids]
+    assert [project["bid_document"]["full_cia_thread_id"] for project in created] == ["a", "b", "rejected"]
+    assert [result["success"] for result in results] == [True, False, False, True, False, False]
+    assert results[0]["bid_card_number"] == "BC-a" and results[0]["cia_thread_id"] == "a"
+    assert results[3]["bid_card_number"] == "BC-b" and results[3]["database_id"] == "id-BC-b"
+    assert "No conversation found" in results[1]["error"]
+    assert results[2]["error"] == "model unavailable"
+    assert results[4]["error"] == "Processing errors: Extraction failed: bad json"
+    assert results[5]["error"].startswith("Failed to create bid card")
+
+
+class FakeBidCardsTable:
+    def __init__(self, db):
+        self.db = db
+
+    def insert(self, records):
+        self.db.inserts.append(records)
+        self.records = records
+        return self
+
+    def execute(self):
+        if isinstance(self.records, dict):
+            if self.records["title"] in self.db.bad_titles:
+                raise RuntimeError("value too long")
+            return SimpleNamespace(data=[self.records])
+        if self.db.error:
+            raise self.db.error
+        # The database returns rows in its own order and may drop some
+        rows = [record for record in reversed(self.records) if record["title"] != "dropped"]
+        return SimpleNamespace(data=rows)
+
+
+class FakeDB:
+    def __init__(self, error=None, bad_titles=()):
+        self.error = error
+        self.bad_titles = set(bad_titles)
+        self.inserts = []
+
+    def table(self, name):
+        assert name == "bid_cards"
+        return FakeBidCardsTable(self)
+
+
+def test_bulk_create_matches_rows_to_projects(monkeypatch):
+    db = FakeDB()
+    monkeypatch.setattr(database_simple, "get_client", lambda: db)
+
+    results = bid_card_utils.create_bid_cards_bulk([
+        {"project_type": "roofing", "title": "first"},
+        {"project_type": "roofing", "title": "dropped"},
+        {"project_type": "roofing", "title": "third"},
+    ])
+
+    assert len(db.inserts) == 1 and len(db.inserts[0]) == 3
+    assert [result["success"] for result in results] == [True, False, True]
+    assert [result["bid_card"]["title"] for result in results if result["success"]] == ["first", "third"]
+    numbers = [record["bid_card_number"] for record in db.inserts[0]]
+    assert len(set(numbers)) == 3
+    assert results[2]["bid_card_number"] == numbers[2]
+
+
+def test_failed_bulk_insert_falls_back_to_one_insert_per_project(monkeypatch):
+    db = FakeDB(error=RuntimeError("value too long"), bad_titles={"two"})
+    monkeypatch.setattr(database_simple, "get_client", lambda: db)
+
+    results = bid_card_utils.create_bid_cards_bulk([{"title": "one"}, {"title": "two"}, {"title": "three"}])
+
+    assert [len(records) if isinstance(records, list) else 1 for records in db.inserts] == [3, 1, 1, 1]
+    assert [result["success"] for result in results] == [True, False, True]
+    assert results[0]["bid_card"]["title"] == "one"
+    assert results[1] == {"success": False, "error": "Database error: value too long"}
+    assert results[2]["bid_card_number"] == db.inserts[0][2]["bid_card_number"]
+    assert bid_card_utils.create_bid_cards_bulk([]) == []
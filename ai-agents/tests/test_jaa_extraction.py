@@ -0,0 +1,38 @@
+"""
+Test JAA rule-based field overrides
+Checks that rule matches only override the model when they are unambiguous
+"""
+
+import os
+import sys
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-key")
+
+from agents.jaa.agent import JobAssessmentAgent
+
+
+def deterministic_fields(*user_messages):
+    agent = JobAssessmentAgent.__new__(JobAssessmentAgent)
+    return agent._deterministic_fields([{"role": "user", "content": text} for text in user_messages])
+
+
+def test_confident_matches_override():
+    fields = deterministic_fields("roof is leaking in 78701", "budget is 5-10k", "asap please")
+
+    assert fields["budget_min"] == 5000 and fields["budget_max"] == 10000
+    assert fields["urgency_level"] == "emergency"
+    assert fields["project_type"] == "roofing"
+    assert fields["location"] == {"zip_code": "78701"}
+
+
+def test_negations_and_corrections_leave_fields_to_the_model():
+    assert deterministic_fields("I dont need it asap") == {}
+    assert deterministic_fields("budget is not 5-10k, more like 20-30k") == {}
+
+    # A later correction voids the earlier confident value
+    fields = deterministic_fields("budget is 5-10k, asap", "actually not asap, and not 5-10k, more like 20-30k")
+    assert "urgency_level" not in fields
+    assert "budget_min" not in fields and "budget_max" not in fields
@@ -0,0 +1,114 @@
+"""
+Test keyset pagination of conversation messages
+Checks cursor round trips, page boundaries on equal timestamps and the unpaged default
+"""
+
+import asyncio
+import os
+import re
+import sys
+from types import SimpleNamespace
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-key")
+
+import database_simple
+from routers.messaging_simple import decode_message_cursor, encode_message_cursor, get_messages
+
+
+KEYSET_FILTER = re.compile(r'created_at\.lt\."(.+?)",and\(created_at\.eq\."(.+?)",id\.lt\.(.+)\)')
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.rows = list(db.rows[table])
+        self.ordering = []
+        self.row_limit = None
+
+    def select(self, *args):
+        return self
+
+    def eq(self, column, value):
+        self.rows = [row for row in self.rows if row[column] == value]
+        return self
+
+    def in_(self, column, values):
+        self.rows = [row for row in self.rows if row[column] in values]
+        return self
+
+    def or_(self, expression):
+        created_at, _, message_id = KEYSET_FILTER.fullmatch(expression).groups()
+        self.rows = [row for row in self.rows if (row["created_at"], row["id"]) < (created_at, message_id)]
+        return self
+
+    def order(self, column, desc=False):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def execute(self):
+        self.db.queries += 1
+        rows = self.rows
+        for column, desc in reversed(self.ordering):
+            rows = sorted(rows, key=lambda row: row[column], reverse=desc)
+        return SimpleNamespace(data=rows[:self.row_limit] if self.row_limit else rows)
+
+
+class FakeDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def make_db(monkeypatch):
+    # Five messages, three sharing a timestamp so pages split inside a tie
+    stamps = ["2024-01-01T00:00:01", "2024-01-01T00:00:02", "2024-01-01T00:00:02",
+              "2024-01-01T00:00:02", "2024-01-01T00:00:03"]
+    messages = [{"id": f"m{index}", "conversation_id": "conv", "created_at": stamp}
+                for index, stamp in enumerate(stamps)]
+    attachments = [{"id": "a1", "message_id": "m2", "created_at": stamps[2]}]
+    db = FakeDB({"messaging_system_messages": messages, "message_attachments": attachments})
+    monkeypatch.setattr(database_simple, "get_client", lambda: db)
+    return db
+
+
+def test_cursor_round_trip():
+    cursor = encode_message_cursor({"created_at": "2024-01-01T00:00:02.5+00:00", "id": "m|2"})
+    assert decode_message_cursor(cursor) == ("2024-01-01T00:00:02.5+00:00", "m|2")
+
+
+def test_pages_cover_every_message_once(monkeypatch):
+    make_db(monkeypatch)
+
+    pages = []
+    cursor = None
+    while True:
+        page = asyncio.run(get_messages("conv", limit=2, before=cursor))
+        pages.append([message["id"] for message in page["messages"]])
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            break
+
+    assert pages == [["m3", "m4"], ["m1", "m2"], ["m0"]]
+    assert cursor is None
+
+
+def test_unpaged_by_default(monkeypatch):
+    db = make_db(monkeypatch)
+
+    page = asyncio.run(get_messages("conv", limit=None, before=None))
+
+    assert [message["id"] for message in page["messages"]] == ["m0", "m1", "m2", "m3", "m4"]
+    assert page["has_more"] is False
+    assert [a["id"] for a in page["messages"][2]["attachments"]] == ["a1"]
+    # Messages plus one attachment query
+    assert db.queries == 2
@@ -0,0 +1,59 @@
+"""
+Test OG image rendering and its content-addressed cache
+"""
+
+import asyncio
+import io
+import os
+import sys
+
+import pytest
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("PIL")
+
+from PIL import Image
+
+from utils.og_image_generator import OGImageCache, og_generator, og_image_key
+
+
+BID_CARD = {
+    "id": "bc-1",
+    "project_type": "kitchen_remodel",
+    "location": {"city": "Miami", "state": "FL"},
+    "budget_display": "$10,000 - $20,000",
+    "timeline": "Within 1 week",
+    "view_count": 3
+}
+
+
+def test_key_depends_only_on_displayed_fields():
+    assert og_image_key(BID_CARD) == og_image_key({**BID_CARD, "id": "bc-2", "view_count": 99})
+    assert og_image_key(BID_CARD) != og_image_key({**BID_CARD, "budget_display": "$5,000+"})
+
+
+def test_render_produces_og_sized_png():
+    image = Image.open(io.BytesIO(og_generator.render_png(BID_CARD)))
+    assert image.format == "PNG"
+    assert image.size == (1200, 630)
+
+
+def test_cache_renders_once_and_serves_from_disk(tmp_path, monkeypatch):
+    renders = []
+    original = og_generator.render_png
+    monkeypatch.setattr(og_generator, "render_png", lambda data: renders.append(1) or original(data))
+
+    key = og_image_key(BID_CARD)
+    cache = OGImageCache(directory=str(tmp_path))
+
+    async def render_concurrently():
+        return await asyncio.gather(*(cache.get_or_render(key, BID_CARD) for _ in range(5)))
+
+    pngs = asyncio.run(render_concurrently())
+    assert len(renders) == 1
+    assert len(set(pngs)) == 1
+
+    # A fresh process (new memory cache) reads the file written by the first
+    assert OGImageCache(directory=str(tmp_path)).get(key) == pngs[0]
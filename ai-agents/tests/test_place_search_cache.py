@@ -0,0 +1,86 @@
+"""
+Test the Tier 3 place search cache
+Checks location cells, TTL reuse and coalescing of concurrent searches
+"""
+
+import os
+import sys
+import threading
+import time
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.cda.place_search_cache import PlaceSearchCache, search_key
+from agents.cda.web_search_agent import ContractorSearchQuery, WebSearchContractorAgent
+
+
+def test_nearby_searches_share_a_key():
+    assert search_key("Roof  Repair", None, 26.2517, -80.1789, 25) == search_key("roof repair", None, 26.27, -80.21, 25)
+    assert search_key("roof repair", None, 26.2517, -80.1789, 25) != search_key("roof repair", None, 25.76, -80.19, 25)
+
+
+def test_fallback_locations_are_keyed_by_place_text():
+    austin = search_key("roof repair", None, 25.7617, -80.1918, 25, "Austin TX 78701")
+    denver = search_key("roof repair", None, 25.7617, -80.1918, 25, "Denver CO 80202")
+    assert austin != denver
+    assert austin == search_key("Roof repair", None, 0, 0, 25, " austin  tx 78701")
+
+
+def test_cities_without_coordinates_do_not_share_searches():
+    class RecordingCache:
+        def __init__(self):
+            self.keys = []
+
+        def get_or_fetch(self, key, fetch):
+            self.keys.append(key)
+            return []
+
+    agent = WebSearchContractorAgent.__new__(WebSearchContractorAgent)
+    agent.google_api_key = "test-key"
+    agent.search_terms = {"roofing": ["roofing contractor"]}
+    agent.place_cache = RecordingCache()
+
+    for city, state, zip_code in [("Austin", "TX", "78701"), ("Denver", "CO", "80202"),
+                                  ("Parkland", "FL", "33067"), ("Coconut Creek", "FL", "33073")]:
+        agent._search_google_maps(ContractorSearchQuery("roofing", zip_code, city, state), 10)
+
+    austin, denver, parkland, coconut_creek = agent.place_cache.keys
+    assert austin != denver
+    # Known cities in the same cell still share one search
+    assert parkland == coconut_creek
+
+
+def test_results_are_reused_and_failures_retried():
+    cache = PlaceSearchCache()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return None if len(calls) == 1 else [{"id": "p1"}]
+
+    assert cache.get_or_fetch("k", fetch) is None
+    assert cache.get_or_fetch("k", fetch) == [{"id": "p1"}]
+    assert cache.get_or_fetch("k", fetch) == [{"id": "p1"}]
+    assert len(calls) == 2
+    assert cache.get_places(["p1", "p2"]) == {"p1": {"id": "p1"}}
+
+
+def test_concurrent_searches_coalesce():
+    cache = PlaceSearchCache()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return [{"id": "p1"}]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch("k", fetch))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [[{"id": "p1"}]] * 5
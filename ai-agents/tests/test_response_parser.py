@@ -0,0 +1,57 @@
+"""
+Test EAA ResponseParser keyword matching
+Checks word-boundary intent classification and batch parsing
+"""
+
+import os
+import sys
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.eaa.response_tracking.response_parser import ResponseParser
+
+
+def test_single_letters_only_match_whole_words():
+    parser = ResponseParser()
+    # "y" and "n" used to match inside any word
+    assert parser._classify_intent("tell me about the timeline") == "need_info"
+    assert parser._classify_intent("y") == "interested"
+    assert parser._classify_intent("n") == "not_interested"
+
+
+def test_longest_phrase_wins_and_opt_out_is_honored():
+    parser = ResponseParser()
+    assert parser._classify_intent("sounds good, no problem") == "interested"
+    assert parser._classify_intent("not interested") == "not_interested"
+    assert parser._classify_intent("stop") == "opt_out"
+    assert parser._determine_interest_level("opt_out", -1.0) == "opt_out"
+
+
+def test_stop_and_remove_in_ordinary_replies_are_not_opt_outs():
+    parser = ResponseParser()
+    assert parser._classify_intent("yes, i can stop by tomorrow to look") == "interested"
+    assert parser._classify_intent("yes we can remove the old tile and install new") == "interested"
+    assert parser._classify_intent("sounds great, i can stop by tuesday") == "interested"
+    assert parser._classify_intent("stop.") == "opt_out"
+    assert parser._classify_intent("yes, please remove me from this list") == "opt_out"
+    assert parser._classify_intent("please stop texting me") == "opt_out"
+
+
+def test_parse_batch_preserves_order():
+    parser = ResponseParser()
+    results = parser.parse_batch([
+        {"content": "Yes please", "channel": "sms"},
+        {"content": "Unsubscribe", "channel": "email"},
+        {"content": "How much is the budget?", "channel": "email"}
+    ])
+    assert [r["intent"] for r in results] == ["interested", "opt_out", "need_info"]
+    assert results[0]["sentiment"] > 0
+
+
+if __name__ == "__main__":
+    test_single_letters_only_match_whole_words()
+    test_longest_phrase_wins_and_opt_out_is_honored()
+    test_stop_and_remove_in_ordinary_replies_are_not_opt_outs()
+    test_parse_batch_preserves_order()
+    print("[OK] Response parser tests passed")
@@ -0,0 +1,64 @@
+"""
+Test the bounded agent session cache
+Checks LRU/byte-budget eviction, TTL expiry and reload-on-miss
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.session_cache import SessionCache
+
+
+def test_evicts_least_recently_used_over_entry_limit():
+    cache = SessionCache("test_lru", max_entries=2)
+    cache["a"] = {"x": 1}
+    cache["b"] = {"x": 2}
+    assert cache.get("a") == {"x": 1}  # "a" is now most recent
+    cache["c"] = {"x": 3}
+
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_evicts_over_byte_budget():
+    cache = SessionCache("test_bytes", max_bytes=1000)
+    cache["a"] = {"image": "x" * 600}
+    cache["b"] = {"image": "y" * 600}
+
+    assert "a" not in cache
+    assert "b" in cache
+    assert cache.stats()["bytes"] <= 1000
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    cache = SessionCache("test_ttl", ttl_seconds=10)
+    cache["a"] = {"x": 1}
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert "a" not in cache
+    assert cache.stats()["expirations"] == 1
+
+
+def test_aget_reloads_misses_through_loader():
+    loaded = []
+
+    async def loader(key):
+        loaded.append(key)
+        return {"session": key} if key == "known" else None
+
+    cache = SessionCache("test_loader", loader=loader)
+    assert asyncio.run(cache.aget("known")) == {"session": "known"}
+    assert asyncio.run(cache.aget("known")) == {"session": "known"}
+    assert asyncio.run(cache.aget("unknown")) is None
+
+    assert loaded == ["known", "unknown"]
+    stats = cache.stats()
+    assert stats["loads"] == 1
+    assert stats["hits"] == 1
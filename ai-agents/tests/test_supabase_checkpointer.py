@@ -0,0 +1,224 @@
+"""
+Test the COIA Supabase checkpointer
+Runs the read, write and prune paths against an in-memory stand-in for the tables
+"""
+
+import asyncio
+import json
+import os
+import sys
+from contextlib import asynccontextmanager
+from itertools import count
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.coia import supabase_checkpointer
+from agents.coia.supabase_checkpointer import (
+    PRUNE_SQL,
+    SELECT_SQL,
+    UPSERT_BLOBS_SQL,
+    UPSERT_CHECKPOINT_SQL,
+    UPSERT_WRITES_SQL,
+    SupabaseCheckpointer,
+)
+
+
+class FakeTables:
+    """Just the statements the checkpointer issues, with the same conflict rules"""
+
+    def __init__(self):
+        self.checkpoints = {}
+        self.blobs = {}
+        self.writes = {}
+        self.clock = count()
+
+    def run(self, sql, params):
+        if sql == UPSERT_BLOBS_SQL:
+            thread_id, ns, channel, version, type_, blob = params
+            self.blobs.setdefault((thread_id, ns, channel, version), (type_, blob))  # DO NOTHING
+        elif sql == UPSERT_CHECKPOINT_SQL:
+            thread_id, ns, checkpoint_id, parent_id, _, checkpoint, metadata = params
+            self.checkpoints[(thread_id, ns, checkpoint_id)] = {
+                "thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint_id,
+                "parent_checkpoint_id": parent_id, "checkpoint": checkpoint, "metadata": metadata,
+                "created_at": next(self.clock)
+            }
+        elif sql == UPSERT_WRITES_SQL:
+            thread_id, ns, checkpoint_id, task_id, idx, channel, type_, blob = params
+            self.writes[(thread_id, ns, checkpoint_id, task_id, idx)] = (channel, type_, blob)
+        elif sql in PRUNE_SQL:
+            self.prune(sql, params)
+        elif sql.startswith(SELECT_SQL):
+            return self.select(sql, params)
+        else:
+            raise AssertionError(f"Unexpected SQL: {sql[:60]}")
+        return []
+
+    def select(self, sql, params):
+        thread_id, ns, *checkpoint_id = params
+        rows = [row for key, row in self.checkpoints.items()
+                if key[:2] == (thread_id, ns) and (not checkpoint_id or key[2] == checkpoint_id[0])]
+        rows.sort(key=lambda row: row["created_at"], reverse=True)
+        return [self.joined(row) for row in rows]
+
+    def joined(self, row):
+        versions = json.loads(row["checkpoint"]).get("channel_versions", {})
+        key = (row["thread_id"], row["checkpoint_ns"])
+        channel_blobs = [
+            [channel.encode(), self.blobs[(*key, channel, version)][0].encode(), self.blobs[(*key, channel, version)][1]]
+            for channel, version in versions.items() if (*key, channel, version) in self.blobs
+        ]
+        pending_writes = [
+            [task_id.encode(), channel.encode(), type_.encode(), blob]
+            for (thread_id, ns, checkpoint_id, task_id, _), (channel, type_, blob) in sorted(self.writes.items())
+            if (thread_id, ns, checkpoint_id) == (*key, row["checkpoint_id"])
+        ]
+        return {**row, "channel_blobs": channel_blobs or None, "pending_writes": pending_writes or None}
+
+    def prune(self, sql, params):
+        key = (params["thread_id"], params["checkpoint_ns"])
+        if sql == PRUNE_SQL[0]:
+            rows = sorted((row for k, row in self.checkpoints.items() if k[:2] == key),
+                          key=lambda row: row["created_at"], reverse=True)
+            for row in rows[params["keep"]:]:
+                del self.checkpoints[(*key, row["checkpoint_id"])]
+        elif sql == PRUNE_SQL[1]:
+            self.writes = {k: v for k, v in self.writes.items() if k[:2] != key or k[:3] in self.checkpoints}
+        else:
+            live = {(*key, channel, version)
+                    for k, row in self.checkpoints.items() if k[:2] == key
+                    for channel, version in json.loads(row["checkpoint"]).get("channel_versions", {}).items()}
+            self.blobs = {k: v for k, v in self.blobs.items() if k[:2] != key or k in live}
+
+
+class FakeCursor:
+    def __init__(self, tables):
+        self.tables = tables
+        self.rows = []
+
+    async def execute(self, sql, params=None):
+        self.rows = self.tables.run(sql, params)
+
+    async def executemany(self, sql, rows):
+        for params in rows:
+            self.tables.run(sql, params)
+
+    async def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    async def __aiter__(self):
+        for row in self.rows:
+            yield row
+
+
+class FakeConnection:
+    def __init__(self, tables):
+        self.tables = tables
+
+    async def execute(self, sql):
+        pass  # Setup DDL
+
+    @asynccontextmanager
+    async def cursor(self):
+        yield FakeCursor(self.tables)
+
+    @asynccontextmanager
+    async def pipeline(self):
+        yield
+
+
+class FakePool:
+    def __init__(self):
+        self.tables = FakeTables()
+
+    @asynccontextmanager
+    async def connection(self):
+        yield FakeConnection(self.tables)
+
+
+def config(checkpoint_id=None):
+    configurable = {"thread_id": "thread-1", "checkpoint_ns": "coia_chat"}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+
+def checkpoint(checkpoint_id, versions, values):
+    return {"v": 1, "id": checkpoint_id, "ts": "2024-01-01T00:00:00",
+            "channel_values": values, "channel_versions": versions, "versions_seen": {}}
+
+
+async def put(saver, checkpoint_id, parent_id, channel_version, value):
+    versions = {"messages": channel_version}
+    return await saver.aput(config(parent_id), checkpoint(checkpoint_id, versions, {"messages": value}),
+                            {"source": "loop", "step": 1}, versions)
+
+
+def test_forked_checkpoints_keep_their_own_values():
+    saver = SupabaseCheckpointer(pool=FakePool())
+
+    async def run():
+        await put(saver, "root", None, saver.get_next_version(None), ["hi"])
+        # Two branches from the same parent reach the same step
+        first = saver.get_next_version(saver.get_next_version(None))
+        second = saver.get_next_version(saver.get_next_version(None))
+        await put(saver, "branch-a", "root", first, ["hi", "roofing"])
+        await put(saver, "branch-b", "root", second, ["hi", "plumbing"])
+        return (await saver.aget_tuple(config("branch-a")), await saver.aget_tuple(config("branch-b")),
+                await saver.aget_tuple(config()))
+
+    branch_a, branch_b, latest = asyncio.run(run())
+
+    assert branch_a.checkpoint["channel_values"]["messages"] == ["hi", "roofing"]
+    assert branch_b.checkpoint["channel_values"]["messages"] == ["hi", "plumbing"]
+    assert latest.config["configurable"]["checkpoint_id"] == "branch-b"
+    assert branch_b.parent_config["configurable"]["checkpoint_id"] == "root"
+
+
+def test_versions_increase_and_never_repeat():
+    saver = SupabaseCheckpointer(pool=FakePool())
+
+    versions = [saver.get_next_version(None) for _ in range(50)]
+    assert len(set(versions)) == 50
+
+    chain = [saver.get_next_version(None)]
+    for _ in range(11):
+        chain.append(saver.get_next_version(chain[-1]))
+    assert chain == sorted(chain)
+    # Integer versions from older checkpoints keep counting up
+    assert saver.get_next_version(3) > saver.get_next_version(2)
+    assert saver.get_next_version("3").startswith(f"{4:032}.")
+
+
+def test_pending_writes_round_trip():
+    saver = SupabaseCheckpointer(pool=FakePool())
+
+    async def run():
+        saved = await put(saver, "cp-1", None, saver.get_next_version(None), ["hi"])
+        await saver.aput_writes(saved, [("messages", ["draft"]), ("mode", None)], "task-1")
+        return await saver.aget_tuple(saved)
+
+    loaded = asyncio.run(run())
+
+    assert loaded.pending_writes == [("task-1", "messages", ["draft"]), ("task-1", "mode", None)]
+
+
+def test_prune_keeps_recent_checkpoints_and_their_blobs(monkeypatch):
+    monkeypatch.setattr(supabase_checkpointer, "CHECKPOINT_PRUNE_EVERY", 1)
+    pool = FakePool()
+    saver = SupabaseCheckpointer(pool=pool, retention=2)
+
+    async def run():
+        version = None
+        parent = None
+        for step in range(4):
+            version = saver.get_next_version(version)
+            saved = await put(saver, f"cp-{step}", parent, version, [f"message {step}"])
+            await saver.aput_writes(saved, [("messages", [f"draft {step}"])], "task")
+            parent = f"cp-{step}"
+        return [item.config["configurable"]["checkpoint_id"] async for item in saver.alist(config())]
+
+    assert asyncio.run(run()) == ["cp-3", "cp-2"]
+    assert len(pool.tables.blobs) == 2
+    assert {key[2] for key in pool.tables.writes} == {"cp-2", "cp-3"}
@@ -0,0 +1,51 @@
+"""
+Test EAA TemplateEngine compiled rendering
+Checks segment rendering and that render_batch matches per-contractor generation
+"""
+
+import os
+import sys
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.eaa.message_templates.template_engine import CompiledTemplate, TemplateEngine
+
+
+BID_CARD = {
+    "id": "bc-123",
+    "project_type": "kitchen remodel",
+    "location": {"city": "Miami", "state": "FL", "zip_code": "33101"},
+    "budget_min": 20000,
+    "budget_max": 35000,
+    "scope_summary": "Full kitchen renovation"
+}
+
+
+def test_compiled_template_renders_and_keeps_unknown_placeholders():
+    template = CompiledTemplate("Hi {name}, see {link} {missing}")
+    assert template.variables == {"name", "link", "missing"}
+    assert template.render({"name": "Bob", "link": "x"}) == "Hi Bob, see x {missing}"
+
+
+def test_render_batch_matches_generate_messages():
+    engine = TemplateEngine()
+    contractors = [
+        {"company_name": "Acme Kitchens", "contact_name": "Bob"},
+        {"company_name": "Best Builders"}
+    ]
+
+    batch = engine.render_batch(contractors, BID_CARD, ["email", "sms"], "week")
+
+    assert len(batch) == 2
+    for contractor, messages in zip(contractors, batch, strict=True):
+        expected = engine.generate_messages(contractor, BID_CARD, ["email", "sms"], "week")
+        assert messages == expected
+    assert "Bob" in batch[0]["email"]["html_content"]
+    assert batch[0]["email"]["template_used"] == "kitchen_standard_email"
+
+
+if __name__ == "__main__":
+    test_compiled_template_renders_and_keeps_unknown_placeholders()
+    test_render_batch_matches_generate_messages()
+    print("[OK] Template engine tests passed")
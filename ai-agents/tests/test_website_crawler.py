@@ -0,0 +1,83 @@
+"""
+Test the website crawler used by email discovery
+Checks per-host spacing, cross-host concurrency and the page cache, including failed fetches
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("aiohttp")
+
+import aiohttp
+
+from agents.cda.website_crawler import WebsiteCrawler, _failed_pages, _page_cache
+
+
+class FakeCrawler(WebsiteCrawler):
+    """Crawler whose network GET just records when each request went out"""
+
+    def __init__(self, failures=0, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = []
+        self.failures = failures
+
+    async def allowed(self, url):
+        return True
+
+    async def _get(self, url, headers=None):
+        await self._wait_for_host(url.split("/")[2])
+        self.requests.append((url, time.monotonic()))
+        if self.failures:
+            self.failures -= 1
+            raise aiohttp.ClientConnectionError("connection reset")
+        return 200, {"Content-Type": "text/html"}, f"<html>{url}</html>"
+
+
+def test_same_host_is_spaced_but_hosts_run_together():
+    crawler = FakeCrawler(per_host_delay=0.2)
+    urls = ["https://a.test/1", "https://a.test/2", "https://b.test/1", "https://c.test/1"]
+
+    async def crawl():
+        await asyncio.gather(*(crawler.fetch(url) for url in urls))
+
+    asyncio.run(crawl())
+
+    times = dict(crawler.requests)
+    assert times["https://a.test/2"] - times["https://a.test/1"] >= 0.19
+    assert abs(times["https://b.test/1"] - times["https://c.test/1"]) < 0.1
+
+
+def test_pages_are_cached():
+    crawler = FakeCrawler(per_host_delay=0)
+    url = "https://cached.test/contact"
+    _page_cache.pop(url, None)
+
+    first = asyncio.run(crawler.fetch(url))
+    second = asyncio.run(crawler.fetch(url))
+
+    assert first == second == f"<html>{url}</html>"
+    assert len(crawler.requests) == 1
+
+
+def test_failed_fetch_is_retried_after_a_short_wait():
+    url = "https://flaky.test/contact"
+    _page_cache.pop(url, None)
+    _failed_pages.pop(url, None)
+    crawler = FakeCrawler(failures=1, per_host_delay=0)
+
+    assert asyncio.run(crawler.fetch(url)) is None
+    # Inside the failure window the page isn't requested again
+    assert asyncio.run(crawler.fetch(url)) is None
+    assert len(crawler.requests) == 1
+
+    _failed_pages.pop(url)  # the short failure TTL has run out
+    assert asyncio.run(crawler.fetch(url)) == f"<html>{url}</html>"
+    assert len(crawler.requests) == 2
+    assert url in _page_cache
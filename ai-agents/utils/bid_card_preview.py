@@ -0,0 +1,117 @@
+"""
+Bid Card Preview Pages
+Compiled HTML template and rendered-page cache for bid card previews
+
+Preview links go out in every contractor email and SMS, so link unfurlers and
+contractors open them in bursts. The template is read and compiled once per
+process, and each bid card's rendered page is kept with its ETag until the
+bid card changes. The CIA modification path calls invalidate_bid_card_preview
+and the bid card writers in routers/ go through
+utils.context_cache.invalidate_bid_card_rows; a short TTL bounds staleness for
+writes made outside the backend.
+"""
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Optional
+
+from utils.session_cache import SessionCache
+
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), "..", "templates", "bid_card_preview.html")
+PREVIEW_CACHE_TTL = float(os.getenv("BID_CARD_PREVIEW_TTL", "300"))
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{(\w+)\}\}")
+
+FALLBACK_TEMPLATE = """<!DOCTYPE html>
+<html><head>
+<title>{{project_type}} Project - Instabids</title>
+<meta property="og:title" content="{{project_type}} - {{budget_display}}">
+<meta property="og:description" content="{{project_type}} in {{location_city}}{{location_state}}. {{timeline}}">
+<meta property="og:image" content="{{og_image_url}}">
+</head><body>
+<h1>{{project_type}}</h1>
+<p>Budget: {{budget_display}}</p>
+<p>Location: {{location_city}}{{location_state}}</p>
+<p>Timeline: {{timeline}}</p>
+</body></html>"""
+
+
+class CompiledHtmlTemplate:
+    """{{variable}} template pre-split into literal and variable segments"""
+
+    __slots__ = ("segments", "variables")
+
+    def __init__(self, template: str):
+        # Segments are plain strings (literals) or 1-tuples holding a variable name
+        self.segments: list[Any] = []
+        pos = 0
+        for match in PLACEHOLDER_PATTERN.finditer(template):
+            if match.start() > pos:
+                self.segments.append(template[pos:match.start()])
+            self.segments.append((match.group(1),))
+            pos = match.end()
+        if pos < len(template):
+            self.segments.append(template[pos:])
+
+        self.variables = {seg[0] for seg in self.segments if isinstance(seg, tuple)}
+
+    def render(self, variables: dict[str, Any]) -> str:
+        """Render the template; unknown placeholders are left as-is"""
+        parts = []
+        for seg in self.segments:
+            if isinstance(seg, tuple):
+                name = seg[0]
+                parts.append(str(variables[name]) if name in variables else f"{{{{{name}}}}}")
+            else:
+                parts.append(seg)
+        return "".join(parts)
+
+
+@lru_cache(maxsize=1)
+def preview_template() -> CompiledHtmlTemplate:
+    """The bid card preview template, loaded and compiled on first use"""
+    try:
+        with open(TEMPLATE_PATH, encoding="utf-8") as f:
+            return CompiledHtmlTemplate(f.read())
+    except FileNotFoundError:
+        return CompiledHtmlTemplate(FALLBACK_TEMPLATE)
+
+
+@dataclass
+class PreviewPage:
+    """A rendered preview page and the validators it is served with"""
+    base_url: str
+    html: str
+    etag: str
+
+
+# Keyed by bid card id; base_url is checked so each host gets its own links
+_preview_pages = SessionCache("bid_card_preview", max_entries=5000, ttl_seconds=PREVIEW_CACHE_TTL)
+
+
+def cached_preview(bid_card_id: str, base_url: str) -> Optional[PreviewPage]:
+    page = _preview_pages.get(bid_card_id)
+    if page is not None and page.base_url == base_url:
+        return page
+    return None
+
+
+def render_preview(bid_card_id: str, base_url: str, variables: dict[str, Any]) -> PreviewPage:
+    """Render a bid card's preview page and cache it until the bid card changes"""
+    html = preview_template().render(variables)
+    page = PreviewPage(
+        base_url=base_url,
+        html=html,
+        etag=f'"{hashlib.sha256(html.encode("utf-8")).hexdigest()[:32]}"'
+    )
+    _preview_pages[bid_card_id] = page
+    return page
+
+
+def invalidate_bid_card_preview(bid_card_id: Optional[str]):
+    """Call after a bid card's project type, budget, timeline or location changes"""
+    if bid_card_id:
+        _preview_pages.pop(bid_card_id, None)
@@ -0,0 +1,108 @@
+"""
+Context Cache
+Per-session cache for the static parts of agent prompt context
+
+Agents rebuild the same context every turn (bid card details, inspiration
+board + images, conversation history). This caches those blocks by key and
+lets writers invalidate them when the underlying record changes; a short TTL
+bounds staleness for writes that happen outside the backend (e.g. direct
+Supabase writes from the frontend).
+
+Also builds Anthropic system prompt blocks with cache_control so the stable
+prefix is served from the provider's prompt cache.
+"""
+from collections.abc import Awaitable, Callable
+from typing import Any, Optional
+
+from utils.bid_card_preview import invalidate_bid_card_preview
+from utils.session_cache import SessionCache
+
+
+class ContextCache:
+    """Keyed cache of assembled context blocks with explicit invalidation"""
+
+    def __init__(self, name: str = "prompt_context", ttl_seconds: float = 120, max_entries: int = 2000):
+        self._entries = SessionCache(name, max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+    async def get_or_build(self, key: str, build: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached block for key, building (and caching) it on a miss"""
+        value = self._entries.get(key)
+        if value is not None:
+            return value
+
+        value = await build()
+        # Don't cache empty results so a missing record is retried next turn
+        if value:
+            self._entries[key] = value
+        return value
+
+    def get(self, key: str) -> Any:
+        return self._entries.get(key)
+
+    def put(self, key: str, value: Any):
+        self._entries[key] = value
+
+    def invalidate(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key)
+
+    def stats(self) -> dict[str, Any]:
+        return self._entries.stats()
+
+
+# Shared by the CIA, JAA and Iris so a write in one invalidates the others
+context_cache = ContextCache()
+
+
+def bid_card_key(bid_card_number: str) -> str:
+    return f"bid_card:{bid_card_number}"
+
+
+def board_key(board_id: str) -> str:
+    return f"iris_board:{board_id}"
+
+
+def board_history_key(board_id: str) -> str:
+    return f"iris_history:{board_id}"
+
+
+def invalidate_bid_card(bid_card_number: Optional[str]):
+    """Call after a bid card is modified"""
+    if bid_card_number:
+        context_cache.invalidate(bid_card_key(bid_card_number))
+
+
+def invalidate_bid_card_rows(rows: Optional[list[dict[str, Any]]]):
+    """Call with the rows a bid_cards update returned (writers that update by id)
+
+    Also drops each bid card's cached preview page, which is keyed by id.
+    """
+    for row in rows or []:
+        invalidate_bid_card(row.get("bid_card_number"))
+        invalidate_bid_card_preview(row.get("id"))
+
+
+def invalidate_board(board_id: Optional[str]):
+    """Call after an inspiration board or its images change"""
+    if board_id:
+        context_cache.invalidate(board_key(board_id))
+
+
+def cached_system_prompt(*blocks: Optional[str], cached_blocks: int = 1) -> list[dict[str, Any]]:
+    """
+    Anthropic system prompt blocks with prompt caching on the stable prefix
+
+    Blocks are ordered most-stable first; the first cached_blocks positions
+    get a cache_control breakpoint so that prefix is reused across turns.
+    Empty blocks are skipped but keep their position, so a missing stable
+    block never moves the breakpoint onto a per-turn one.
+    """
+    system = []
+    for index, text in enumerate(blocks):
+        if not text:
+            continue
+        entry: dict[str, Any] = {"type": "text", "text": text}
+        if index < cached_blocks:
+            entry["cache_control"] = {"type": "ephemeral"}
+        system.append(entry)
+    return system
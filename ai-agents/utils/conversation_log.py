@@ -0,0 +1,197 @@
+"""
+Conversation Log
+Delta-based persistence for agent conversation state
+
+Instead of rewriting the whole state (every message, every image) on each
+turn, messages go to an append-only turn log (one row per message) and the
+rest of the state is written as a compact, versioned snapshot with a single
+upsert. A turn therefore costs O(new messages), not O(conversation).
+
+Loaders rebuild the full state from the snapshot plus the turn log tail.
+Snapshots written before the log existed still carry their messages inline;
+those are used as the head and only later turns are read from the log.
+"""
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+from utils.session_cache import SessionCache
+
+
+# Rows per turn log read in load_many (PostgREST caps responses at 1000 rows)
+TURN_PAGE_SIZE = 1000
+
+
+class ConversationLog:
+    """Append-only message log + versioned snapshot for one conversation table"""
+
+    def __init__(self,
+                 client: Any,
+                 table: str = "agent_conversations",
+                 turns_table: str = "agent_conversation_turns",
+                 messages_key: str = "messages"):
+        self.client = client
+        self.table = table
+        self.turns_table = turns_table
+        self.messages_key = messages_key
+
+        # thread_id -> (messages already logged, snapshot version), so a save
+        # normally needs no read; misses are filled from the snapshot row
+        self._progress = SessionCache(
+            f"{table}_log_progress",
+            max_entries=10000,
+            ttl_seconds=24 * 3600,
+            sizer=lambda _: 64
+        )
+
+    def save(self, thread_id: str, state: dict[str, Any], fields: Optional[dict[str, Any]] = None) -> Optional[dict[str, Any]]:
+        """
+        Persist one turn: append new messages, then upsert the snapshot
+
+        Args:
+            thread_id: Conversation thread ID
+            state: Full conversation state (messages under messages_key)
+            fields: Extra snapshot row columns (user_id, agent_type, ...)
+
+        Returns:
+            Saved snapshot row
+        """
+        messages = state.get(self.messages_key) or []
+        logged, version = self._get_progress(thread_id)
+
+        # A shorter history means the state was reset; rewrite from its start
+        if logged > len(messages):
+            logged = 0
+
+        new_messages = messages[logged:]
+        if new_messages:
+            now = datetime.utcnow().isoformat()
+            self.client.table(self.turns_table).upsert([
+                {
+                    "thread_id": thread_id,
+                    "seq": logged + offset,
+                    "role": message.get("role") if isinstance(message, dict) else None,
+                    "message": message,
+                    "created_at": now
+                }
+                for offset, message in enumerate(new_messages)
+            ], on_conflict="thread_id,seq").execute()
+
+        snapshot = {key: value for key, value in state.items() if key != self.messages_key}
+        row = {
+            **(fields or {}),
+            "thread_id": thread_id,
+            "state": snapshot,
+            "message_count": len(messages),
+            "state_version": version + 1,
+            "updated_at": datetime.utcnow().isoformat()
+        }
+        result = self.client.table(self.table).upsert(row, on_conflict="thread_id").execute()
+
+        self._progress[thread_id] = (len(messages), version + 1)
+        return result.data[0] if result.data else None
+
+    def load(self, thread_id: str, filters: Optional[dict[str, Any]] = None) -> Optional[dict[str, Any]]:
+        """
+        Load a conversation row with its state rebuilt from snapshot + log tail
+
+        Returns:
+            The snapshot row with row["state"][messages_key] restored, or None
+        """
+        query = self.client.table(self.table).select("*").eq("thread_id", thread_id)
+        for column, value in (filters or {}).items():
+            query = query.eq(column, value)
+        result = query.limit(1).execute()
+        if not result.data:
+            return None
+
+        row = result.data[0]
+        row["state"] = self.rebuild_state(row)
+        return row
+
+    def load_many(self, thread_ids: list[str]) -> dict[str, dict[str, Any]]:
+        """Load several conversations with one snapshot query and one turn log query, keyed by thread_id"""
+        if not thread_ids:
+            return {}
+
+        result = self.client.table(self.table).select("*").in_("thread_id", list(thread_ids)).execute()
+        rows = result.data or []
+        for row in rows:
+            if isinstance(row.get("state"), str):
+                row["state"] = json.loads(row["state"])
+
+        ranges = {row["thread_id"]: self._tail_range(row) for row in rows}
+        tails = self._load_tails({thread_id: span for thread_id, span in ranges.items() if span[1] > span[0]})
+
+        conversations = {}
+        for row in rows:
+            row["state"] = self.rebuild_state(row, tails.get(row["thread_id"], []))
+            conversations[row["thread_id"]] = row
+        return conversations
+
+    def rebuild_state(self, row: dict[str, Any], tail: Optional[list[Any]] = None) -> dict[str, Any]:
+        """
+        Restore the full state for an already-fetched snapshot row
+
+        Pass tail when the row's log messages were already fetched (load_many);
+        otherwise they are read here.
+        """
+        state = row.get("state") or {}
+        if isinstance(state, str):
+            state = json.loads(state)
+
+        # Legacy snapshots carry their messages inline; the log holds the rest
+        head = state.get(self.messages_key) or []
+        if tail is None:
+            tail = []
+            start, end = self._tail_range({**row, "state": state})
+            if end > start:
+                turns = self.client.table(self.turns_table).select("seq,message").eq(
+                    "thread_id", row["thread_id"]
+                ).gte("seq", start).lt("seq", end).order("seq").execute()
+                tail = [turn["message"] for turn in turns.data or []]
+
+        state[self.messages_key] = head + tail
+        # Inline messages aren't in the log yet, so the next save logs them all
+        self._progress[row["thread_id"]] = (row.get("message_count") or 0, row.get("state_version") or 0)
+        return state
+
+    def _tail_range(self, row: dict[str, Any]) -> tuple[int, int]:
+        """Turn log seq range [start, end) not carried inline by a parsed snapshot row"""
+        head = (row.get("state") or {}).get(self.messages_key) or []
+        return len(head), row.get("message_count") or len(head)
+
+    def _load_tails(self, ranges: dict[str, tuple[int, int]]) -> dict[str, list[Any]]:
+        """Log messages for several threads, read in pages of TURN_PAGE_SIZE across all of them"""
+        tails: dict[str, list[Any]] = {thread_id: [] for thread_id in ranges}
+        if not ranges:
+            return tails
+
+        offset = 0
+        while True:
+            page = self.client.table(self.turns_table).select("thread_id,seq,message").in_(
+                "thread_id", list(ranges)
+            ).gte("seq", min(start for start, _ in ranges.values())).order("thread_id").order("seq").range(
+                offset, offset + TURN_PAGE_SIZE - 1
+            ).execute().data or []
+
+            for turn in page:
+                start, end = ranges[turn["thread_id"]]
+                if start <= turn["seq"] < end:
+                    tails[turn["thread_id"]].append(turn["message"])
+
+            if len(page) < TURN_PAGE_SIZE:
+                return tails
+            offset += TURN_PAGE_SIZE
+
+    def _get_progress(self, thread_id: str) -> tuple[int, int]:
+        progress = self._progress.get(thread_id)
+        if progress is not None:
+            return progress
+
+        result = self.client.table(self.table).select("message_count,state_version").eq(
+            "thread_id", thread_id
+        ).limit(1).execute()
+        if not result.data:
+            return 0, 0
+        return result.data[0].get("message_count") or 0, result.data[0].get("state_version") or 0
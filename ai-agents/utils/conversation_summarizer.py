@@ -0,0 +1,190 @@
+"""
+Conversation Summarizer
+Rolling per-session summaries so prompts stay within a fixed token budget
+
+Agents keep a running summary of everything older than the recent window.
+Every `every_messages` new messages that fall out of the window, the summary
+is extended in the background (one short LLM call over just those messages).
+Prompt assembly then takes the summary plus as many recent messages as fit
+the token budget, so prompt size stays flat as conversations grow. The budget
+is a hard cap: messages waiting for the summary to catch up use the share of
+it that recent messages leave free, and the oldest of them are dropped if
+they don't fit. A failing summarize call is retried with backoff.
+"""
+import asyncio
+import inspect
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, Optional
+
+from utils.session_cache import SessionCache
+
+
+SUMMARY_EVERY_MESSAGES = 6
+SUMMARY_MAX_TOKENS = 400
+MIN_RECENT_MESSAGES = 4
+# Share of the budget recent messages fill; the rest is for messages not yet summarized
+RECENT_BUDGET_SHARE = 0.75
+# First retry delay after a failed summarize call, doubled per failure up to the max
+SUMMARY_RETRY_SECONDS = 30.0
+SUMMARY_RETRY_MAX_SECONDS = 600.0
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an assistant.
+Update the summary with the new messages below. Keep every concrete fact (names, budgets,
+dates, locations, decisions, open questions) and drop pleasantries. Reply with the updated
+summary only, in at most 200 words.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}"""
+
+SummarizeFn = Callable[[str], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+def message_role(message: Any) -> str:
+    return message.get("role", "unknown") if isinstance(message, dict) else getattr(message, "role", "unknown")
+
+
+def message_text(message: Any) -> str:
+    """Text content of a dict message or a ConversationMessage-style object"""
+    content = message.get("content", "") if isinstance(message, dict) else getattr(message, "content", "")
+    if isinstance(content, list):
+        content = " ".join(block.get("text", "") for block in content if isinstance(block, dict))
+    return content or ""
+
+
+def make_anthropic_summarize(client: Any, model: str = "claude-3-5-haiku-20241022", timeout: float = 30.0) -> SummarizeFn:
+    """Summarize function backed by an Anthropic client (sync or async)"""
+
+    async def summarize(prompt: str) -> str:
+        kwargs = {
+            "model": model,
+            "max_tokens": SUMMARY_MAX_TOKENS,
+            "temperature": 0,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        if inspect.iscoroutinefunction(client.messages.create):
+            response = await asyncio.wait_for(client.messages.create(**kwargs), timeout)
+        else:
+            response = await asyncio.wait_for(asyncio.to_thread(client.messages.create, **kwargs), timeout)
+        return response.content[0].text.strip()
+
+    return summarize
+
+
+def make_openai_summarize(client: Any, model: str = "gpt-4o-mini", timeout: float = 30.0) -> SummarizeFn:
+    """Summarize function backed by a sync OpenAI client"""
+
+    async def summarize(prompt: str) -> str:
+        response = await asyncio.wait_for(asyncio.to_thread(
+            client.chat.completions.create,
+            model=model,
+            max_tokens=SUMMARY_MAX_TOKENS,
+            temperature=0,
+            messages=[{"role": "user", "content": prompt}]
+        ), timeout)
+        return response.choices[0].message.content.strip()
+
+    return summarize
+
+
+class ConversationSummarizer:
+    """Keeps a running summary per session and assembles budgeted history windows"""
+
+    def __init__(self,
+                 name: str,
+                 summarize: Optional[SummarizeFn],
+                 token_budget: int = 4000,
+                 every_messages: int = SUMMARY_EVERY_MESSAGES):
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.every_messages = every_messages
+
+        # session key -> {"text": summary, "covered": messages folded into it}
+        self._summaries = SessionCache(f"{name}_summaries", max_entries=5000, ttl_seconds=6 * 3600)
+        # session key -> (consecutive failures, monotonic time of the next attempt)
+        self._backoff = SessionCache(f"{name}_summary_backoff", max_entries=5000, ttl_seconds=3600)
+        self._pending: dict[str, asyncio.Task] = {}
+
+    def get_summary(self, key: str, stored: Optional[dict[str, Any]] = None) -> dict[str, Any]:
+        """Current summary for a session, seeded from persisted state if given"""
+        summary = self._summaries.get(key)
+        if summary is None or (stored and stored.get("covered", 0) > summary["covered"]):
+            summary = dict(stored) if stored else {"text": "", "covered": 0}
+            self._summaries[key] = summary
+        return summary
+
+    def window(self, key: str, messages: list[Any], stored: Optional[dict[str, Any]] = None,
+               token_budget: Optional[int] = None) -> tuple[str, list[Any]]:
+        """
+        Pick the history to send: (summary text, recent messages)
+
+        Recent messages are taken newest-first until RECENT_BUDGET_SHARE of
+        the budget (less the summary) is used, keeping at least
+        MIN_RECENT_MESSAGES. Older messages get folded into the summary in the
+        background; until the summary covers them they stay in the window as
+        far as the rest of the budget allows, newest first. Without a
+        summarize function the window is simply truncated.
+        """
+        budget = token_budget or self.token_budget
+        summary = self.get_summary(key, stored)
+        remaining = budget - estimate_tokens(summary["text"])
+        recent_room = remaining * RECENT_BUDGET_SHARE
+
+        start = len(messages)
+        while start > 0:
+            cost = estimate_tokens(message_text(messages[start - 1]))
+            if len(messages) - start >= MIN_RECENT_MESSAGES and cost > recent_room:
+                break
+            recent_room -= cost
+            remaining -= cost
+            start -= 1
+
+        self._schedule_update(key, messages[:start])
+        if self.summarize:
+            while start > summary["covered"]:
+                cost = estimate_tokens(message_text(messages[start - 1]))
+                if cost > remaining:
+                    break
+                remaining -= cost
+                start -= 1
+        return summary["text"] if start > 0 else "", messages[start:]
+
+    def _schedule_update(self, key: str, older_messages: list[Any]):
+        summary = self._summaries.get(key)
+        if not self.summarize or summary is None or key in self._pending:
+            return
+        if len(older_messages) - summary["covered"] < self.every_messages:
+            return
+        backoff = self._backoff.get(key)
+        if backoff is not None and time.monotonic() < backoff[1]:
+            return
+
+        try:
+            task = asyncio.get_running_loop().create_task(
+                self._update(key, summary, older_messages[summary["covered"]:], len(older_messages))
+            )
+        except RuntimeError:
+            return  # No event loop: summarize on a later async call
+        self._pending[key] = task
+        task.add_done_callback(lambda _: self._pending.pop(key, None))
+
+    async def _update(self, key: str, summary: dict[str, Any], new_messages: list[Any], covered: int):
+        transcript = "\n".join(f"{message_role(m)}: {message_text(m)}" for m in new_messages)
+        try:
+            text = await self.summarize(SUMMARY_PROMPT.format(summary=summary["text"] or "(none)", messages=transcript))
+        except Exception as e:
+            failures = (self._backoff.get(key) or (0, 0))[0] + 1
+            delay = min(SUMMARY_RETRY_SECONDS * 2 ** (failures - 1), SUMMARY_RETRY_MAX_SECONDS)
+            self._backoff[key] = (failures, time.monotonic() + delay)
+            print(f"[SUMMARIZER] Could not update summary for {key} ({failures} failures, retrying in {delay:.0f}s): {e}")
+            return
+        self._backoff.pop(key, None)
+        self._summaries[key] = {"text": text, "covered": covered}
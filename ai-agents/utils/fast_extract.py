@@ -0,0 +1,336 @@
+"""
+Fast Extract
+Deterministic first tier for project information extraction
+
+Compiled regex and keyword extractors for the fields that don't need a model:
+ZIP code, budget range, urgency, start date and project type. Every match
+carries a confidence; agents apply the confident ones directly and only ask
+the LLM for what is still missing or uncertain. A message that is nothing but
+simple fields ("78701", "$5-10k", "asap please") doesn't need the LLM at all.
+
+Negated phrases ("I don't need it asap") are not matches; a field mentioned
+only in negation gets a denied match (value None, confidence 0) so callers
+know it was discussed. A message that negates or corrects itself ("not 5-10k,
+more like 20-30k") never skips the LLM.
+"""
+import re
+from typing import Any, NamedTuple
+
+
+FAST_PATH_CONFIDENCE = 0.8
+# Matches below this are applied but may be replaced by the LLM's reading of the same field
+SETTLED_CONFIDENCE = 0.9
+MAX_RESIDUAL_WORDS = 2
+
+
+class FieldMatch(NamedTuple):
+    value: Any
+    confidence: float
+    span: tuple[int, int]
+
+
+# Ordered most specific first; the first type matched wins
+PROJECT_TYPE_KEYWORDS = [
+    ("mold remediation", ["mold", "black mold", "mold removal"]),
+    ("pressure washing", ["pressure wash", "pressure washing", "power wash", "power washing"]),
+    ("tree removal", ["tree removal", "stump", "stump grinding"]),
+    ("lawn care", ["lawn", "mowing", "grass"]),
+    ("landscaping", ["landscape", "landscaping", "garden", "yard"]),
+    ("kitchen remodel", ["kitchen", "countertop", "countertops", "cabinets"]),
+    ("bathroom remodel", ["bathroom", "shower", "bathtub", "tub", "vanity", "toilet"]),
+    ("roofing", ["roof", "roofing", "shingle", "shingles"]),
+    ("gutters", ["gutter", "gutters"]),
+    ("flooring", ["floor", "floors", "flooring", "hardwood", "carpet", "laminate"]),
+    ("painting", ["paint", "painting", "repaint"]),
+    ("plumbing", ["plumbing", "plumber", "pipe", "pipes", "drain", "faucet", "water heater"]),
+    ("electrical", ["electrical", "electrician", "wiring", "outlet", "outlets", "breaker", "panel"]),
+    ("hvac", ["hvac", "air conditioning", "ac unit", "a/c", "furnace", "heat pump"]),
+    ("fence", ["fence", "fencing"]),
+    ("deck", ["deck", "patio"]),
+    ("driveway", ["driveway"]),
+    ("pool", ["pool"]),
+]
+
+# JAA bid cards use a fixed category set
+JAA_PROJECT_TYPES = {
+    "kitchen remodel": "kitchen",
+    "bathroom remodel": "bathroom",
+    "roofing": "roofing",
+    "flooring": "flooring",
+    "plumbing": "plumbing",
+    "electrical": "electrical",
+    "hvac": "hvac",
+    "painting": "painting",
+    "landscaping": "landscaping",
+    "lawn care": "landscaping",
+    "tree removal": "landscaping",
+}
+
+# (timeline_urgency, phrases, confidence); earlier levels win ties
+URGENCY_PHRASES = [
+    ("emergency", [r"emergency", r"asap", r"a\.s\.a\.p", r"right away", r"immediately", r"right now",
+                   r"today", r"tonight", r"tomorrow", r"burst", r"flood(?:ing|ed)?",
+                   r"no (?:heat|hot water|power|ac|a/c)", r"actively leaking"], 0.9),
+    ("urgent", [r"urgent(?:ly)?", r"this week", r"next week", r"within (?:a|one|1) week",
+                r"in a (?:few|couple of) days", r"this weekend"], 0.85),
+    ("urgent", [r"soon", r"quickly", r"fast"], 0.6),
+    ("flexible", [r"flexible", r"no rush", r"whenever", r"this month", r"next month",
+                  r"within (?:a|the|one|1) month", r"(?:a )?few weeks", r"couple (?:of )?weeks"], 0.85),
+    ("planning", [r"next year", r"someday", r"eventually", r"in a few months",
+                  r"just (?:looking|exploring|browsing)", r"thinking about", r"planning ahead"], 0.85),
+]
+
+MONTHS = r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+WEEKDAYS = r"(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+
+# Words that carry no information on their own once the fields are removed
+FILLER_WORDS = frozenset("""
+    a about across after again all also am an and any are around as at be before between budget but by
+    can code could do done dollars bucks for from get got great have hello hey hi i i'm im in is it it's
+    its just like looking maybe me my need needs no of ok okay on or our please probably range right
+    roughly say should so somewhere sure than thank thanks that the there this to too under up us want
+    was we we'd we're would yeah yes yep you zip zipcode
+""".split())
+
+NUMBER = r"\$?\s?(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)\s?(k|thousand)?\b"
+NON_MONEY_UNITS = re.compile(r"\s*(?:-\s*)?(?:days?|weeks?|months?|years?|hours?|hrs?|mins?|minutes?|sq|square|feet|ft|foot|"
+                             r"inch(?:es)?|%|percent|x\b|by\b|people|rooms?|bedrooms?|baths?|stories|story|windows?)",
+                             re.IGNORECASE)
+BUDGET_CONTEXT = re.compile(r"\b(?:budget|spend|afford|cost|price|pay|dollars|bucks|quote[sd]?)\b|\$", re.IGNORECASE)
+# A number right after these is an amount, not a ZIP ("we spent 20000")
+MONEY_VERB_PREFIX = re.compile(r"\b(?:spen[dt]|spending|paid|pay(?:ing)?|costs?|budget(?:ed)?|price[ds]?|quoted?|"
+                               r"afford|saved|owe[ds]?|worth|about|around|roughly)\W*$", re.IGNORECASE)
+# A number followed by a street name is a house number ("12345 Main St")
+STREET_SUFFIX = re.compile(r"(?:\s+[NSEW]\.?)?(?:\s+[A-Za-z][\w'.]*){1,3}?\s+(?:st|street|ave|avenue|rd|road|blvd|"
+                           r"boulevard|dr|drive|ln|lane|way|ct|court|pl|place|ter|terrace|cir|circle|hwy|highway|"
+                           r"pkwy|parkway|trl|trail)\b", re.IGNORECASE)
+# Left over after the fields are removed, these mean the message says something more
+RESIDUAL_FACTS = re.compile(r"[\d$]|\b(?:k|grand|hundred|thousand|million|one|two|three|four|five|six|seven|eight|nine|"
+                            r"ten|rooms?|bedrooms?|bathrooms?|baths?|beds?|sq|square|feet|ft|acres?|stories|story|"
+                            r"floors?|units?)\b", re.IGNORECASE)
+
+NEGATORS = r"(?:not|never|don['’]?t|doesn['’]?t|isn['’]?t|aren['’]?t|wasn['’]?t|won['’]?t|without)"
+# A negator up to three words before a match, within the same clause
+NEGATED_PREFIX = re.compile(rf"\b{NEGATORS}\b(?:[^\w,.;!?]+[\w'’]+){{0,3}}[^\w,.;!?]*$", re.IGNORECASE)
+# Negations and self-corrections change what a message means; leave those to the LLM
+HEDGES = re.compile(rf"\b(?:{NEGATORS}|actually|more like|i mean|rather|instead|correction|scratch that)\b",
+                    re.IGNORECASE)
+HEDGED_CONFIDENCE = 0.6
+
+
+def _phrase_pattern(phrases: list[str]) -> re.Pattern:
+    return re.compile(r"\b(?:" + "|".join(phrases) + r")\b", re.IGNORECASE)
+
+
+class FastExtractor:
+    """Compiled rule-based extractors returning FieldMatch values by field name"""
+
+    def __init__(self):
+        self.budget_range = re.compile(r"(?:between\s+)?" + NUMBER + r"\s*(?:-|–|to|and)\s*" + NUMBER, re.IGNORECASE)
+        self.budget_max = re.compile(r"\b(?:under|below|less than|up to|no more than|max(?:imum)? (?:of )?|at most)\s*" + NUMBER, re.IGNORECASE)
+        self.budget_min = re.compile(r"\b(?:at least|over|more than|minimum (?:of )?)\s*" + NUMBER, re.IGNORECASE)
+        self.quotes = re.compile(r"\b(?:got|have|received|gotten) (?:a |some |\w+ )?(?:quote|quotes|estimates?|bids?)\b", re.IGNORECASE)
+        self.zip_code = re.compile(r"(?<![\d$])(?<!\d[,.])(\d{5})(?:-\d{4})?(?![\d]|[,.]\d|\s?(?:k|thousand|dollars|bucks)\b)", re.IGNORECASE)
+        self.zip_hint = re.compile(r"(?:\b(?i:zip)(?:\s?(?i:code))?(?:\s+(?i:is))?|\b[A-Z]{2})\W*$")
+        self.urgency = [(level, _phrase_pattern(phrases), confidence) for level, phrases, confidence in URGENCY_PHRASES]
+        self.date = re.compile(
+            r"\b(?:(?:by|before|after|starting|start|around|on|in)\s+)?(?:"
+            rf"(?:this|next)\s+(?:week(?:end)?|month|year|spring|summer|fall|autumn|winter|{WEEKDAYS})"
+            rf"|{MONTHS}\.?\s+\d{{1,2}}(?:st|nd|rd|th)?(?:,?\s+\d{{4}})?"
+            rf"|(?:early|mid|late)[\s-]{MONTHS}|(?<=by |in )(?:early |mid |late )?{MONTHS}\b"
+            r"|\d{1,2}/\d{1,2}(?:/\d{2,4})?"
+            r"|tomorrow|today)\b",
+            re.IGNORECASE
+        )
+        self.project_types = [
+            (project_type, _phrase_pattern([re.escape(keyword) for keyword in keywords]))
+            for project_type, keywords in PROJECT_TYPE_KEYWORDS
+        ]
+        self.words = re.compile(r"[a-z][a-z'/]*|\d+", re.IGNORECASE)
+
+    def extract(self, text: str) -> dict[str, FieldMatch]:
+        """All fields found in text, with confidence and source span"""
+        if not text:
+            return {}
+
+        matches: dict[str, FieldMatch] = {}
+        money_context = bool(BUDGET_CONTEXT.search(text))
+        self._extract_budget(text, money_context, matches)
+        self._extract_zip(text, money_context, matches)
+        self._extract_urgency(text, matches)
+        self._extract_date(text, matches)
+        self._extract_project_type(text, matches)
+        return matches
+
+    def confident(self, matches: dict[str, FieldMatch], threshold: float = FAST_PATH_CONFIDENCE) -> dict[str, Any]:
+        """Values good enough to use without asking the LLM"""
+        return {field: match.value for field, match in matches.items() if match.confidence >= threshold}
+
+    def tentative(self, matches: dict[str, FieldMatch], threshold: float = FAST_PATH_CONFIDENCE) -> dict[str, Any]:
+        """Low-confidence values, only worth using when nothing better is found"""
+        return {field: match.value for field, match in matches.items()
+                if match.confidence < threshold and match.value is not None}
+
+    def covers(self, text: str, matches: dict[str, FieldMatch], max_residual_words: int = MAX_RESIDUAL_WORDS) -> bool:
+        """
+        True when the message holds nothing beyond confidently matched simple fields
+
+        Messages naming a project type always go to the LLM: they usually
+        describe the work too (service type, description, motivation). So do
+        messages that negate or correct something, and any with a number or
+        unit left over ("asap, 15k", "78701 3 bedrooms").
+        """
+        if not matches or "project_type" in matches or HEDGES.search(text):
+            return False
+        if any(match.confidence < FAST_PATH_CONFIDENCE for match in matches.values()):
+            return False
+
+        residual = text
+        for start, end in sorted({match.span for match in matches.values()}, reverse=True):
+            residual = residual[:start] + " " + residual[end:]
+        if RESIDUAL_FACTS.search(residual):
+            return False
+        words = [word for word in self.words.findall(residual.lower()) if word not in FILLER_WORDS]
+        return len(words) <= max_residual_words
+
+    def _extract_budget(self, text: str, money_context: bool, matches: dict[str, FieldMatch]):
+        ranges = []
+        negated = None
+        for match in self.budget_range.finditer(text):
+            if NON_MONEY_UNITS.match(text, match.end()):
+                continue
+            low_suffix, high_suffix = match.group(2), match.group(4)
+            low = _parse_amount(match.group(1), low_suffix or (high_suffix if _is_small(match.group(1)) else None))
+            high = _parse_amount(match.group(3), high_suffix)
+            if low < 100 or high < low:
+                continue
+            if _negated(text, match.start()):
+                negated = match.span()
+                continue
+
+            marked = money_context or bool(low_suffix or high_suffix)
+            ranges.append(FieldMatch((low, high), 0.95 if marked else 0.5, match.span()))
+
+        if ranges:
+            # The last range stands; a denied or competing one ("not 5-10k, more like 20-30k") needs judgement
+            best = ranges[-1]
+            if negated or len({r.value for r in ranges}) > 1:
+                best = best._replace(confidence=min(best.confidence, HEDGED_CONFIDENCE))
+            low, high = best.value
+            matches["budget_min"] = best._replace(value=low)
+            matches["budget_max"] = best._replace(value=high)
+            matches["budget_context"] = best._replace(value="has_budget_range")
+            return
+
+        for field, pattern in (("budget_max", self.budget_max), ("budget_min", self.budget_min)):
+            for match in pattern.finditer(text):
+                if _negated(text, match.start()):
+                    negated = match.span()
+                else:
+                    break
+            else:
+                match = None
+            if not match or NON_MONEY_UNITS.match(text, match.end()):
+                continue
+            amount = _parse_amount(match.group(1), match.group(2))
+            if amount >= 100:
+                confidence = 0.85 if money_context or match.group(2) else 0.5
+                if negated:
+                    confidence = min(confidence, HEDGED_CONFIDENCE)
+                matches[field] = FieldMatch(amount, confidence, match.span())
+                matches.setdefault("budget_context", FieldMatch("has_budget_range", confidence, match.span()))
+
+        if negated and "budget_min" not in matches and "budget_max" not in matches:
+            matches["budget_min"] = matches["budget_max"] = FieldMatch(None, 0.0, negated)
+
+        match = self.quotes.search(text)
+        if match:
+            matches["budget_context"] = FieldMatch("has_quotes", 0.9, match.span())
+
+    def _extract_zip(self, text: str, money_context: bool, matches: dict[str, FieldMatch]):
+        budget_spans = [m.span for field, m in matches.items() if field.startswith("budget")]
+        hinted = []
+        plain = []
+        negated = None
+        for match in self.zip_code.finditer(text):
+            if any(start <= match.start() < end for start, end in budget_spans):
+                continue
+            before = text[max(0, match.start() - 40):match.start()]
+            if MONEY_VERB_PREFIX.search(before) or STREET_SUFFIX.match(text, match.end()):
+                continue
+            if _negated(text, match.start()):
+                negated = match.span()  # "not in 78701"
+                continue
+
+            if self.zip_hint.search(text[:match.start()]) or text.strip() == match.group(0):
+                hinted.append(FieldMatch(match.group(1), 0.95, match.span()))
+            elif money_context and match.group(1).endswith("000"):
+                continue  # Round numbers near money talk are amounts, not ZIPs
+            else:
+                plain.append(FieldMatch(match.group(1), 0.85, match.span()))
+
+        # A ZIP after a state or "zip" wins; otherwise addresses end with the ZIP, so take the last
+        candidates = hinted or plain
+        if not candidates:
+            if negated:
+                matches["location_zip"] = FieldMatch(None, 0.0, negated)
+            return
+        best = candidates[-1]
+        if negated or len({m.value for m in candidates}) > 1:
+            best = best._replace(confidence=min(best.confidence, HEDGED_CONFIDENCE))
+        matches["location_zip"] = best
+
+    def _extract_urgency(self, text: str, matches: dict[str, FieldMatch]):
+        found = []
+        negated = None
+        for level, pattern, confidence in self.urgency:
+            for match in pattern.finditer(text):
+                if _negated(text, match.start()):
+                    negated = match.span()  # "not urgent", "I don't need it asap"
+                    continue
+                found.append(FieldMatch(level, confidence, match.span()))
+                break
+        if not found:
+            if negated:
+                matches["timeline_urgency"] = FieldMatch(None, 0.0, negated)
+            return
+
+        best = max(found, key=lambda m: m.confidence)
+        # Conflicting signals ("asap... but no rush") or a denied one need judgement
+        if negated or len({m.value for m in found if m.confidence >= FAST_PATH_CONFIDENCE}) > 1:
+            best = best._replace(confidence=min(best.confidence, HEDGED_CONFIDENCE))
+        matches["timeline_urgency"] = best
+
+    def _extract_date(self, text: str, matches: dict[str, FieldMatch]):
+        match = next((m for m in self.date.finditer(text) if not _negated(text, m.start())), None)
+        if match:
+            matches["timeline_start"] = FieldMatch(match.group(0).strip(), 0.85, match.span())
+
+    def _extract_project_type(self, text: str, matches: dict[str, FieldMatch]):
+        found = [(project_type, pattern.search(text)) for project_type, pattern in self.project_types]
+        found = [(project_type, match) for project_type, match in found if match]
+        if not found:
+            return
+
+        project_type, match = found[0]
+        confidence = 0.9 if len(found) == 1 else 0.6
+        matches["project_type"] = FieldMatch(project_type, confidence, match.span())
+
+
+def _negated(text: str, start: int) -> bool:
+    """True when a negator governs the match starting at start"""
+    return bool(NEGATED_PREFIX.search(text, max(0, start - 60), start))
+
+
+def _is_small(number: str) -> bool:
+    return float(number.replace(",", "")) < 1000
+
+
+def _parse_amount(number: str, suffix: str = None) -> int:
+    amount = float(number.replace(",", ""))
+    if suffix:
+        amount *= 1000
+    return int(amount)
+
+
+fast_extractor = FastExtractor()
@@ -0,0 +1,195 @@
+"""
+Image Store
+Content-addressed storage for conversation photos
+
+Uploaded `data:image/...;base64,` strings are written once (Supabase Storage
+when IMAGE_STORE_BUCKET is set, a local directory when IMAGE_STORE_DIR is set)
+and replaced in conversation state by a short reference:
+`image_ref:<sha256>.<ext>`. Image bytes are only materialized when a model
+call or a client actually needs them, through a small LRU of decoded images.
+
+With neither set, images stay inline in conversation state. A local directory
+isn't shared between instances and doesn't survive a redeploy, so it's never
+picked implicitly.
+"""
+import base64
+import hashlib
+import os
+from typing import Any, Optional
+
+from utils.session_cache import SessionCache
+
+
+IMAGE_REF_PREFIX = "image_ref:"
+
+MEDIA_TYPE_EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp"
+}
+EXTENSION_MEDIA_TYPES = {ext: media_type for media_type, ext in MEDIA_TYPE_EXTENSIONS.items()}
+
+DEFAULT_LOCAL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".image_store")
+
+
+def is_image_ref(image: str) -> bool:
+    return isinstance(image, str) and image.startswith(IMAGE_REF_PREFIX)
+
+
+class LocalImageBackend:
+    """Content-addressed files on local disk (development)"""
+
+    def __init__(self, root_dir: str = DEFAULT_LOCAL_DIR):
+        self.root_dir = root_dir
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root_dir, key[:2], key)
+
+    def put(self, key: str, data: bytes, media_type: str):
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def public_url(self, key: str) -> Optional[str]:
+        return None
+
+
+class SupabaseImageBackend:
+    """Content-addressed objects in a Supabase Storage bucket"""
+
+    def __init__(self, client: Any, bucket: str):
+        self.client = client
+        self.bucket = bucket
+
+    def put(self, key: str, data: bytes, media_type: str):
+        try:
+            self.client.storage.from_(self.bucket).upload(key, data, {"content-type": media_type})
+        except Exception as e:
+            # Same content hash means the object is already there
+            if "exists" not in str(e).lower() and "duplicate" not in str(e).lower():
+                raise
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.storage.from_(self.bucket).download(key)
+        except Exception:
+            return None
+
+    def public_url(self, key: str) -> Optional[str]:
+        # Only loads in a browser if the bucket is public; a private bucket would need signed URLs
+        return self.client.storage.from_(self.bucket).get_public_url(key)
+
+
+class ImageStore:
+    """Offloads inline images to a backend and materializes them on demand
+
+    With no backend, data URLs are left inline and references can't be resolved.
+    """
+
+    def __init__(self, backend: Optional[Any], cache_entries: int = 64, cache_bytes: int = 64 * 1024 * 1024):
+        self.backend = backend
+        # Decoded images by key: (bytes, media_type)
+        self._blobs = SessionCache(
+            "image_blobs",
+            max_entries=cache_entries,
+            ttl_seconds=600,
+            max_bytes=cache_bytes,
+            sizer=lambda blob: len(blob[0])
+        )
+
+    def offload(self, images: Optional[list[str]]) -> list[str]:
+        """Replace data URLs with references; other entries pass through"""
+        return [self.put_data_url(image) for image in images or []]
+
+    def put_data_url(self, image: str) -> str:
+        """Store a data URL once and return its reference"""
+        if self.backend is None or not isinstance(image, str) or not image.startswith("data:image/"):
+            return image
+
+        header, b64_data = image.split(",", 1)
+        media_type = header.split(":")[1].split(";")[0]
+        data = base64.b64decode(b64_data)
+        key = f"{hashlib.sha256(data).hexdigest()}.{MEDIA_TYPE_EXTENSIONS.get(media_type, 'jpg')}"
+
+        if key not in self._blobs:
+            self.backend.put(key, data, media_type)
+            self._blobs[key] = (data, media_type)
+        return IMAGE_REF_PREFIX + key
+
+    def get(self, ref: str) -> Optional[tuple[bytes, str]]:
+        """Bytes and media type for a reference, or None if it can't be found"""
+        key = ref[len(IMAGE_REF_PREFIX):]
+        blob = self._blobs.get(key)
+        if blob is not None or self.backend is None:
+            return blob
+
+        data = self.backend.get(key)
+        if data is None:
+            return None
+        blob = (data, EXTENSION_MEDIA_TYPES.get(key.rsplit(".", 1)[-1], "image/jpeg"))
+        self._blobs[key] = blob
+        return blob
+
+    def to_claude_block(self, image: str) -> Optional[dict[str, Any]]:
+        """Anthropic image content block for a reference or data URL"""
+        if is_image_ref(image):
+            blob = self.get(image)
+            if blob is None:
+                return None
+            media_type, b64_data = blob[1], base64.b64encode(blob[0]).decode("ascii")
+        elif isinstance(image, str) and image.startswith("data:image/"):
+            header, b64_data = image.split(",", 1)
+            media_type = header.split(":")[1].split(";")[0]
+        else:
+            return None
+
+        return {
+            "type": "image",
+            "source": {"type": "base64", "media_type": media_type, "data": b64_data}
+        }
+
+    def display_url(self, image: str) -> str:
+        """Something a browser can show: a public URL, or a data URL in dev"""
+        if not is_image_ref(image):
+            return image
+
+        public_url = self.backend.public_url(image[len(IMAGE_REF_PREFIX):]) if self.backend else None
+        if public_url:
+            return public_url
+        blob = self.get(image)
+        if blob is None:
+            return image
+        return f"data:{blob[1]};base64,{base64.b64encode(blob[0]).decode('ascii')}"
+
+
+_image_store: Optional[ImageStore] = None
+
+
+def get_image_store(supabase_client: Any = None) -> ImageStore:
+    """Process-wide image store: IMAGE_STORE_BUCKET, then IMAGE_STORE_DIR, else images stay inline"""
+    global _image_store
+    if _image_store is None:
+        bucket = os.getenv("IMAGE_STORE_BUCKET")
+        local_dir = os.getenv("IMAGE_STORE_DIR")
+        if bucket and supabase_client is not None:
+            backend = SupabaseImageBackend(supabase_client, bucket)
+        elif local_dir:
+            backend = LocalImageBackend(local_dir)
+        else:
+            print("[ImageStore] IMAGE_STORE_BUCKET not set, keeping conversation images inline")
+            backend = None
+        _image_store = ImageStore(backend)
+    return _image_store
@@ -1,14 +1,47 @@
 """
 Dynamic Open Graph Image Generator for Bid Cards
 Creates rich preview images for social media sharing
+
+Fonts and the static background (gradient, branding, decorative circles) are
+prepared once per process; each render copies the background and draws only
+the bid card's own fields. Rendered PNGs are cached in memory, on disk and
+optionally in Supabase Storage, keyed by a hash of the displayed fields, so a
+shared link is rendered once no matter how many crawlers fetch it.
 """
+import asyncio
 import base64
+import hashlib
 import io
+import json
+import os
+import tempfile
 import textwrap
-from typing import Any
+from functools import lru_cache
+from typing import Any, Optional
 
 from PIL import Image, ImageDraw, ImageFont
 
+from utils.session_cache import SessionCache
+
+
+# Bump when the layout changes so cached images are re-rendered
+OG_IMAGE_RENDER_VERSION = 1
+OG_IMAGE_CACHE_DIR = os.getenv("OG_IMAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "instabids-og-images"))
+OG_IMAGE_BUCKET = os.getenv("OG_IMAGE_BUCKET")  # Supabase Storage bucket, optional
+
+
+@lru_cache(maxsize=None)
+def _load_font(name: str, size: int):
+    """TrueType font, or Pillow's default when it isn't installed (looked up once per size)"""
+    try:
+        return ImageFont.truetype(name, size)
+    except OSError:
+        return None
+
+
+def _font_or_default(name: str, size: int):
+    return _load_font(name, size) or ImageFont.load_default()
+
 
 class OGImageGenerator:
     def __init__(self):
@@ -18,35 +51,30 @@ class OGImageGenerator:
         self.text_color = (255, 255, 255)
         self.accent_color = (118, 75, 162)
 
-        # Try to load fonts, fallback to default if not available
-        try:
-            self.title_font = ImageFont.truetype("arial.ttf", 48)
-            self.subtitle_font = ImageFont.truetype("arial.ttf", 32)
-            self.detail_font = ImageFont.truetype("arial.ttf", 24)
-        except:
-            # Fallback to default font
-            self.title_font = ImageFont.load_default()
-            self.subtitle_font = ImageFont.load_default()
-            self.detail_font = ImageFont.load_default()
+        # Fallback to default font if arial isn't available
+        self.title_font = _font_or_default("arial.ttf", 48)
+        self.subtitle_font = _font_or_default("arial.ttf", 32)
+        self.detail_font = _font_or_default("arial.ttf", 24)
+        self.icon_font = _load_font("seguiemj.ttf", 80)  # Emoji font
+
+        self._background: Optional[Image.Image] = None
 
     def generate_bid_card_image(self, bid_card_data: dict[str, Any]) -> str:
         """
         Generate Open Graph image for bid card
         Returns base64 encoded PNG image
         """
-        # Create image with gradient background
-        image = Image.new("RGB", (self.width, self.height), self.bg_color)
-        draw = ImageDraw.Draw(image)
+        return base64.b64encode(self.render_png(bid_card_data)).decode()
 
-        # Create gradient background
-        self._draw_gradient_background(draw)
+    def render_png(self, bid_card_data: dict[str, Any]) -> bytes:
+        """Generate Open Graph image for bid card as PNG bytes"""
+        fields = og_image_fields(bid_card_data)
 
-        # Add Instabids branding
-        self._draw_branding(draw)
+        image = self._static_background().copy()
+        draw = ImageDraw.Draw(image)
 
-        # Add project type and location
-        project_type = bid_card_data.get("project_type", "Home Project").replace("_", " ").title()
-        location = self._format_location(bid_card_data.get("location", {}))
+        project_type = fields["project_type"]
+        location = fields["location"]
 
         # Main title
         title_y = 180
@@ -58,31 +86,36 @@ class OGImageGenerator:
             self._draw_centered_text(draw, location, subtitle_y, self.subtitle_font, self.text_color, opacity=200)
 
         # Budget and timeline boxes
-        budget = bid_card_data.get("budget_display", "Budget TBD")
-        timeline = bid_card_data.get("timeline", "Timeline TBD")
+        self._draw_info_boxes(draw, fields["budget"], fields["timeline"])
 
-        self._draw_info_boxes(draw, budget, timeline)
+        # Project type icon
+        self._draw_project_icon(draw, project_type)
 
-        # Add decorative elements
-        self._draw_decorative_elements(draw, project_type)
-
-        # Convert to base64
         buffer = io.BytesIO()
         image.save(buffer, format="PNG", quality=95)
-        buffer.seek(0)
-
-        return base64.b64encode(buffer.getvalue()).decode()
-
-    def _draw_gradient_background(self, draw):
-        """Draw gradient background"""
+        return buffer.getvalue()
+
+    def _static_background(self) -> Image.Image:
+        """Gradient, branding and decorative circles shared by every image"""
+        if self._background is None:
+            image = self._gradient_background()
+            draw = ImageDraw.Draw(image)
+            self._draw_branding(draw)
+            self._draw_decorative_circles(draw)
+            self._background = image
+        return self._background
+
+    def _gradient_background(self) -> Image.Image:
+        """Vertical brand gradient: one pixel column stretched to full width"""
+        column = Image.new("RGB", (1, self.height))
+        colors = []
         for y in range(self.height):
-            # Calculate gradient color
             ratio = y / self.height
-            r = int(self.bg_color[0] + (self.accent_color[0] - self.bg_color[0]) * ratio)
-            g = int(self.bg_color[1] + (self.accent_color[1] - self.bg_color[1]) * ratio)
-            b = int(self.bg_color[2] + (self.accent_color[2] - self.bg_color[2]) * ratio)
-
-            draw.line([(0, y), (self.width, y)], fill=(r, g, b))
+            colors.append(tuple(
+                int(start + (end - start) * ratio) for start, end in zip(self.bg_color, self.accent_color, strict=True)
+            ))
+        column.putdata(colors)
+        return column.resize((self.width, self.height), Image.NEAREST)
 
     def _draw_branding(self, draw):
         """Draw Instabids branding"""
@@ -180,9 +213,8 @@ class OGImageGenerator:
             value_x = x + (width - value_width) // 2
             draw.text((value_x, value_y), value, font=self.detail_font, fill=self.text_color)
 
-    def _draw_decorative_elements(self, draw, project_type):
-        """Add decorative elements based on project type"""
-        # Add some subtle decorative circles
+    def _draw_decorative_circles(self, draw):
+        """Add subtle decorative circles"""
         circle_color = (255, 255, 255, 20)
 
         # Top right decorative circles
@@ -193,7 +225,8 @@ class OGImageGenerator:
         draw.ellipse([50, self.height - 150, 150, self.height - 50], fill=circle_color)
         draw.ellipse([20, self.height - 180, 100, self.height - 100], fill=circle_color)
 
-        # Project type icon in bottom right
+    def _draw_project_icon(self, draw, project_type):
+        """Project type icon in bottom right"""
         icon_map = {
             "kitchen": "🏠",
             "bathroom": "🚿",
@@ -214,16 +247,16 @@ class OGImageGenerator:
                 break
 
         # Draw large icon in bottom right (if font supports it)
-        try:
-            icon_font = ImageFont.truetype("seguiemj.ttf", 80)  # Emoji font
+        if self.icon_font is not None:
             draw.text((self.width - 150, self.height - 150), icon,
-                     font=icon_font, fill=(255, 255, 255, 100))
-        except:
+                     font=self.icon_font, fill=(255, 255, 255, 100))
+        else:
             # Fallback: draw a simple geometric shape
             draw.ellipse([self.width - 140, self.height - 140, self.width - 60, self.height - 60],
                         fill=(255, 255, 255, 50))
 
-    def _format_location(self, location):
+    @staticmethod
+    def _format_location(location):
         """Format location string"""
         if not location:
             return ""
@@ -246,9 +279,121 @@ class OGImageGenerator:
         with open(filename, "wb") as f:
             f.write(image_data)
 
+def og_image_fields(bid_card_data: dict[str, Any]) -> dict[str, str]:
+    """The bid card fields an OG image displays"""
+    return {
+        "project_type": (bid_card_data.get("project_type") or "Home Project").replace("_", " ").title(),
+        "location": OGImageGenerator._format_location(bid_card_data.get("location", {})),
+        "budget": bid_card_data.get("budget_display", "Budget TBD"),
+        "timeline": bid_card_data.get("timeline", "Timeline TBD")
+    }
+
+
+def og_image_key(bid_card_data: dict[str, Any]) -> str:
+    """Content hash of the displayed fields; identical cards share one image"""
+    payload = json.dumps({"v": OG_IMAGE_RENDER_VERSION, **og_image_fields(bid_card_data)}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class OGImageCache:
+    """Rendered PNGs by content key: memory, then disk, then object storage"""
+
+    def __init__(self, directory: str = OG_IMAGE_CACHE_DIR, supabase: Any = None, bucket: Optional[str] = OG_IMAGE_BUCKET):
+        self.directory = directory
+        self.supabase = supabase
+        self.bucket = bucket
+        self._memory = SessionCache("og_images", max_entries=500, ttl_seconds=24 * 3600, max_bytes=64 * 1024 * 1024)
+        self._rendering: dict[str, asyncio.Future] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.png")
+
+    def get(self, key: str) -> Optional[bytes]:
+        png = self._memory.get(key)
+        if png is not None:
+            return png
+
+        try:
+            with open(self._path(key), "rb") as f:
+                png = f.read()
+        except OSError:
+            png = self._download(key)
+            if png is not None:
+                self._write_file(key, png)
+
+        if png is not None:
+            self._memory[key] = png
+        return png
+
+    def put(self, key: str, png: bytes):
+        self._memory[key] = png
+        self._write_file(key, png)
+        if self.supabase is not None and self.bucket:
+            try:
+                self.supabase.storage.from_(self.bucket).upload(
+                    path=f"og-images/{key}.png",
+                    file=png,
+                    file_options={"content-type": "image/png", "upsert": "true"}
+                )
+            except Exception as e:
+                print(f"[OGImageCache] Could not upload {key}: {e}")
+
+    def _write_file(self, key: str, png: bytes):
+        # Write-then-rename so concurrent readers never see a partial file
+        tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(png)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"[OGImageCache] Could not write {key} to disk: {e}")
+
+    def _download(self, key: str) -> Optional[bytes]:
+        if self.supabase is None or not self.bucket:
+            return None
+        try:
+            return self.supabase.storage.from_(self.bucket).download(f"og-images/{key}.png")
+        except Exception:
+            return None
+
+    async def get_or_render(self, key: str, bid_card_data: dict[str, Any]) -> bytes:
+        """Cached PNG for key, rendering it in a worker thread (once) on a miss"""
+        png = await asyncio.to_thread(self.get, key)
+        if png is not None:
+            return png
+
+        pending = self._rendering.get(key)
+        if pending is not None:
+            return await pending
+
+        future = asyncio.get_running_loop().create_future()
+        self._rendering[key] = future
+        try:
+            png = await asyncio.to_thread(og_generator.render_png, bid_card_data)
+            await asyncio.to_thread(self.put, key, png)
+            future.set_result(png)
+            return png
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._rendering.pop(key, None)
+
+
 # Initialize global generator
 og_generator = OGImageGenerator()
 
+_og_image_cache: Optional[OGImageCache] = None
+
+
+def get_og_image_cache(supabase: Any = None) -> OGImageCache:
+    global _og_image_cache
+    if _og_image_cache is None:
+        _og_image_cache = OGImageCache(supabase=supabase)
+    return _og_image_cache
+
+
 def generate_og_image_for_bid_card(bid_card_data: dict[str, Any]) -> str:
     """
     Generate Open Graph image for bid card
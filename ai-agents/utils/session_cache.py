@@ -0,0 +1,217 @@
+"""
+Bounded Session Cache
+LRU + TTL cache for in-memory agent session state with a memory budget
+
+Used by the CIA (homeowner sessions) and CoIA (contractor sessions) so that
+long-running servers don't keep every conversation, including inline photo
+payloads, in memory forever. Evicted sessions are reloaded transparently from
+persisted state through an optional async loader.
+"""
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterator
+from typing import Any, Optional
+
+
+# All caches created in this process, by name, for monitoring
+_registry: dict[str, "SessionCache"] = {}
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Roughly estimate the in-memory payload size of a session state in bytes
+
+    Counts string/bytes lengths (which dominate: messages and base64 images)
+    and a small constant per container entry. Dataclass-style objects are
+    walked through their __dict__.
+    """
+    if _depth > 20:
+        return 0
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(16 + estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sum(8 + estimate_size(v, _depth + 1) for v in value)
+    if hasattr(value, "__dict__"):
+        return estimate_size(vars(value), _depth + 1)
+    return 8
+
+
+class SessionCache:
+    """
+    Dict-like session store with LRU + TTL eviction and a memory budget
+
+    Supports `in`, `[]`, `[]=`, `del`, `get`, `pop`, `keys`, `items` and `len` so it can
+    replace a plain dict. `aget` additionally reloads misses through the
+    loader when one is configured.
+    """
+
+    def __init__(self,
+                 name: str,
+                 max_entries: int = 1000,
+                 ttl_seconds: float = 3600,
+                 max_bytes: int = 256 * 1024 * 1024,
+                 loader: Optional[Callable[[str], Awaitable[Optional[Any]]]] = None,
+                 sizer: Callable[[Any], int] = estimate_size):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self.sizer = sizer
+
+        # key -> (value, size_bytes, last_access)
+        self._entries: OrderedDict[str, tuple[Any, int, float]] = OrderedDict()
+        self._bytes = 0
+        # Callers may touch the cache from worker threads (asyncio.to_thread)
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        _registry[name] = self
+
+    # === Mapping interface ===
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)  # type: ignore[arg-type]
+            if entry is None:
+                return False
+            if self._is_expired(entry):
+                self._remove(key, expired=True)  # type: ignore[arg-type]
+                return False
+            return True
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None and key not in self._entries:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        self.set(key, value)
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            if key not in self._entries:
+                raise KeyError(key)
+            self._remove(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def keys(self) -> list[str]:
+        return list(self._entries)
+
+    def items(self) -> list[tuple[str, Any]]:
+        with self._lock:
+            return [(key, entry[0]) for key, entry in self._entries.items()]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a cached value, refreshing its LRU position"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._is_expired(entry):
+                if entry is not None:
+                    self._remove(key, expired=True)
+                self.misses += 1
+                return default
+
+            value, size, _ = entry
+            self._entries[key] = (value, size, time.monotonic())
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            self._remove(key)
+            return entry[0]
+
+    def set(self, key: str, value: Any):
+        """Store a value and evict least recently used entries over budget"""
+        size = self.sizer(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            self._evict()
+
+    # === Async loading ===
+
+    async def aget(self, key: str) -> Any:
+        """Get a value, reloading it through the loader on a miss"""
+        value = self.get(key)
+        if value is not None or not self.loader:
+            return value
+
+        value = await self.loader(key)
+        if value is not None:
+            self.loads += 1
+            self.set(key, value)
+        return value
+
+    # === Maintenance and metrics ===
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry, returning how many were removed"""
+        with self._lock:
+            expired = [k for k, entry in self._entries.items() if self._is_expired(entry)]
+            for key in expired:
+                self._remove(key, expired=True)
+            return len(expired)
+
+    def stats(self) -> dict[str, Any]:
+        """Size and hit-rate metrics for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+    def _is_expired(self, entry: tuple[Any, int, float]) -> bool:
+        return self.ttl_seconds > 0 and time.monotonic() - entry[2] > self.ttl_seconds
+
+    def _remove(self, key: str, expired: bool = False):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        if expired:
+            self.expirations += 1
+
+    def _evict(self):
+        # Always keep the most recent entry, even if it alone exceeds the budget
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+
+def get_session_cache_stats() -> list[dict[str, Any]]:
+    """Metrics for every session cache in this process"""
+    return [cache.stats() for cache in _registry.values()]